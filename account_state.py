@@ -0,0 +1,195 @@
+"""
+账户状态快照
+风控开仓检查需要的余额、持仓数、当日盈亏都保存在本地快照中：余额由行情总线上的
+周期任务刷新（成交/平仓后标记为待刷新，下个周期优先拉取），持仓数与当日盈亏由
+开平仓记录直接更新。can_open_trade 只读快照，不再为每次开仓请求交易所余额
+"""
+
+import logging
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+from market_data_bus import TOPIC_BALANCE
+
+logger = logging.getLogger(__name__)
+
+BALANCE_REFRESH_TICK = 5.0       # 余额刷新任务的执行间隔（秒），待刷新的账户最迟在一个周期内更新
+BALANCE_REFRESH_INTERVAL = 60.0  # 无成交时每个账户余额的刷新间隔（秒）
+BALANCE_CURRENCY = 'USDT'
+
+
+class AccountState:
+    """单个账户的状态快照"""
+
+    __slots__ = ('balance', 'balance_at', 'open_positions', 'daily_pnl', 'pnl_date', 'dirty')
+
+    def __init__(self):
+        self.balance: Optional[float] = None   # 可用余额（None 为尚未获取）
+        self.balance_at = 0.0                  # 余额更新时间（单调时钟）
+        self.open_positions = 0
+        self.daily_pnl = 0.0
+        self.pnl_date = date.today()
+        self.dirty = True                      # 余额待刷新
+
+    def roll_day(self, today: date) -> bool:
+        """跨日时清零当日盈亏，返回是否发生了重置"""
+        if self.pnl_date < today:
+            self.daily_pnl = 0.0
+            self.pnl_date = today
+            return True
+        return False
+
+
+class AccountStateStore:
+    """所有账户的状态快照（线程安全，只在内存中读写）"""
+
+    def __init__(self):
+        self._states: Dict[str, AccountState] = {}
+        self._lock = threading.Lock()
+        self._attached = set()  # 已订阅余额更新的行情总线 id
+
+    def _state(self, account_name: str) -> AccountState:
+        state = self._states.get(account_name)
+        if state is None:
+            state = self._states[account_name] = AccountState()
+        return state
+
+    # ---------- 余额 ----------
+
+    def get_balance(self, account_name: str) -> Optional[float]:
+        with self._lock:
+            state = self._states.get(account_name)
+            return state.balance if state is not None else None
+
+    def set_balance(self, account_name: str, balance: Optional[float]):
+        if balance is None:
+            return
+        with self._lock:
+            state = self._state(account_name)
+            state.balance = float(balance)
+            state.balance_at = time.monotonic()
+            state.dirty = False
+
+    def mark_dirty(self, account_name: str):
+        """标记余额待刷新（下单成交、平仓后调用）"""
+        with self._lock:
+            self._state(account_name).dirty = True
+
+    def balances_due(self, accounts, now: Optional[float] = None,
+                     max_age: float = BALANCE_REFRESH_INTERVAL):
+        """需要刷新余额的账户：待刷新或超过 max_age 未更新"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = []
+            for account_name in accounts:
+                state = self._state(account_name)
+                if state.dirty or now - state.balance_at >= max_age:
+                    due.append(account_name)
+            return due
+
+    # ---------- 持仓数与当日盈亏 ----------
+
+    def open_positions(self, account_name: str) -> int:
+        with self._lock:
+            state = self._states.get(account_name)
+            return state.open_positions if state is not None else 0
+
+    def position_opened(self, account_name: str):
+        with self._lock:
+            self._state(account_name).open_positions += 1
+
+    def position_closed(self, account_name: str, pnl: float = 0.0):
+        """平仓：持仓数减一、累计当日盈亏，并标记余额待刷新"""
+        with self._lock:
+            state = self._state(account_name)
+            state.roll_day(date.today())
+            state.open_positions = max(0, state.open_positions - 1)
+            state.daily_pnl += pnl
+            state.dirty = True
+
+    def daily_pnl(self, account_name: str) -> float:
+        with self._lock:
+            state = self._states.get(account_name)
+            if state is None:
+                return 0.0
+            state.roll_day(date.today())
+            return state.daily_pnl
+
+    def reset(self, account_name: str):
+        """清零持仓数与当日盈亏（保留余额）"""
+        with self._lock:
+            state = self._state(account_name)
+            state.open_positions = 0
+            state.daily_pnl = 0.0
+            state.pnl_date = date.today()
+
+    def restore(self, account_name: str, open_positions: int, daily_pnl: float, pnl_date: date):
+        """从检查点恢复持仓数与当日盈亏（检查点不是今天的则当日盈亏清零）"""
+        with self._lock:
+            state = self._state(account_name)
+            state.open_positions = max(0, int(open_positions))
+            state.daily_pnl = float(daily_pnl)
+            state.pnl_date = pnl_date
+            state.roll_day(date.today())
+
+    def snapshot(self, account_name: str) -> Dict:
+        with self._lock:
+            state = self._states.get(account_name) or AccountState()
+            state.roll_day(date.today())
+            return {
+                'balance': state.balance,
+                'balance_age': time.monotonic() - state.balance_at if state.balance is not None else None,
+                'open_positions': state.open_positions,
+                'daily_pnl': state.daily_pnl,
+                'pnl_date': state.pnl_date,
+            }
+
+    # ---------- 与行情总线对接 ----------
+
+    def attach(self, bus):
+        """订阅总线上的余额更新（任何组件经总线读取余额都会同步到快照）"""
+        with self._lock:
+            if id(bus) in self._attached:
+                return
+            self._attached.add(id(bus))
+
+        def on_balance(key, value):
+            account_name, currency = key
+            if currency == BALANCE_CURRENCY:
+                self.set_balance(account_name, value)
+
+        bus.subscribe(TOPIC_BALANCE, on_balance)
+
+    def refresh_balances(self, bus, now: Optional[float] = None) -> int:
+        """经总线刷新到期账户的余额，返回实际刷新的账户数"""
+        accounts = list(getattr(bus.exchange, 'clients', {}).keys())
+        refreshed = 0
+        for account_name in self.balances_due(accounts, now):
+            try:
+                balance = bus.get_balance(account_name, BALANCE_CURRENCY, max_age=0.0)
+            except Exception as e:
+                logger.debug(f"刷新 {account_name} 余额失败: {e}")
+                continue
+            if balance is not None:
+                # 总线已推送给订阅者；未订阅时直接写入
+                self.set_balance(account_name, balance)
+                refreshed += 1
+        return refreshed
+
+
+# 全局账户状态快照
+account_states = AccountStateStore()
+
+
+def start_account_state_refresh(bus, store: Optional[AccountStateStore] = None) -> bool:
+    """
+    在行情总线上登记余额刷新任务；GUI 与机器人都会调用，同一进程内只登记一次
+
+    Returns:
+        bool: 是否为新登记
+    """
+    store = account_states if store is None else store
+    store.attach(bus)
+    return bus.register_job('account_state', lambda: store.refresh_balances(bus), BALANCE_REFRESH_TICK)
@@ -0,0 +1,190 @@
+"""
+持仓监控基准
+在数千个持仓上对比单次价格更新的评估开销：
+  - 字典持仓：逐键 .get() 取值、每次 float() 转换并按方向现算保本价/追踪止损（旧实现的写法，作为对照）
+  - PositionRecord：读 __slots__ 属性，保本触发价与追踪系数已预先算好
+  - PositionManager.monitor_positions 整轮耗时（触发价索引 + 持仓记录），及开启向量化评估
+    （按交易对每轮只取一次价格、整列比较）后的对比
+另输出单个持仓的内存占用对比
+
+用法:
+    python bench_position_manager.py [--positions 5000] [--ticks 50] [--symbols 50]
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+
+from order_manager import PositionManager
+from position_record import PositionRecord
+from position_state import PositionStateStore
+
+
+def make_positions(count: int, symbols: int, seed: int = 7):
+    """生成 [(account_name, symbol, 字典持仓)]，多空各半，带止损/保本/追踪配置"""
+    rng = random.Random(seed)
+    positions = []
+    for i in range(count):
+        side = 'buy' if i % 2 == 0 else 'sell'
+        entry = 100.0 * (1 + rng.uniform(-0.05, 0.05))
+        sl_gap = rng.uniform(0.01, 0.3)
+        positions.append((f"acc{i // symbols}", f"SYM{i % symbols}/USDT", {
+            'side': side,
+            'entry_price': entry,
+            'position_size': rng.uniform(0.1, 5.0),
+            'stop_loss': entry * (1 - sl_gap) if side == 'buy' else entry * (1 + sl_gap),
+            'trailing_stop_pct': rng.choice([None, 2.0, 4.0]),
+            'move_sl_to_breakeven': True,
+            'breakeven_trigger_pct': 1.0,
+            'highest_price': entry if side == 'buy' else None,
+            'lowest_price': entry if side == 'sell' else None,
+            'sl_moved_to_breakeven': False,
+            'trailing_min_step_pct': 0.2,
+            'leverage': 5,
+            'state': 'protected',
+        }))
+    return positions
+
+
+def evaluate_dict(position: dict, price: float) -> int:
+    """旧写法：逐键 .get()、float() 转换、按方向现算"""
+    hits = 0
+    stop_loss = float(position.get('stop_loss') or 0.0)
+    entry = float(position.get('entry_price') or 0.0)
+    if position.get('side') == 'buy':
+        if stop_loss and price <= stop_loss:
+            hits += 1
+        if position.get('move_sl_to_breakeven') and not position.get('sl_moved_to_breakeven'):
+            if price >= entry * (1 + float(position.get('breakeven_trigger_pct', 1.0) or 0.0) / 100.0):
+                hits += 1
+        pct = position.get('trailing_stop_pct')
+        if pct:
+            highest = float(position.get('highest_price') or entry)
+            if price > highest and highest * (1 - float(pct) / 100.0) > stop_loss:
+                hits += 1
+    else:
+        if stop_loss and price >= stop_loss:
+            hits += 1
+        if position.get('move_sl_to_breakeven') and not position.get('sl_moved_to_breakeven'):
+            if price <= entry * (1 - float(position.get('breakeven_trigger_pct', 1.0) or 0.0) / 100.0):
+                hits += 1
+        pct = position.get('trailing_stop_pct')
+        if pct:
+            lowest = float(position.get('lowest_price') or entry)
+            if price < lowest and lowest * (1 + float(pct) / 100.0) < stop_loss:
+                hits += 1
+    return hits
+
+
+def evaluate_record(position: PositionRecord, price: float) -> int:
+    """新写法：属性读取，保本价与追踪系数预先算好"""
+    hits = 0
+    stop_loss = position.stop_loss
+    if position.is_long:
+        if stop_loss and price <= stop_loss:
+            hits += 1
+        if position.move_sl_to_breakeven and not position.sl_moved_to_breakeven and price >= position.breakeven_price:
+            hits += 1
+        factor = position.trailing_factor
+        if factor is not None:
+            highest = position.extreme_price()
+            if price > highest and highest * factor > stop_loss:
+                hits += 1
+    else:
+        if stop_loss and price >= stop_loss:
+            hits += 1
+        if position.move_sl_to_breakeven and not position.sl_moved_to_breakeven and price <= position.breakeven_price:
+            hits += 1
+        factor = position.trailing_factor
+        if factor is not None:
+            lowest = position.extreme_price()
+            if price < lowest and lowest * factor < stop_loss:
+                hits += 1
+    return hits
+
+
+def _time(func, ticks: int) -> float:
+    start = time.perf_counter()
+    for tick in range(ticks):
+        func(tick)
+    return (time.perf_counter() - start) / ticks
+
+
+class _Account:
+    exchange_type = 'binance'
+    testnet = False
+
+
+class _Prices:
+    """按交易对返回随机游走价格的交易所替身（所有账户同一交易所）"""
+
+    def __init__(self, symbols: int):
+        self.clients = {}
+        self.accounts = {}
+        self.prices = {f"SYM{i}/USDT": 100.0 for i in range(symbols)}
+        self.fetches = 0
+
+    def get_current_price(self, account_name, symbol):
+        self.fetches += 1
+        return self.prices[symbol]
+
+    def close_position(self, account_name, symbol):
+        return True
+
+
+def run(count: int, ticks: int, symbols: int):
+    positions = make_positions(count, symbols)
+    dicts = [p for _, _, p in positions]
+    records = [PositionRecord.from_dict(p) for p in dicts]
+    rng = random.Random(11)
+    price_path = [100.0 * (1 + rng.uniform(-0.02, 0.02)) for _ in range(ticks)]
+
+    print("=" * 60)
+    print(f"持仓数: {count}  交易对: {symbols}  价格更新: {ticks}")
+    print("=" * 60)
+
+    dict_tick = _time(lambda t: sum(evaluate_dict(p, price_path[t]) for p in dicts), ticks)
+    record_tick = _time(lambda t: sum(evaluate_record(p, price_path[t]) for p in records), ticks)
+    assert all(evaluate_dict(d, 101.0) == evaluate_record(r, 101.0) for d, r in zip(dicts, records))
+    print(f"字典持仓逐个评估:   {dict_tick * 1000:8.3f} ms/次  ({dict_tick / count * 1e9:6.0f} ns/持仓)")
+    print(f"持仓记录逐个评估:   {record_tick * 1000:8.3f} ms/次  ({record_tick / count * 1e9:6.0f} ns/持仓)"
+          f"  加速 {dict_tick / record_tick:.2f}x")
+
+    for vectorized in (False, True):
+        exchange = _Prices(symbols)
+        pm = PositionManager(exchange, state_store=PositionStateStore(), vectorized=vectorized)
+        for account_name, symbol, info in positions:
+            exchange.clients[account_name] = object()
+            exchange.accounts[account_name] = _Account()
+            pm._save_position_info(account_name, symbol, dict(info))
+
+        def tick(t):
+            for i, symbol in enumerate(exchange.prices):
+                exchange.prices[symbol] = price_path[(t + i) % ticks]
+            pm.monitor_positions()
+
+        monitor_tick = _time(tick, ticks)
+        label = "monitor_positions(向量化)" if vectorized else "monitor_positions"
+        print(f"{label}: {monitor_tick * 1000:8.3f} ms/轮  取价 {exchange.fetches // ticks} 次/轮  "
+              f"触发处理 {pm.evaluations} 次")
+
+    dict_size = sys.getsizeof(dicts[0])
+    record_size = sys.getsizeof(records[0]) + sys.getsizeof(records[0].extra)
+    print(f"单个持仓内存（不含值对象）: 字典 {dict_size} B / 记录 {record_size} B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="持仓监控基准")
+    parser.add_argument('--positions', type=int, default=5000)
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--symbols', type=int, default=50)
+    args = parser.parse_args()
+    # 基准时关闭监控日志，只测评估本身
+    logging.disable(logging.CRITICAL)
+    run(args.positions, args.ticks, args.symbols)
+
+
+if __name__ == "__main__":
+    main()
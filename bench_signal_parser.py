@@ -0,0 +1,314 @@
+"""
+信号解析基准套件
+基于带标注的消息语料（signal_corpus.json：开仓/止盈提示/平仓/战绩统计/推广/闲聊）给出：
+  - 吞吐：类型检测、字段提取、parse()/analyze()、群组模板、parse_many()（可选进程池）的耗时与条/秒
+  - 单项开销：各关键词组/正则格式在语料上的平均耗时
+  - 准确性：对照标注统计误报（FP）、漏报（FN）、类型/币种错误与字段错误
+  - 新旧实现对照：逐个关键词 `in` / 逐个格式扫描 与 单遍匹配的结果一致性和耗时
+解析器改动可同时从速度与准确性两方面评估
+
+用法:
+    python bench_signal_parser.py [--rounds 200] [--corpus signal_corpus.json]
+                                  [--export result.json] [--workers 4] [--archive-size 20000]
+    --export 为 Telegram Desktop 导出的群聊记录（JSON），用于 parse_many 吞吐测试
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import signal_parser
+from keyword_matcher import KeywordMatcher
+from signal_parser import SignalParser, SignalType, ENTRY_KEYWORDS, STOP_LOSS_KEYWORDS
+from signal_templates import SignalTemplateRegistry
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signal_corpus.json')
+EXAMPLE_TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signal_templates.example.json')
+
+
+def load_corpus(path: str = DEFAULT_CORPUS) -> list:
+    """加载带标注的语料：[{"text": ..., "expected": null 或 {"type", "symbol", "entry", "sl", "tp", "leverage"}}]"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_telegram_export(path: str) -> list:
+    """
+    读取 Telegram Desktop 导出的 JSON 聊天记录，返回消息文本列表
+
+    text 字段可能是字符串，也可能是由字符串与 {"type": ..., "text": ...} 片段组成的列表
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    texts = []
+    for msg in data.get('messages', []):
+        if msg.get('type') != 'message':
+            continue
+        text = msg.get('text')
+        if isinstance(text, list):
+            text = ''.join(part if isinstance(part, str) else str(part.get('text', '')) for part in text)
+        if text:
+            texts.append(text)
+    return texts
+
+
+# 语料文本（供其他脚本直接引用）
+CORPUS = [item['text'] for item in load_corpus()]
+
+
+def naive_detect(message: str) -> SignalType:
+    """旧版实现：每组关键词逐个 `in` 判断、正则每次现编译（作为对照）"""
+    if any(kw in message for kw in SignalParser.REVIEW_KEYWORDS):
+        return SignalType.UNKNOWN
+    if sum(1 for kw in SignalParser.EXCLUDE_KEYWORDS if kw in message) >= 2:
+        return SignalType.UNKNOWN
+    for keyword in SignalParser.BUY_KEYWORDS:
+        if keyword in message:
+            return SignalType.LONG
+    for keyword in SignalParser.SELL_KEYWORDS:
+        if keyword in message:
+            return SignalType.SHORT
+    for keyword in SignalParser.CLOSE_KEYWORDS:
+        if keyword in message:
+            return SignalType.CLOSE
+    tp_price_patterns = [
+        r'(?:第[一二三四五六七八九十1-9]\s*止盈|tp\s*\d*|目标)\s*[:：\s]+(\d+\.?\d*)',
+        r'(?:止盈|目标)\s*[:：\s]+(\d+\.?\d*)'
+    ]
+    for pat in tp_price_patterns:
+        if re.search(pat, message, re.IGNORECASE):
+            return SignalType.CLOSE
+    if any(k in message for k in SignalParser.TRIGGER_ONLY_KEYWORDS):
+        return SignalType.UNKNOWN
+    return SignalType.UNKNOWN
+
+
+def naive_fields(message: str):
+    """旧版字段提取：每个格式单独 re.search/finditer 扫描全文（作为对照）"""
+    def price(keywords):
+        for keyword in keywords:
+            match = re.search(rf'{keyword}[:\s]*(\d+\.?\d*)', message, re.IGNORECASE)
+            if match:
+                return float(match.group(1))
+        return None
+    tp_list = []
+    for _, pattern in signal_parser._TAKE_PROFIT_PATTERNS:
+        for match in re.finditer(pattern, message, re.IGNORECASE):
+            value = float(match.groups()[-1])
+            if value > 0 and value not in tp_list:
+                tp_list.append(value)
+    leverage = None
+    for pattern in signal_parser._LEVERAGE_PATTERNS:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            leverage = int(match.group(1))
+            break
+    return price(ENTRY_KEYWORDS), price(STOP_LOSS_KEYWORDS), sorted(tp_list), leverage
+
+
+def _timeit(func, messages, rounds: int) -> float:
+    """返回每条消息的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for msg in messages:
+            func(msg)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(messages)) * 1e6
+
+
+def check_consistency(texts: list) -> list:
+    """新旧实现结果对照，返回不一致的消息"""
+    mismatches = [m for m in texts if naive_detect(m.lower()) != SignalParser._detect_signal_type(m.lower())]
+    for m in texts:
+        a = SignalParser.analyze(m)
+        if naive_fields(m) != (a.entry_price, a.stop_loss, list(a.take_profit), a.leverage):
+            mismatches.append(m)
+    return mismatches
+
+
+def bench_throughput(texts: list, rounds: int):
+    """单条解析吞吐"""
+    lowered = [m.lower() for m in texts]
+    naive_us = _timeit(naive_detect, lowered, rounds)
+    matcher_us = _timeit(SignalParser._detect_signal_type, lowered, rounds)
+    naive_fields_us = _timeit(naive_fields, texts, rounds)
+    fields_us = _timeit(signal_parser._scan_fields, texts, rounds)
+    parse_us = _timeit(SignalParser.parse, texts, rounds)
+    analyze_us = _timeit(SignalParser.analyze, texts, rounds)
+
+    print(f"类型检测（逐个 in）     : {naive_us:8.2f} µs/条")
+    print(f"类型检测（单遍匹配器） : {matcher_us:8.2f} µs/条  ({naive_us / matcher_us:.2f}x)")
+    print(f"字段提取（逐个格式）   : {naive_fields_us:8.2f} µs/条")
+    print(f"字段提取（单遍扫描）   : {fields_us:8.2f} µs/条  ({naive_fields_us / fields_us:.2f}x)")
+    print(f"完整 parse()            : {parse_us:8.2f} µs/条  ({1e6 / parse_us:,.0f} 条/秒)")
+    print(f"完整 analyze()          : {analyze_us:8.2f} µs/条  ({1e6 / analyze_us:,.0f} 条/秒)")
+
+
+def bench_templates(texts: list, rounds: int):
+    """群组模板解析与通用解析的耗时对比（模板取自示例配置）"""
+    registry = SignalTemplateRegistry(EXAMPLE_TEMPLATES)
+    for chat_id, template in registry._templates.items():
+        matched = [m for m in texts if template.analyze(m) is not None]
+        if not matched:
+            continue
+        generic_us = _timeit(SignalParser.analyze, matched, rounds)
+        template_us = _timeit(template.analyze, matched, rounds)
+        print(f"模板 {template.name}（命中 {len(matched)} 条）:")
+        print(f"  通用 analyze()  : {generic_us:8.2f} µs/条")
+        print(f"  模板 analyze()  : {template_us:8.2f} µs/条  ({generic_us / template_us:.2f}x)")
+
+
+def bench_keyword_growth(texts: list, rounds: int):
+    """关键词数量翻倍（模拟持续新增分组/关键词）后的扩展性"""
+    lowered = [m.lower() for m in texts]
+    extra = [f'{kw}{i}' for i in range(4) for kw in SignalParser.BUY_KEYWORDS + SignalParser.SELL_KEYWORDS]
+    saved = SignalParser.BUY_KEYWORDS
+    try:
+        SignalParser.BUY_KEYWORDS = saved + extra
+        SignalParser.compile_keywords()
+        naive_big = _timeit(naive_detect, lowered, rounds)
+        matcher_big = _timeit(SignalParser._detect_signal_type, lowered, rounds)
+    finally:
+        SignalParser.BUY_KEYWORDS = saved
+        SignalParser.compile_keywords()
+    total_kw = len(SignalParser._keyword_matcher._owners) + len(extra)
+    print(f"扩充至 {total_kw} 个关键词后:")
+    print(f"类型检测（逐个 in）     : {naive_big:8.2f} µs/条")
+    print(f"类型检测（单遍匹配器） : {matcher_big:8.2f} µs/条  ({naive_big / matcher_big:.2f}x)")
+
+
+def bench_archive(archive: list, workers: int):
+    """批量解析吞吐（parse_many）"""
+    runs = [('逐条 parse()', lambda: [SignalParser.parse(m) for m in archive]),
+            ('parse_many()', lambda: SignalParser.parse_many(archive))]
+    if workers and workers > 1:
+        runs.append((f'parse_many(workers={workers})', lambda: SignalParser.parse_many(archive, workers=workers)))
+    for label, func in runs:
+        start = time.perf_counter()
+        results = func()
+        elapsed = time.perf_counter() - start
+        found = sum(1 for r in results if r)
+        print(f"{label:<28}: {elapsed:7.3f} 秒  ({len(archive) / elapsed:,.0f} 条/秒，识别 {found} 条信号)")
+
+
+def bench_patterns(texts: list, rounds: int):
+    """各关键词组/正则格式的单项开销"""
+    upper = [m.upper() for m in texts]
+    lowered = [m.lower() for m in texts]
+    items = []
+    for name, kws in SignalParser._keyword_matcher.groups.items():
+        matcher = KeywordMatcher({name: kws})
+        items.append((f'关键词组 {name} ({len(kws)})', matcher.find_all, lowered))
+    items.append(('关键词（全部分组单遍）', SignalParser._keyword_matcher.find_all, lowered))
+    for pattern in signal_parser._SYMBOL_PRIORITY_PATTERNS + signal_parser._SYMBOL_OTHER_PATTERNS:
+        items.append((f'币种 {pattern.pattern}', pattern.search, upper))
+    for keyword in ENTRY_KEYWORDS + STOP_LOSS_KEYWORDS:
+        regex = re.compile(rf'{keyword}[:\s]*(\d+\.?\d*)', re.IGNORECASE)
+        items.append((f'价格 {keyword}', regex.search, texts))
+    for _, pattern in signal_parser._TAKE_PROFIT_PATTERNS:
+        regex = re.compile(pattern, re.IGNORECASE)
+        items.append((f'止盈 {pattern}', lambda m, r=regex: list(r.finditer(m)), texts))
+    for regex in signal_parser._LEVERAGE_REGEXES:
+        items.append((f'杠杆 {regex.pattern}', regex.search, texts))
+    items.append(('字段（全部格式单遍）', signal_parser._scan_fields, texts))
+
+    costs = [(label, _timeit(func, data, rounds)) for label, func, data in items]
+    for label, cost in sorted(costs, key=lambda x: -x[1]):
+        print(f"  {cost:7.2f} µs  {label}")
+
+
+def evaluate_accuracy(corpus: list) -> dict:
+    """对照标注统计误报/漏报/错误，并打印明细"""
+    fields = [('entry', 'entry_price'), ('sl', 'stop_loss'), ('tp', 'take_profit'), ('leverage', 'leverage')]
+    report = {'total': len(corpus), 'tp': 0, 'tn': 0, 'fp': 0, 'fn': 0, 'wrong': 0, 'field_errors': 0}
+    signals = SignalParser.parse_many([item['text'] for item in corpus])
+    for item, signal in zip(corpus, signals):
+        expected = item.get('expected')
+        text = item['text'].replace('\n', ' ⏎ ')[:50]
+        if expected is None:
+            if signal is None:
+                report['tn'] += 1
+            else:
+                report['fp'] += 1
+                print(f"  FP  {text!r} -> {signal}")
+            continue
+        if signal is None:
+            report['fn'] += 1
+            print(f"  FN  {text!r}（应为 {expected['type']} {expected['symbol']}）")
+            continue
+        if signal.signal_type.value != expected['type'] or signal.symbol != expected['symbol']:
+            report['wrong'] += 1
+            print(f"  错误 {text!r} -> {signal.signal_type.value} {signal.symbol}（应为 {expected['type']} {expected['symbol']}）")
+            continue
+        report['tp'] += 1
+        for key, attr in fields:
+            if key not in expected:
+                continue
+            actual = getattr(signal, attr)
+            want = sorted(expected[key]) if key == 'tp' else expected[key]
+            if (sorted(actual) if key == 'tp' else actual) != want:
+                report['field_errors'] += 1
+                print(f"  字段 {text!r} {key}: {actual}（应为 {want}）")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='信号解析基准套件')
+    parser.add_argument('--rounds', type=int, default=200, help='单条耗时测试的重复轮数')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='带标注的语料 JSON')
+    parser.add_argument('--export', help='Telegram Desktop 导出的聊天记录 JSON（批量吞吐测试）')
+    parser.add_argument('--workers', type=int, default=0, help='parse_many 进程数')
+    parser.add_argument('--archive-size', type=int, default=20000, help='无导出文件时由语料复制出的消息数')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    texts = [item['text'] for item in corpus]
+
+    # 先确认新旧实现结果一致
+    mismatches = check_consistency(texts)
+    if mismatches:
+        print(f"❌ 新旧实现结果不一致: {len(mismatches)} 条")
+        for m in mismatches:
+            print(f"   {m!r}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"📊 单条解析（{len(texts)} 条消息 × {args.rounds} 轮）")
+    print("=" * 60)
+    bench_throughput(texts, args.rounds)
+    print()
+    bench_keyword_growth(texts, args.rounds)
+    print()
+    bench_templates(texts, args.rounds)
+
+    print("\n" + "=" * 60)
+    if args.export:
+        archive = load_telegram_export(args.export)
+        print(f"📦 批量解析（导出记录 {len(archive)} 条）")
+    else:
+        # 末尾附加由 ·/• 组成的编号，使每条文本不同且不影响解析结果
+        archive = [f"{texts[i % len(texts)]} {bin(i)[2:].replace('0', '·').replace('1', '•')}"
+                   for i in range(args.archive_size)]
+        print(f"📦 批量解析（语料复制 {len(archive)} 条）")
+    print("=" * 60)
+    bench_archive(archive, args.workers)
+
+    print("\n" + "=" * 60)
+    print("⏱ 单项开销（µs/条，降序）")
+    print("=" * 60)
+    bench_patterns(texts, max(1, args.rounds // 4))
+
+    print("\n" + "=" * 60)
+    print("🎯 准确性（对照标注）")
+    print("=" * 60)
+    report = evaluate_accuracy(corpus)
+    labeled = report['tp'] + report['fn'] + report['wrong']
+    print(f"\n共 {report['total']} 条：正确识别 {report['tp']}/{labeled}，正确忽略 {report['tn']}")
+    print(f"误报 FP {report['fp']}，漏报 FN {report['fn']}，类型/币种错误 {report['wrong']}，字段错误 {report['field_errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,9 @@ class Config:
     MAX_POSITION_SIZE = float(os.getenv('MAX_POSITION_SIZE', '0.1'))
     RISK_PERCENTAGE = float(os.getenv('RISK_PERCENTAGE', '1.0'))
     
+    # 持仓监控：按交易对分组向量化评估（账户/持仓很多时开启）
+    VECTORIZED_MONITOR = os.getenv('VECTORIZED_MONITOR', 'False').lower() == 'true'
+    
     @classmethod
     def validate(cls):
         """验证配置是否完整"""
@@ -0,0 +1,104 @@
+"""
+测试公共替身（pytest 自动加载；直接运行测试脚本时按普通模块导入，只供测试使用）
+持仓管理器/风控/账户快照等测试共用：按交易对返回价格、按账户返回余额，
+记录取价与余额请求次数、止损改单、撤单、原生追踪单与平仓；另提供临时数据库与建仓辅助函数
+"""
+
+import os
+import tempfile
+
+from database import TradingDatabase
+from order_manager import PositionManager
+from position_state import PositionStateStore
+
+
+class FakeClient:
+    """只提供价格精度的交易所客户端"""
+
+    def market(self, symbol):
+        return {'precision': {'price': 0.5}}
+
+
+class FakeExchange:
+    """
+    多账户交易所替身
+
+    Args:
+        accounts: 账户名列表；传字典（账户名 -> 账户配置）时同时作为 exchange.accounts
+        prices: 交易对 -> 价格
+        price: 统一价格（设置后所有交易对都返回该价格）
+        balances: 账户名 -> 余额（未列出的账户返回 1000）
+        positions: list_open_positions 的返回值（None 表示查询失败）
+        native: 是否支持交易所原生追踪止损
+    """
+
+    def __init__(self, accounts=('acc1',), prices=None, price=None, balances=None, positions=None, native=True):
+        if isinstance(accounts, dict):
+            self.accounts = accounts
+        self.clients = {name: FakeClient() for name in accounts}
+        self.prices = dict(prices or {})
+        self.price = price
+        self.balances = dict(balances or {})
+        self.positions = positions
+        self.native = native
+        self.fetches = 0
+        self.balance_calls = 0
+        self.position_calls = 0
+        self.amends = []
+        self.cancels = []
+        self.trailing = []
+        self.closed = []
+
+    def get_current_price(self, account_name, symbol):
+        self.fetches += 1
+        if self.price is not None:
+            return self.price
+        return self.prices.get(symbol)
+
+    def get_balance(self, account_name, currency='USDT'):
+        self.balance_calls += 1
+        return self.balances.get(account_name, 1000.0)
+
+    def list_open_positions(self, account_name, strict=False):
+        self.position_calls += 1
+        return self.positions
+
+    def amend_stop_loss_order(self, account_name, symbol, side, amount, stop_price, order_id=None):
+        self.amends.append((order_id, round(stop_price, 6)))
+        return {'status': 'success', 'order_id': f"SL{len(self.amends)}", 'amended': 'edit'}
+
+    def place_trailing_stop_order(self, account_name, symbol, side, amount, callback_pct, activation_price=None):
+        if not self.native:
+            return None
+        self.trailing.append((side, amount, callback_pct))
+        return {'status': 'success', 'order_id': f"TR{len(self.trailing)}", 'callback_pct': callback_pct,
+                'activation_price': self.price, 'native': True}
+
+    def cancel_order(self, account_name, symbol, order_id):
+        self.cancels.append(order_id)
+        return True
+
+    def close_position(self, account_name, symbol):
+        self.closed.append((account_name, symbol))
+        return True
+
+
+def temp_db(name: str = 'test.db') -> TradingDatabase:
+    """临时目录下的独立数据库"""
+    return TradingDatabase(os.path.join(tempfile.mkdtemp(), name))
+
+
+def make_manager(exchange, positions=None, state_store=None, **kwargs) -> PositionManager:
+    """
+    创建持仓管理器并登记持仓
+
+    Args:
+        exchange: 交易所替身
+        positions: {(账户名, 交易对): 持仓字段}
+        state_store: 持仓状态存储（默认只存内存）
+        **kwargs: 传给 PositionManager 的其他参数
+    """
+    pm = PositionManager(exchange, state_store=state_store or PositionStateStore(), **kwargs)
+    for (account_name, symbol), info in (positions or {}).items():
+        pm._save_position_info(account_name, symbol, info)
+    return pm
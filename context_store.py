@@ -0,0 +1,226 @@
+"""
+群组上下文存储
+按群组保存近期开仓信号（按币种索引，可同时保留多个）和最近的止盈提示价格，
+带 TTL 过期清理，并可落库以便重启后恢复邻近消息推断所需的上下文
+"""
+
+import logging
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class ChatContextStore:
+    """按群组的近期上下文：chat_id -> {symbol: entry}，以及 chat_id -> 最近止盈提示"""
+
+    # 止盈价与参考价的最大偏离（对数比例），超出则不视为同一币种
+    MAX_PRICE_LOG_RATIO = math.log(3.0)
+
+    def __init__(self, ttl: timedelta = timedelta(minutes=20), max_entries_per_chat: int = 10, db=None):
+        """
+        Args:
+            ttl: 上下文有效期
+            max_entries_per_chat: 每个群最多保留的近期开仓数（按币种去重）
+            db: TradingDatabase 实例（为 None 时仅保存在内存）
+        """
+        self.ttl = ttl
+        self.max_entries_per_chat = max(1, int(max_entries_per_chat))
+        self.db = db
+        self._entries: Dict[Any, OrderedDict] = {}  # chat_id -> OrderedDict(symbol -> entry)
+        self._tp_hints: Dict[Any, Dict] = {}  # chat_id -> {'price': float, 'time': datetime}
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    # ---------- 写入 ----------
+
+    def record_entry(self, chat_id, symbol: str, ref_prices: Optional[List[float]] = None,
+                     msg_id: Optional[int] = None, at: Optional[datetime] = None, persist: bool = True,
+                     scale: float = 1.0):
+        """
+        记录一次开仓信号（同一币种重复出现时刷新时间并移到最新）；同一条消息原样重复记录（重启后
+        回溯历史消息）不重复落库，比已有记录更早的消息不覆盖已有记录
+
+        Args:
+            ref_prices: 参考价（已按币种别名换算后的价格）
+            scale: 参考价相对群内消息原始价格的换算系数（如 PEPE -> 1000PEPE 为 1000）
+        """
+        if chat_id is None or not symbol:
+            return
+        at = at or datetime.utcnow()
+        prices = [float(p) for p in (ref_prices or []) if p]
+        with self._lock:
+            entries = self._entries.setdefault(chat_id, OrderedDict())
+            entry = {'symbol': symbol, 'time': at, 'ref_prices': prices, 'msg_id': msg_id,
+                     'scale': float(scale or 1.0)}
+            current = entries.get(symbol)
+            if current is not None and (current['time'] > at or current == entry):
+                return
+            entries[symbol] = entry
+            entries.move_to_end(symbol)
+            while len(entries) > self.max_entries_per_chat:
+                # 回溯的历史消息可能晚于较新的记录写入，按时间淘汰最早的
+                oldest = min(entries, key=lambda key: entries[key]['time'])
+                del entries[oldest]
+        if persist:
+            self._persist(chat_id, 'entry', at, symbol=symbol, ref_prices=prices, msg_id=msg_id,
+                          scale=float(scale or 1.0))
+
+    def record_tp_hint(self, chat_id, price: float, at: Optional[datetime] = None, persist: bool = True):
+        """记录最近一次止盈提示价格（不早于已有提示时才更新，重复记录不重复落库）"""
+        if chat_id is None or not price:
+            return
+        at = at or datetime.utcnow()
+        with self._lock:
+            hint = {'price': float(price), 'time': at}
+            current = self._tp_hints.get(chat_id)
+            if current is not None and (current['time'] > at or current == hint):
+                return
+            self._tp_hints[chat_id] = hint
+        if persist:
+            self._persist(chat_id, 'tp_hint', at, price=float(price))
+
+    # ---------- 读取 ----------
+
+    def recent_entries(self, chat_id, now: Optional[datetime] = None) -> List[Dict]:
+        """窗口内的近期开仓（按消息时间最新在前，与 get_entry 一样按 TTL 过滤）"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            entries = self._entries.get(chat_id)
+            if not entries:
+                return []
+            self._evict_expired(entries, now)
+            live = sorted(entries.values(), key=lambda e: e['time'], reverse=True)
+            return [dict(e) for e in live]
+
+    def get_entry(self, chat_id, symbol: str, now: Optional[datetime] = None) -> Optional[Dict]:
+        """按币种获取窗口内的开仓记录"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(chat_id, {}).get(symbol)
+            if entry and now - entry['time'] <= self.ttl:
+                return dict(entry)
+        return None
+
+    def last_tp_hint(self, chat_id, now: Optional[datetime] = None) -> Optional[Dict]:
+        """窗口内最近一次止盈提示"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            hint = self._tp_hints.get(chat_id)
+            if not hint:
+                return None
+            if now - hint['time'] > self.ttl:
+                del self._tp_hints[chat_id]
+                return None
+            return dict(hint)
+
+    def infer_symbol(self, chat_id, price: Optional[float] = None, now: Optional[datetime] = None) -> Optional[str]:
+        """为无币种的止盈提示推断币种（见 infer_entry）"""
+        entry = self.infer_entry(chat_id, price, now)
+        return entry['symbol'] if entry else None
+
+    def infer_entry(self, chat_id, price: Optional[float] = None, now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        为无币种的止盈提示推断对应的近期开仓记录
+
+        只有一个近期开仓时直接使用；有多个时，按止盈价（群内原始价格，按各记录的换算系数
+        换算后）与各币种参考价（入场/止损/止盈）的接近程度选择，无法区分时退回最新的一个
+        """
+        entries = self.recent_entries(chat_id, now)
+        if not entries:
+            return None
+        if len(entries) == 1 or not price or price <= 0:
+            return entries[0]
+        best_entry = None
+        best_distance = None
+        for entry in entries:
+            scaled = price * entry.get('scale', 1.0)
+            for ref in entry['ref_prices']:
+                if ref <= 0:
+                    continue
+                distance = abs(math.log(scaled / ref))
+                if best_distance is None or distance < best_distance:
+                    best_distance = distance
+                    best_entry = entry
+        if best_entry and best_distance <= self.MAX_PRICE_LOG_RATIO:
+            return best_entry
+        return entries[0]
+
+    # ---------- 维护 ----------
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """清理所有过期上下文，返回清理条数"""
+        now = now or datetime.utcnow()
+        removed = 0
+        with self._lock:
+            for chat_id in list(self._entries.keys()):
+                entries = self._entries[chat_id]
+                removed += self._evict_expired(entries, now)
+                if not entries:
+                    del self._entries[chat_id]
+            for chat_id in list(self._tp_hints.keys()):
+                if now - self._tp_hints[chat_id]['time'] > self.ttl:
+                    del self._tp_hints[chat_id]
+                    removed += 1
+        if self.db is not None:
+            try:
+                self.db.prune_chat_context(now - self.ttl)
+            except Exception as e:
+                logger.debug(f"清理群组上下文失败: {e}")
+        return removed
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """从数据库恢复窗口内的上下文，返回恢复条数"""
+        if self.db is None:
+            return 0
+        now = now or datetime.utcnow()
+        try:
+            rows = self.db.load_chat_context(now - self.ttl)
+        except Exception as e:
+            logger.warning(f"加载群组上下文失败: {e}")
+            return 0
+        loaded = 0
+        for row in rows:
+            try:
+                chat_id = row['chat_id']
+                if isinstance(chat_id, str) and chat_id.lstrip('-').isdigit():
+                    chat_id = int(chat_id)
+                at = row['created_at']
+                if isinstance(at, str):
+                    at = datetime.fromisoformat(at)
+                if row['kind'] == 'entry':
+                    self.record_entry(chat_id, row['symbol'], row.get('ref_prices'), row.get('msg_id'), at=at,
+                                      persist=False, scale=row.get('scale') or 1.0)
+                elif row['kind'] == 'tp_hint':
+                    self.record_tp_hint(chat_id, row['price'], at=at, persist=False)
+                else:
+                    continue
+                loaded += 1
+            except Exception:
+                continue
+        self.prune(now)
+        if loaded:
+            logger.info(f"✓ 已恢复群组上下文 {loaded} 条")
+        return loaded
+
+    def _evict_expired(self, entries: OrderedDict, now: datetime) -> int:
+        """淘汰全部过期记录（插入顺序不一定是时间顺序，逐条按 TTL 判断；调用方持有锁）"""
+        expired = [symbol for symbol, entry in entries.items() if now - entry['time'] > self.ttl]
+        for symbol in expired:
+            del entries[symbol]
+        return len(expired)
+
+    def _persist(self, chat_id, kind: str, at: datetime, **fields):
+        if self.db is None:
+            return
+        try:
+            self.db.save_chat_context(chat_id, kind, at, **fields)
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 200:
+                self._writes_since_prune = 0
+                self.db.prune_chat_context(datetime.utcnow() - self.ttl)
+        except Exception as e:
+            logger.debug(f"保存群组上下文失败: {e}")
@@ -4,6 +4,7 @@ SQLite 数据库管理
 """
 
 import sqlite3
+import json
 import logging
 from datetime import datetime
 from typing import List, Dict, Optional, Any
@@ -145,6 +146,56 @@ class TradingDatabase:
                 )
             ''')
             
+            # 群组上下文表（近期开仓/止盈提示，用于重启后恢复邻近消息推断）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS chat_context (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    symbol TEXT,
+                    price REAL,
+                    ref_prices TEXT,
+                    msg_id INTEGER,
+                    created_at TIMESTAMP NOT NULL
+                )
+            ''')
+            
+            # 持仓生命周期状态表（每个账户+币种一行，用于重启后恢复持仓保护）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS position_states (
+                    account_name TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    info TEXT,
+                    updated_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (account_name, symbol)
+                )
+            ''')
+            
+            # 风控状态检查点（每个账户一行 JSON，重启后直接恢复连亏计数、当日盈亏与冷却期）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS risk_state (
+                    account_name TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at TIMESTAMP NOT NULL
+                )
+            ''')
+            
+            # 模拟盘账户状态（每个账户一行 JSON：余额、持仓、未结束挂单），重启后恢复模拟持仓
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS paper_state (
+                    account_name TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at TIMESTAMP NOT NULL
+                )
+            ''')
+            
+            # 模拟盘标记（旧库补列）
+            self._ensure_column(cursor, 'trades', 'is_paper', 'INTEGER DEFAULT 0')
+            self._ensure_column(cursor, 'orders', 'is_paper', 'INTEGER DEFAULT 0')
+            # 群组上下文的币种别名价格换算系数（旧库补列）
+            self._ensure_column(cursor, 'chat_context', 'scale', 'REAL DEFAULT 1')
+            
             # 创建索引
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_account ON trades(account_name)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades(symbol)')
@@ -153,15 +204,24 @@ class TradingDatabase:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_stats_account_date ON daily_stats(account_name, date)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_created ON signals(created_at)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_risk_events_account ON risk_events(account_name)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_chat_context_created ON chat_context(created_at)')
             
             logger.info("✓ 数据库初始化完成")
     
+    @staticmethod
+    def _ensure_column(cursor, table: str, column: str, decl: str):
+        """表中缺少该列时补上（兼容旧版本数据库文件）"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {decl}')
+    
     def record_trade(self, account_name: str, symbol: str, side: str,
                     entry_price: float, position_size: float, leverage: int = 1,
                     stop_loss: Optional[float] = None, take_profit: Optional[List[float]] = None,
-                    trailing_stop_pct: Optional[float] = None, notes: str = "") -> int:
+                    trailing_stop_pct: Optional[float] = None, notes: str = "",
+                    is_paper: bool = False) -> int:
         """
-        记录新交易
+        记录新交易（is_paper 标记模拟盘交易）
         
         Returns:
             int: 交易ID
@@ -172,13 +232,13 @@ class TradingDatabase:
             cursor.execute('''
                 INSERT INTO trades (account_name, symbol, side, entry_price, position_size,
                                   leverage, entry_time, status, stop_loss, take_profit,
-                                  trailing_stop_pct, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                  trailing_stop_pct, notes, is_paper)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 account_name, symbol, side, entry_price, position_size,
                 leverage, datetime.now(), 'open',
                 stop_loss, str(take_profit) if take_profit else None,
-                trailing_stop_pct, notes
+                trailing_stop_pct, notes, int(bool(is_paper))
             ))
             
             trade_id = cursor.lastrowid
@@ -219,51 +279,34 @@ class TradingDatabase:
                 WHERE id = ?
             ''', (exit_price, datetime.now(), pnl, pnl_pct, fees, 'closed', trade_id))
             
-            # 更新每日统计
-            self._update_daily_stats(cursor, trade['account_name'], pnl, fees)
+            # 更新每日统计（模拟盘交易不计入实盘统计）
+            if not trade['is_paper']:
+                self._update_daily_stats(cursor, trade['account_name'], pnl, fees)
             
             logger.info(f"✓ 交易已平仓: ID={trade_id}, PnL={pnl:.2f} ({pnl_pct:.2f}%)")
     
     def _update_daily_stats(self, cursor, account_name: str, pnl: float, fees: float):
-        """更新每日统计"""
+        """更新每日统计（单条 UPSERT 增量累加，与平仓在同一事务中）"""
         today = datetime.now().date()
-        
-        # 检查今天的统计是否存在
+        win = 1 if pnl > 0 else 0
+        loss = 1 if pnl < 0 else 0
         cursor.execute('''
-            SELECT * FROM daily_stats WHERE account_name = ? AND date = ?
-        ''', (account_name, today))
-        
-        stat = cursor.fetchone()
-        
-        if stat:
-            # 更新
-            total_trades = stat['total_trades'] + 1
-            winning_trades = stat['winning_trades'] + (1 if pnl > 0 else 0)
-            losing_trades = stat['losing_trades'] + (1 if pnl < 0 else 0)
-            total_pnl = stat['total_pnl'] + pnl
-            total_fees = stat['total_fees'] + fees
-            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            largest_win = max(stat['largest_win'], pnl) if pnl > 0 else stat['largest_win']
-            largest_loss = min(stat['largest_loss'], pnl) if pnl < 0 else stat['largest_loss']
-            
-            cursor.execute('''
-                UPDATE daily_stats
-                SET total_trades = ?, winning_trades = ?, losing_trades = ?,
-                    total_pnl = ?, total_fees = ?, win_rate = ?,
-                    largest_win = ?, largest_loss = ?
-                WHERE account_name = ? AND date = ?
-            ''', (total_trades, winning_trades, losing_trades, total_pnl, total_fees,
-                  win_rate, largest_win, largest_loss, account_name, today))
-        else:
-            # 插入新记录
-            cursor.execute('''
-                INSERT INTO daily_stats (account_name, date, total_trades, winning_trades,
-                                        losing_trades, total_pnl, total_fees, win_rate,
-                                        largest_win, largest_loss)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (account_name, today, 1, 1 if pnl > 0 else 0, 1 if pnl < 0 else 0,
-                  pnl, fees, 100 if pnl > 0 else 0,
-                  pnl if pnl > 0 else 0, pnl if pnl < 0 else 0))
+            INSERT INTO daily_stats (account_name, date, total_trades, winning_trades,
+                                    losing_trades, total_pnl, total_fees, win_rate,
+                                    largest_win, largest_loss)
+            VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(account_name, date) DO UPDATE SET
+                total_trades = daily_stats.total_trades + 1,
+                winning_trades = daily_stats.winning_trades + excluded.winning_trades,
+                losing_trades = daily_stats.losing_trades + excluded.losing_trades,
+                total_pnl = daily_stats.total_pnl + excluded.total_pnl,
+                total_fees = daily_stats.total_fees + excluded.total_fees,
+                win_rate = (daily_stats.winning_trades + excluded.winning_trades) * 100.0
+                           / (daily_stats.total_trades + 1),
+                largest_win = MAX(daily_stats.largest_win, excluded.largest_win),
+                largest_loss = MIN(daily_stats.largest_loss, excluded.largest_loss)
+        ''', (account_name, today, win, loss, pnl, fees, 100 if win else 0,
+              pnl if win else 0, pnl if loss else 0))
     
     def record_signal(self, symbol: str, signal_type: str, entry_price: Optional[float],
                      stop_loss: Optional[float], take_profit: Optional[List[float]],
@@ -392,19 +435,133 @@ class TradingDatabase:
     def record_order(self, trade_id: Optional[int], account_name: str, symbol: str,
                      order_type: str, side: str, price: Optional[float] = None,
                      amount: Optional[float] = None, status: Optional[str] = None,
-                     order_id: Optional[str] = None, filled_amount: Optional[float] = None) -> int:
+                     order_id: Optional[str] = None, filled_amount: Optional[float] = None,
+                     is_paper: bool = False) -> int:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO orders (trade_id, account_name, symbol, order_type, side,
-                                    price, amount, filled_amount, status, order_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                    price, amount, filled_amount, status, order_id, is_paper)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 trade_id, account_name, symbol, order_type, side,
-                price, amount, filled_amount, status, order_id
+                price, amount, filled_amount, status, order_id, int(bool(is_paper))
+            ))
+            return cursor.lastrowid
+
+    def save_chat_context(self, chat_id: Any, kind: str, created_at: datetime,
+                          symbol: Optional[str] = None, price: Optional[float] = None,
+                          ref_prices: Optional[List[float]] = None, msg_id: Optional[int] = None,
+                          scale: float = 1.0) -> int:
+        """记录一条群组上下文（kind: 'entry' 近期开仓 / 'tp_hint' 止盈提示；scale 为币种别名的价格换算系数）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO chat_context (chat_id, kind, symbol, price, ref_prices, msg_id, created_at, scale)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                str(chat_id), kind, symbol, price,
+                json.dumps(ref_prices) if ref_prices else None, msg_id, created_at, scale
             ))
             return cursor.lastrowid
 
+    def load_chat_context(self, since: datetime) -> List[Dict]:
+        """加载指定时间之后的群组上下文（按时间升序）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT chat_id, kind, symbol, price, ref_prices, msg_id, created_at, scale
+                FROM chat_context WHERE created_at >= ? ORDER BY created_at ASC, id ASC
+            ''', (since,))
+            rows = []
+            for row in cursor.fetchall():
+                item = dict(row)
+                try:
+                    item['ref_prices'] = json.loads(item['ref_prices']) if item['ref_prices'] else []
+                except Exception:
+                    item['ref_prices'] = []
+                rows.append(item)
+            return rows
+
+    def prune_chat_context(self, before: datetime) -> int:
+        """删除过期的群组上下文，返回删除条数"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM chat_context WHERE created_at < ?', (before,))
+            return cursor.rowcount
+
+    def save_position_state(self, account_name: str, symbol: str, state: str, info: Optional[str] = None):
+        """写入持仓状态（info 为 None 时保留原有持仓信息）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO position_states (account_name, symbol, state, info, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(account_name, symbol) DO UPDATE SET
+                    state = excluded.state,
+                    info = COALESCE(excluded.info, position_states.info),
+                    updated_at = excluded.updated_at
+            ''', (account_name, symbol, state, info, datetime.now()))
+
+    def load_position_states(self, include_closed: bool = False) -> List[Dict]:
+        """加载持仓状态（默认只含未平仓）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if include_closed:
+                cursor.execute('SELECT account_name, symbol, state, info, updated_at FROM position_states')
+            else:
+                cursor.execute('''
+                    SELECT account_name, symbol, state, info, updated_at
+                    FROM position_states WHERE state != 'closed'
+                ''')
+            return [dict(row) for row in cursor.fetchall()]
+
+    def prune_position_states(self, before: datetime) -> int:
+        """删除早于指定时间的已平仓状态，返回删除条数"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM position_states WHERE state = 'closed' AND updated_at < ?", (before,))
+            return cursor.rowcount
+
+    def save_risk_state(self, account_name: str, state: str):
+        """写入账户风控状态检查点（JSON）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO risk_state (account_name, state, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(account_name) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = excluded.updated_at
+            ''', (account_name, state, datetime.now()))
+
+    def load_risk_states(self) -> Dict[str, str]:
+        """加载所有账户的风控状态检查点：{account_name: JSON}"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT account_name, state FROM risk_state')
+            return {row['account_name']: row['state'] for row in cursor.fetchall()}
+
+    def save_paper_state(self, account_name: str, state: str):
+        """写入模拟盘账户状态（JSON）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO paper_state (account_name, state, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(account_name) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = excluded.updated_at
+            ''', (account_name, state, datetime.now()))
+
+    def load_paper_state(self, account_name: str) -> Optional[str]:
+        """加载模拟盘账户状态（JSON），没有记录时返回 None"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT state FROM paper_state WHERE account_name = ?', (account_name,))
+            row = cursor.fetchone()
+            return row['state'] if row else None
+
 # 全局实例
 trading_db = TradingDatabase()
 
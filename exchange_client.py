@@ -1,265 +1,156 @@
-import ccxt
 from typing import Optional, Dict, Any
 from config import Config
 import logging
-from retry_utils import retry_call
+from multi_exchange_config import ExchangeAccount
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ExchangeClient:
-    """交易所客户端"""
-    
-    def __init__(self):
+    """
+    单交易所客户端（.env 配置的后备模式）
+    不再单独维护下单逻辑：把 .env 中的账户以 'single' 名称注册到多交易所执行引擎，
+    所有方法转发给引擎，单账户部署与多账户共用同一套缓存、重试、订单簿与执行流程
+    """
+
+    ACCOUNT_NAME = 'single'
+
+    def __init__(self, engine=None):
+        """
+        Args:
+            engine: 多交易所执行引擎（默认使用全局 multi_exchange_client）
+        """
+        if engine is None:
+            from multi_exchange_client import multi_exchange_client
+            engine = multi_exchange_client
+        self.engine = engine
         self.exchange = None
         self.initialized = False
         self._init_exchange()
-    
+
+    @staticmethod
+    def _account_from_config() -> ExchangeAccount:
+        """由 .env 配置生成单账户（仓位按余额百分比的名义金额计算，与旧版一致）"""
+        return ExchangeAccount(
+            name=ExchangeClient.ACCOUNT_NAME,
+            exchange_type=(Config.EXCHANGE_NAME or 'binance').lower(),
+            api_key=Config.EXCHANGE_API_KEY or '',
+            api_secret=Config.EXCHANGE_API_SECRET or '',
+            testnet=Config.EXCHANGE_TESTNET,
+            enabled=True,
+            max_position_size=Config.MAX_POSITION_SIZE,
+            risk_percentage=Config.RISK_PERCENTAGE,
+            risk_as_notional=True,
+        )
+
     def _init_exchange(self):
-        """初始化交易所连接"""
+        """在执行引擎中注册单账户（已注册时直接复用）"""
         try:
-            exchange_class = getattr(ccxt, Config.EXCHANGE_NAME)
-            self.exchange = exchange_class({
-                'apiKey': Config.EXCHANGE_API_KEY,
-                'secret': Config.EXCHANGE_API_SECRET,
-                'enableRateLimit': True,
-                'options': {
-                    'defaultType': 'future',  # 默认使用合约交易
-                }
-            })
-            
-            if Config.EXCHANGE_TESTNET:
-                if hasattr(self.exchange, 'set_sandbox_mode'):
-                    self.exchange.set_sandbox_mode(True)
-                    logger.info("已启用测试网模式")
-            
-            # 测试连接
-            retry_call(self.exchange.load_markets, retries=3, delay=0.6)
-            self.initialized = True
-            logger.info(f"成功连接到 {Config.EXCHANGE_NAME}")
-            
+            if self.ACCOUNT_NAME not in self.engine.clients:
+                self.engine.add_exchange(self._account_from_config())
+            self.exchange = self.engine.clients.get(self.ACCOUNT_NAME)
+            self.initialized = self.exchange is not None
+            if self.initialized:
+                logger.info(f"成功连接到 {Config.EXCHANGE_NAME}（单账户模式）")
         except Exception as e:
             logger.error(f"初始化交易所失败: {e}")
             self.initialized = False
-    
+
+    def _can_trade(self) -> bool:
+        if not self.initialized or not Config.TRADING_ENABLED:
+            logger.warning("交易未启用或交易所未初始化")
+            return False
+        return True
+
     def get_balance(self, currency: str = 'USDT') -> Optional[float]:
         """获取账户余额"""
         if not self.initialized:
             return None
-        
-        try:
-            balance = retry_call(self.exchange.fetch_balance, retries=3, delay=0.6)
-            return balance['free'].get(currency, 0.0)
-        except Exception as e:
-            logger.error(f"获取余额失败: {e}")
-            return None
-    
+        return self.engine.get_balance(self.ACCOUNT_NAME, currency)
+
     def get_current_price(self, symbol: str) -> Optional[float]:
         """获取当前市场价格"""
         if not self.initialized:
             return None
-        
-        try:
-            ticker = retry_call(self.exchange.fetch_ticker, symbol, retries=3, delay=0.6)
-            return ticker['last']
-        except Exception as e:
-            logger.error(f"获取价格失败 {symbol}: {e}")
-            return None
-    
+        return self.engine.get_current_price(self.ACCOUNT_NAME, symbol)
+
     def place_market_order(self, symbol: str, side: str, amount: float) -> Optional[Dict[str, Any]]:
         """
         下市价单
-        
+
         Args:
             symbol: 交易对，如 'BTC/USDT'
             side: 'buy' 或 'sell'
             amount: 交易数量
-            
+
         Returns:
             订单信息或 None
         """
-        if not self.initialized or not Config.TRADING_ENABLED:
-            logger.warning("交易未启用或交易所未初始化")
-            return None
-        
-        try:
-            order = retry_call(self.exchange.create_market_order, symbol, side, amount, retries=3, delay=0.6)
-            logger.info(f"订单已下: {side} {amount} {symbol}")
-            return order
-        except Exception as e:
-            logger.error(f"下单失败: {e}")
+        if not self._can_trade():
             return None
-    
+        return self.engine.place_market_order(self.ACCOUNT_NAME, symbol, side, amount)
+
     def place_limit_order(self, symbol: str, side: str, amount: float, price: float) -> Optional[Dict[str, Any]]:
         """
         下限价单
-        
+
         Args:
             symbol: 交易对
             side: 'buy' 或 'sell'
             amount: 交易数量
             price: 限价
-            
+
         Returns:
             订单信息或 None
         """
-        if not self.initialized or not Config.TRADING_ENABLED:
-            logger.warning("交易未启用或交易所未初始化")
-            return None
-        
-        try:
-            order = retry_call(self.exchange.create_limit_order, symbol, side, amount, price, retries=3, delay=0.6)
-            logger.info(f"限价单已下: {side} {amount} {symbol} @ {price}")
-            return order
-        except Exception as e:
-            logger.error(f"下限价单失败: {e}")
+        if not self._can_trade():
             return None
-    
+        return self.engine.place_limit_order(self.ACCOUNT_NAME, symbol, side, price, amount)
+
     def set_leverage(self, symbol: str, leverage: int) -> bool:
         """设置杠杆倍数"""
         if not self.initialized:
             return False
-        
-        try:
-            retry_call(self.exchange.set_leverage, leverage, symbol, retries=3, delay=0.6)
-            logger.info(f"已设置 {symbol} 杠杆为 {leverage}x")
-            return True
-        except Exception as e:
-            logger.error(f"设置杠杆失败: {e}")
-            return False
-    
+        return self.engine.set_leverage(self.ACCOUNT_NAME, symbol, leverage)
+
     def close_position(self, symbol: str) -> bool:
         """平仓"""
         if not self.initialized or not Config.TRADING_ENABLED:
             return False
-        
-        try:
-            # 获取当前持仓
-            positions = retry_call(self.exchange.fetch_positions, [symbol], retries=3, delay=0.6)
-            for position in positions:
-                if float(position['contracts']) > 0:
-                    side = 'sell' if position['side'] == 'long' else 'buy'
-                    amount = abs(float(position['contracts']))
-                    self.place_market_order(symbol, side, amount)
-                    logger.info(f"已平仓 {symbol}")
-                    return True
-            
-            logger.info(f"没有 {symbol} 的持仓")
-            return False
-            
-        except Exception as e:
-            logger.error(f"平仓失败: {e}")
-            return False
+        return self.engine.close_position(self.ACCOUNT_NAME, symbol)
 
     def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
         """获取单一交易对的当前持仓概要（contracts、side、entry_price）"""
         if not self.initialized:
             return None
-        try:
-            positions = retry_call(self.exchange.fetch_positions, [symbol], retries=3, delay=0.6)
-            if not positions:
-                return None
-            for p in positions:
-                try:
-                    contracts = float(p.get('contracts') or 0.0)
-                except Exception:
-                    contracts = 0.0
-                if contracts <= 0:
-                    continue
-                side = str(p.get('side') or '')
-                ep = None
-                for k in ('entry_price', 'entryPrice', 'average', 'avgPrice'):
-                    try:
-                        v = p.get(k)
-                        if v is not None:
-                            ep = float(v)
-                            break
-                    except Exception:
-                        continue
-                return {
-                    'symbol': symbol,
-                    'contracts': contracts,
-                    'side': side,
-                    'entry_price': ep,
-                }
-            return None
-        except Exception as e:
-            logger.error(f"获取持仓失败 {symbol}: {e}")
-            return None
-    
-    def calculate_position_size(self, symbol: str, price: float, risk_percentage: float) -> float:
+        return self.engine.get_position(self.ACCOUNT_NAME, symbol)
+
+    def calculate_position_size(self, symbol: str, price: float, risk_percentage: Optional[float] = None) -> float:
         """
         根据风险百分比计算仓位大小
-        
+
         Args:
             symbol: 交易对
             price: 入场价格
-            risk_percentage: 风险百分比（账户余额的百分比）
-            
+            risk_percentage: 风险百分比（账户余额的百分比，默认使用 .env 配置）
+
         Returns:
             交易数量
         """
-        balance = self.get_balance('USDT')
-        if not balance:
+        if self.ACCOUNT_NAME not in self.engine.accounts:
             return 0.0
-        
-        risk_amount = balance * (risk_percentage / 100)
-        position_size = risk_amount / price
-        
-        # 限制最大仓位
-        max_position = Config.MAX_POSITION_SIZE
-        position_size = min(position_size, max_position)
-        
-        return round(position_size, 3)
+        # 只对本次计算生效，不改写账户配置
+        return self.engine.calculate_position_size(self.ACCOUNT_NAME, symbol, price,
+                                                   risk_percentage=risk_percentage)
 
     def place_stop_loss_order(self, symbol: str, side: str, amount: float, stop_price: float) -> Optional[Dict[str, Any]]:
-        """设置止损订单（通用实现，使用统一参数 stopLossPrice）"""
-        if not self.initialized or not Config.TRADING_ENABLED:
-            return None
-        try:
-            # 使用统一的 stopLossPrice 参数，reduceOnly 防止加仓
-            params = {
-                'reduceOnly': True,
-                'stopLossPrice': stop_price,
-            }
-            order = retry_call(
-                self.exchange.create_order,
-                symbol,
-                'market',
-                side,
-                amount,
-                None,
-                retries=3,
-                delay=0.6,
-                params=params,
-            )
-            logger.info(f"止损单已下: {side} {amount} {symbol} @ SL {stop_price}")
-            return order
-        except Exception as e:
-            logger.error(f"止损下单失败: {e}")
+        """设置止损订单"""
+        if not self._can_trade():
             return None
+        return self.engine.place_stop_loss_order(self.ACCOUNT_NAME, symbol, side, amount, stop_price)
 
     def place_take_profit_order(self, symbol: str, side: str, amount: float, tp_price: float) -> Optional[Dict[str, Any]]:
-        """设置止盈限价单（reduce-only）"""
-        if not self.initialized or not Config.TRADING_ENABLED:
+        """设置止盈订单（reduce-only）"""
+        if not self._can_trade():
             return None
-        try:
-            params = {
-                'reduceOnly': True,
-            }
-            order = retry_call(
-                self.exchange.create_limit_order,
-                symbol,
-                side,
-                amount,
-                tp_price,
-                retries=3,
-                delay=0.6,
-                params=params,
-            )
-            logger.info(f"止盈单已下: {side} {amount} {symbol} @ {tp_price}")
-            return order
-        except Exception as e:
-            logger.error(f"止盈下单失败: {e}")
-            return None
-
+        return self.engine.place_take_profit_order(self.ACCOUNT_NAME, symbol, side, amount, tp_price)
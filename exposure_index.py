@@ -0,0 +1,98 @@
+"""
+跨账户敞口索引
+一个信号往往在十几个账户同时开同一个币种，单账户风控看不到合计敞口。这里按
+(交易对, 方向) 维护名义价值：每个账户一份、全部账户合计一份，成交/平仓时增量更新，
+组合层面的限额检查只读合计值（O(1)），每个信号在分发到各账户前检查一次
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+LONG = 'long'
+SHORT = 'short'
+
+_SIDES = {'buy': LONG, 'long': LONG, 'sell': SHORT, 'short': SHORT}
+
+
+def normalize_side(side) -> Optional[str]:
+    """'buy'/'long' → long，'sell'/'short' → short（也接受 PositionSide 枚举）"""
+    return _SIDES.get(str(getattr(side, 'value', side) or '').lower())
+
+
+class ExposureIndex:
+    """(symbol, side) → 名义价值（USDT），分账户与合计"""
+
+    def __init__(self):
+        # (account_name, symbol) -> (side, notional)
+        self._positions: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._aggregate: Counter = Counter()  # (symbol, side) -> notional
+        self._accounts: Counter = Counter()   # (symbol, side) -> 持仓账户数
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def _apply(self, key: Tuple[str, str], side: str, notional: float, sign: int):
+        symbol = key[1]
+        self._aggregate[(symbol, side)] += sign * notional
+        self._accounts[(symbol, side)] += sign
+        self._total += sign * notional
+        if self._accounts[(symbol, side)] <= 0:
+            # 最后一个账户平仓后清掉浮点残差
+            self._total -= self._aggregate.pop((symbol, side), 0.0)
+            del self._accounts[(symbol, side)]
+
+    def set(self, account_name: str, symbol: str, side, notional: float):
+        """设置某个账户在该交易对上的持仓名义价值（开仓/加仓/部分平仓后调用）"""
+        side = normalize_side(side)
+        if side is None:
+            return
+        notional = max(0.0, float(notional or 0.0))
+        key = (account_name, symbol)
+        with self._lock:
+            old = self._positions.pop(key, None)
+            if old is not None:
+                self._apply(key, old[0], old[1], -1)
+            if notional > 0:
+                self._positions[key] = (side, notional)
+                self._apply(key, side, notional, 1)
+
+    def remove(self, account_name: str, symbol: str) -> float:
+        """平仓：移除该账户的持仓，返回移除的名义价值"""
+        key = (account_name, symbol)
+        with self._lock:
+            old = self._positions.pop(key, None)
+            if old is None:
+                return 0.0
+            self._apply(key, old[0], old[1], -1)
+            return old[1]
+
+    def notional(self, symbol: str, side) -> float:
+        """全部账户在 (symbol, side) 上的合计名义价值"""
+        return self._aggregate.get((symbol, normalize_side(side)), 0.0)
+
+    def account_count(self, symbol: str, side) -> int:
+        """在 (symbol, side) 上有持仓的账户数"""
+        return self._accounts.get((symbol, normalize_side(side)), 0)
+
+    def account_notional(self, account_name: str, symbol: str) -> Tuple[Optional[str], float]:
+        """某个账户在该交易对上的 (方向, 名义价值)"""
+        return self._positions.get((account_name, symbol), (None, 0.0))
+
+    def total(self) -> float:
+        """全部账户、全部交易对的合计名义价值"""
+        return self._total
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """{symbol: {side: notional}}"""
+        with self._lock:
+            result: Dict[str, Dict[str, float]] = {}
+            for (symbol, side), notional in self._aggregate.items():
+                result.setdefault(symbol, {})[side] = notional
+            return result
+
+    def __len__(self):
+        return len(self._positions)
+
+
+# 全局敞口索引（持仓管理器在登记/移除持仓时更新）
+exposure_index = ExposureIndex()
@@ -26,6 +26,8 @@ from gui_multi_exchange import ExchangeManagementWindow
 from database import trading_db
 from statistics import trading_stats
 import order_manager
+from market_data_bus import get_market_data_bus
+from account_state import start_account_state_refresh
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -36,16 +38,21 @@ ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 class TextHandler(logging.Handler):
-    """自定义日志处理器，将日志输出到 GUI"""
+    """自定义日志处理器，将日志输出到 GUI（待显示队列有上限，满时丢弃并计数）"""
+    
+    MAX_PENDING = 2000  # 待显示的最大条数
     
     def __init__(self, text_widget):
         super().__init__()
         self.text_widget = text_widget
-        self.queue = queue.Queue()
+        self.queue = queue.Queue(maxsize=self.MAX_PENDING)
+        self.dropped = 0
         
     def emit(self, record):
-        msg = self.format(record)
-        self.queue.put(msg)
+        try:
+            self.queue.put_nowait(self.format(record))
+        except queue.Full:
+            self.dropped += 1
 
 class TradingBotGUI(ctk.CTk):
     """主 GUI 应用"""
@@ -66,6 +73,7 @@ class TradingBotGUI(ctk.CTk):
         self.is_running = False
         self.exchange: Optional[ExchangeClient] = None
         self.multi_exchange = multi_exchange_client  # 多交易所客户端
+        self.market_data = get_market_data_bus(self.multi_exchange)  # 与机器人共享的行情总线
         self.signal_parser = SignalParser()
         
         # 统计数据
@@ -834,11 +842,25 @@ class TradingBotGUI(ctk.CTk):
         logger.addHandler(self.text_handler)
         logger.setLevel(logging.INFO)
         
+    # 日志框最多保留的行数，超出时删除最早的行
+    MAX_LOG_LINES = 5000
+    
     def update_log_display(self):
-        """更新日志显示"""
-        while not self.text_handler.queue.empty():
-            msg = self.text_handler.queue.get()
-            self.log_text.insert("end", msg + "\n")
+        """更新日志显示：每次批量插入一次，并裁剪到最多 MAX_LOG_LINES 行"""
+        lines = []
+        try:
+            while len(lines) < TextHandler.MAX_PENDING:
+                lines.append(self.text_handler.queue.get_nowait())
+        except queue.Empty:
+            pass
+        dropped, self.text_handler.dropped = self.text_handler.dropped, 0
+        if dropped:
+            lines.append(f"... 日志过多，已丢弃 {dropped} 条")
+        if lines:
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            total = int(self.log_text.index("end-1c").split(".")[0])
+            if total > self.MAX_LOG_LINES:
+                self.log_text.delete("1.0", f"{total - self.MAX_LOG_LINES + 1}.0")
             self.log_text.see("end")
         
         self.after(100, self.update_log_display)
@@ -897,47 +919,35 @@ class TradingBotGUI(ctk.CTk):
         """启动监控任务"""
         try:
             # 创建持仓管理器实例并设置为全局变量
-            logger.info("🔧 创建PositionManager实例...")
-            order_manager.position_manager = order_manager.PositionManager(self.multi_exchange)
+            # 复用已创建（并已恢复持仓状态）的实例，避免覆盖恢复的持仓
+            if order_manager.position_manager is None:
+                logger.info("🔧 创建PositionManager实例...")
+                order_manager.position_manager = order_manager.PositionManager(
+                    self.multi_exchange, adaptive_cadence=True, market_data=self.market_data,
+                    vectorized=Config.VECTORIZED_MONITOR)
             self.position_manager = order_manager.position_manager
             logger.info(f"🔧 PositionManager创建成功: {order_manager.position_manager}")
             
-            # 在新线程中启动监控循环
-            logger.info("🔧 启动监控线程...")
-            self.monitor_thread = threading.Thread(target=self.run_monitoring_async, daemon=True)
-            self.monitor_thread.start()
+            # 持仓监控登记在行情总线上（与机器人共用同一个轮询线程，重复登记会被忽略）
+            logger.info("🔧 登记持仓监控任务...")
+            order_manager.start_position_monitor(self.market_data)
+            start_account_state_refresh(self.market_data)
             logging.info("✓ 持仓监控已启动")
         except Exception as e:
             logging.error(f"启动监控失败: {e}")
             import traceback
             logging.error(f"详细错误信息: {traceback.format_exc()}")
     
-    def run_monitoring_async(self):
-        """在异步环境中运行监控"""
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # 创建监控任务
-            async def monitoring_loop():
-                while True:
-                    try:
-                        if order_manager.position_manager:
-                            order_manager.position_manager.monitor_positions()
-                    except Exception as e:
-                        logging.error(f"监控持仓出错: {e}")
-                    await asyncio.sleep(3)
-            
-            loop.run_until_complete(monitoring_loop())
-        except Exception as e:
-            logging.error(f"监控循环出错: {e}")
-    
     def stop_monitoring(self):
         """停止监控任务"""
         try:
-            if hasattr(self, 'monitor_thread') and self.monitor_thread.is_alive():
-                # 由于是守护线程，会自动停止
+            # 撤销行情总线上的持仓监控任务（总线轮询线程继续服务其他任务）
+            if 'position_monitor' in self.market_data.get_stats().get('jobs', []):
+                self.market_data.unregister_job('position_monitor')
                 logging.info("✓ 持仓监控已停止")
+            # 节流中尚未落库的止损移动在停止时写入
+            if order_manager.position_manager is not None:
+                order_manager.position_manager.flush_state()
         except Exception as e:
             logging.error(f"停止监控失败: {e}")
     
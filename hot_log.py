@@ -0,0 +1,102 @@
+"""
+热路径日志
+监控循环每秒对每个持仓执行多次，逐次输出 INFO 日志会占用大量 CPU 并刷屏 GUI。
+这里提供按键限频、按键采样与仅状态变化时输出三种方式；消息使用 logging 的 % 参数延迟格式化，
+级别未启用或被限频/采样丢弃时不做任何格式化
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Hashable, Optional
+
+
+class HotPathLogger:
+    """包装 logging.Logger，供高频循环使用"""
+
+    def __init__(self, logger: logging.Logger, interval: float = 30.0, sample_every: int = 100):
+        """
+        Args:
+            interval: 同一键两次输出的默认最小间隔（秒）
+            sample_every: sample() 默认每多少次输出一次
+        """
+        self.logger = logger
+        self.interval = interval
+        self.sample_every = sample_every
+        self._last_emit: Dict[Hashable, float] = {}
+        self._suppressed: Counter = Counter()
+        self._counts: Counter = Counter()
+        self._states: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        # emitted 实际输出 / suppressed 被限频或采样丢弃 / unchanged 状态未变化未输出
+        self.stats = Counter()
+
+    def log(self, level: int, key: Hashable, msg: str, *args, interval: Optional[float] = None) -> bool:
+        """
+        同一键在 interval 秒内最多输出一次；输出时附带期间被省略的条数
+
+        Returns:
+            bool: 是否已输出
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        interval = self.interval if interval is None else interval
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_emit.get(key)
+            if last is not None and now - last < interval:
+                self._suppressed[key] += 1
+                self.stats['suppressed'] += 1
+                return False
+            self._last_emit[key] = now
+            skipped = self._suppressed.pop(key, 0)
+        self.stats['emitted'] += 1
+        if skipped:
+            self.logger.log(level, msg + " (期间省略 %d 条)", *args, skipped)
+        else:
+            self.logger.log(level, msg, *args)
+        return True
+
+    def sample(self, level: int, key: Hashable, msg: str, *args, every: Optional[int] = None) -> bool:
+        """同一键每 every 次输出一次（第一次总会输出）"""
+        if not self.logger.isEnabledFor(level):
+            return False
+        every = self.sample_every if every is None else max(1, every)
+        with self._lock:
+            n = self._counts[key]
+            self._counts[key] = n + 1
+        if n % every:
+            self.stats['suppressed'] += 1
+            return False
+        self.stats['emitted'] += 1
+        if n:
+            self.logger.log(level, msg + " (每 %d 次采样)", *args, every)
+        else:
+            self.logger.log(level, msg, *args)
+        return True
+
+    def on_change(self, level: int, key: Hashable, state: Any, msg: str, *args) -> bool:
+        """只在键对应的状态与上次不同时输出（如止损价、触发类型变化）"""
+        with self._lock:
+            if key in self._states and self._states[key] == state:
+                self.stats['unchanged'] += 1
+                return False
+            self._states[key] = state
+        if not self.logger.isEnabledFor(level):
+            return False
+        self.stats['emitted'] += 1
+        self.logger.log(level, msg, *args)
+        return True
+
+    def forget(self, *keys: Hashable):
+        """清除键的限频/采样/状态记录（如持仓已平仓）"""
+        with self._lock:
+            for key in keys:
+                self._last_emit.pop(key, None)
+                self._suppressed.pop(key, None)
+                self._counts.pop(key, None)
+                self._states.pop(key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -57,7 +57,7 @@ class FakeMultiExchange:
         return 1.0
 
     # Orders
-    def place_market_order(self, account_name, symbol, side, amount):
+    def place_market_order(self, account_name, symbol, side, amount, current_price=None, leverage=None):
         price = 100.0
         self.positions.setdefault(account_name, {})[symbol] = {
             "contracts": float(amount),
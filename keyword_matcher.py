@@ -0,0 +1,98 @@
+"""
+多关键词单遍匹配器
+将多组关键词（开多/开空/平仓/排除/统计等）编译为一个前缀树形式的交替正则，
+一次扫描消息即可得到每组命中的全部关键词，替代逐个关键词的 `in` 判断
+"""
+
+import re
+from typing import Dict, Iterable, List, Set
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    将关键词集合构造成前缀树正则（公共前缀只比较一次）
+
+    以关键词结尾的节点写成 (?:子节点)? 的贪婪形式，保证每个位置返回最长命中
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    多组关键词匹配器
+
+    用法:
+        matcher = KeywordMatcher({'buy': ['做多', 'long'], 'sell': ['做空', 'short']})
+        hits = matcher.scan('#BTC 做多')   # {'buy': {'做多'}, 'sell': set()}
+
+    说明:
+        - 区分大小写，调用方自行决定是否先 lower()
+        - 关键词可同时属于多个分组
+        - 每次 search 取当前位置的最长命中并展开为其全部前缀关键词；下一次从“可能有别的关键词起始”
+          的最近位置继续（编译期预计算），因此重叠/包含关系（如 “点击” 与 “点击进入”、
+          “平多” 与 “多单”）与逐个 `in` 判断结果一致，同时正则引擎可按首字符快速跳过无关文本
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: Dict[str, List[str]] = {name: [kw for kw in kws if kw] for name, kws in groups.items()}
+        self._group_sets: Dict[str, frozenset] = {name: frozenset(kws) for name, kws in self.groups.items()}
+
+        # 关键词 -> 所属分组
+        self._owners: Dict[str, List[str]] = {}
+        for name, kws in self.groups.items():
+            for kw in kws:
+                owners = self._owners.setdefault(kw, [])
+                if name not in owners:
+                    owners.append(name)
+
+        keywords = list(self._owners.keys())
+        # 关键词 -> 同一位置必然同时命中的关键词（自身及其前缀）
+        self._prefixes: Dict[str, frozenset] = {
+            kw: frozenset(other for other in keywords if kw.startswith(other)) for kw in keywords
+        }
+        # 关键词 -> 命中后下一次搜索的起始偏移：
+        # 最小的 j 使得 kw[j:] 是某关键词的前缀或以某关键词开头（即可能有关键词在该处起始）
+        self._resume: Dict[str, int] = {}
+        for kw in keywords:
+            step = len(kw)
+            for j in range(1, len(kw)):
+                tail = kw[j:]
+                if any(other.startswith(tail) or tail.startswith(other) for other in keywords):
+                    step = j
+                    break
+            self._resume[kw] = step
+        self._pattern = re.compile(_trie_pattern(keywords)) if keywords else None
+
+    def find_all(self, text: str) -> Set[str]:
+        """返回文本中出现的所有关键词（去重）"""
+        found: Set[str] = set()
+        if not text or self._pattern is None:
+            return found
+        search = self._pattern.search
+        pos = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                return found
+            longest = match.group()
+            found |= self._prefixes[longest]
+            pos = match.start() + self._resume[longest]
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """返回每个分组命中的关键词集合（未命中的分组为空集合）"""
+        found = self.find_all(text)
+        return {name: found & kws for name, kws in self._group_sets.items()}
@@ -0,0 +1,272 @@
+"""
+行情/账户状态总线
+进程内唯一的价格、持仓、订单状态数据源：所有读取都经过带有效期的缓存，
+同一键的并发请求合并为一次交易所请求，结果再推送给订阅者；
+持仓监控、平仓检测等周期任务也登记在总线上由同一个轮询线程执行，
+GUI 与机器人同时运行时任务只登记一次，不会成倍增加交易所请求
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from hot_log import HotPathLogger
+
+logger = logging.getLogger(__name__)
+hot_log = HotPathLogger(logger)
+
+TOPIC_PRICE = 'price'        # key: (account_name, symbol)，value: 价格
+TOPIC_POSITION = 'position'  # key: (account_name, symbol)，value: 持仓概要或 None
+TOPIC_ORDER = 'order'        # key: (account_name, order_id)，value: 订单状态
+TOPIC_BALANCE = 'balance'    # key: (account_name, currency)，value: 可用余额
+
+# 订单最终状态，缓存后不再查询
+_FINAL_ORDER_STATUSES = ('closed', 'canceled')
+# 轮询线程空闲时的最长休眠（秒）
+_IDLE_SLEEP = 1.0
+# 缓存项写入后超过该时长即清理（远大于各类有效期；订单最终状态在此期间复用）
+_CACHE_RETENTION = 60.0
+# 轮询线程清理过期缓存的间隔（秒）
+_PRUNE_INTERVAL = 30.0
+
+
+def _is_final(value) -> bool:
+    """订单状态是否已结束（成交/撤销）"""
+    return isinstance(value, dict) and value.get('status') in _FINAL_ORDER_STATUSES
+
+
+class _Job:
+    """周期任务：interval 为秒数或返回秒数的函数（如持仓管理器的自适应节奏）"""
+
+    __slots__ = ('name', 'func', 'interval', 'next_run')
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: Union[float, Callable[[], float]]):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = 0.0
+
+    def delay(self) -> float:
+        try:
+            return float(self.interval() if callable(self.interval) else self.interval)
+        except Exception:
+            return _IDLE_SLEEP
+
+
+class MarketDataBus:
+    """进程内行情/账户状态总线"""
+
+    def __init__(self, exchange, price_ttl: float = 1.0, position_ttl: float = 2.0, order_ttl: float = 2.0,
+                 balance_ttl: float = 30.0):
+        """
+        Args:
+            exchange: 多交易所执行引擎（提供 get_current_price / get_position / fetch_order_status / get_balance）
+            price_ttl / position_ttl / order_ttl / balance_ttl: 各类数据的缓存有效期（秒）
+        """
+        self.exchange = exchange
+        self.ttl = {TOPIC_PRICE: price_ttl, TOPIC_POSITION: position_ttl, TOPIC_ORDER: order_ttl,
+                    TOPIC_BALANCE: balance_ttl}
+        self._cache: Dict[Tuple[str, Tuple], Tuple[Any, float]] = {}
+        self._fetch_locks: Dict[Tuple[str, Tuple], threading.Lock] = {}
+        self._subscribers: Dict[str, List[Callable[[Tuple, Any], None]]] = {}
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._last_prune = time.monotonic()
+        # requests 实际请求 / hits 缓存命中 / coalesced 等待其他线程的同键请求后直接复用
+        self.stats = Counter()
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self, topic: str, callback: Callable[[Tuple, Any], None]) -> Callable[[], None]:
+        """订阅某类更新，callback(key, value)；返回取消订阅函数"""
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                try:
+                    self._subscribers.get(topic, []).remove(callback)
+                except ValueError:
+                    pass
+        return unsubscribe
+
+    def publish(self, topic: str, key: Tuple, value: Any):
+        """写入缓存并通知订阅者（订阅者异常只记录）"""
+        with self._lock:
+            self._cache[(topic, key)] = (value, time.monotonic())
+            callbacks = list(self._subscribers.get(topic, []))
+        for callback in callbacks:
+            try:
+                callback(key, value)
+            except Exception as e:
+                logger.debug(f"行情总线订阅者处理 {topic} {key} 失败: {e}")
+
+    # ---------- 读取 ----------
+
+    def _cached(self, topic: str, key: Tuple, max_age: float) -> Tuple[bool, Any]:
+        entry = self._cache.get((topic, key))
+        if entry is not None and time.monotonic() - entry[1] <= max_age:
+            return True, entry[0]
+        return False, None
+
+    def _read_through(self, topic: str, key: Tuple, fetch: Callable[[], Any], max_age: Optional[float]) -> Any:
+        """缓存有效时直接返回，否则每个键只有一个线程请求交易所，其余线程等待后复用结果"""
+        max_age = self.ttl[topic] if max_age is None else max_age
+        hit, value = self._cached(topic, key, max_age)
+        if hit:
+            self.stats['hits'] += 1
+            return value
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault((topic, key), threading.Lock())
+        with fetch_lock:
+            hit, value = self._cached(topic, key, max_age)
+            if hit:
+                self.stats['coalesced'] += 1
+                return value
+            self.stats['requests'] += 1
+            value = fetch()
+        if value is not None or topic == TOPIC_POSITION:
+            self.publish(topic, key, value)
+        return value
+
+    def get_price(self, account_name: str, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """当前价格（max_age 秒内的缓存直接复用）"""
+        return self._read_through(TOPIC_PRICE, (account_name, symbol),
+                                  lambda: self.exchange.get_current_price(account_name, symbol), max_age)
+
+    def get_position(self, account_name: str, symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """持仓概要（contracts、side、entry_price），无持仓为 None"""
+        return self._read_through(TOPIC_POSITION, (account_name, symbol),
+                                  lambda: self.exchange.get_position(account_name, symbol), max_age)
+
+    def get_order_status(self, account_name: str, symbol: str, order_id: str,
+                         max_age: Optional[float] = None) -> Optional[Dict]:
+        """订单状态（最终状态在缓存保留期内复用，不再查询；同时释放该订单的请求锁）"""
+        key = (account_name, order_id)
+        entry = self._cache.get((TOPIC_ORDER, key))
+        if entry is not None and _is_final(entry[0]):
+            self.stats['hits'] += 1
+            return entry[0]
+        value = self._read_through(TOPIC_ORDER, key,
+                                   lambda: self.exchange.fetch_order_status(account_name, symbol, order_id), max_age)
+        if _is_final(value):
+            with self._lock:
+                self._fetch_locks.pop((TOPIC_ORDER, key), None)
+        return value
+
+    def get_balance(self, account_name: str, currency: str = 'USDT',
+                    max_age: Optional[float] = None) -> Optional[float]:
+        """可用余额（获取失败为 None，不缓存）"""
+        return self._read_through(TOPIC_BALANCE, (account_name, currency),
+                                  lambda: self.exchange.get_balance(account_name, currency), max_age)
+
+    def invalidate(self, topic: str, key: Tuple):
+        """使某项缓存失效（如下单/平仓后持仓已变化）"""
+        with self._lock:
+            self._cache.pop((topic, key), None)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        清理超过保留期的缓存项（含已结束订单），以及没有缓存项且空闲的请求锁
+
+        Returns:
+            int: 清理的缓存项数
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stale = [k for k, (_, at) in self._cache.items() if now - at > _CACHE_RETENTION]
+            for k in stale:
+                del self._cache[k]
+            for k in [k for k, lock in self._fetch_locks.items() if k not in self._cache and not lock.locked()]:
+                del self._fetch_locks[k]
+        if stale:
+            self.stats['pruned'] += len(stale)
+        return len(stale)
+
+    # ---------- 周期任务 ----------
+
+    def register_job(self, name: str, func: Callable[[], Any],
+                     interval: Union[float, Callable[[], float]]) -> bool:
+        """
+        登记周期任务（同名任务只登记一次）并确保轮询线程已启动
+
+        Returns:
+            bool: 是否为新登记（False 表示其他组件已登记过同名任务）
+        """
+        with self._lock:
+            if name in self._jobs:
+                return False
+            self._jobs[name] = _Job(name, func, interval)
+        logger.info(f"✓ 行情总线已登记任务: {name}")
+        self.start()
+        self._wake.set()
+        return True
+
+    def unregister_job(self, name: str):
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def start(self):
+        """启动轮询线程（已在运行时忽略）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='market-data-bus', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run_due_jobs(self, now: Optional[float] = None) -> float:
+        """执行已到期的任务，返回距下一个任务到期的秒数"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            jobs = list(self._jobs.values())
+        next_due = now + _IDLE_SLEEP
+        for job in jobs:
+            if now >= job.next_run:
+                try:
+                    job.func()
+                except Exception as e:
+                    hot_log.log(logging.ERROR, ('job_error', job.name), "行情总线任务 %s 出错: %s", job.name, e)
+                job.next_run = time.monotonic() + job.delay()
+            next_due = min(next_due, job.next_run)
+        return max(next_due - time.monotonic(), 0.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.run_due_jobs()
+            if time.monotonic() - self._last_prune >= _PRUNE_INTERVAL:
+                self._last_prune = time.monotonic()
+                self.prune()
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = sorted(self._jobs)
+        return {**self.stats, 'jobs': jobs}
+
+
+# 全局行情总线实例（首次使用时创建）
+market_data_bus: Optional[MarketDataBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_market_data_bus(exchange=None) -> MarketDataBus:
+    """获取全局行情总线；首次调用时用给定的执行引擎（默认全局 multi_exchange_client）创建"""
+    global market_data_bus
+    with _bus_lock:
+        if market_data_bus is None:
+            if exchange is None:
+                from multi_exchange_client import multi_exchange_client
+                exchange = multi_exchange_client
+            market_data_bus = MarketDataBus(exchange)
+        return market_data_bus
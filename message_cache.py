@@ -0,0 +1,96 @@
+"""
+近期消息缓存
+按群组保存最近消息的文本与解析出的币种（LRU），
+用于回复消息的币种推断，避免每次都调用 get_reply_message() 请求 Telegram API
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Any
+
+from parse_cache import parse_cache
+
+logger = logging.getLogger(__name__)
+
+# 币种尚未解析的占位标记（None 表示“已解析但无币种”）
+_UNPARSED = object()
+
+
+class MessageCache:
+    """按群组的近期消息 LRU 缓存：chat_id -> {msg_id: [text, symbol]}"""
+
+    def __init__(self, max_per_chat: int = 500):
+        self.max_per_chat = max(1, int(max_per_chat))
+        self._chats: Dict[Any, OrderedDict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, chat_id, msg_id, text: Optional[str], symbol: Any = _UNPARSED):
+        """
+        写入/刷新一条消息
+
+        Args:
+            chat_id: 群组ID
+            msg_id: 消息ID
+            text: 消息文本
+            symbol: 已知的币种（不传则在首次查询时再解析）
+        """
+        if chat_id is None or msg_id is None or not text:
+            return
+        with self._lock:
+            entries = self._chats.setdefault(chat_id, OrderedDict())
+            old = entries.get(msg_id)
+            # 文本未变化时保留已解析的币种
+            if symbol is _UNPARSED and old is not None and old[0] == text:
+                symbol = old[1]
+            entries[msg_id] = [text, symbol]
+            entries.move_to_end(msg_id)
+            while len(entries) > self.max_per_chat:
+                entries.popitem(last=False)
+
+    def get_text(self, chat_id, msg_id) -> Optional[str]:
+        """获取缓存的消息文本，未命中返回 None"""
+        with self._lock:
+            entry = self._chats.get(chat_id, {}).get(msg_id)
+            return entry[0] if entry else None
+
+    def get_symbol(self, chat_id, msg_id) -> Tuple[bool, Optional[str]]:
+        """
+        获取消息中的币种
+
+        Returns:
+            (是否命中缓存, 币种或 None)
+        """
+        with self._lock:
+            entries = self._chats.get(chat_id)
+            entry = entries.get(msg_id) if entries else None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            entries.move_to_end(msg_id)
+            text, symbol = entry
+        if symbol is _UNPARSED:
+            try:
+                symbol = parse_cache.analyze(text, chat_id=chat_id).symbol
+            except Exception:
+                symbol = None
+            with self._lock:
+                current = self._chats.get(chat_id, {}).get(msg_id)
+                if current is not None and current[0] == text:
+                    current[1] = symbol
+        return True, symbol
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'chats': len(self._chats),
+                'messages': sum(len(v) for v in self._chats.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total else 0.0,
+            }
@@ -4,10 +4,16 @@
 """
 
 import ccxt
+import time
+from collections import Counter
 from typing import Dict, List, Optional, Any
 from multi_exchange_config import ExchangeAccount, multi_exchange_config
 import logging
 from retry_utils import retry_call, log_struct
+from symbol_index import tradable_symbols
+from order_book import OrderBookOfRecord
+from paper_exchange import PaperExchange
+from database import trading_db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +24,12 @@ class MultiExchangeClient:
     def __init__(self):
         self.clients: Dict[str, ccxt.Exchange] = {}
         self.accounts: Dict[str, ExchangeAccount] = {}
+        # 每账户一次批量 fetch_open_orders 的挂单快照（订单状态/挂单清理从这里读取）
+        self.order_book = OrderBookOfRecord(lambda: self.clients, self._order_params)
+        # 最近一次行情价格：(account_name, 原始交易对) -> (价格, monotonic 时间)
+        self._last_prices: Dict[tuple, tuple] = {}
+        # 止损改单统计：edit（原生改单）/ replace（撤单重下）/ failed
+        self.amend_stats = Counter()
         self._init_all_exchanges()
     
     def _init_all_exchanges(self):
@@ -51,6 +63,12 @@ class MultiExchangeClient:
             if account.password and account.password.strip():
                 config['password'] = account.password.strip()
             
+            # 模拟盘只用公共行情接口，不带 API Key，避免误下真实订单
+            paper = bool(getattr(account, 'paper_trading', False))
+            if paper:
+                for key in ('apiKey', 'secret', 'password'):
+                    config.pop(key, None)
+            
             client = exchange_class(config)
             
             if account.testnet:
@@ -66,20 +84,33 @@ class MultiExchangeClient:
                 logger=logger,
                 op=f"{account.name}.load_markets",
             )
+            if paper:
+                # 模拟盘余额/持仓/挂单落库，重启后恢复，持仓核对不会把模拟持仓标记为已平仓
+                client = PaperExchange(client, account_name=account.name,
+                                       balance=float(getattr(account, 'paper_balance', 1000.0) or 1000.0),
+                                       db=trading_db)
+                logger.info(f"📝 {account.name} - 模拟盘模式（真实行情，本地模拟成交）")
             
             self.clients[account.name] = client
             self.accounts[account.name] = account
+            # 更新可交易币种索引（解析阶段据此校验币种、解析别名）
+            tradable_symbols.update_account(account.name, getattr(client, 'markets', None))
             
             logger.info(f"✓ 成功连接到 {account.name} ({exchange_type})")
             
         except Exception as e:
             logger.error(f"✗ 初始化 {account.name} 失败: {e}")
     
+    def is_paper(self, account_name: str) -> bool:
+        """账户是否为模拟盘"""
+        return bool(getattr(self.clients.get(account_name), 'paper', False))
+
     def remove_exchange(self, account_name: str):
         """移除交易所"""
         if account_name in self.clients:
             del self.clients[account_name]
             del self.accounts[account_name]
+            tradable_symbols.remove_account(account_name)
             logger.info(f"已移除交易所: {account_name}")
     
     def get_balance(self, account_name: str, currency: str = 'USDT') -> Optional[float]:
@@ -277,6 +308,12 @@ class MultiExchangeClient:
         if ':' in symbol:
             return symbol
 
+        # 可交易币种索引（加载 markets 时已选好各账户的首选合约）
+        account_name = next((name for name, c in self.clients.items() if c is client), None)
+        indexed = tradable_symbols.contract_symbol(account_name, symbol) if account_name else None
+        if indexed and indexed.endswith(':USDT'):
+            return indexed
+
         # 构造常见的 USDT 本位合约候选
         candidates = []
         if symbol.endswith('/USDT'):
@@ -311,6 +348,7 @@ class MultiExchangeClient:
         if account_name not in self.clients:
             return None
         
+        original_symbol = symbol
         try:
             client = self.clients[account_name]
             # 转换为合约符号
@@ -323,15 +361,26 @@ class MultiExchangeClient:
                 logger=logger,
                 op=f"{account_name}.fetch_ticker",
             )
-            return ticker['last']
+            price = ticker['last']
+            if price:
+                self._last_prices[(account_name, original_symbol)] = (float(price), time.monotonic())
+            return price
         except Exception as e:
             logger.error(f"获取 {account_name} {symbol} 价格失败: {e}")
             return None
     
-    def calculate_position_size(self, account_name: str, symbol: str, price: float) -> float:
+    def get_cached_price(self, account_name: str, symbol: str, max_age: float = 10.0) -> Optional[float]:
+        """最近一次获取的价格（不超过 max_age 秒），不发起请求；无缓存或已过期返回 None"""
+        cached = self._last_prices.get((account_name, symbol))
+        if not cached or time.monotonic() - cached[1] > max_age:
+            return None
+        return cached[0]
+    
+    def calculate_position_size(self, account_name: str, symbol: str, price: float,
+                                risk_percentage: Optional[float] = None) -> float:
         """
         计算仓位大小
-        根据账户配置使用风险百分比或固定保证金
+        根据账户配置使用风险百分比或固定保证金；risk_percentage 只对本次计算覆盖账户的风险百分比
         """
         if account_name not in self.accounts:
             return 0.0
@@ -350,7 +399,9 @@ class MultiExchangeClient:
             balance = self.get_balance(account_name, 'USDT')
             if not balance:
                 return 0.0
-            risk_amount = balance * (account.risk_percentage / 100)
+            if risk_percentage is None:
+                risk_percentage = account.risk_percentage
+            risk_amount = balance * (risk_percentage / 100)
             if getattr(account, 'risk_as_notional', False):
                 # 风险额度按名义金额（直接作为成本），则数量 = 名义金额 / 价格
                 position_size = risk_amount / price
@@ -364,11 +415,14 @@ class MultiExchangeClient:
         return round(position_size, 6)
     
     def place_market_order(self, account_name: str, symbol: str, side: str, 
-                          amount: float = None, stop_loss_price: float = None) -> Optional[Dict[str, Any]]:
+                          amount: float = None, stop_loss_price: float = None,
+                          current_price: float = None, leverage: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         下市价单
         如果 amount 为 None，自动计算仓位大小
         如果 stop_loss_price 不为 None，将在订单中附带止损价格（Bitget 专用）
+        如果 current_price 不为 None，直接使用该价格（调用方刚取过价格时省去一次行情请求）
+        如果 leverage 不为 None，本单按该杠杆（否则使用账户默认杠杆）
         """
         if account_name not in self.clients:
             logger.error(f"账户 {account_name} 不存在")
@@ -377,13 +431,15 @@ class MultiExchangeClient:
         client = self.clients[account_name]
         account = self.accounts[account_name]
         exchange_type = account.exchange_type.lower()
+        leverage = leverage or account.default_leverage
         
         try:
             # 转换为合约符号格式
             contract_symbol = self._convert_to_contract_symbol(client, symbol)
             
             # 获取当前价格
-            current_price = self.get_current_price(account_name, symbol)
+            if not current_price:
+                current_price = self.get_current_price(account_name, symbol)
             if not current_price or current_price <= 0:
                 logger.error(f"{account_name} - 无法获取有效价格")
                 return None
@@ -394,7 +450,7 @@ class MultiExchangeClient:
                     # 设置杠杆（Bitget合约必需）
                     retry_call(
                         client.set_leverage,
-                        account.default_leverage,
+                        leverage,
                         contract_symbol,
                         retries=2,
                         delay=0.5,
@@ -405,7 +461,7 @@ class MultiExchangeClient:
                             'productType': 'USDT-FUTURES'
                         }
                     )
-                    logger.debug(f"{account_name} - 已设置杠杆 {account.default_leverage}x")
+                    logger.debug(f"{account_name} - 已设置杠杆 {leverage}x")
                 except Exception as e:
                     # 如果杠杆已设置，会报错但不影响下单
                     logger.debug(f"{account_name} - 设置杠杆: {e}")
@@ -464,7 +520,7 @@ class MultiExchangeClient:
 
             # 最大允许成本 = 可用保证金 * 杠杆 * 安全缓冲
             safety_buffer = 0.98  # 留出手续费/滑点余量
-            max_cost_allowed = available_usdt * account.default_leverage * safety_buffer
+            max_cost_allowed = available_usdt * leverage * safety_buffer
 
             # 如果交易所有最小成本要求，且最大允许成本低于最小成本，则直接提示余额不足，避免无谓请求
             if min_cost and max_cost_allowed > 0 and max_cost_allowed < min_cost:
@@ -549,7 +605,7 @@ class MultiExchangeClient:
                         op=f"{account_name}.create_market_order",
                         params=params,
                     )
-                    logger.info(f"{account_name} - 订单已下: {('做多' if side=='buy' else '做空')} {contract_symbol}, 数量: {amount:.6f}, 名义: {notional:.2f} USDT, 杠杆: {account.default_leverage}x")
+                    logger.info(f"{account_name} - 订单已下: {('做多' if side=='buy' else '做空')} {contract_symbol}, 数量: {amount:.6f}, 名义: {notional:.2f} USDT, 杠杆: {leverage}x")
                     try:
                         log_struct(logger, logging.INFO, "order_placed", account=account_name, symbol=contract_symbol, side=side, type="market", amount=amount, price=current_price, order_id=(order.get('id') if isinstance(order, dict) else None))
                     except Exception:
@@ -617,7 +673,7 @@ class MultiExchangeClient:
                     elif '43012' in error_str:
                         # 🔁 余额不足/风控：递减重试，逐步降低数量
                         available_usdt = self.get_balance(account_name, 'USDT') or 0.0
-                        required_margin = (amount * current_price) / max(account.default_leverage, 1)
+                        required_margin = (amount * current_price) / max(leverage, 1)
                         logger.error(
                             f"{account_name} - 余额不足(43012): 目标名义 {(amount*current_price):.2f} USDT, 所需保证金约 {required_margin:.2f} USDT, 可用 {available_usdt:.2f} USDT"
                         )
@@ -955,10 +1011,14 @@ class MultiExchangeClient:
             logger.error(f"{account_name} - 获取持仓失败: {e}")
             return None
 
-    def list_open_positions(self, account_name: str) -> List[Dict[str, Any]]:
-        """列出账户当前所有持仓（仅返回有仓位的合约）"""
+    def list_open_positions(self, account_name: str, strict: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        列出账户当前所有持仓（仅返回有仓位的合约）
+
+        strict=True 时查询失败返回 None（区分“无持仓”与“查询失败”）
+        """
         if account_name not in self.clients:
-            return []
+            return None if strict else []
         client = self.clients[account_name]
         account = self.accounts.get(account_name)
         exchange_type = (account.exchange_type.lower() if account else '').strip()
@@ -987,12 +1047,24 @@ class MultiExchangeClient:
             return results
         except Exception as e:
             logger.error(f"{account_name} - 列出持仓失败: {e}")
-            return []
+            return None if strict else []
     
+    def _order_params(self, account_name: str) -> Dict[str, Any]:
+        """查询/撤销挂单的交易所特定参数"""
+        account = self.accounts.get(account_name)
+        exchange_type = (account.exchange_type.lower() if account else '').strip()
+        return {'productType': 'USDT-FUTURES', 'marginCoin': 'USDT'} if exchange_type == 'bitget' else {}
+
     def fetch_order_status(self, account_name: str, symbol: str, order_id: str) -> Optional[Dict[str, Any]]:
-        """查询订单状态，返回统一结构：{'status': 'open|closed|canceled', 'filled': float, 'remaining': float} """
+        """
+        查询订单状态，返回统一结构：{'status': 'open|closed|canceled', 'filled': float, 'remaining': float}
+        优先读取挂单快照；不在快照中的订单才直接查询，最终状态会被缓存
+        """
         if account_name not in self.clients:
             return None
+        cached = self.order_book.lookup(account_name, order_id)
+        if cached is not None:
+            return cached
         client = self.clients[account_name]
         try:
             contract_symbol = self._convert_to_contract_symbol(client, symbol)
@@ -1012,64 +1084,117 @@ class MultiExchangeClient:
                 log_struct(logger, logging.INFO, "order_status", account=account_name, symbol=contract_symbol, order_id=order_id, status=status, filled=filled, remaining=remaining)
             except Exception:
                 pass
-            return {
+            result = {
                 'status': status,
                 'filled': filled,
                 'remaining': remaining,
                 'info': order
             }
+            self.order_book.record_final(account_name, order_id, result)
+            return result
         except Exception as e:
             logger.debug(f"{account_name} - 查询订单状态失败: {e}")
             return None
 
+    def cancel_order(self, account_name: str, symbol: str, order_id: str) -> bool:
+        """撤销单个订单，成功后从订单簿移除"""
+        if account_name not in self.clients:
+            return False
+        client = self.clients[account_name]
+        try:
+            contract_symbol = self._convert_to_contract_symbol(client, symbol)
+            retry_call(
+                client.cancel_order,
+                order_id,
+                contract_symbol,
+                retries=2,
+                delay=0.5,
+                logger=logger,
+                op=f"{account_name}.cancel_order",
+                params=self._order_params(account_name),
+            )
+            self.order_book.remove(account_name, [order_id])
+            return True
+        except Exception as e:
+            logger.warning(f"{account_name} - 撤销订单 {order_id} 失败: {e}")
+            return False
+
     def cancel_open_reduce_only_orders(self, account_name: str, symbol: str) -> int:
         """取消该交易对的所有未成交 reduce-only 限价单（用于切换到价格型TP策略时清理回退挂单）。
+        挂单从订单簿读取（强制刷新一次批量快照），交易所支持时使用批量撤单接口。
         返回取消数量。
         """
         if account_name not in self.clients:
             return 0
         client = self.clients[account_name]
-        account = self.accounts.get(account_name)
-        exchange_type = (account.exchange_type.lower() if account else '').strip()
         cancelled = 0
         try:
             contract_symbol = self._convert_to_contract_symbol(client, symbol)
-            params = {'productType': 'USDT-FUTURES', 'marginCoin': 'USDT'} if exchange_type == 'bitget' else {}
-            open_orders = retry_call(
-                client.fetch_open_orders,
-                contract_symbol,
-                retries=3,
-                delay=0.6,
-                logger=logger,
-                op=f"{account_name}.fetch_open_orders",
-                params=params,
-            )
+            params = self._order_params(account_name)
+            open_orders = self.order_book.open_orders(account_name, contract_symbol, max_age=0)
+            if open_orders is None:
+                # 批量快照不可用（交易所不支持不带交易对查询等），回退为按交易对查询
+                open_orders = retry_call(
+                    client.fetch_open_orders,
+                    contract_symbol,
+                    retries=3,
+                    delay=0.6,
+                    logger=logger,
+                    op=f"{account_name}.fetch_open_orders",
+                    params=params,
+                )
+            order_ids = []
             for o in open_orders or []:
+                info = o.get('info') or {}
+                reduce_only = o.get('reduceOnly')
+                if reduce_only is None:
+                    # 尝试从原始字段判断
+                    reduce_only = bool(info.get('reduceOnly')) if isinstance(info.get('reduceOnly'), (bool, str)) else False
+                if reduce_only and o.get('id') is not None:
+                    order_ids.append(o.get('id'))
+            if not order_ids:
+                return 0
+
+            done = []
+            if len(order_ids) > 1 and (getattr(client, 'has', None) or {}).get('cancelOrders'):
                 try:
-                    info = o.get('info') or {}
-                    reduce_only = o.get('reduceOnly')
-                    if reduce_only is None:
-                        # 尝试从原始字段判断
-                        reduce_only = bool(info.get('reduceOnly')) if isinstance(info.get('reduceOnly'), (bool, str)) else False
-                    if reduce_only:
-                        retry_call(
-                            client.cancel_order,
-                            o.get('id'),
-                            contract_symbol,
-                            retries=2,
-                            delay=0.5,
-                            logger=logger,
-                            op=f"{account_name}.cancel_order",
-                            params=params,
-                        )
-                        cancelled += 1
-                        try:
-                            log_struct(logger, logging.INFO, "order_cancelled", account=account_name, symbol=contract_symbol, order_id=o.get('id'), reason="reduce_only_cleanup")
-                        except Exception:
-                            pass
+                    retry_call(
+                        client.cancel_orders,
+                        order_ids,
+                        contract_symbol,
+                        retries=2,
+                        delay=0.5,
+                        logger=logger,
+                        op=f"{account_name}.cancel_orders",
+                        params=params,
+                    )
+                    done = list(order_ids)
+                except Exception as be:
+                    logger.debug(f"{account_name} 批量撤单失败，改为逐个撤单: {be}")
+            for order_id in order_ids:
+                if order_id in done:
+                    continue
+                try:
+                    retry_call(
+                        client.cancel_order,
+                        order_id,
+                        contract_symbol,
+                        retries=2,
+                        delay=0.5,
+                        logger=logger,
+                        op=f"{account_name}.cancel_order",
+                        params=params,
+                    )
+                    done.append(order_id)
                 except Exception as ie:
                     logger.debug(f"{account_name} 取消订单失败: {ie}")
-                    continue
+            self.order_book.remove(account_name, done)
+            cancelled = len(done)
+            for order_id in done:
+                try:
+                    log_struct(logger, logging.INFO, "order_cancelled", account=account_name, symbol=contract_symbol, order_id=order_id, reason="reduce_only_cleanup")
+                except Exception:
+                    pass
         except Exception as e:
             logger.debug(f"{account_name} 获取/取消 open orders 失败: {e}")
         return cancelled
@@ -1153,6 +1278,9 @@ class MultiExchangeClient:
             client = self.clients[account_name]
             account = self.accounts[account_name]
             exchange_type = account.exchange_type.lower()
+            if getattr(client, 'paper', False):
+                # 模拟盘：触发单在本地撮合，统一走通用 stopLossPrice 下单
+                exchange_type = 'paper'
             
             # 转换为合约符号
             contract_symbol = self._convert_to_contract_symbol(client, symbol)
@@ -1508,6 +1636,9 @@ class MultiExchangeClient:
                 'reduceOnly': True,
                 'stopLossPrice': stop_price,
             }
+            if exchange_type in ('binance', 'binanceusdm'):
+                # 按标记价格触发，避免最新成交价插针误触发
+                params['workingType'] = 'MARK_PRICE'
             order = client.create_order(
                 symbol=contract_symbol,
                 type='market',
@@ -1529,6 +1660,144 @@ class MultiExchangeClient:
             logger.error(f"{account_name} 止损订单失败: {e}")
             return None
     
+    def amend_stop_loss_order(self, account_name: str, symbol: str, side: str, amount: float,
+                              stop_price: float, order_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        修改已挂出的止损单触发价
+
+        交易所支持原生改单（editOrder）时一次请求完成；否则撤销旧单后重新下止损单。
+        返回格式同 place_stop_loss_order，额外带 'amended': 'edit' | 'replace'
+        """
+        if account_name not in self.clients:
+            return None
+        client = self.clients[account_name]
+        contract_symbol = self._convert_to_contract_symbol(client, symbol)
+        has = getattr(client, 'has', None) or {}
+        if order_id and has.get('editOrder'):
+            try:
+                params = dict(self._order_params(account_name))
+                params.update({'stopLossPrice': stop_price, 'reduceOnly': True})
+                order = retry_call(
+                    client.edit_order,
+                    order_id,
+                    contract_symbol,
+                    'market',
+                    side,
+                    amount,
+                    None,
+                    retries=2,
+                    delay=0.5,
+                    logger=logger,
+                    op=f"{account_name}.edit_order",
+                    params=params,
+                )
+                self.amend_stats['edit'] += 1
+                new_id = (order.get('id') if isinstance(order, dict) else None) or order_id
+                if new_id != order_id:
+                    self.order_book.remove(account_name, [order_id])
+                self.order_book.invalidate(account_name)
+                return {'status': 'success', 'order_id': new_id, 'price': stop_price, 'amount': amount,
+                        'order': order, 'amended': 'edit'}
+            except Exception as e:
+                logger.debug(f"{account_name} - 原生改单失败，改为撤单重下: {e}")
+        if order_id and not self.cancel_order(account_name, symbol, order_id) \
+                and not self._order_gone(account_name, symbol, order_id):
+            # 旧止损单撤不掉且仍挂着（或已触发）：不再重下，避免同时挂两张止损单，由程序化止损接管
+            self.amend_stats['failed'] += 1
+            logger.warning(f"⚠ {account_name} - 撤销旧止损单 {order_id} 失败，未重下止损单: {symbol}")
+            return {'status': 'error', 'order_id': None, 'price': stop_price, 'amount': amount,
+                    'amended': None}
+        result = self.place_stop_loss_order(account_name, symbol, side, amount, stop_price)
+        if result and result.get('status') == 'success':
+            self.amend_stats['replace'] += 1
+            result['amended'] = 'replace'
+        else:
+            self.amend_stats['failed'] += 1
+        return result
+    
+    def _order_gone(self, account_name: str, symbol: str, order_id: str) -> bool:
+        """撤单失败后核对订单：已撤销/过期/被拒（不再挂在交易所且未成交）时返回 True"""
+        status = self.fetch_order_status(account_name, symbol, order_id)
+        return bool(status) and status.get('status') in ('canceled', 'cancelled', 'expired', 'rejected')
+
+    def supports_native_trailing(self, account_name: str) -> bool:
+        """账户是否支持交易所原生追踪止损单（模拟盘不支持）"""
+        client = self.clients.get(account_name)
+        if client is None or getattr(client, 'paper', False):
+            return False
+        account = self.accounts.get(account_name)
+        exchange_type = account.exchange_type.lower() if account else ''
+        if exchange_type in ('bitget', 'binance', 'binanceusdm'):
+            return True
+        return bool((getattr(client, 'has', None) or {}).get('createTrailingPercentOrder'))
+
+    def place_trailing_stop_order(self, account_name: str, symbol: str, side: str, amount: float,
+                                  callback_pct: float, activation_price: Optional[float] = None) -> Optional[Dict]:
+        """
+        下交易所原生追踪止损单（reduce-only，按标记价格触发）
+        Bitget 为 track_plan（移动止盈止损计划单），Binance 为 TRAILING_STOP_MARKET，
+        其余交易所使用 ccxt 统一的 trailingPercent 参数
+
+        Args:
+            side: 平仓方向（多仓为 'sell'）
+            callback_pct: 回调比例（百分比）
+            activation_price: 激活价（默认最新价；Bitget 必填）
+
+        Returns:
+            {'status': 'success', 'order_id', 'callback_pct', 'activation_price', 'native': True}，不支持或失败返回 None
+        """
+        if not self.supports_native_trailing(account_name):
+            return None
+        client = self.clients[account_name]
+        exchange_type = self.accounts[account_name].exchange_type.lower()
+        try:
+            contract_symbol = self._convert_to_contract_symbol(client, symbol)
+            try:
+                amount = float(client.amount_to_precision(contract_symbol, amount))
+            except Exception:
+                pass
+            params = {'reduceOnly': True, 'trailingPercent': float(callback_pct)}
+            if exchange_type == 'bitget':
+                if not activation_price:
+                    activation_price = self.get_cached_price(account_name, symbol) or self.get_current_price(account_name, symbol)
+                params.update({'marginCoin': 'USDT', 'productType': 'USDT-FUTURES', 'triggerType': 'mark_price'})
+            elif exchange_type in ('binance', 'binanceusdm'):
+                params['workingType'] = 'MARK_PRICE'
+            if activation_price:
+                try:
+                    activation_price = float(client.price_to_precision(contract_symbol, activation_price))
+                except Exception:
+                    pass
+                params['trailingTriggerPrice'] = activation_price
+            order = retry_call(
+                client.create_order,
+                contract_symbol,
+                'market',
+                side,
+                amount,
+                None,
+                retries=2,
+                delay=0.5,
+                logger=logger,
+                op=f"{account_name}.create_trailing_stop",
+                params=params,
+            )
+            order_id = order.get('id') if isinstance(order, dict) else None
+            logger.info(f"{account_name} - 原生追踪止损已下: {side} {amount} {contract_symbol} 回调 {callback_pct}%"
+                        + (f" 激活价 {activation_price}" if activation_price else ""))
+            try:
+                log_struct(logger, logging.INFO, "order_placed", account=account_name, symbol=contract_symbol, side=side,
+                           type="trailing_stop", amount=amount, callback_pct=callback_pct,
+                           activation_price=activation_price, order_id=order_id)
+            except Exception:
+                pass
+            self.order_book.invalidate(account_name)
+            return {'status': 'success', 'order_id': order_id, 'callback_pct': callback_pct,
+                    'activation_price': activation_price, 'native': True, 'order': order}
+        except Exception as e:
+            logger.warning(f"{account_name} - 原生追踪止损下单失败，保留程序追踪: {e}")
+            return None
+
     def place_take_profit_order(self, account_name: str, symbol: str, side: str, 
                                 amount: float, tp_price: float) -> Optional[Dict]:
         """
@@ -18,7 +18,10 @@ class ExchangeAccount:
                  default_leverage: int = 10, default_position_size: float = 0.01,
                  max_position_size: float = 0.1, risk_percentage: float = 1.0,
                  use_margin_amount: bool = False, margin_amount: float = 100.0,
-                 manual_contract_balance: float = 0.0, risk_as_notional: bool = False):
+                 manual_contract_balance: float = 0.0, risk_as_notional: bool = False,
+                 paper_trading: bool = False, paper_balance: float = 1000.0,
+                 max_signal_age_sec: float = 0.0, max_slippage_pct: float = 0.0,
+                 stale_action: str = 'skip', limit_entry_timeout_sec: float = 60.0):
         """
         Args:
             name: 账户名称（如 "币安主账户"）
@@ -34,6 +37,12 @@ class ExchangeAccount:
             risk_percentage: 风险百分比（账户余额的百分比）
             use_margin_amount: 是否使用固定保证金金额
             margin_amount: 固定保证金金额（USDT）
+            paper_trading: 模拟盘（真实行情、本地模拟成交，不需要 API Key）
+            paper_balance: 模拟盘初始余额（USDT）
+            max_signal_age_sec: 信号延迟预算（秒，从消息发送到下单），0 表示不限制
+            max_slippage_pct: 入场价不利滑点上限（百分比），0 表示不限制
+            stale_action: 超出预算时的处理：skip 跳过 / limit 改为入场价限价单 / shrink 按比例缩仓
+            limit_entry_timeout_sec: 改为限价单后等待成交的时间（秒），超时撤单
         """
         self.name = name
         self.exchange_type = exchange_type
@@ -50,6 +59,12 @@ class ExchangeAccount:
         self.margin_amount = margin_amount
         self.manual_contract_balance = manual_contract_balance
         self.risk_as_notional = risk_as_notional
+        self.paper_trading = paper_trading
+        self.paper_balance = paper_balance
+        self.max_signal_age_sec = max_signal_age_sec
+        self.max_slippage_pct = max_slippage_pct
+        self.stale_action = stale_action
+        self.limit_entry_timeout_sec = limit_entry_timeout_sec
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -69,6 +84,12 @@ class ExchangeAccount:
             'margin_amount': self.margin_amount,
             'manual_contract_balance': self.manual_contract_balance,
             'risk_as_notional': self.risk_as_notional,
+            'paper_trading': self.paper_trading,
+            'paper_balance': self.paper_balance,
+            'max_signal_age_sec': self.max_signal_age_sec,
+            'max_slippage_pct': self.max_slippage_pct,
+            'stale_action': self.stale_action,
+            'limit_entry_timeout_sec': self.limit_entry_timeout_sec,
         }
     
     @classmethod
@@ -78,7 +99,7 @@ class ExchangeAccount:
     
     def __repr__(self):
         status = "启用" if self.enabled else "禁用"
-        network = "测试网" if self.testnet else "正式网"
+        network = "模拟盘" if self.paper_trading else ("测试网" if self.testnet else "正式网")
         return f"<ExchangeAccount: {self.name} ({self.exchange_type}) - {status} - {network}>"
 
 class MultiExchangeConfig:
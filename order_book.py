@@ -0,0 +1,173 @@
+"""
+订单簿记录（order book of record）
+每个账户按固定间隔只做一次批量 fetch_open_orders（全部交易对），结果保存在内存；
+订单状态查询、reduce-only 挂单清理和止盈记账都从这里读取，避免逐单查询。
+不在快照中的订单（已成交/撤销或条件单）由调用方直接查询一次，最终状态缓存后不再查询
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable
+
+from retry_utils import retry_call
+
+logger = logging.getLogger(__name__)
+
+# 最终状态缓存上限（每个账户）
+_MAX_FINAL = 1000
+# 批量刷新失败（网络错误或交易所不支持不带交易对查询）后的退避时间（秒）
+_FAILURE_BACKOFF = 30.0
+
+
+class _AccountBook:
+    """单个账户的未成交订单快照"""
+
+    def __init__(self):
+        self.orders: Dict[str, Dict[str, Any]] = {}  # order_id -> ccxt order
+        self.updated: float = 0.0                     # 上次成功刷新时间（monotonic）
+        self.final: OrderedDict = OrderedDict()       # order_id -> 最终状态（closed/canceled）
+        self.retry_after: float = 0.0                 # 刷新失败后的退避截止时间
+        self.lock = threading.Lock()
+
+
+class OrderBookOfRecord:
+    """按账户维护的未成交订单簿（批量刷新，按需读取）"""
+
+    def __init__(self, clients: Callable[[], Dict[str, Any]], params_for: Optional[Callable[[str], Dict]] = None,
+                 refresh_interval: float = 3.0):
+        """
+        Args:
+            clients: 返回 {account_name: ccxt 客户端} 的函数
+            params_for: 返回账户 fetch_open_orders 额外参数的函数（如 Bitget 的 productType）
+            refresh_interval: 快照有效期（秒），期间内的查询不再请求交易所
+        """
+        self._clients = clients
+        self._params_for = params_for or (lambda account_name: {})
+        self.refresh_interval = refresh_interval
+        self._books: Dict[str, _AccountBook] = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _book(self, account_name: str) -> _AccountBook:
+        with self._lock:
+            book = self._books.get(account_name)
+            if book is None:
+                book = self._books[account_name] = _AccountBook()
+            return book
+
+    # ---------- 刷新 ----------
+
+    def refresh(self, account_name: str, max_age: Optional[float] = None) -> bool:
+        """
+        快照超过 max_age（默认 refresh_interval）时批量刷新一次
+
+        Returns:
+            bool: 快照是否可用（刷新失败且无有效快照时为 False）
+        """
+        book = self._book(account_name)
+        max_age = self.refresh_interval if max_age is None else max_age
+        with book.lock:
+            now = time.monotonic()
+            if book.updated and now - book.updated <= max_age:
+                return True
+            if now < book.retry_after:
+                return False
+            client = self._clients().get(account_name)
+            if client is None:
+                return False
+            try:
+                # Binance 等不带交易对查询全部挂单时默认会告警，这里本来就要批量查询
+                options = getattr(client, 'options', None)
+                if isinstance(options, dict):
+                    options['warnOnFetchOpenOrdersWithoutSymbol'] = False
+                orders = retry_call(
+                    client.fetch_open_orders,
+                    None,
+                    retries=2,
+                    delay=0.5,
+                    logger=logger,
+                    op=f"{account_name}.fetch_open_orders_all",
+                    params=self._params_for(account_name),
+                )
+            except Exception as e:
+                logger.debug(f"{account_name} 批量获取挂单失败: {e}")
+                book.updated = 0.0
+                book.retry_after = time.monotonic() + _FAILURE_BACKOFF
+                return False
+            self.fetches += 1
+            book.orders = {str(o.get('id')): o for o in orders or [] if o.get('id') is not None}
+            book.updated = time.monotonic()
+            return True
+
+    def invalidate(self, account_name: str):
+        """使账户快照失效（下单/撤单后下一次读取重新拉取）"""
+        book = self._book(account_name)
+        with book.lock:
+            book.updated = 0.0
+
+    # ---------- 读取 ----------
+
+    def lookup(self, account_name: str, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        从订单簿读取订单状态：{'status', 'filled', 'remaining', 'info'}
+
+        返回 None 表示订单簿无法判断（从未出现在快照中，如条件单；或刚从快照中消失），
+        调用方需直接查询一次，并用 record_final 缓存最终状态
+        """
+        order_id = str(order_id)
+        book = self._book(account_name)
+        with book.lock:
+            final = book.final.get(order_id)
+        if final is not None:
+            return final
+        if not self.refresh(account_name):
+            return None
+        with book.lock:
+            order = book.orders.get(order_id)
+            if order is None:
+                return None
+            return {
+                'status': 'open',
+                'filled': float(order.get('filled') or 0),
+                'remaining': float(order.get('remaining') or 0),
+                'info': order,
+            }
+
+    def record_final(self, account_name: str, order_id: str, result: Optional[Dict[str, Any]]):
+        """缓存订单的最终状态（closed/canceled），之后的查询不再请求交易所"""
+        if not result or result.get('status') not in ('closed', 'canceled', 'cancelled', 'expired', 'rejected'):
+            return
+        book = self._book(account_name)
+        with book.lock:
+            book.final[str(order_id)] = result
+            book.orders.pop(str(order_id), None)
+            while len(book.final) > _MAX_FINAL:
+                book.final.popitem(last=False)
+
+    def open_orders(self, account_name: str, symbol: Optional[str] = None,
+                    max_age: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """账户（或某交易对）的未成交订单；快照不可用时返回 None"""
+        if not self.refresh(account_name, max_age=max_age):
+            return None
+        book = self._book(account_name)
+        with book.lock:
+            orders = list(book.orders.values())
+        if symbol is None:
+            return orders
+        return [o for o in orders if o.get('symbol') == symbol]
+
+    def remove(self, account_name: str, order_ids: List[str], status: str = 'canceled'):
+        """撤单成功后从快照移除并记为最终状态"""
+        for order_id in order_ids:
+            self.record_final(account_name, order_id, {'status': status, 'filled': 0.0, 'remaining': 0.0, 'info': None})
+
+    def stats(self) -> Dict[str, Any]:
+        """订单簿统计"""
+        with self._lock:
+            books = dict(self._books)
+        return {
+            'fetches': self.fetches,
+            'accounts': {name: {'open': len(b.orders), 'final': len(b.final)} for name, b in books.items()},
+        }
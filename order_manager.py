@@ -4,16 +4,41 @@
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 
+from hot_log import HotPathLogger
+from position_state import PositionState, PositionStateStore, position_states
+from position_record import PositionRecord
+from trigger_index import TriggerIndex, ABOVE, BELOW, KIND_STOP_LOSS, KIND_BREAKEVEN, KIND_TRAILING
+from vector_evaluator import VectorEvaluator
+from exposure_index import ExposureIndex, exposure_index
+
 logger = logging.getLogger(__name__)
+# 监控循环使用的限频/采样/状态变化日志
+hot_log = HotPathLogger(logger)
 
 # 全局持仓管理器实例
 position_manager = None
 
+# 自适应监控节奏：下次检查时间 = 到最近触发价的距离 / (安全倍数 × 近期价格变动速度)
+MIN_CHECK_INTERVAL = 0.25      # 贴近触发价的持仓最短检查间隔（秒）
+MAX_CHECK_INTERVAL = 30.0      # 远离触发价的持仓最长检查间隔（秒）
+MONITOR_TICK = 1.0             # 监控循环最长休眠（新登记的持仓最迟在一个 tick 内被检查）
+FILL_CHECK_MIN_INTERVAL = 2.0  # 平仓检测（查询交易所持仓）的最短/最长间隔（秒）
+FILL_CHECK_MAX_INTERVAL = 30.0
+PRICE_SPEED_ALPHA = 0.2        # 价格变动速度 EWMA 系数
+MIN_PRICE_SPEED = 0.0002       # 价格变动速度下限（相对变化/秒），避免静默行情下间隔过长
+COALESCED_SAVE_INTERVAL = 10.0 # 合并（未改单）的止损移动落库的最短间隔（秒），间隔内的移动只更新内存
+CHECK_SAFETY_FACTOR = 4.0      # 安全倍数：按近期速度的若干倍估计最快到达时间
+
 class OrderType(Enum):
     """订单类型"""
     ENTRY = "entry"              # 入场订单
@@ -58,10 +83,46 @@ class TradePlan:
 class PositionManager:
     """持仓管理器"""
     
-    def __init__(self, exchange_client):
+    def __init__(self, exchange_client, state_store: Optional[PositionStateStore] = None,
+                 adaptive_cadence: bool = False, market_data=None, vectorized: bool = False,
+                 exposure: Optional[ExposureIndex] = None):
+        """
+        Args:
+            adaptive_cadence: 按到触发价的距离与近期波动安排每个持仓的检查时间（监控循环使用）；
+                关闭时每次 monitor_positions 都检查全部持仓
+            market_data: 行情总线（MarketDataBus），设置后价格经总线读取，与其他组件共享请求
+            vectorized: 按交易对分组，每组取一次价格并用向量化评估一次比较整组持仓（账户多时使用）
+            exposure: 跨账户敞口索引（登记/更新/移除持仓时同步名义价值），默认使用全局索引
+        """
         self.exchange = exchange_client
+        self.market_data = market_data
+        # 监控在总线轮询线程执行，下单/TP1 监控在事件循环或工作线程修改持仓，统一用可重入锁保护
+        self._lock = threading.RLock()
+        # 持锁处理触发期间推迟的交易所请求（改单、撤单、平仓），释放锁后由同一线程执行
+        self._deferred = threading.local()
         self.active_positions: Dict[str, Dict] = {}  # {account_name: {symbol: position_info}}
         self.active_orders: Dict[str, List] = {}  # {account_name: [orders]}
+        # 持仓生命周期状态存储（落库，重启后用 restore_state 恢复）
+        self.state_store = state_store if state_store is not None else position_states
+        # 触发价索引：每次价格更新只处理越过阈值的持仓
+        self.trigger_index = TriggerIndex()
+        self.exposure = exposure_index if exposure is None else exposure
+        # 向量化评估：与触发价索引同步维护的按交易对列式触发价
+        self.vector_evaluator = VectorEvaluator() if vectorized else None
+        self.evaluations = 0  # 实际进入触发处理的次数
+        # 交易所止损改单：sent 实际改单 / coalesced 未达步长或间隔而合并 / flushed 延后补发 /
+        # native_handover 追踪止损交给交易所原生追踪单
+        self.amend_stats = Counter()
+        self._pending_amends = set()  # 有未同步到交易所的止损改动的 (account_name, symbol)
+        self._unsaved_amends = set()  # 合并的止损移动尚未落库的 (account_name, symbol)
+        self._coalesced_saved_at: Dict[Tuple[str, str], float] = {}
+        # 自适应监控节奏：(account_name, symbol) -> 下次检查时间 / 检查间隔 / (上次价格, 时间, 变动速度)
+        self.adaptive_cadence = adaptive_cadence
+        self._next_check: Dict[Tuple[str, str], float] = {}
+        self._check_interval: Dict[Tuple[str, str], float] = {}
+        self._price_speed: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+        self._next_fill_check: Dict[Tuple[str, str], float] = {}
+        self.checks_skipped = 0  # 因未到检查时间而省下的取价次数
         
     def create_position_with_plan(self, account_name: str, trade_plan: TradePlan, 
                                   position_size: float) -> Dict[str, Any]:
@@ -130,22 +191,22 @@ class PositionManager:
             
             # 5. 记录持仓信息
             self._save_position_info(
-                account_name, trade_plan.symbol, {
-                    'entry_price': actual_price,
-                    'position_size': position_size,
-                    'side': trade_plan.side,
-                    'stop_loss': trade_plan.stop_loss,
-                    'take_profits': trade_plan.take_profits,
-                    'tp_portions': trade_plan.tp_portions,
-                    'trailing_stop_pct': trade_plan.trailing_stop_pct,
-                    'move_sl_to_breakeven': trade_plan.move_sl_to_breakeven,
-                    'stop_trailing_after_breakeven': getattr(trade_plan, 'stop_trailing_after_breakeven', False),
-                    'breakeven_trigger_pct': trade_plan.breakeven_trigger_pct,
-                    'highest_price': actual_price if trade_plan.side == 'buy' else None,
-                    'lowest_price': actual_price if trade_plan.side == 'sell' else None,
-                    'sl_moved_to_breakeven': False,
-                    'entry_time': datetime.now(),
-                }
+                account_name, trade_plan.symbol, PositionRecord(
+                    trade_plan.side,
+                    entry_price=actual_price,
+                    position_size=position_size,
+                    stop_loss=trade_plan.stop_loss,
+                    take_profits=trade_plan.take_profits,
+                    tp_portions=trade_plan.tp_portions,
+                    trailing_stop_pct=trade_plan.trailing_stop_pct,
+                    move_sl_to_breakeven=trade_plan.move_sl_to_breakeven,
+                    stop_trailing_after_breakeven=getattr(trade_plan, 'stop_trailing_after_breakeven', False),
+                    breakeven_trigger_pct=trade_plan.breakeven_trigger_pct,
+                    highest_price=actual_price if trade_plan.side == 'buy' else None,
+                    lowest_price=actual_price if trade_plan.side == 'sell' else None,
+                    sl_moved_to_breakeven=False,
+                    entry_time=datetime.now(),
+                )
             )
             
             logger.info(f"✓ {account_name} - 持仓创建成功: {trade_plan.symbol}")
@@ -240,48 +301,37 @@ class PositionManager:
             return False
         
         position = self.active_positions[account_name][symbol]
-        trailing_stop_pct = position.get('trailing_stop_pct')
+        factor = position.trailing_factor
         
-        if not trailing_stop_pct:
+        if factor is None or position.native_trailing_order_id:
+            # 未启用追踪，或已交给交易所原生追踪单时不再程序追踪
             return False
         
-        side = position['side']
-        entry_price = position['entry_price']
-        current_sl = position.get('stop_loss')
+        current_sl = position.stop_loss
         
         try:
-            if side == 'buy':
+            if position.is_long:
                 # 做多：追踪最高价
-                highest = position.get('highest_price', entry_price)
+                highest = position.extreme_price()
                 if current_price > highest:
-                    position['highest_price'] = current_price
-                    highest = current_price
+                    position.highest_price = highest = current_price
                 
-                # 计算新的止损价格
-                new_sl = highest * (1 - trailing_stop_pct / 100.0)
-                
-                # 只有当新止损高于当前止损时才更新
+                # 计算新的止损价格，只有当新止损高于当前止损时才更新
+                new_sl = highest * factor
                 if not current_sl or new_sl > current_sl:
-                    self._update_stop_loss_order(account_name, symbol, new_sl, position['position_size'])
-                    position['stop_loss'] = new_sl
-                    logger.info(f"✓ {account_name} - 追踪止损已更新: {symbol} @ {new_sl:.2f}")
+                    self._trail_stop_to(account_name, symbol, position, new_sl, current_sl)
                     return True
             
             else:  # sell
                 # 做空：追踪最低价
-                lowest = position.get('lowest_price', entry_price)
+                lowest = position.extreme_price()
                 if current_price < lowest:
-                    position['lowest_price'] = current_price
-                    lowest = current_price
-                
-                # 计算新的止损价格
-                new_sl = lowest * (1 + trailing_stop_pct / 100.0)
+                    position.lowest_price = lowest = current_price
                 
-                # 只有当新止损低于当前止损时才更新
+                # 计算新的止损价格，只有当新止损低于当前止损时才更新
+                new_sl = lowest * factor
                 if not current_sl or new_sl < current_sl:
-                    self._update_stop_loss_order(account_name, symbol, new_sl, position['position_size'])
-                    position['stop_loss'] = new_sl
-                    logger.info(f"✓ {account_name} - 追踪止损已更新: {symbol} @ {new_sl:.2f}")
+                    self._trail_stop_to(account_name, symbol, position, new_sl, current_sl)
                     return True
         
         except Exception as e:
@@ -307,87 +357,414 @@ class PositionManager:
         
         position = self.active_positions[account_name][symbol]
         
-        if not position.get('move_sl_to_breakeven'):
-            return False
+        if not position.move_sl_to_breakeven or position.sl_moved_to_breakeven:
+            return False  # 未启用或已经移动过了
         
-        if position.get('sl_moved_to_breakeven'):
-            return False  # 已经移动过了
-        
-        entry_price = position['entry_price']
-        side = position['side']
-        trigger_pct = position.get('breakeven_trigger_pct', 1.0)
+        trigger_price = position.breakeven_price
+        if trigger_price is None:
+            return False
         
         try:
-            # 检查是否达到触发条件
-            if side == 'buy':
-                profit_pct = ((current_price - entry_price) / entry_price) * 100
-                if profit_pct >= trigger_pct:
-                    # 移动止损到入场价（或略高一点以覆盖手续费）
-                    new_sl = entry_price * 1.001  # +0.1% 覆盖手续费
-                    self._update_stop_loss_order(account_name, symbol, new_sl, position['position_size'])
-                    position['stop_loss'] = new_sl
-                    position['sl_moved_to_breakeven'] = True
-                    logger.info(f"✓ {account_name} - 止损已移至盈亏平衡: {symbol} @ {new_sl:.2f}")
-                    return True
-            
-            else:  # sell
-                profit_pct = ((entry_price - current_price) / entry_price) * 100
-                if profit_pct >= trigger_pct:
-                    new_sl = entry_price * 0.999  # -0.1% 覆盖手续费
-                    self._update_stop_loss_order(account_name, symbol, new_sl, position['position_size'])
-                    position['stop_loss'] = new_sl
-                    position['sl_moved_to_breakeven'] = True
-                    logger.info(f"✓ {account_name} - 止损已移至盈亏平衡: {symbol} @ {new_sl:.2f}")
-                    return True
+            # 检查是否达到触发价（按方向预先算好的保本触发价）
+            if position.is_long:
+                if current_price < trigger_price:
+                    return False
+                # 移动止损到入场价（或略高一点以覆盖手续费）
+                new_sl = position.entry_price * 1.001  # +0.1% 覆盖手续费
+            else:
+                if current_price > trigger_price:
+                    return False
+                new_sl = position.entry_price * 0.999  # -0.1% 覆盖手续费
+            self._request_stop_amend(account_name, symbol, position, new_sl, force=True)
+            position.stop_loss = new_sl
+            self.state_store.transition(account_name, symbol, position, PositionState.BREAKEVEN,
+                                        sl_moved_to_breakeven=True)
+            if position.stop_trailing_after_breakeven:
+                self._cancel_native_trailing(account_name, symbol, position)
+            logger.info(f"✓ {account_name} - 止损已移至盈亏平衡: {symbol} @ {new_sl:.2f}")
+            return True
         
         except Exception as e:
             logger.error(f"✗ {account_name} - 移动止损到盈亏平衡失败: {e}")
         
         return False
     
+    def hand_over_trailing(self, account_name: str, symbol: str) -> bool:
+        """
+        把追踪止损交给交易所原生追踪单（Bitget 移动止盈止损计划单 / Binance TRAILING_STOP_MARKET），
+        之后程序不再逐笔追踪、也不再为追踪改单；交易所侧止损单与程序化止损仍保留为底线。
+        交易所或账户不支持、下单失败时返回 False，继续由程序追踪
+
+        Returns:
+            bool: 是否已交给交易所
+        """
+        position = self.get_position_info(account_name, symbol)
+        if position is None or not position.get('trailing_stop_pct') or not position.get('trailing_native'):
+            return False
+        if position.get('native_trailing_order_id'):
+            return True
+        if position.get('stop_trailing_after_breakeven') and position.get('sl_moved_to_breakeven'):
+            return False
+        place = getattr(self.exchange, 'place_trailing_stop_order', None)
+        if place is None:
+            return False
+        close_side = 'sell' if position['side'] == 'buy' else 'buy'
+        result = place(account_name, symbol, close_side, position['position_size'],
+                       float(position['trailing_stop_pct']))
+        if not isinstance(result, dict) or result.get('status') != 'success':
+            return False
+        self.update_position(account_name, symbol, native_trailing_order_id=result.get('order_id') or 'native',
+                             native_trailing_activation=result.get('activation_price'))
+        self._pending_amends.discard((account_name, symbol))
+        self.amend_stats['native_handover'] += 1
+        logger.info(f"✓ {account_name} - 追踪止损已交给交易所: {symbol} 回调 {position['trailing_stop_pct']}%")
+        return True
+
+    def _cancel_native_trailing(self, account_name: str, symbol: str, position: Dict):
+        """撤销交易所原生追踪单（保本后停止追踪、平仓时）"""
+        order_id = position.get('native_trailing_order_id')
+        if not order_id:
+            return
+        position['native_trailing_order_id'] = None
+        self._defer(self._cancel_exchange_order, account_name, symbol, order_id, '追踪止损')
+
+    def _cancel_exchange_order(self, account_name: str, symbol: str, order_id: str, label: str):
+        """撤销交易所挂单（失败只记录日志）"""
+        try:
+            cancel = getattr(self.exchange, 'cancel_order', None)
+            if cancel is not None and order_id != 'native':
+                cancel(account_name, symbol, order_id)
+            logger.info(f"✓ {account_name} - 已撤销交易所{label}: {symbol}")
+        except Exception as e:
+            logger.warning(f"⚠ {account_name} - 撤销交易所{label}失败 {symbol}: {e}")
+
+    def _defer(self, action, *args):
+        """持锁处理触发期间把交易所请求推迟到释放锁后执行；不在 _deferring 块内时直接执行并返回结果"""
+        actions = getattr(self._deferred, 'actions', None)
+        if actions is None:
+            return action(*args)
+        actions.append((action, args))
+        return None
+
+    @contextmanager
+    def _deferring(self):
+        """
+        收集块内推迟的交易所请求，块结束后依次执行；调用方在块内加锁、块结束前释放锁，
+        阻塞的交易所请求（改单重试、撤单重下、平仓）不会占住锁，事件循环登记/更新持仓不被卡住
+        """
+        if getattr(self._deferred, 'actions', None) is not None:
+            yield
+            return
+        self._deferred.actions = actions = []
+        try:
+            yield
+        finally:
+            self._deferred.actions = None
+            for action, args in actions:
+                try:
+                    action(*args)
+                except Exception as e:
+                    logger.error(f"执行交易所请求失败 {getattr(action, '__name__', action)}: {e}")
+
+    def _trail_stop_to(self, account_name: str, symbol: str, position: Dict, new_sl: float,
+                       previous_sl: Optional[float]):
+        """追踪止损上移/下移：内存中的程序化止损立即生效，交易所改单与落库按步长和间隔合并"""
+        position.stop_loss = new_sl
+        if position.sl_amended_price is None:
+            position.sl_amended_price = previous_sl
+        if self._request_stop_amend(account_name, symbol, position, new_sl):
+            logger.info("✓ %s - 追踪止损已更新: %s @ %.2f", account_name, symbol, new_sl)
+        else:
+            logger.debug("%s - 追踪止损 %s @ %.4f 未达改单步长/间隔，暂不同步", account_name, symbol, new_sl)
+
+    def _tick_size(self, account_name: str, symbol: str) -> Optional[float]:
+        """交易对价格最小变动单位（取自市场精度，本地查询）"""
+        try:
+            client = self.exchange.clients.get(account_name)
+            precision = client.market(symbol).get('precision', {}).get('price')
+            if precision is None:
+                return None
+            return 10 ** -precision if isinstance(precision, int) else float(precision)
+        except Exception:
+            return None
+
+    def _amend_due(self, account_name: str, symbol: str, position: Dict, new_sl: float) -> bool:
+        """相对上次同步到交易所的止损，改动是否达到最小步长且超过最小间隔"""
+        last = position.sl_amended_price
+        if not last:
+            return True
+        step = abs(new_sl - last)
+        min_pct = position.trailing_min_step_pct
+        if min_pct and step / last * 100.0 < min_pct:
+            return False
+        min_ticks = position.trailing_min_step_ticks
+        if min_ticks:
+            tick = self._tick_size(account_name, symbol)
+            if tick and step < min_ticks * tick * (1 - 1e-9):
+                return False
+        min_interval = position.trailing_min_amend_sec
+        last_at = position.sl_amended_at
+        if min_interval and last_at and time.time() - last_at < min_interval:
+            return False
+        return True
+
+    def _request_stop_amend(self, account_name: str, symbol: str, position: Dict, new_sl: float,
+                            force: bool = False) -> bool:
+        """
+        把止损同步到交易所（程序化止损只更新内存）并落库；合并的改动同样落库
+
+        Args:
+            force: 忽略步长与间隔（保本等一次性移动）
+
+        Returns:
+            bool: 是否已同步；未同步的改动记为待发，下个监控周期满足条件后补发
+        """
+        key = (account_name, symbol)
+        if not force and not self._amend_due(account_name, symbol, position, new_sl):
+            self._pending_amends.add(key)
+            self.amend_stats['coalesced'] += 1
+            # 交易所改单合并，但内存中的程序化止损已移动；按间隔节流落库，重启恢复到较新的止损
+            self._unsaved_amends.add(key)
+            self._save_coalesced(account_name, symbol, position)
+            return False
+        self._defer(self._update_stop_loss_order, account_name, symbol, new_sl, position.position_size)
+        position.sl_amended_price = new_sl
+        position.sl_amended_at = time.time()
+        self._pending_amends.discard(key)
+        self._unsaved_amends.discard(key)
+        self._coalesced_saved_at.pop(key, None)
+        self.amend_stats['sent'] += 1
+        self.state_store.save(account_name, symbol, position)
+        return True
+
+    def _save_coalesced(self, account_name: str, symbol: str, position: PositionRecord,
+                        now: Optional[float] = None):
+        """合并的止损移动落库（同一持仓两次落库至少间隔 COALESCED_SAVE_INTERVAL 与最小改单间隔的较大者）"""
+        key = (account_name, symbol)
+        now = time.time() if now is None else now
+        interval = max(position.trailing_min_amend_sec or 0.0, COALESCED_SAVE_INTERVAL)
+        if now - self._coalesced_saved_at.get(key, 0.0) < interval:
+            return
+        self._coalesced_saved_at[key] = now
+        self._unsaved_amends.discard(key)
+        self.state_store.save(account_name, symbol, position)
+
+    def flush_state(self) -> int:
+        """把尚未落库的合并止损移动全部落库（停止监控/退出时调用），返回落库条数"""
+        count = 0
+        with self._lock:
+            for account_name, symbol in list(self._unsaved_amends):
+                position = self.get_position_info(account_name, symbol)
+                if position is not None:
+                    self.state_store.save(account_name, symbol, position)
+                    count += 1
+            self._unsaved_amends.clear()
+        return count
+
+    def _flush_pending_amends(self):
+        """补发之前被合并、现已满足步长与间隔的止损改动"""
+        with self._lock:
+            pending = list(self._pending_amends)
+        for account_name, symbol in pending:
+            with self._deferring(), self._lock:
+                position = self.get_position_info(account_name, symbol)
+                if position is None or not position.stop_loss:
+                    self._pending_amends.discard((account_name, symbol))
+                    continue
+                if position.stop_loss == position.sl_amended_price:
+                    self._pending_amends.discard((account_name, symbol))
+                    continue
+                if self._amend_due(account_name, symbol, position, position.stop_loss):
+                    self._request_stop_amend(account_name, symbol, position, position.stop_loss, force=True)
+                    self.amend_stats['flushed'] += 1
+                elif (account_name, symbol) in self._unsaved_amends:
+                    # 价格不再推动止损时，最后一次移动也会在节流间隔后落库
+                    self._save_coalesced(account_name, symbol, position)
+
+    def get_amend_stats(self) -> Dict[str, int]:
+        """止损改单统计（sent / coalesced / flushed），coalesced 即节省的改单请求数"""
+        return dict(self.amend_stats)
+
     def _update_stop_loss_order(self, account_name: str, symbol: str,
                                new_sl_price: float, amount: float):
-        """更新止损订单（取消旧的，创建新的）- 在程序化止损模式下只更新内存"""
+        """更新止损：交易所侧止损单走原生改单（不支持时撤单重下）；程序化止损只更新内存"""
         try:
-            # 对于程序化止损，只需要更新内存中的止损价格即可
-            # 不需要实际挂订单，因为程序会监控价格并自动平仓
             position = self.active_positions.get(account_name, {}).get(symbol)
-            if position and position.get('stop_loss'):
-                logger.info(f"✓ {account_name} - 程序化止损价格已更新: {symbol} @ {new_sl_price:.4f}")
+            order_id = position.get('sl_order_id') if position else None
+            amend = getattr(self.exchange, 'amend_stop_loss_order', None)
+            if not order_id or amend is None:
+                # 程序化止损：程序监控价格并自动平仓，不需要实际挂订单
+                logger.info("✓ %s - 程序化止损价格已更新: %s @ %.4f", account_name, symbol, new_sl_price)
                 return {'status': 'updated', 'price': new_sl_price}
             
-            # 如果不是程序化止损模式，尝试挂实际订单
-            client = self.exchange.clients.get(account_name)
-            if not client:
-                return
-            
-            # 取消现有的止损订单
-            # 注意：实际实现中需要记录订单ID来取消
-            # 这里简化处理
-            
-            # 创建新的止损订单
-            side = self.active_positions[account_name][symbol]['side']
-            sl_side = 'sell' if side == 'buy' else 'buy'
-            
-            order = client.create_order(
-                symbol=symbol,
-                type='stop_market',
-                side=sl_side,
-                amount=amount,
-                params={'stopPrice': new_sl_price}
-            )
-            
-            return order
+            sl_side = 'sell' if position['side'] == 'buy' else 'buy'
+            # 改单（含重试、撤单重下）不持锁，只在回写订单号时加锁
+            result = amend(account_name, symbol, sl_side, amount, new_sl_price, order_id=order_id)
+            if isinstance(result, dict) and result.get('status') == 'success':
+                new_order_id = result.get('order_id') or order_id
+                logger.info("✓ %s - 交易所止损已改单(%s): %s @ %.4f", account_name, result.get('amended'), symbol, new_sl_price)
+            else:
+                # 改单失败（或交易所退回程序化止损）：由程序化止损接管
+                new_order_id = None
+                logger.warning(f"⚠ {account_name} - 交易所止损改单失败，改由程序化止损监控: {symbol}")
+            with self._lock:
+                if new_order_id != order_id and self.get_position_info(account_name, symbol) is position:
+                    position['sl_order_id'] = new_order_id
+                    self.state_store.save(account_name, symbol, position)
+            return result
             
         except Exception as e:
             logger.error(f"更新止损订单失败: {e}")
     
     def _save_position_info(self, account_name: str, symbol: str, position_info: Dict):
-        """保存持仓信息"""
-        if account_name not in self.active_positions:
-            self.active_positions[account_name] = {}
-        
-        self.active_positions[account_name][symbol] = position_info
+        """保存持仓信息（字典会转为 PositionRecord）"""
+        if not isinstance(position_info, PositionRecord):
+            position_info = PositionRecord.from_dict(position_info)
+        with self._lock:
+            if account_name not in self.active_positions:
+                self.active_positions[account_name] = {}
+            
+            self.active_positions[account_name][symbol] = position_info
+            self.state_store.save(account_name, symbol, position_info)
+            self._reindex(account_name, symbol)
+            self._track_exposure(account_name, symbol, position_info)
+        self._invalidate_market_position(account_name, symbol)
+    
+    def update_position(self, account_name: str, symbol: str, state: Optional[PositionState] = None,
+                        **updates) -> bool:
+        """
+        更新持仓字段（止损价、保本标记等）并推进状态；所有外部修改都应经过这里，
+        以便同步落库与触发价索引
+
+        Returns:
+            bool: 持仓是否存在
+        """
+        with self._lock:
+            info = self.get_position_info(account_name, symbol)
+            if info is None:
+                return False
+            if state is None:
+                info.update(updates)
+                self.state_store.save(account_name, symbol, info)
+            else:
+                self.state_store.transition(account_name, symbol, info, state, **updates)
+            self._reindex(account_name, symbol)
+            if 'position_size' in updates or 'entry_price' in updates:
+                self._track_exposure(account_name, symbol, info)
+            return True
+
+    def _track_exposure(self, account_name: str, symbol: str, info: PositionRecord):
+        """按持仓数量 × 开仓价更新跨账户敞口索引"""
+        try:
+            self.exposure.set(account_name, symbol, info.side,
+                              (info.position_size or 0.0) * (info.entry_price or 0.0))
+        except Exception as e:
+            logger.debug(f"更新敞口索引失败 {account_name} {symbol}: {e}")
+    
+    @staticmethod
+    def _trigger_levels(position: PositionRecord) -> List[Tuple[str, float, str]]:
+        """持仓的触发价：程序化止损、保本触发价、追踪止损极值价（交给交易所追踪时不登记）"""
+        levels = []
+        is_long = position.is_long
+        stop_loss = position.stop_loss
+        if stop_loss:
+            levels.append((BELOW if is_long else ABOVE, stop_loss, KIND_STOP_LOSS))
+        if position.move_sl_to_breakeven and not position.sl_moved_to_breakeven and position.breakeven_price:
+            levels.append((ABOVE if is_long else BELOW, position.breakeven_price, KIND_BREAKEVEN))
+        if position.trailing_factor is not None and not position.native_trailing_order_id and not (
+                position.stop_trailing_after_breakeven and position.sl_moved_to_breakeven):
+            # 已有止损时，只有价格创出新极值才可能上调/下调止损；无止损时任何价格都要处理
+            extreme = position.extreme_price()
+            if is_long:
+                levels.append((ABOVE, extreme if (stop_loss and extreme) else 0.0, KIND_TRAILING))
+            else:
+                levels.append((BELOW, extreme if (stop_loss and extreme) else math.inf, KIND_TRAILING))
+        return levels
+    
+    def _reindex(self, account_name: str, symbol: str):
+        """按持仓当前字段重建其触发价（触发价变化后下个监控周期立即检查）"""
+        info = self.get_position_info(account_name, symbol)
+        if info is None:
+            self.trigger_index.remove(account_name, symbol)
+            if self.vector_evaluator is not None:
+                self.vector_evaluator.remove(account_name, symbol)
+        else:
+            levels = self._trigger_levels(info)
+            self.trigger_index.update(account_name, symbol, levels)
+            if self.vector_evaluator is not None:
+                self.vector_evaluator.update(account_name, symbol, info.is_long, levels)
+        self._next_check.pop((account_name, symbol), None)
+
+    def _forget_schedule(self, account_name: str, symbol: str):
+        key = (account_name, symbol)
+        for table in (self._next_check, self._check_interval, self._price_speed, self._next_fill_check):
+            table.pop(key, None)
+
+    def _observe_price(self, account_name: str, symbol: str, price: float, now: float) -> float:
+        """更新持仓的价格变动速度 EWMA（相对变化/秒），返回当前估计"""
+        key = (account_name, symbol)
+        last = self._price_speed.get(key)
+        speed = MIN_PRICE_SPEED
+        if last is not None:
+            last_price, last_at, speed = last
+            dt = now - last_at
+            if dt > 0 and last_price:
+                sample = abs(price - last_price) / last_price / dt
+                speed = (1 - PRICE_SPEED_ALPHA) * speed + PRICE_SPEED_ALPHA * sample
+        self._price_speed[key] = (price, now, speed)
+        return max(speed, MIN_PRICE_SPEED)
+
+    def _trigger_distance(self, account_name: str, symbol: str, price: float) -> float:
+        """当前价到最近触发价的相对距离（已越过或无条件触发为 0）"""
+        nearest = math.inf
+        for direction, level, _ in self.trigger_index.levels_of(account_name, symbol):
+            if not math.isfinite(level) or level <= 0:
+                return 0.0
+            gap = (level - price) if direction == ABOVE else (price - level)
+            nearest = min(nearest, max(gap, 0.0) / price)
+        return nearest
+
+    def _schedule_check(self, account_name: str, symbol: str, price: float, now: float) -> float:
+        """按到最近触发价的距离与近期价格变动速度安排下次检查，返回间隔（秒）"""
+        speed = self._observe_price(account_name, symbol, price, now)
+        distance = self._trigger_distance(account_name, symbol, price)
+        interval = distance / (CHECK_SAFETY_FACTOR * speed) if math.isfinite(distance) else MAX_CHECK_INTERVAL
+        interval = min(max(interval, MIN_CHECK_INTERVAL), MAX_CHECK_INTERVAL)
+        key = (account_name, symbol)
+        self._check_interval[key] = interval
+        self._next_check[key] = now + interval
+        return interval
+
+    def _fetch_price(self, account_name: str, symbol: str) -> Optional[float]:
+        """当前价格：有行情总线时经总线读取（与其他组件共享请求），否则直接请求交易所"""
+        if self.market_data is not None:
+            return self.market_data.get_price(account_name, symbol, max_age=MIN_CHECK_INTERVAL)
+        return self.exchange.get_current_price(account_name, symbol)
+
+    def next_monitor_delay(self, now: Optional[float] = None) -> float:
+        """监控循环应休眠的秒数：到最早一个持仓的检查时间，不超过一个 tick"""
+        now = time.monotonic() if now is None else now
+        if not self._next_check:
+            return MONITOR_TICK
+        delay = min(self._next_check.values()) - now
+        return min(max(delay, MIN_CHECK_INTERVAL), MONITOR_TICK)
+
+    def fill_checks_due(self, now: Optional[float] = None) -> List[Tuple[str, str, Dict]]:
+        """
+        到期需要核对交易所持仓（是否已被止损/止盈平掉）的持仓，并安排下次核对：
+        间隔取价格检查间隔的两倍，贴近触发价的持仓核对得更勤
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            for account_name, symbol, info in self.iter_active_positions():
+                key = (account_name, symbol)
+                if now < self._next_fill_check.get(key, 0.0):
+                    continue
+                interval = 2 * self._check_interval.get(key, FILL_CHECK_MIN_INTERVAL)
+                self._next_fill_check[key] = now + min(max(interval, FILL_CHECK_MIN_INTERVAL), FILL_CHECK_MAX_INTERVAL)
+                due.append((account_name, symbol, info))
+        return due
     
     def _get_order_price(self, order: Dict, fallback_price: Optional[float]) -> float:
         """从订单中获取成交价格"""
@@ -404,19 +781,54 @@ class PositionManager:
         return None
 
     def iter_active_positions(self):
-        """遍历所有活跃持仓，产出 (account_name, symbol, position_info)"""
-        for account_name, positions in self.active_positions.items():
-            for symbol, info in positions.items():
-                yield account_name, symbol, info
+        """遍历所有活跃持仓（加锁取快照），产出 (account_name, symbol, position_info)"""
+        with self._lock:
+            snapshot = [(account_name, symbol, info)
+                        for account_name, positions in self.active_positions.items()
+                        for symbol, info in positions.items()]
+        yield from snapshot
 
     def remove_position(self, account_name: str, symbol: str):
-        """移除持仓记录（用于检测到已完全平仓后清理内存状态）"""
+        """移除持仓记录并撤销其交易所挂单（用于检测到已完全平仓后清理内存状态）"""
         try:
-            if account_name in self.active_positions and symbol in self.active_positions[account_name]:
-                del self.active_positions[account_name][symbol]
+            if self._drop_position(account_name, symbol) is not None:
                 logger.info(f"✓ {account_name} - 已移除持仓记录: {symbol}")
         except Exception as e:
             logger.debug(f"移除持仓记录失败 {account_name} {symbol}: {e}")
+
+    def _drop_position(self, account_name: str, symbol: str) -> Optional[Dict]:
+        """
+        从内存、触发价索引与监控节奏中移除持仓并标记为已平仓，释放锁后撤销其仍挂在交易所的
+        追踪止损、止损与止盈单（避免残留挂单在之后的同向持仓上误触发），返回移除的持仓信息
+        """
+        with self._lock:
+            info = self.active_positions.get(account_name, {}).pop(symbol, None)
+            if info is None:
+                return None
+            self.trigger_index.remove(account_name, symbol)
+            if self.vector_evaluator is not None:
+                self.vector_evaluator.remove(account_name, symbol)
+            self._pending_amends.discard((account_name, symbol))
+            self._unsaved_amends.discard((account_name, symbol))
+            self._coalesced_saved_at.pop((account_name, symbol), None)
+            self._forget_schedule(account_name, symbol)
+            self.exposure.remove(account_name, symbol)
+            self.state_store.mark_closed(account_name, symbol, info)
+            orders = [(info.native_trailing_order_id, '追踪止损'), (info.sl_order_id, '止损单'),
+                      (info.tp1_order_id, '止盈单')]
+        for order_id, label in orders:
+            if order_id:
+                self._defer(self._cancel_exchange_order, account_name, symbol, order_id, label)
+        hot_log.forget(('kinds', account_name, symbol), ('price_fail', account_name, symbol),
+                       ('monitor_error', account_name, symbol))
+        self._invalidate_market_position(account_name, symbol)
+        return info
+
+    def _invalidate_market_position(self, account_name: str, symbol: str):
+        """持仓登记/移除后，行情总线中缓存的交易所持仓已过时"""
+        if self.market_data is not None:
+            from market_data_bus import TOPIC_POSITION
+            self.market_data.invalidate(TOPIC_POSITION, (account_name, symbol))
     
     def close_position(self, account_name: str, symbol: str) -> bool:
         """关闭持仓"""
@@ -424,13 +836,8 @@ class PositionManager:
             # 平仓
             result = self.exchange.close_position(account_name, symbol)
             
-            # 取消所有相关订单
-            # TODO: 实现取消订单逻辑
-            
-            # 移除持仓记录
-            if account_name in self.active_positions:
-                if symbol in self.active_positions[account_name]:
-                    del self.active_positions[account_name][symbol]
+            # 移除持仓记录并撤销相关挂单（追踪止损、止损、止盈）
+            self._drop_position(account_name, symbol)
             
             logger.info(f"✓ {account_name} - 持仓已关闭: {symbol}")
             return result
@@ -439,59 +846,221 @@ class PositionManager:
             logger.error(f"✗ {account_name} - 关闭持仓失败: {e}")
             return False
     
-    def monitor_positions(self):
-        """监控所有持仓，更新追踪止损、移动止损和程序化止损"""
+    def restore_state(self, prune_days: int = 7) -> List[Tuple[str, str, Dict]]:
+        """
+        启动时从本地状态恢复持仓（崩溃/重启后继续追踪止损与程序化止损）
+
+        每个账户只调用一次批量持仓查询核对：交易所仍有仓位的恢复到内存（数量以交易所为准），
+        已无仓位的标记为已平仓；查询失败或账户未连接时保留本地状态，下次启动再核对
+
+        Returns:
+            恢复的持仓列表 [(account_name, symbol, position_info)]
+        """
+        by_account: Dict[str, List[Tuple[str, Dict]]] = {}
+        for account_name, symbol, info in self.state_store.load_open():
+            by_account.setdefault(account_name, []).append((symbol, info))
+
+        restored: List[Tuple[str, str, Dict]] = []
+        for account_name, items in by_account.items():
+            if account_name not in getattr(self.exchange, 'clients', {}):
+                logger.info(f"⏭ {account_name} 未连接，暂不恢复 {len(items)} 个持仓状态")
+                continue
+            try:
+                opens = self.exchange.list_open_positions(account_name, strict=True)
+            except Exception as e:
+                logger.warning(f"⚠ {account_name} 批量持仓查询失败，按本地状态恢复: {e}")
+                opens = None
+            open_map = None
+            if opens is not None:
+                open_map = {str(p.get('symbol') or '').split(':')[0]: p for p in opens}
+            for symbol, info in items:
+                live = open_map.get(symbol.split(':')[0]) if open_map is not None else None
+                if open_map is not None and live is None:
+                    self.state_store.mark_closed(account_name, symbol, info)
+                    logger.info(f"✓ {account_name} {symbol} 已无持仓，状态标记为已平仓")
+                    continue
+                if live is not None:
+                    try:
+                        info['position_size'] = float(live.get('contracts') or info.get('position_size') or 0.0)
+                    except Exception:
+                        pass
+                info = PositionRecord.from_dict(info)
+                self.active_positions.setdefault(account_name, {})[symbol] = info
+                self.state_store.save(account_name, symbol, info)
+                self._reindex(account_name, symbol)
+                self._track_exposure(account_name, symbol, info)
+                restored.append((account_name, symbol, info))
+                logger.info(f"✓ 已恢复持仓 {account_name} {symbol} [{info.get('state')}] 止损: {info.get('stop_loss')}")
+
+        try:
+            db = getattr(self.state_store, 'db', None)
+            if db is not None:
+                db.prune_position_states(datetime.now() - timedelta(days=prune_days))
+        except Exception:
+            pass
+        if restored:
+            logger.info(f"✓ 持仓状态恢复完成: {len(restored)} 个")
+        return restored
+
+    def monitor_positions(self, now: Optional[float] = None):
+        """
+        监控所有持仓，更新追踪止损、移动止损和程序化止损
+
+        Args:
+            now: 单调时钟时间（开启自适应节奏时只检查已到检查时间的持仓）
+        """
         # 统计所有账户的总持仓数，空仓时不输出监控日志，直接返回
         total_positions = sum(len(positions) for positions in self.active_positions.values())
         if total_positions == 0:
             logger.debug("🔍 当前无任何持仓，监控循环略过")
             return
 
-        logger.info(f"🔍 开始监控持仓，总账户数: {len(self.active_positions)}，总持仓数: {total_positions}")
-        # 使用浅拷贝列表进行遍历，避免在遍历过程中修改字典大小导致错误
-        for account_name, positions in list(self.active_positions.items()):
-            position_count = len(positions)
-            if position_count == 0:
-                # 账户存在但当前无持仓时，仅输出 DEBUG，避免 INFO 日志刷屏
-                logger.debug(f"🔍 账户 {account_name} 当前无持仓，跳过监控")
-                continue
-
-            logger.info(f"🔍 监控账户 {account_name}，持仓数: {position_count}")
-            
-            for symbol, position in list(positions.items()):
-                try:
-                    # 获取当前价格
-                    current_price = self.exchange.get_current_price(account_name, symbol)
-                    if not current_price:
-                        logger.warning(f"🔍 {account_name} {symbol} - 获取价格失败")
+        self._flush_pending_amends()
+        # 心跳日志：每分钟最多一条
+        hot_log.log(logging.INFO, 'monitor', "🔍 持仓监控运行中，总账户数: %d，总持仓数: %d",
+                    len(self.active_positions), total_positions, interval=60.0)
+        if self.vector_evaluator is not None:
+            self._monitor_vectorized(now)
+            return
+        # 加锁取快照分组：同一交易对、同一价格来源的持仓共用一个价格与一次索引查询
+        # 没有任何触发价（无止损/追踪/保本）的持仓无需取价
+        groups: Dict[Tuple[str, Any], List[str]] = {}
+        with self._lock:
+            for account_name, positions in self.active_positions.items():
+                for symbol in positions:
+                    if self.trigger_index.levels_of(account_name, symbol):
+                        groups.setdefault((symbol, self._price_group(account_name)), []).append(account_name)
+        
+        for (symbol, _), accounts in groups.items():
+            try:
+                check_at = time.monotonic() if now is None else now
+                if self.adaptive_cadence:
+                    due = [a for a in accounts if check_at >= self._next_check.get((a, symbol), 0.0)]
+                    self.checks_skipped += len(accounts) - len(due)
+                    if not due:
                         continue
+                else:
+                    due = accounts
+                # 获取当前价格
+                current_price = self._fetch_price(due[0], symbol)
+                if not current_price:
+                    hot_log.log(logging.WARNING, ('price_fail', due[0], symbol),
+                                "🔍 %s %s - 获取价格失败", due[0], symbol)
+                    continue
+                
+                # 持锁只做判断与内存更新，交易所请求在释放锁后执行
+                with self._deferring(), self._lock:
+                    if self.adaptive_cadence:
+                        for account_name in due:
+                            if self.get_position_info(account_name, symbol) is not None:
+                                self._schedule_check(account_name, symbol, current_price, check_at)
                     
-                    logger.info(f"🔍 {account_name} {symbol} - 当前价格: {current_price:.4f}, 持仓信息: {position}")
-                    
-                    # 更新追踪止损
-                    if position.get('trailing_stop_pct'):
-                        # 如果配置为保本后停止追踪止损，且已移动到保本位，则跳过追踪止损
-                        if position.get('stop_trailing_after_breakeven') and position.get('sl_moved_to_breakeven'):
-                            logger.debug(f"🔍 {account_name} {symbol} - 已保本且配置为停止追踪止损，跳过追踪止损更新")
-                        else:
-                            logger.debug(f"🔍 检查追踪止损: {account_name} {symbol}")
-                            self.update_trailing_stop(account_name, symbol, current_price)
-                    
-                    # 检查是否需要移动止损到盈亏平衡
-                    if position.get('move_sl_to_breakeven') and not position.get('sl_moved_to_breakeven'):
-                        logger.debug(f"🔍 检查保本止损: {account_name} {symbol}")
-                        self.move_stop_to_breakeven(account_name, symbol, current_price)
-                    
-                    # 检查程序化止损：当价格达到止损点位时自动平仓
-                    logger.debug(f"🔍 调用程序化止损检查: {account_name} {symbol}")
-                    if self._check_and_trigger_program_sl(account_name, symbol, current_price):
-                        # 止损已触发，持仓已被关闭，跳过后续处理
+                    # 只处理价格越过阈值的触发：整个交易对查询一次，按账户归并
+                    members = set(due)
+                    hits: Dict[str, set] = {}
+                    for account_name, kind in self.trigger_index.crossed(symbol, current_price):
+                        if account_name in members:
+                            hits.setdefault(account_name, set()).add(kind)
+                    for account_name, kinds in hits.items():
+                        # 取价期间持仓可能已被其他线程移除
+                        if self.get_position_info(account_name, symbol) is None:
+                            continue
+                        try:
+                            self._process_crossed(account_name, symbol, current_price, kinds)
+                        except Exception as e:
+                            hot_log.log(logging.ERROR, ('monitor_error', account_name, symbol),
+                                        "监控持仓出错 %s %s: %s", account_name, symbol, e)
+            except Exception as e:
+                hot_log.log(logging.ERROR, ('monitor_error', symbol),
+                            "监控交易对出错 %s: %s", symbol, e)
+        
+        logger.debug("🔍 监控循环完成")
+
+    def _process_crossed(self, account_name: str, symbol: str, current_price: float, kinds) -> bool:
+        """
+        处理价格越过阈值的触发（调用方持有 self._lock，并在 _deferring 块内调用：
+        改单与平仓推迟到释放锁后执行）
+
+        Returns:
+            bool: 是否触发了程序化止损
+        """
+        self.evaluations += 1
+        # 触发类型变化时才输出（追踪止损逐笔新高只在首次记录）
+        hot_log.on_change(logging.INFO, ('kinds', account_name, symbol), frozenset(kinds),
+                          "🔍 %s %s - 当前价格: %.4f, 触发: %s",
+                          account_name, symbol, current_price, sorted(kinds))
+        
+        # 更新追踪止损（价格创出新极值）
+        if KIND_TRAILING in kinds:
+            self.update_trailing_stop(account_name, symbol, current_price)
+        
+        # 达到保本触发价，移动止损到盈亏平衡
+        if KIND_BREAKEVEN in kinds:
+            self.move_stop_to_breakeven(account_name, symbol, current_price)
+        
+        self._reindex(account_name, symbol)
+        
+        # 检查程序化止损（按更新后的止损价）：当价格达到止损点位时自动平仓
+        if any(kind == KIND_STOP_LOSS for _, kind in
+               self.trigger_index.crossed(symbol, current_price, account_name)):
+            return self._check_and_trigger_program_sl(account_name, symbol, current_price)
+        return False
+
+    def _price_group(self, account_name: str):
+        """价格来源：同一交易所同一网络的账户共用一个价格"""
+        account = getattr(self.exchange, 'accounts', {}).get(account_name)
+        if account is None:
+            return account_name
+        return (getattr(account, 'exchange_type', account_name), getattr(account, 'testnet', None))
+
+    def _monitor_vectorized(self, now: Optional[float]):
+        """
+        按交易对与价格来源分组监控：每组只取一次价格，用向量化评估一次比较整组持仓，
+        只处理返回的需要动作的持仓
+        """
+        # 没有任何触发价（无止损/追踪/保本）的持仓不在评估器中，无需取价
+        groups: Dict[Tuple[str, Any], List[str]] = {}
+        for symbol, accounts in self.vector_evaluator.accounts_by_symbol().items():
+            for account_name in accounts:
+                groups.setdefault((symbol, self._price_group(account_name)), []).append(account_name)
+        
+        for (symbol, _), accounts in groups.items():
+            try:
+                check_at = time.monotonic() if now is None else now
+                if self.adaptive_cadence:
+                    due = [a for a in accounts if check_at >= self._next_check.get((a, symbol), 0.0)]
+                    if not due:
+                        self.checks_skipped += len(accounts)
                         continue
-                    
-                except Exception as e:
-                    logger.error(f"监控持仓出错 {account_name} {symbol}: {e}")
+                else:
+                    due = accounts
+                current_price = self._fetch_price(due[0], symbol)
+                if not current_price:
+                    hot_log.log(logging.WARNING, ('price_fail', due[0], symbol),
+                                "🔍 %s %s - 获取价格失败", due[0], symbol)
+                    continue
+                
+                # 持锁只做判断与内存更新，交易所请求在释放锁后执行
+                with self._deferring(), self._lock:
+                    if self.adaptive_cadence:
+                        for account_name in accounts:
+                            if self.get_position_info(account_name, symbol) is not None:
+                                self._schedule_check(account_name, symbol, current_price, check_at)
+                    hits = self.vector_evaluator.evaluate(symbol, current_price, set(accounts))
+                    for account_name, kinds in hits:
+                        # 取价期间持仓可能已被其他线程移除
+                        if self.get_position_info(account_name, symbol) is None:
+                            continue
+                        try:
+                            self._process_crossed(account_name, symbol, current_price, kinds)
+                        except Exception as e:
+                            hot_log.log(logging.ERROR, ('monitor_error', account_name, symbol),
+                                        "监控持仓出错 %s %s: %s", account_name, symbol, e)
+            except Exception as e:
+                hot_log.log(logging.ERROR, ('monitor_error', symbol),
+                            "监控交易对出错 %s: %s", symbol, e)
         
-        logger.debug(f"🔍 监控循环完成")
+        logger.debug("🔍 监控循环完成")
 
     def _check_and_trigger_program_sl(self, account_name: str, symbol: str, current_price: float) -> bool:
         """
@@ -503,71 +1072,94 @@ class PositionManager:
             current_price: 当前价格
             
         Returns:
-            bool: 是否触发了止损（True=已触发并平仓，False=未触发）
+            bool: 是否触发了止损（True=已触发并平仓或平仓已推迟执行，False=未触发或平仓失败）
         """
         position = self.active_positions[account_name][symbol]
-        stop_loss = position.get('stop_loss')
+        stop_loss = position.stop_loss
         
-        logger.info(f"🔍 检查程序化止损: {account_name} {symbol} @ {current_price:.4f}, 止损价: {stop_loss}, 持仓: {position}")
+        logger.debug("🔍 检查程序化止损: %s %s @ %.4f, 止损价: %s", account_name, symbol, current_price, stop_loss)
         
         if not stop_loss:
-            logger.info(f"🔍 {account_name} {symbol} - 未设置止损价格")
+            logger.debug("🔍 %s %s - 未设置止损价格", account_name, symbol)
             return False  # 没有设置止损
         
-        side = position['side']
+        side = position.side.value
         triggered = False
         
         try:
-            if side == 'buy':
+            if position.is_long:
                 # 做多仓位：价格跌破止损价时触发
                 if current_price <= stop_loss:
                     triggered = True
                     logger.warning(f"⚠ {account_name} - 程序化止损触发: {symbol} 多仓 @ {current_price:.4f} <= 止损价 {stop_loss:.4f}")
                 else:
-                    logger.info(f"🔍 {account_name} {symbol} 多仓 - 价格 {current_price:.4f} > 止损价 {stop_loss:.4f}, 未触发")
+                    logger.debug("🔍 %s %s 多仓 - 价格 %.4f > 止损价 %.4f, 未触发", account_name, symbol, current_price, stop_loss)
             else:  # side == 'sell'
                 # 做空仓位：价格涨破止损价时触发
                 if current_price >= stop_loss:
                     triggered = True
                     logger.warning(f"⚠ {account_name} - 程序化止损触发: {symbol} 空仓 @ {current_price:.4f} >= 止损价 {stop_loss:.4f}")
                 else:
-                    logger.info(f"🔍 {account_name} {symbol} 空仓 - 价格 {current_price:.4f} < 止损价 {stop_loss:.4f}, 未触发")
+                    logger.debug("🔍 %s %s 空仓 - 价格 %.4f < 止损价 %.4f, 未触发", account_name, symbol, current_price, stop_loss)
             
             if triggered:
-                # 执行平仓
-                try:
-                    # 记录止损前的PnL
-                    entry_price = position.get('entry_price', 0)
-                    position_size = position.get('position_size', 0)
-                    leverage = position.get('leverage', 1)
-                    
-                    if side == 'buy':
-                        pnl = (current_price - entry_price) * position_size * leverage
-                    else:
-                        pnl = (entry_price - current_price) * position_size * leverage
-                    
-                    logger.warning(f"⚠ {account_name} - 止损执行前PnL: {pnl:.4f}")
-                    
-                    logger.info(f"🔍 执行市价平仓: {account_name} {symbol}, 方向: {side}")
-                    # 执行市价平仓
-                    result = self.exchange.close_position(account_name, symbol)
-                    logger.info(f"🔍 平仓结果: {result}")
-                    
-                    if result:
-                        logger.warning(f"⚠ {account_name} - 程序化止损已执行: {symbol} @ {current_price:.4f}")
-                        # 移除持仓记录
-                        self.remove_position(account_name, symbol)
-                        return True
-                    else:
-                        logger.error(f"✗ {account_name} - 程序化止损平仓失败: {symbol}")
-                        return False
-                        
-                except Exception as close_e:
-                    logger.error(f"✗ {account_name} - 程序化止损执行失败: {close_e}")
-                    return False
+                # 记录止损前的PnL
+                entry_price = position.entry_price or 0.0
+                position_size = position.position_size or 0.0
+                leverage = position.leverage or 1
+                
+                if side == 'buy':
+                    pnl = (current_price - entry_price) * position_size * leverage
+                else:
+                    pnl = (entry_price - current_price) * position_size * leverage
+                
+                logger.warning(f"⚠ {account_name} - 止损执行前PnL: {pnl:.4f}")
+                # 监控循环中平仓推迟到释放锁后执行（此时返回 True 表示已触发）
+                closed = self._defer(self._execute_program_sl, account_name, symbol, current_price, position)
+                return True if closed is None else closed
         
         except Exception as e:
             logger.error(f"✗ {account_name} - 检查程序化止损失败 {symbol}: {e}")
         
         return False
 
+    def _execute_program_sl(self, account_name: str, symbol: str, current_price: float, position: Dict) -> bool:
+        """程序化止损市价平仓（不持锁调用）；判断之后持仓已被其他线程移除或替换时不再平仓"""
+        if self.get_position_info(account_name, symbol) is not position:
+            logger.info(f"⏭ {account_name} {symbol} 持仓已变化，跳过程序化止损平仓")
+            return False
+        try:
+            logger.info(f"🔍 执行市价平仓: {account_name} {symbol}, 方向: {position.side.value}")
+            # 执行市价平仓
+            result = self.exchange.close_position(account_name, symbol)
+            logger.info(f"🔍 平仓结果: {result}")
+            
+            if result:
+                logger.warning(f"⚠ {account_name} - 程序化止损已执行: {symbol} @ {current_price:.4f}")
+                # 移除持仓记录
+                self.remove_position(account_name, symbol)
+                return True
+            logger.error(f"✗ {account_name} - 程序化止损平仓失败: {symbol}")
+            return False
+        
+        except Exception as close_e:
+            logger.error(f"✗ {account_name} - 程序化止损执行失败: {close_e}")
+            return False
+
+
+def start_position_monitor(bus) -> bool:
+    """
+    在行情总线上登记持仓监控任务（按全局持仓管理器的自适应节奏执行）；
+    GUI 与机器人都会调用，同一进程内只登记一次
+
+    Returns:
+        bool: 是否为新登记
+    """
+    def _tick():
+        if position_manager is not None:
+            position_manager.monitor_positions()
+
+    def _delay():
+        return position_manager.next_monitor_delay() if position_manager is not None else MONITOR_TICK
+
+    return bus.register_job('position_monitor', _tick, _delay)
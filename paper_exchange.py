@@ -0,0 +1,332 @@
+"""
+模拟盘交易所客户端
+行情、市场信息、精度等公共接口转发给真实的 ccxt 客户端（不带 API Key），
+下单、触发单、持仓、余额与盈亏在本地模拟；接口与 ccxt 保持一致，
+多交易所客户端的下单/止损/止盈/平仓流程无需区分实盘与模拟盘
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# 触发单价格参数（按优先级）；takeProfitPrice 为止盈方向，其余为止损方向
+_STOP_KEYS = ('stopLossPrice', 'stopPrice', 'triggerPrice')
+_TP_KEYS = ('takeProfitPrice',)
+_FINAL = ('closed', 'canceled')
+# 保留的已结束订单数（超出后清理最早的）
+_MAX_FINISHED = 2000
+
+
+class PaperExchange:
+    """模拟盘客户端（包装真实 ccxt 客户端的公共接口）"""
+
+    paper = True
+
+    def __init__(self, public_client, account_name: str = '', balance: float = 1000.0,
+                 fee_rate: float = 0.0006, slippage_pct: float = 0.02, db=None):
+        """
+        Args:
+            public_client: 已 load_markets 的 ccxt 客户端（只用于行情与市场信息）
+            account_name: 账户名称（日志用）
+            balance: 初始 USDT 余额
+            fee_rate: 吃单手续费率
+            slippage_pct: 市价单模拟滑点（百分比）
+            db: TradingDatabase 实例，余额/持仓/挂单每次变更写入、构造时恢复（为 None 时不持久化）
+        """
+        self._public = public_client
+        self.account_name = account_name
+        self.balance = float(balance)
+        self.fee_rate = float(fee_rate)
+        self.slippage_pct = float(slippage_pct)
+        self.realized_pnl = 0.0
+        self.fees_paid = 0.0
+        self.positions: Dict[str, Dict[str, float]] = {}  # symbol -> {'contracts': 带符号数量, 'entry_price'}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.leverage: Dict[str, int] = {}
+        self._last: Dict[str, float] = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self.db = db
+        self._restore()
+
+    # ---------- 持久化 ----------
+
+    def _restore(self):
+        """恢复上次保存的模拟盘状态（重启后持仓与挂单仍在，持仓核对不会把模拟持仓标记为已平仓）"""
+        if self.db is None:
+            return
+        try:
+            raw = self.db.load_paper_state(self.account_name)
+            if not raw:
+                return
+            data = json.loads(raw)
+            self.balance = float(data['balance'])
+            self.realized_pnl = float(data.get('realized_pnl', 0.0))
+            self.fees_paid = float(data.get('fees_paid', 0.0))
+            self.positions = data.get('positions', {})
+            self.orders = data.get('orders', {})
+            self.leverage = data.get('leverage', {})
+            self._next_id = int(data.get('next_id', 1))
+            logger.info(f"📝 [模拟盘 {self.account_name}] 已恢复状态: 余额 {self.balance:.2f}，"
+                        f"持仓 {len(self.positions)}，挂单 {len(self.orders)}")
+        except Exception as e:
+            logger.warning(f"⚠ [模拟盘 {self.account_name}] 恢复状态失败: {e}")
+
+    def _checkpoint(self):
+        """保存模拟盘状态（调用方持有锁）；只保存未结束的挂单"""
+        if self.db is None:
+            return
+        try:
+            data = {
+                'balance': self.balance,
+                'realized_pnl': self.realized_pnl,
+                'fees_paid': self.fees_paid,
+                'positions': self.positions,
+                'orders': {oid: o for oid, o in self.orders.items() if o['status'] == 'open'},
+                'leverage': self.leverage,
+                'next_id': self._next_id,
+            }
+            self.db.save_paper_state(self.account_name, json.dumps(data))
+        except Exception as e:
+            logger.debug(f"保存模拟盘状态失败 {self.account_name}: {e}")
+
+    def __getattr__(self, name):
+        # 公共接口（markets / market / amount_to_precision / has 等）转发给真实客户端
+        return getattr(self._public, name)
+
+    # ---------- 行情 ----------
+
+    def fetch_ticker(self, symbol: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        ticker = self._public.fetch_ticker(symbol)
+        last = ticker.get('last')
+        if last:
+            self.on_price(symbol, float(last))
+        return ticker
+
+    def on_price(self, symbol: str, price: float):
+        """记录最新价并撮合该交易对的挂单/触发单"""
+        with self._lock:
+            self._last[symbol] = price
+            filled = False
+            for order in list(self.orders.values()):
+                if order['symbol'] != symbol or order['status'] != 'open':
+                    continue
+                fill_price = self._crossed(order, price)
+                if fill_price is not None:
+                    self._execute(order, fill_price)
+                    filled = True
+            if filled:
+                self._checkpoint()
+
+    def _price(self, symbol: str) -> float:
+        price = self._last.get(symbol)
+        if price is None:
+            price = float(self.fetch_ticker(symbol)['last'])
+        return price
+
+    @staticmethod
+    def _crossed(order: Dict[str, Any], price: float) -> Optional[float]:
+        """挂单是否被当前价触发，返回成交价"""
+        trigger = order.get('triggerPrice')
+        side = order['side']
+        if trigger is not None:
+            if order.get('tp_trigger'):
+                hit = price >= trigger if side == 'sell' else price <= trigger
+            else:
+                hit = price <= trigger if side == 'sell' else price >= trigger
+            return price if hit else None
+        limit = order.get('price')
+        if order['type'] == 'limit' and limit is not None:
+            hit = price >= limit if side == 'sell' else price <= limit
+            return limit if hit else None
+        return None
+
+    # ---------- 下单 ----------
+
+    def create_order(self, symbol: str, type: str, side: str, amount: float, price: Optional[float] = None,
+                     params: Optional[Dict] = None) -> Dict[str, Any]:
+        params = params or {}
+        trigger, tp_trigger = None, False
+        for key in _STOP_KEYS + _TP_KEYS:
+            if params.get(key) is not None:
+                trigger, tp_trigger = float(params[key]), key in _TP_KEYS
+                break
+        with self._lock:
+            order_id = f"paper-{self._next_id}"
+            self._next_id += 1
+            order = {
+                'id': order_id,
+                'symbol': symbol,
+                'type': 'stop' if trigger is not None else type,
+                'side': side,
+                'amount': float(amount),
+                'price': float(price) if price is not None else None,
+                'triggerPrice': trigger,
+                'tp_trigger': tp_trigger,
+                'reduceOnly': bool(params.get('reduceOnly') or params.get('reduce_only')),
+                'status': 'open',
+                'filled': 0.0,
+                'remaining': float(amount),
+                'average': None,
+                'timestamp': int(time.time() * 1000),
+                'info': {'paper': True},
+            }
+            self.orders[order['id']] = order
+            self._prune()
+            last = self._price(symbol)
+            if trigger is None and type == 'market':
+                slip = self.slippage_pct / 100.0
+                self._execute(order, last * (1 + slip) if side == 'buy' else last * (1 - slip))
+            else:
+                fill_price = self._crossed(order, last)
+                if fill_price is not None:
+                    self._execute(order, fill_price)
+            self._checkpoint()
+            return dict(order)
+
+    def _prune(self):
+        finished = [oid for oid, o in self.orders.items() if o['status'] in _FINAL]
+        for oid in finished[:max(0, len(finished) - _MAX_FINISHED)]:
+            del self.orders[oid]
+
+    def create_market_order(self, symbol, side, amount, price=None, params=None):
+        return self.create_order(symbol, 'market', side, amount, None, params)
+
+    def create_limit_order(self, symbol, side, amount, price, params=None):
+        return self.create_order(symbol, 'limit', side, amount, price, params)
+
+    def _execute(self, order: Dict[str, Any], price: float):
+        """按价格成交订单并更新持仓、余额（调用方持有锁）"""
+        symbol, amount = order['symbol'], order['remaining']
+        delta = amount if order['side'] == 'buy' else -amount
+        pos = self.positions.get(symbol) or {'contracts': 0.0, 'entry_price': 0.0}
+        held = pos['contracts']
+        if order['reduceOnly']:
+            # 只减仓：不能反向开仓，无持仓则撤单
+            if held == 0 or (held > 0) == (delta > 0):
+                order['status'] = 'canceled'
+                return
+            delta = max(delta, -held) if held > 0 else min(delta, -held)
+        size = self._contract_size(symbol)
+        fee = abs(delta) * size * price * self.fee_rate
+        pnl = 0.0
+        if held and (held > 0) != (delta > 0):
+            closed = min(abs(delta), abs(held))
+            pnl = closed * size * (price - pos['entry_price']) * (1 if held > 0 else -1)
+            remaining = held + delta
+            if remaining == 0 or (remaining > 0) != (held > 0):
+                pos = {'contracts': remaining, 'entry_price': price if remaining else 0.0}
+            else:
+                pos = {'contracts': remaining, 'entry_price': pos['entry_price']}
+        else:
+            total = held + delta
+            pos = {'contracts': total, 'entry_price': (abs(held) * pos['entry_price'] + abs(delta) * price) / abs(total)}
+        self.balance += pnl - fee
+        self.realized_pnl += pnl
+        self.fees_paid += fee
+        if abs(pos['contracts']) < 1e-12:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = pos
+        order.update(status='closed', filled=abs(delta), remaining=0.0, average=price,
+                     cost=abs(delta) * size * price, fee={'currency': 'USDT', 'cost': fee})
+        logger.info(f"📝 [模拟盘 {self.account_name}] 成交 {order['side']} {symbol} {abs(delta):.6f} @ {price:.6g}"
+                    + (f"，已实现盈亏 {pnl:+.4f} USDT" if pnl else ""))
+
+    def _contract_size(self, symbol: str) -> float:
+        try:
+            return float(self._public.market(symbol).get('contractSize') or 1.0)
+        except Exception:
+            return 1.0
+
+    # ---------- 订单查询/撤单 ----------
+
+    def fetch_order(self, id: str, symbol: Optional[str] = None, params: Optional[Dict] = None) -> Dict[str, Any]:
+        with self._lock:
+            order = self.orders.get(id)
+            if order is None:
+                raise KeyError(f"订单不存在: {id}")
+            return dict(order)
+
+    def fetch_open_orders(self, symbol: Optional[str] = None, since=None, limit=None,
+                          params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(o) for o in self.orders.values()
+                    if o['status'] == 'open' and (symbol is None or o['symbol'] == symbol)]
+
+    def cancel_order(self, id: str, symbol: Optional[str] = None, params: Optional[Dict] = None) -> Dict[str, Any]:
+        with self._lock:
+            order = self.orders.get(id)
+            if order is None or order['status'] in _FINAL:
+                raise KeyError(f"订单不存在或已结束: {id}")
+            order['status'] = 'canceled'
+            self._checkpoint()
+            return dict(order)
+
+    def cancel_orders(self, ids: List[str], symbol: Optional[str] = None, params: Optional[Dict] = None):
+        return [self.cancel_order(i, symbol) for i in ids]
+
+    # ---------- 持仓/余额 ----------
+
+    def set_leverage(self, leverage, symbol: Optional[str] = None, params: Optional[Dict] = None):
+        with self._lock:
+            self.leverage[symbol] = int(leverage)
+            self._checkpoint()
+        return {'leverage': int(leverage), 'symbol': symbol}
+
+    def set_margin_mode(self, *args, **kwargs):
+        return {}
+
+    def set_position_mode(self, *args, **kwargs):
+        return {}
+
+    def fetch_positions(self, symbols: Optional[List[str]] = None, params: Optional[Dict] = None) -> List[Dict]:
+        with self._lock:
+            results = []
+            for symbol, pos in self.positions.items():
+                if symbols and symbol not in symbols:
+                    continue
+                contracts = pos['contracts']
+                last = self._last.get(symbol, pos['entry_price'])
+                size = self._contract_size(symbol)
+                results.append({
+                    'symbol': symbol,
+                    'contracts': abs(contracts),
+                    'contractSize': size,
+                    'side': 'long' if contracts > 0 else 'short',
+                    'entryPrice': pos['entry_price'],
+                    'markPrice': last,
+                    'notional': abs(contracts) * size * last,
+                    'leverage': self.leverage.get(symbol, 1),
+                    'unrealizedPnl': contracts * size * (last - pos['entry_price']),
+                    'info': {'paper': True},
+                })
+            return results
+
+    def fetch_balance(self, params: Optional[Dict] = None) -> Dict[str, Any]:
+        with self._lock:
+            used = 0.0
+            unrealized = 0.0
+            for p in self.fetch_positions():
+                used += p['notional'] / max(1, p['leverage'])
+                unrealized += p['unrealizedPnl']
+            total = self.balance + unrealized
+            free = max(0.0, total - used)
+            usdt = {'free': free, 'used': used, 'total': total}
+            return {'USDT': usdt, 'free': {'USDT': free}, 'used': {'USDT': used}, 'total': {'USDT': total},
+                    'info': {'paper': True}}
+
+    def summary(self) -> Dict[str, Any]:
+        """模拟盘账户概况"""
+        with self._lock:
+            return {
+                'balance': self.balance,
+                'realized_pnl': self.realized_pnl,
+                'fees': self.fees_paid,
+                'positions': len(self.positions),
+                'open_orders': sum(1 for o in self.orders.values() if o['status'] == 'open'),
+            }
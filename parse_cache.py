@@ -0,0 +1,89 @@
+"""
+消息解析缓存
+按“规范化后的消息内容”缓存 SignalParser.analyze() 的不可变结果（LRU），
+编辑/回补/回复查询等重复出现的文本无需再次解析
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any
+
+from signal_parser import SignalParser, MessageAnalysis
+from signal_templates import signal_templates
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_message(text: str) -> str:
+    """
+    规范化消息内容（仅去除不影响解析结果的差异）
+
+    统一换行符、去掉首尾空白与每行行尾空白；不改变大小写、全角符号和行内空白，
+    保证规范化前后解析结果一致
+    """
+    return '\n'.join(line.rstrip() for line in (text or '').strip().splitlines())
+
+
+class ParseCache:
+    """解析结果 LRU 缓存：hash(规范化内容)[+群组模板] -> MessageAnalysis"""
+
+    def __init__(self, max_size: int = 2000):
+        self.max_size = max(1, int(max_size))
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_key(text: str) -> bytes:
+        """规范化内容的摘要（作为缓存键）"""
+        return hashlib.blake2b(normalize_message(text).encode('utf-8'), digest_size=16).digest()
+
+    def analyze(self, text: str, chat_id=None) -> MessageAnalysis:
+        """
+        返回消息的解析结果，命中缓存时不再解析
+
+        chat_id 所在群配置了模板时，结果与群组及模板版本绑定；其余群共享通用解析结果
+        """
+        key = self.content_key(text)
+        template = signal_templates.get(chat_id)
+        if template is None:
+            chat_id = None
+        else:
+            key += f'|{template.chat_id}|{template.version}'.encode('utf-8')
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = SignalParser.analyze(text, chat_id=chat_id)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        """清空缓存（修改解析规则后调用）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total else 0.0,
+            }
+
+
+# 全局解析缓存实例
+parse_cache = ParseCache()
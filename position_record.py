@@ -0,0 +1,152 @@
+"""
+持仓记录
+PositionManager 每个持仓一条 __slots__ 记录：数值字段写入时统一转为 float，方向为枚举，
+保本触发价与追踪止损系数按方向预先算好，监控热路径直接读属性，不做字典查找与重复类型转换。
+记录同时实现映射接口（info['stop_loss']、info.get(...)、info.update(...)），
+值为 None 的字段视为不存在，落库/恢复与旧的字典用法保持兼容；未定义的键保存在 extra 中
+"""
+
+from collections.abc import MutableMapping
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional
+
+
+class PositionSide(Enum):
+    """持仓方向（值与下单方向一致）"""
+    LONG = 'buy'
+    SHORT = 'sell'
+
+
+FLOAT_FIELDS = (
+    'entry_price', 'position_size', 'stop_loss', 'trailing_stop_pct', 'breakeven_trigger_pct',
+    'highest_price', 'lowest_price', 'trailing_min_step_pct', 'trailing_min_amend_sec',
+    'sl_amended_price', 'sl_amended_at', 'native_trailing_activation', 'time_unprotected_ms',
+)
+INT_FIELDS = ('trailing_min_step_ticks', 'leverage')
+BOOL_FIELDS = ('move_sl_to_breakeven', 'sl_moved_to_breakeven', 'stop_trailing_after_breakeven', 'trailing_native')
+OBJECT_FIELDS = (
+    'take_profits', 'tp_portions', 'entry_time', 'state', 'trade_id',
+    'sl_order_id', 'tp1_order_id', 'native_trailing_order_id',
+)
+FIELDS = ('side',) + FLOAT_FIELDS + INT_FIELDS + BOOL_FIELDS + OBJECT_FIELDS
+
+_FLOATS = frozenset(FLOAT_FIELDS)
+_INTS = frozenset(INT_FIELDS)
+_BOOLS = frozenset(BOOL_FIELDS)
+_OBJECTS = frozenset(OBJECT_FIELDS)
+# 修改后需要重算派生字段的键
+_DERIVED_INPUTS = frozenset(('side', 'entry_price', 'breakeven_trigger_pct', 'trailing_stop_pct'))
+
+DEFAULT_BREAKEVEN_TRIGGER_PCT = 1.0
+
+
+class PositionRecord(MutableMapping):
+    """单个持仓的紧凑记录"""
+
+    __slots__ = FIELDS + ('extra', 'is_long', 'breakeven_price', 'trailing_factor')
+
+    def __init__(self, side: Any = PositionSide.LONG, **fields):
+        for name in FLOAT_FIELDS + INT_FIELDS + OBJECT_FIELDS:
+            object.__setattr__(self, name, None)
+        for name in BOOL_FIELDS:
+            object.__setattr__(self, name, False)
+        self.extra: Dict[str, Any] = {}
+        self.side = PositionSide(side)
+        for key, value in fields.items():
+            self._assign(key, value)
+        self._refresh()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PositionRecord':
+        data = dict(data)
+        return cls(data.pop('side', PositionSide.LONG), **data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    # ---------- 派生字段 ----------
+
+    def _refresh(self):
+        """按方向预先计算保本触发价与追踪止损系数"""
+        self.is_long = self.side is PositionSide.LONG
+        entry = self.entry_price
+        pct = self.breakeven_trigger_pct
+        pct = DEFAULT_BREAKEVEN_TRIGGER_PCT if pct is None else pct
+        if entry:
+            self.breakeven_price = entry * (1 + pct / 100.0) if self.is_long else entry * (1 - pct / 100.0)
+        else:
+            self.breakeven_price = None
+        trail = self.trailing_stop_pct
+        if trail:
+            self.trailing_factor = (1 - trail / 100.0) if self.is_long else (1 + trail / 100.0)
+        else:
+            self.trailing_factor = None
+
+    # ---------- 映射接口 ----------
+
+    def _assign(self, key: str, value: Any):
+        if key == 'side':
+            self.side = PositionSide(value)
+        elif key in _FLOATS:
+            setattr(self, key, None if value is None else float(value))
+        elif key in _INTS:
+            setattr(self, key, None if value is None else int(value))
+        elif key in _BOOLS:
+            setattr(self, key, bool(value))
+        elif key in _OBJECTS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __setitem__(self, key: str, value: Any):
+        self._assign(key, value)
+        if key in _DERIVED_INPUTS:
+            self._refresh()
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        按键取值：值为 None 的已定义字段视为不存在，抛出 KeyError（与旧的字典用法一致，
+        info['stop_loss'] 在未设置止损时会失败）；需要可选读取时用 info.get(key)
+        """
+        if key == 'side':
+            return self.side.value
+        if key in _FLOATS or key in _INTS or key in _OBJECTS or key in _BOOLS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        return self.extra[key]
+
+    def __delitem__(self, key: str):
+        if key in self.extra:
+            del self.extra[key]
+        elif key in _BOOLS:
+            setattr(self, key, False)
+        elif key in _FLOATS or key in _INTS or key in _OBJECTS:
+            if getattr(self, key) is None:
+                raise KeyError(key)
+            setattr(self, key, None)
+            if key in _DERIVED_INPUTS:
+                self._refresh()
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name in FIELDS:
+            if name == 'side' or name in _BOOLS or getattr(self, name) is not None:
+                yield name
+        yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return (f"PositionRecord({self.side.value} entry={self.entry_price} size={self.position_size} "
+                f"sl={self.stop_loss} state={self.state})")
+
+    # ---------- 热路径辅助 ----------
+
+    def extreme_price(self) -> Optional[float]:
+        """追踪止损记录的极值价（多仓最高价 / 空仓最低价，缺省为入场价）"""
+        extreme = self.highest_price if self.is_long else self.lowest_price
+        return extreme if extreme is not None else self.entry_price
@@ -0,0 +1,139 @@
+"""
+持仓生命周期状态机（持久化）
+每个持仓按 入场 → 已保护 → TP1 成交 → 保本 → 已平仓 推进，状态与持仓信息（止损价、
+保本标记、TP1 订单号等）落库到 position_states 表；程序崩溃或 GUI 重启后从本地恢复，
+每个账户只做一次批量持仓核对，无需逐个查询订单
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PositionState(Enum):
+    """持仓生命周期状态"""
+    ENTRY = "entry"              # 入场已成交，保护单未确认
+    PROTECTED = "protected"      # 止损已确认（止盈已挂出）
+    TP1_FILLED = "tp1_filled"    # 第一止盈已成交
+    BREAKEVEN = "breakeven"      # 止损已移至保本
+    CLOSED = "closed"            # 已平仓
+
+
+# 状态只能向前推进（平仓可从任意状态进入）
+_STATE_ORDER = {state: i for i, state in enumerate(PositionState)}
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+class PositionStateStore:
+    """持仓状态存储：内存中的状态以 position_info['state'] 为准，每次变更写入数据库"""
+
+    def __init__(self, db=None):
+        """
+        Args:
+            db: TradingDatabase 实例（为 None 时不持久化）
+        """
+        self.db = db
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def state_of(info: Optional[Dict]) -> Optional[PositionState]:
+        """持仓信息中记录的状态"""
+        try:
+            return PositionState(info.get('state')) if info and info.get('state') else None
+        except ValueError:
+            return None
+
+    def save(self, account_name: str, symbol: str, info: Dict):
+        """保存持仓当前状态与信息（状态缺省为入场）"""
+        if not info:
+            return
+        info.setdefault('state', PositionState.ENTRY.value)
+        if self.db is None:
+            return
+        try:
+            with self._lock:
+                # 持仓记录（PositionRecord）按映射序列化
+                payload = json.dumps(dict(info), default=_encode, ensure_ascii=False)
+                self.db.save_position_state(account_name, symbol, info['state'], payload)
+        except Exception as e:
+            logger.debug(f"保存持仓状态失败 {account_name} {symbol}: {e}")
+
+    def transition(self, account_name: str, symbol: str, info: Optional[Dict],
+                   state: PositionState, **updates) -> bool:
+        """
+        推进持仓状态并落库（回退到更早的状态会被忽略）
+
+        Returns:
+            bool: 状态是否发生变化
+        """
+        if info is None:
+            return False
+        current = self.state_of(info)
+        if current is not None and state != PositionState.CLOSED and _STATE_ORDER[state] <= _STATE_ORDER[current]:
+            if updates:
+                info.update(updates)
+                self.save(account_name, symbol, info)
+            return False
+        info.update(updates)
+        info['state'] = state.value
+        self.save(account_name, symbol, info)
+        log_from = current.value if current else '-'
+        logger.info(f"📌 {account_name} {symbol} 状态: {log_from} → {state.value}")
+        return True
+
+    def mark_closed(self, account_name: str, symbol: str, info: Optional[Dict] = None):
+        """标记持仓已平仓"""
+        if info is not None:
+            self.transition(account_name, symbol, info, PositionState.CLOSED)
+        elif self.db is not None:
+            try:
+                with self._lock:
+                    self.db.save_position_state(account_name, symbol, PositionState.CLOSED.value, None)
+            except Exception as e:
+                logger.debug(f"标记持仓平仓失败 {account_name} {symbol}: {e}")
+
+    def load_open(self) -> List[Tuple[str, str, Dict]]:
+        """加载所有未平仓的持仓：[(account_name, symbol, info)]"""
+        if self.db is None:
+            return []
+        results = []
+        try:
+            rows = self.db.load_position_states()
+        except Exception as e:
+            logger.warning(f"加载持仓状态失败: {e}")
+            return []
+        for row in rows:
+            try:
+                info = json.loads(row['info']) if row.get('info') else {}
+                info['state'] = row['state']
+                if isinstance(info.get('entry_time'), str):
+                    info['entry_time'] = datetime.fromisoformat(info['entry_time'])
+                results.append((row['account_name'], row['symbol'], info))
+            except Exception as e:
+                logger.debug(f"解析持仓状态失败 {row}: {e}")
+        return results
+
+
+def _load_default_store() -> PositionStateStore:
+    try:
+        from database import trading_db
+        return PositionStateStore(db=trading_db)
+    except Exception as e:
+        logger.warning(f"持仓状态存储未启用持久化: {e}")
+        return PositionStateStore()
+
+
+# 全局持仓状态存储
+position_states = _load_default_store()
@@ -3,11 +3,15 @@
 包含最大亏损限制、连续亏损保护等
 """
 
+import json
 import logging
 from typing import Dict, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass
 
+from account_state import AccountStateStore, BALANCE_CURRENCY, account_states
+from exposure_index import ExposureIndex, exposure_index, normalize_side
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -20,12 +24,26 @@ class RiskLimits:
     max_open_positions: int = 5  # 最大同时持仓数
     cooldown_after_limit: int = 60  # 触发限制后的冷却时间（分钟）
     min_account_balance: float = 100.0  # 最低账户余额要求
+    # 组合层面（全部账户合计）限制，None 为不限制
+    max_symbol_notional: Optional[float] = None  # 同一交易对同一方向的合计名义价值（USDT）
+    max_total_notional: Optional[float] = None  # 全部持仓的合计名义价值（USDT）
+    max_symbol_accounts: Optional[int] = None  # 同一交易对同一方向最多同时持仓的账户数
 
 class RiskManager:
     """风险管理器"""
     
-    def __init__(self, exchange_client):
+    def __init__(self, exchange_client, account_state: Optional[AccountStateStore] = None, db=None,
+                 exposure: Optional[ExposureIndex] = None):
+        """
+        Args:
+            account_state: 账户状态快照（余额/持仓数/当日盈亏），默认使用全局快照
+            db: TradingDatabase 实例，风控状态每次变更写入检查点、构造时恢复（为 None 时不持久化）
+            exposure: 跨账户敞口索引（组合层面限制），默认使用全局索引
+        """
         self.exchange = exchange_client
+        self.account_state = account_states if account_state is None else account_state
+        self.exposure = exposure_index if exposure is None else exposure
+        self.db = db
         self.limits = RiskLimits()
         
         # 账户风险状态
@@ -34,7 +52,8 @@ class RiskManager:
         # 每日统计
         self.daily_stats: Dict[str, Dict] = {}  # {account_name: {date: stats}}
         
-        # 初始化账户
+        # 先从检查点恢复，再初始化检查点中没有的账户
+        self._restore_state()
         self._init_accounts()
     
     def _init_accounts(self):
@@ -42,15 +61,65 @@ class RiskManager:
         for account_name in self.exchange.clients.keys():
             self._init_account_risk_state(account_name)
     
+    def _restore_state(self):
+        """从数据库检查点恢复各账户风控状态（每个账户读一行，不回放历史交易）"""
+        if self.db is None:
+            return
+        try:
+            rows = self.db.load_risk_states()
+        except Exception as e:
+            logger.warning(f"加载风控状态失败: {e}")
+            return
+        for account_name, raw in rows.items():
+            try:
+                data = json.loads(raw)
+                risk_state = data['risk']
+                if risk_state.get('cooldown_until'):
+                    risk_state['cooldown_until'] = datetime.fromisoformat(risk_state['cooldown_until'])
+                self.account_risks[account_name] = risk_state
+                self.account_state.restore(account_name, data.get('open_positions', 0),
+                                           data.get('daily_pnl', 0.0),
+                                           date.fromisoformat(data.get('pnl_date') or date.today().isoformat()))
+                today = data.get('today')
+                if today and today.get('date') == date.today().isoformat():
+                    self.daily_stats.setdefault(account_name, {})[date.today()] = today['stats']
+            except Exception as e:
+                logger.debug(f"解析风控状态失败 {account_name}: {e}")
+        if self.account_risks:
+            logger.info(f"✓ 风控状态已恢复: {len(self.account_risks)} 个账户")
+    
+    def _checkpoint(self, account_name: str):
+        """把账户风控状态写入检查点（失败只记录，不影响交易）"""
+        if self.db is None or account_name not in self.account_risks:
+            return
+        try:
+            risk_state = dict(self.account_risks[account_name])
+            if risk_state.get('cooldown_until'):
+                risk_state['cooldown_until'] = risk_state['cooldown_until'].isoformat()
+            snapshot = self.account_state.snapshot(account_name)
+            today = date.today()
+            data = {
+                'risk': risk_state,
+                'open_positions': snapshot['open_positions'],
+                'daily_pnl': snapshot['daily_pnl'],
+                'pnl_date': snapshot['pnl_date'].isoformat(),
+            }
+            today_stats = self.daily_stats.get(account_name, {}).get(today)
+            if today_stats:
+                data['today'] = {'date': today.isoformat(), 'stats': today_stats}
+            self.db.save_risk_state(account_name, json.dumps(data))
+        except Exception as e:
+            logger.debug(f"保存风控状态失败 {account_name}: {e}")
+    
     def _init_account_risk_state(self, account_name: str):
         """初始化账户风险状态"""
         if account_name not in self.account_risks:
-            initial_balance = self.exchange.get_balance(account_name, 'USDT') or 0.0
+            # 只取快照中的余额：尚未获取时初始余额在首次拿到余额后补上，不在构造时逐个请求交易所
+            initial_balance = self.account_state.get_balance(account_name) or 0.0
             
             self.account_risks[account_name] = {
                 'initial_balance': initial_balance,
                 'current_balance': initial_balance,
-                'daily_pnl': 0.0,
                 'total_pnl': 0.0,
                 'consecutive_losses': 0,
                 'consecutive_wins': 0,
@@ -59,13 +128,27 @@ class RiskManager:
                 'losing_trades': 0,
                 'trading_enabled': True,
                 'cooldown_until': None,
-                'last_reset_date': datetime.now().date(),
-                'open_positions_count': 0,
             }
         
         if account_name not in self.daily_stats:
             self.daily_stats[account_name] = {}
     
+    def _current_balance(self, account_name: str) -> Optional[float]:
+        """
+        快照中的余额；快照尚无该账户余额时（余额刷新任务未运行或刚启动）请求一次交易所并写入快照
+        """
+        balance = self.account_state.get_balance(account_name)
+        if balance is None:
+            balance = self.exchange.get_balance(account_name, BALANCE_CURRENCY)
+            self.account_state.set_balance(account_name, balance)
+        risk_state = self.account_risks.get(account_name)
+        if balance and risk_state is not None:
+            risk_state['current_balance'] = balance
+            if risk_state['initial_balance'] <= 0:
+                risk_state['initial_balance'] = balance
+                self._checkpoint(account_name)
+        return balance
+    
     def set_risk_limits(self, limits: RiskLimits):
         """设置风险限制"""
         self.limits = limits
@@ -94,12 +177,13 @@ class RiskManager:
                     risk_state['trading_enabled'] = True
                     risk_state['cooldown_until'] = None
                     logger.info(f"✓ {account_name} - 冷却期结束，交易已重新启用")
+                    self._checkpoint(account_name)
         
         if not risk_state['trading_enabled']:
             return False, "交易已被禁用"
         
-        # 2. 检查账户余额
-        current_balance = self.exchange.get_balance(account_name, 'USDT')
+        # 2. 检查账户余额（读快照）
+        current_balance = self._current_balance(account_name)
         if not current_balance:
             return False, "无法获取账户余额"
         
@@ -107,7 +191,7 @@ class RiskManager:
             return False, f"账户余额不足 {self.limits.min_account_balance} USDT"
         
         # 3. 检查每日亏损限制
-        daily_pnl = risk_state['daily_pnl']
+        daily_pnl = self.account_state.daily_pnl(account_name)
         
         # 百分比限制
         daily_loss_pct = abs(daily_pnl / risk_state['initial_balance'] * 100) if risk_state['initial_balance'] > 0 else 0
@@ -134,12 +218,48 @@ class RiskManager:
             return False, f"连续亏损 {risk_state['consecutive_losses']} 次，暂停交易"
         
         # 6. 检查最大持仓数
-        if risk_state['open_positions_count'] >= self.limits.max_open_positions:
+        if self.account_state.open_positions(account_name) >= self.limits.max_open_positions:
             return False, f"已达最大持仓数限制 ({self.limits.max_open_positions})"
         
         return True, "允许开仓"
     
-    def record_trade(self, account_name: str, pnl: float, closed: bool = True):
+    def check_signal_exposure(self, symbol: str, side: str) -> tuple[bool, str, Optional[float]]:
+        """
+        组合层面检查（每个信号分发到各账户前调用一次，只读敞口索引的合计值）
+
+        Returns:
+            (bool, str, Optional[float]): (是否允许, 原因, 本信号还可新增的合计名义价值；None 为不限)
+        """
+        limits = self.limits
+        if limits.max_symbol_accounts is not None and \
+                self.exposure.account_count(symbol, side) >= limits.max_symbol_accounts:
+            return False, f"{symbol} 同方向持仓账户数已达上限 ({limits.max_symbol_accounts})", 0.0
+        headroom = None
+        if limits.max_symbol_notional is not None:
+            headroom = limits.max_symbol_notional - self.exposure.notional(symbol, side)
+        if limits.max_total_notional is not None:
+            total_room = limits.max_total_notional - self.exposure.total()
+            headroom = total_room if headroom is None else min(headroom, total_room)
+        if headroom is not None and headroom <= 0:
+            return False, f"{symbol} 组合敞口已达上限", 0.0
+        return True, "允许开仓", headroom
+    
+    def signal_account_slots(self, symbol: str, side: str) -> Optional[int]:
+        """本信号还可新增的同方向持仓账户数（None 为不限），分发时逐个账户扣减"""
+        if self.limits.max_symbol_accounts is None:
+            return None
+        return max(0, self.limits.max_symbol_accounts - self.exposure.account_count(symbol, side))
+    
+    def holds_side(self, account_name: str, symbol: str, side: str) -> bool:
+        """账户在该交易对上是否已有同方向持仓（加仓不占用新的账户名额）"""
+        held, _ = self.exposure.account_notional(account_name, symbol)
+        return held is not None and held == normalize_side(side)
+    
+    def get_exposure_status(self) -> Dict:
+        """组合敞口概览"""
+        return {'total_notional': self.exposure.total(), 'by_symbol': self.exposure.snapshot()}
+    
+    def record_trade(self, account_name: str, pnl: float, closed: bool = True, is_paper: bool = False):
         """
         记录交易结果
         
@@ -147,25 +267,22 @@ class RiskManager:
             account_name: 账户名称
             pnl: 盈亏金额（正数为盈利，负数为亏损）
             closed: 是否平仓（False表示开仓）
+            is_paper: 模拟盘交易（不计入实盘的盈亏统计、连亏计数与冷却，也不写检查点）
         """
+        if is_paper:
+            logger.debug(f"📝 {account_name} - 模拟盘交易不计入风控统计: {pnl:.2f} USDT")
+            return
+        
         if account_name not in self.account_risks:
             self._init_account_risk_state(account_name)
         
         risk_state = self.account_risks[account_name]
         
-        # 检查是否需要重置每日统计
-        self._check_daily_reset(account_name)
-        
         if closed:
-            # 平仓，更新统计
+            # 平仓，更新统计（快照中的余额标记为待刷新，由余额刷新任务异步更新）
             risk_state['total_trades'] += 1
-            risk_state['daily_pnl'] += pnl
             risk_state['total_pnl'] += pnl
-            
-            # 更新当前余额
-            current_balance = self.exchange.get_balance(account_name, 'USDT')
-            if current_balance:
-                risk_state['current_balance'] = current_balance
+            self.account_state.position_closed(account_name, pnl)
             
             # 更新连续盈亏
             if pnl > 0:
@@ -201,12 +318,13 @@ class RiskManager:
             can_trade, reason = self.can_open_trade(account_name, 0)
             if not can_trade:
                 logger.warning(f"⚠ {account_name} - {reason}")
-            
-            risk_state['open_positions_count'] = max(0, risk_state['open_positions_count'] - 1)
         
         else:
-            # 开仓
-            risk_state['open_positions_count'] += 1
+            # 开仓（保证金已占用，余额待刷新）
+            self.account_state.position_opened(account_name)
+            self.account_state.mark_dirty(account_name)
+        
+        self._checkpoint(account_name)
     
     def _trigger_cooldown(self, account_name: str, reason: str, duration: int = None):
         """触发冷却期"""
@@ -218,17 +336,7 @@ class RiskManager:
         risk_state['cooldown_until'] = datetime.now() + timedelta(minutes=duration)
         
         logger.warning(f"🚫 {account_name} - 交易已暂停: {reason} (冷却 {duration} 分钟)")
-    
-    def _check_daily_reset(self, account_name: str):
-        """检查是否需要重置每日统计"""
-        risk_state = self.account_risks[account_name]
-        today = datetime.now().date()
-        
-        if risk_state['last_reset_date'] < today:
-            # 新的一天，重置每日统计
-            risk_state['daily_pnl'] = 0.0
-            risk_state['last_reset_date'] = today
-            logger.info(f"✓ {account_name} - 每日统计已重置")
+        self._checkpoint(account_name)
     
     def get_risk_status(self, account_name: str) -> Dict:
         """获取风险状态"""
@@ -236,6 +344,7 @@ class RiskManager:
             self._init_account_risk_state(account_name)
         
         risk_state = self.account_risks[account_name]
+        daily_pnl = self.account_state.daily_pnl(account_name)
         
         # 计算胜率
         win_rate = 0.0
@@ -244,8 +353,8 @@ class RiskManager:
         
         # 计算每日亏损百分比
         daily_loss_pct = 0.0
-        if risk_state['initial_balance'] > 0 and risk_state['daily_pnl'] < 0:
-            daily_loss_pct = abs(risk_state['daily_pnl'] / risk_state['initial_balance'] * 100)
+        if risk_state['initial_balance'] > 0 and daily_pnl < 0:
+            daily_loss_pct = abs(daily_pnl / risk_state['initial_balance'] * 100)
         
         # 计算总亏损百分比
         total_loss_pct = 0.0
@@ -258,7 +367,7 @@ class RiskManager:
             'cooldown_until': risk_state['cooldown_until'],
             'initial_balance': risk_state['initial_balance'],
             'current_balance': risk_state['current_balance'],
-            'daily_pnl': risk_state['daily_pnl'],
+            'daily_pnl': daily_pnl,
             'total_pnl': risk_state['total_pnl'],
             'daily_loss_pct': daily_loss_pct,
             'total_loss_pct': total_loss_pct,
@@ -268,7 +377,7 @@ class RiskManager:
             'winning_trades': risk_state['winning_trades'],
             'losing_trades': risk_state['losing_trades'],
             'win_rate': win_rate,
-            'open_positions_count': risk_state['open_positions_count'],
+            'open_positions_count': self.account_state.open_positions(account_name),
         }
     
     def get_all_risk_status(self) -> Dict[str, Dict]:
@@ -281,12 +390,11 @@ class RiskManager:
     def reset_account(self, account_name: str):
         """重置账户统计（保留余额信息）"""
         if account_name in self.account_risks:
-            current_balance = self.exchange.get_balance(account_name, 'USDT') or 0.0
+            current_balance = self._current_balance(account_name) or 0.0
             
             self.account_risks[account_name] = {
                 'initial_balance': current_balance,
                 'current_balance': current_balance,
-                'daily_pnl': 0.0,
                 'total_pnl': 0.0,
                 'consecutive_losses': 0,
                 'consecutive_wins': 0,
@@ -295,10 +403,10 @@ class RiskManager:
                 'losing_trades': 0,
                 'trading_enabled': True,
                 'cooldown_until': None,
-                'last_reset_date': datetime.now().date(),
-                'open_positions_count': 0,
             }
+            self.account_state.reset(account_name)
             
+            self._checkpoint(account_name)
             logger.info(f"✓ {account_name} - 风险统计已重置")
     
     def manually_enable_trading(self, account_name: str):
@@ -306,21 +414,29 @@ class RiskManager:
         if account_name in self.account_risks:
             self.account_risks[account_name]['trading_enabled'] = True
             self.account_risks[account_name]['cooldown_until'] = None
+            self._checkpoint(account_name)
             logger.info(f"✓ {account_name} - 交易已手动启用")
     
     def manually_disable_trading(self, account_name: str, reason: str = "手动禁用"):
         """手动禁用交易"""
         if account_name in self.account_risks:
             self.account_risks[account_name]['trading_enabled'] = False
+            self._checkpoint(account_name)
             logger.warning(f"🚫 {account_name} - 交易已手动禁用: {reason}")
 
 # 全局实例（需要在使用时初始化）
 risk_manager = None
 
-def init_risk_manager(exchange_client, limits: Optional[RiskLimits] = None):
-    """初始化风险管理器"""
+def init_risk_manager(exchange_client, limits: Optional[RiskLimits] = None, db=None):
+    """初始化风险管理器（默认使用全局交易数据库保存/恢复风控状态）"""
     global risk_manager
-    risk_manager = RiskManager(exchange_client)
+    if db is None:
+        try:
+            from database import trading_db
+            db = trading_db
+        except Exception as e:
+            logger.warning(f"风控状态未启用持久化: {e}")
+    risk_manager = RiskManager(exchange_client, db=db)
     if limits:
         risk_manager.set_risk_limits(limits)
     return risk_manager
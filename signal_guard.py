@@ -0,0 +1,78 @@
+"""
+过期信号保护（延迟预算 + 滑点保护）
+执行开仓前比较 Telegram 消息时间与信号入场价和缓存的实时价格：
+超过账户的延迟预算或不利滑点上限时，按账户配置跳过、改为入场价限价单或按比例缩小仓位。
+只使用调用方传入的价格，不发起任何请求
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 超限后的处理方式
+ACTION_PROCEED = 'proceed'
+ACTION_SKIP = 'skip'
+ACTION_LIMIT = 'limit'
+ACTION_SHRINK = 'shrink'
+STALE_ACTIONS = (ACTION_SKIP, ACTION_LIMIT, ACTION_SHRINK)
+
+# 缩仓后低于该比例时直接跳过
+MIN_SHRINK_FACTOR = 0.25
+
+
+@dataclass(frozen=True)
+class GuardDecision:
+    """保护判断结果"""
+    action: str
+    reason: str = ""
+    age_sec: Optional[float] = None        # 信号年龄（秒）
+    slippage_pct: Optional[float] = None   # 不利方向的价格偏离（百分比，有利为负）
+    size_factor: float = 1.0               # 仓位缩放比例（shrink 时 < 1）
+    limit_price: Optional[float] = None    # 改为限价单时的挂单价
+
+
+def evaluate_signal(side: str, entry_price: Optional[float], live_price: Optional[float],
+                    message_time: Optional[datetime], max_age_sec: float = 0.0,
+                    max_slippage_pct: float = 0.0, action: str = ACTION_SKIP,
+                    now: Optional[datetime] = None) -> GuardDecision:
+    """
+    判断信号是否仍可按市价执行
+
+    Args:
+        side: 'buy' 或 'sell'
+        entry_price: 信号入场价（无则不检查滑点）
+        live_price: 缓存的实时价格（无则不检查滑点）
+        message_time: 消息发送时间（UTC，无时区；无则不检查延迟）
+        max_age_sec: 延迟预算（秒），0 表示不限制
+        max_slippage_pct: 不利滑点上限（百分比），0 表示不限制
+        action: 超限时的处理方式（skip / limit / shrink）
+        now: 当前时间（UTC，测试用）
+    """
+    age = None
+    if message_time is not None:
+        age = max(0.0, ((now or datetime.utcnow()) - message_time).total_seconds())
+    slippage = None
+    if entry_price and live_price:
+        moved = (live_price - entry_price) / entry_price * 100.0
+        slippage = moved if side == 'buy' else -moved
+
+    factor = 1.0
+    reasons = []
+    if max_age_sec and age is not None and age > max_age_sec:
+        reasons.append(f"信号已过去 {age:.1f}s > {max_age_sec:g}s")
+        factor = min(factor, max_age_sec / age)
+    if max_slippage_pct and slippage is not None and slippage > max_slippage_pct:
+        reasons.append(f"价格已不利偏离 {slippage:.2f}% > {max_slippage_pct:g}%")
+        factor = min(factor, max_slippage_pct / slippage)
+    if not reasons:
+        return GuardDecision(ACTION_PROCEED, age_sec=age, slippage_pct=slippage)
+
+    reason = "；".join(reasons)
+    if action == ACTION_LIMIT and entry_price:
+        return GuardDecision(ACTION_LIMIT, reason, age, slippage, limit_price=float(entry_price))
+    if action == ACTION_SHRINK and factor >= MIN_SHRINK_FACTOR:
+        return GuardDecision(ACTION_SHRINK, reason, age, slippage, size_factor=factor)
+    return GuardDecision(ACTION_SKIP, reason, age, slippage)
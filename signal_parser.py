@@ -1,7 +1,157 @@
+import logging
 import re
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from enum import Enum
 
+from keyword_matcher import KeywordMatcher
+from symbol_index import TradableSymbolIndex, tradable_symbols
+
+logger = logging.getLogger(__name__)
+
+# 分批止盈价格格式（仅当“止盈/目标/TPx”后跟明确数值时视为平仓信号），模块加载时预编译
+_TP_PRICE_PATTERNS = [
+    re.compile(r'(?:第[一二三四五六七八九十1-9]\s*止盈|tp\s*\d*|目标)\s*[:：\s]+(\d+\.?\d*)', re.IGNORECASE),
+    re.compile(r'(?:止盈|目标)\s*[:：\s]+(\d+\.?\d*)', re.IGNORECASE),
+]
+
+# 交易对：优先匹配 # / $ 前缀（在大写文本上），其次常见交易对格式（先去除 URL）
+_SYMBOL_PRIORITY_PATTERNS = [
+    re.compile(r'#([A-Z0-9]{1,10})\b'),  # 支持以数字开头，如 #0G
+    re.compile(r'\$([A-Z0-9]{1,10})\b'),  # 支持以数字开头，如 $0G
+]
+_SYMBOL_OTHER_PATTERNS = [
+    re.compile(r'([A-Z0-9]{2,10})/([A-Z]{3,5})'),  # BTC/USDT 或 0G/USDT
+    re.compile(r'([A-Z0-9]{2,10})(USDT|BUSD|USDC|DAI)\b'),  # BTCUSDT 或 0GUSDT
+    re.compile(r'\b([A-Z0-9]{2,10})\s*USDT'),  # BTC USDT 或 0G USDT
+]
+_URL_PATTERN = re.compile(r'https?://[^\s]+', re.IGNORECASE)
+
+# 入场价/止损价关键词（按优先级）
+ENTRY_KEYWORDS = ['entry', 'price', '入场', '价格']
+STOP_LOSS_KEYWORDS = ['stop loss', 'sl', '止损']
+
+# 止盈目标格式（可能有多个，全部命中取并集）：(可能的首字符, 正则)
+# 首字符用于字段扫描时快速跳过无关位置，新增格式时需一并填写
+_TAKE_PROFIT_PATTERNS = [
+    # 英文格式
+    ('t', r'tp\s*\d*[:\s：]*(\d+\.?\d*)'),
+    ('t', r'take\s*profit\s*\d*[:\s：]*(\d+\.?\d*)'),
+    ('t', r'target\s*\d*[:\s：]*(\d+\.?\d*)'),
+    # 中文格式（简体）
+    ('止', r'止盈\s*\d*[:\s：]*(\d+\.?\d*)'),
+    ('目', r'目标\s*\d*[:\s：]*(\d+\.?\d*)'),
+    # 特殊中文格式："第一止盈"、"第二止盈"等
+    ('第', r'第[一二三四五六七八九十1-9]\s*止盈[:\s：]*(\d+\.?\d*)'),
+    ('第', r'第[一二三四五六七八九十1-9]\s*目标[:\s：]*(\d+\.?\d*)'),
+    # Emoji 格式
+    ('🎯', r'🎯\s*\d*[:\s：]*(\d+\.?\d*)'),
+    # 新增中文习惯用法："到0.0703 减仓/保本一次"、"到 0.0703" 等
+    # （第一个分组为“到”与价格之间的间隔，仅含空白时同时视为止盈提示）
+    ('到', r'到([:\s]*?)(\d+\.?\d*)'),
+    ('到', r'到价[:\s：]*?(\d+\.?\d*)'),
+    ('减減保', r'(?:减仓|減倉|保本)[:\s]*?(\d+\.?\d*)'),
+]
+
+# 杠杆格式（按优先级）
+_LEVERAGE_PATTERNS = [
+    r'leverage[:\s]*(\d+)[x]?',
+    r'(\d+)[x]\s*leverage',
+    r'杠杆[:\s]*(\d+)',
+]
+_LEVERAGE_REGEXES = [re.compile(p, re.IGNORECASE) for p in _LEVERAGE_PATTERNS]
+# 字段扫描中使用的等价形式：“数字x leverage” 以 x 为锚点，数值取紧邻其前的连续数字
+# （避免在每个数字位置都尝试全部格式）
+_LEVERAGE_SCAN_PATTERNS = [
+    ('l', r'leverage[:\s]*(\d+)[x]?'),
+    ('x', r'[x]\s*leverage'),
+    ('杠', r'杠杆[:\s]*(\d+)'),
+]
+
+# 止盈提示关键词（与“到 + 数字”一起用于预判止盈提示消息）
+TP_HINT_KEYWORDS = ['止盈', '目标', 'tp', '减仓', '減倉', '保本']
+
+# _extract_price 按关键词缓存的编译结果
+_PRICE_PATTERN_CACHE: Dict[str, Any] = {}
+
+
+def _build_field_scanner():
+    """
+    将入场/止损/止盈/杠杆的全部格式合并为一个交替正则
+
+    每个格式包在命名分组 f<n> 中，值为该分组内最后一个捕获组（无捕获组时取紧邻其前的连续数字）；
+    整体前置首字符前瞻，使引擎在无关位置快速失败
+    返回 (编译后的正则, {分组名: (字段, 优先级, 值分组号或 None, 间隔分组号或 None)})
+    """
+    specs = []
+    specs += [('entry', rank, kw[0], rf'{kw}[:\s]*(\d+\.?\d*)') for rank, kw in enumerate(ENTRY_KEYWORDS)]
+    specs += [('stop_loss', rank, kw[0], rf'{kw}[:\s]*(\d+\.?\d*)') for rank, kw in enumerate(STOP_LOSS_KEYWORDS)]
+    specs += [('take_profit', rank, lead, pat) for rank, (lead, pat) in enumerate(_TAKE_PROFIT_PATTERNS)]
+    specs += [('leverage', rank, lead, pat) for rank, (lead, pat) in enumerate(_LEVERAGE_SCAN_PATTERNS)]
+
+    leads = ''.join(sorted({ch for _, _, lead, _ in specs for ch in lead}))
+    body = '|'.join(f'(?P<f{n}>{pat})' for n, (_, _, _, pat) in enumerate(specs))
+    regex = re.compile(f'(?=[{re.escape(leads)}])(?:{body})', re.IGNORECASE)
+    meta = {}
+    for n, (name, rank, _, pat) in enumerate(specs):
+        start = regex.groupindex[f'f{n}']
+        inner = re.compile(pat).groups
+        meta[f'f{n}'] = (name, rank, start + inner if inner else None, start + 1 if inner > 1 else None)
+    return regex, meta
+
+
+_FIELD_REGEX, _FIELD_META = _build_field_scanner()
+
+
+def _scan_fields(message: str) -> Dict[str, Any]:
+    """
+    一次扫描提取入场价、止损价、止盈列表与杠杆
+
+    在每个可能的起始位置尝试全部格式（各格式起始内容互不冲突，同一位置至多一个命中），
+    入场/止损/杠杆按“格式优先级 → 位置”取第一个，止盈取全部去重后排序，
+    结果与逐个格式 re.search / re.finditer 一致
+    """
+    best: Dict[str, Any] = {}  # 字段 -> (优先级, 值)
+    tp_list: List[float] = []
+    dao_hint = False
+    search = _FIELD_REGEX.search
+    pos = 0
+    while True:
+        match = search(message, pos)
+        if match is None:
+            break
+        pos = match.start() + 1
+        name, rank, value_group, gap_group = _FIELD_META[match.lastgroup]
+        if value_group is None:
+            # 以 x 为锚点的杠杆格式：取紧邻其前的连续数字
+            begin = match.start()
+            while begin > 0 and message[begin - 1].isdecimal():
+                begin -= 1
+            raw = message[begin:match.start()]
+            if not raw:
+                continue
+        else:
+            raw = match.group(value_group)
+        try:
+            if name == 'take_profit':
+                price = float(raw)
+                if price > 0 and price not in tp_list:
+                    tp_list.append(price)
+                if gap_group is not None and not match.group(gap_group).strip():
+                    dao_hint = True
+            elif name not in best or rank < best[name][0]:
+                best[name] = (rank, int(raw) if name == 'leverage' else float(raw))
+        except (ValueError, IndexError):
+            continue
+    return {
+        'entry_price': best['entry'][1] if 'entry' in best else None,
+        'stop_loss': best['stop_loss'][1] if 'stop_loss' in best else None,
+        'take_profit': sorted(tp_list),
+        'leverage': best['leverage'][1] if 'leverage' in best else None,
+        'dao_hint': dao_hint,
+    }
+
 class SignalType(Enum):
     """信号类型"""
     BUY = "BUY"
@@ -16,7 +166,8 @@ class TradingSignal:
     
     def __init__(self, signal_type: SignalType, symbol: str, entry_price: Optional[float] = None,
                  stop_loss: Optional[float] = None, take_profit: Optional[list] = None,
-                 leverage: Optional[int] = None, raw_message: str = ""):
+                 leverage: Optional[int] = None, raw_message: str = "",
+                 message_time: Optional[datetime] = None):
         self.signal_type = signal_type
         self.symbol = symbol
         self.entry_price = entry_price
@@ -24,11 +175,40 @@ class TradingSignal:
         self.take_profit = take_profit or []
         self.leverage = leverage
         self.raw_message = raw_message
+        self.message_time = message_time  # 消息发送时间（UTC，无时区），用于过期信号判断
+        self.price_scale = 1.0  # 信号价格相对原消息价格的换算系数（币种别名，如 PEPE -> 1000PEPE 为 1000）
+    
+    def apply_alias(self, symbol: str, scale: float) -> 'TradingSignal':
+        """换成别名币种并按乘数换算所有价格（原地修改，返回自身）"""
+        self.symbol = symbol
+        if scale != 1.0:
+            self.entry_price = _scale_price(self.entry_price, scale)
+            self.stop_loss = _scale_price(self.stop_loss, scale)
+            self.take_profit = [_scale_price(p, scale) for p in self.take_profit]
+            self.price_scale *= scale
+        return self
     
     def __repr__(self):
         return (f"TradingSignal(type={self.signal_type.value}, symbol={self.symbol}, "
                 f"entry={self.entry_price}, sl={self.stop_loss}, tp={self.take_profit})")
 
+@dataclass(frozen=True)
+class MessageAnalysis:
+    """单条消息的一次性解析结果（信号类型 + 全部字段，不可变），供解析、止盈提示预判与缓存共享"""
+    signal_type: SignalType
+    symbol: Optional[str] = None
+    entry_price: Optional[float] = None
+    stop_loss: Optional[float] = None
+    take_profit: Tuple[float, ...] = ()
+    leverage: Optional[int] = None
+    is_tp_hint: bool = False  # 是否为止盈提示（止盈/目标/TP/减仓/保本/“到 + 数字”）
+    
+    @property
+    def trading_key(self) -> tuple:
+        """与交易相关的字段，用于判断消息（编辑前后）是否需要重新处理"""
+        return (self.signal_type.value, self.symbol, self.entry_price, self.stop_loss,
+                self.take_profit, self.leverage, self.is_tp_hint)
+
 class SignalParser:
     """信号解析器"""
     
@@ -52,37 +232,100 @@ class SignalParser:
         '进空', '進空', '市价开空', '市價開空', '空单', '空單', '反手空'
     ]
     CLOSE_KEYWORDS = ['close', 'exit', '平仓', '关闭', '平倉', '關閉', '清仓', '清倉', '平多', '平空']
+    # 回顾/战绩/统计/复盘/总结类消息（命中任一即忽略）
+    REVIEW_KEYWORDS = [
+        '获利', '獲利', '盈利', '盈亏', '盈虧', '胜率', '收益', '净值',
+        '战绩', '戰績', '战报', '戰報', '统计', '統計', '月度', '周度', '复盘', '復盤', '总结', '總結',
+        '回顾', '回顧', '本周', '上周', '每日总结', '每天战绩', '目标已达成', 'TP达成'
+    ]
+    # 统计、日期、推广等排除关键词（命中两个及以上即忽略）
+    EXCLUDE_KEYWORDS = ['号', '號', '点击', '点击进入', '免费', '体验', '每天', '每場']
+    # 仅“已触发/达成/到位”且无明确价格的提示
+    TRIGGER_ONLY_KEYWORDS = ['已触发', '已觸發', '达成', '達成', '到位']
+    
+    # 所有关键词分组编译后的单遍匹配器（见 compile_keywords）
+    _keyword_matcher: Optional[KeywordMatcher] = None
+    
+    # 可交易币种索引（由已加载的交易所 markets 构建；为空时不校验币种）
+    symbol_index: Optional[TradableSymbolIndex] = tradable_symbols
+    
+    @classmethod
+    def compile_keywords(cls) -> KeywordMatcher:
+        """
+        将各组关键词编译为单遍匹配器
+        
+        修改/扩充关键词列表后需重新调用一次
+        """
+        cls._keyword_matcher = KeywordMatcher({
+            'review': cls.REVIEW_KEYWORDS,
+            'exclude': cls.EXCLUDE_KEYWORDS,
+            'buy': cls.BUY_KEYWORDS,
+            'sell': cls.SELL_KEYWORDS,
+            'close': cls.CLOSE_KEYWORDS,
+            'trigger': cls.TRIGGER_ONLY_KEYWORDS,
+            'tp_hint': TP_HINT_KEYWORDS,
+        })
+        return cls._keyword_matcher
+    
+    @staticmethod
+    def analyze(message: str, chat_id=None) -> MessageAnalysis:
+        """
+        一次性解析消息的信号类型与全部字段（无论是否构成信号）
+        
+        关键词只扫描一遍、字段只扫描一遍；结果可传给 parse(analysis=...) 复用。
+        传入 chat_id 且该群配置了模板时优先按模板解析，未命中再走通用解析
+        """
+        if chat_id is not None:
+            result = SignalParser._analyze_with_template(message, chat_id)
+            if result is not None:
+                return result
+        message_lower = message.lower()
+        hits = SignalParser._scan_keywords(message_lower)
+        fields = _scan_fields(message)
+        return MessageAnalysis(
+            signal_type=SignalParser._detect_signal_type(message_lower, hits),
+            symbol=SignalParser._extract_symbol(message),
+            entry_price=fields['entry_price'],
+            stop_loss=fields['stop_loss'],
+            take_profit=tuple(fields['take_profit']),
+            leverage=fields['leverage'],
+            is_tp_hint=bool(hits['tp_hint']) or fields['dao_hint'],
+        )
     
     @staticmethod
-    def parse(message: str) -> Optional[TradingSignal]:
+    def parse(message: str, analysis: Optional[MessageAnalysis] = None, chat_id=None) -> Optional[TradingSignal]:
         """
         解析 Telegram 消息，提取交易信号
         
         Args:
             message: Telegram 消息内容
+            analysis: 已有的 analyze() 结果（传入则不再重复扫描）
+            chat_id: 消息来源群组（配置了模板的群优先按模板解析）
             
         Returns:
             TradingSignal 对象或 None
         """
-        message_lower = message.lower()
-        
-        # 确定信号类型
-        signal_type = SignalParser._detect_signal_type(message_lower)
-        if signal_type == SignalType.UNKNOWN:
-            return None
-        
-        # 提取交易对
-        symbol = SignalParser._extract_symbol(message)
-        if not symbol:
-            return None
+        if analysis is None and chat_id is not None:
+            analysis = SignalParser._analyze_with_template(message, chat_id)
+        if analysis is None:
+            # 未预先分析时先判定类型，非信号消息不再提取字段
+            signal_type = SignalParser._detect_signal_type(message.lower())
+            if signal_type == SignalType.UNKNOWN:
+                return None
+            symbol = SignalParser._extract_symbol(message)
+            if not symbol:
+                return None
+            fields = _scan_fields(message)
+            entry_price, stop_loss = fields['entry_price'], fields['stop_loss']
+            take_profit, leverage = fields['take_profit'], fields['leverage']
+        else:
+            signal_type, symbol = analysis.signal_type, analysis.symbol
+            if signal_type == SignalType.UNKNOWN or not symbol:
+                return None
+            entry_price, stop_loss = analysis.entry_price, analysis.stop_loss
+            take_profit, leverage = list(analysis.take_profit), analysis.leverage
         
-        # 提取价格信息
-        entry_price = SignalParser._extract_price(message, ['entry', 'price', '入场', '价格'])
-        stop_loss = SignalParser._extract_price(message, ['stop loss', 'sl', '止损'])
-        take_profit = SignalParser._extract_take_profit(message)
-        leverage = SignalParser._extract_leverage(message)
-        
-        return TradingSignal(
+        return SignalParser._check_tradable(TradingSignal(
             signal_type=signal_type,
             symbol=symbol,
             entry_price=entry_price,
@@ -90,55 +333,129 @@ class SignalParser:
             take_profit=take_profit,
             leverage=leverage,
             raw_message=message
-        )
+        ))
+    
+    @staticmethod
+    def _check_tradable(signal: TradingSignal) -> Optional[TradingSignal]:
+        """
+        按可交易币种索引校验信号币种：解析别名（如 PEPE -> 1000PEPE，价格按乘数换算），
+        任何已连接交易所都不可交易的币种直接丢弃，避免进入各账户的下单流程
+        """
+        index = SignalParser.symbol_index
+        if index is None or not index.ready:
+            return signal
+        resolved = index.resolve(signal.symbol)
+        if resolved is None:
+            logger.warning(f"⚠ {signal.symbol} 不在任何已连接交易所的可交易列表中，忽略信号")
+            return None
+        symbol, scale = resolved
+        if symbol != signal.symbol:
+            logger.info(f"币种别名: {signal.symbol} -> {symbol}" + (f"（价格 ×{scale:g}）" if scale != 1.0 else ""))
+        return signal.apply_alias(symbol, scale)
+    
+    @staticmethod
+    def parse_many(messages: Iterable[str], workers: Optional[int] = None,
+                   chunk_size: int = 1000) -> List[Optional[TradingSignal]]:
+        """
+        批量解析消息（如导出的群聊历史），结果顺序与输入一致
+        
+        Args:
+            messages: 消息文本序列
+            workers: 进程数（> 1 时按块分发到进程池并行解析，None/1 为当前进程顺序解析）
+            chunk_size: 每块消息数
+            
+        Returns:
+            与输入一一对应的 TradingSignal 或 None（相同文本只解析一次，但各自返回独立对象）
+        """
+        messages = [m or '' for m in messages]
+        if workers and workers > 1 and len(messages) > chunk_size:
+            from concurrent.futures import ProcessPoolExecutor
+            chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+            results: List[Optional[TradingSignal]] = []
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for part in pool.map(_parse_chunk, chunks):
+                    for fields in part:
+                        # 子进程只回传字段元组，原文在本进程补回，减少序列化开销
+                        if fields is None:
+                            results.append(None)
+                        else:
+                            # 子进程没有本进程的可交易币种索引，币种校验在本进程完成
+                            type_value, symbol, entry, sl, tps, lev = fields
+                            results.append(SignalParser._check_tradable(
+                                TradingSignal(SignalType(type_value), symbol, entry, sl, list(tps), lev,
+                                              messages[len(results)])))
+            return results
+        
+        parsed: Dict[str, Optional[TradingSignal]] = {}
+        results = []
+        for message in messages:
+            if message in parsed:
+                signal = parsed[message]
+                if signal is not None:
+                    scale = signal.price_scale
+                    signal = TradingSignal(signal.signal_type, signal.symbol, signal.entry_price, signal.stop_loss,
+                                           list(signal.take_profit), signal.leverage, signal.raw_message)
+                    signal.price_scale = scale
+            else:
+                signal = parsed[message] = SignalParser.parse(message)
+            results.append(signal)
+        return results
+    
+    @staticmethod
+    def _analyze_with_template(message: str, chat_id) -> Optional[MessageAnalysis]:
+        """
+        按群组模板解析；群组无模板，或模板未识别且允许回退时返回 None（由调用方走通用解析）
+        """
+        # 延迟导入：signal_templates 依赖本模块
+        from signal_templates import signal_templates
+        template = signal_templates.get(chat_id)
+        if template is None:
+            return None
+        result = template.analyze(message)
+        if result is None and not template.fallback:
+            return MessageAnalysis(signal_type=SignalType.UNKNOWN)
+        return result
+    
+    @staticmethod
+    def _scan_keywords(message: str) -> Dict[str, Any]:
+        """单遍扫描各组关键词（message 需已转小写）"""
+        matcher = SignalParser._keyword_matcher or SignalParser.compile_keywords()
+        return matcher.scan(message)
     
     @staticmethod
-    def _detect_signal_type(message: str) -> SignalType:
+    def _detect_signal_type(message: str, hits: Optional[Dict[str, Any]] = None) -> SignalType:
         """
         检测信号类型
         
         🔧 BUG 16 修复：排除统计/总结类消息，但保留真实信号
         """
+        # 一次扫描得到各组命中的关键词，判定优先级与逐组判断一致
+        if hits is None:
+            hits = SignalParser._scan_keywords(message)
+        
         # 🔧 排除规则1：回顾/战绩/统计/复盘/总结类消息
-        review_keywords = [
-            '获利', '獲利', '盈利', '盈亏', '盈虧', '胜率', '收益', '净值',
-            '战绩', '戰績', '战报', '戰報', '统计', '統計', '月度', '周度', '复盘', '復盤', '总结', '總結',
-            '回顾', '回顧', '本周', '上周', '每日总结', '每天战绩', '目标已达成', 'TP达成'
-        ]
-        if any(kw in message for kw in review_keywords):
+        if hits['review']:
             return SignalType.UNKNOWN
         
         # 🔧 排除规则2：如果包含多个排除关键词（统计、日期、推广等）
-        exclude_keywords = ['号', '號', '点击', '点击进入', '免费', '体验', '每天', '每場']
-        exclude_count = sum(1 for kw in exclude_keywords if kw in message)
-        if exclude_count >= 2:
+        if len(hits['exclude']) >= 2:
             return SignalType.UNKNOWN
         
         # 正常的信号类型检测
-        for keyword in SignalParser.BUY_KEYWORDS:
-            if keyword in message:
-                return SignalType.LONG
-        
-        for keyword in SignalParser.SELL_KEYWORDS:
-            if keyword in message:
-                return SignalType.SHORT
-        
-        for keyword in SignalParser.CLOSE_KEYWORDS:
-            if keyword in message:
-                return SignalType.CLOSE
+        if hits['buy']:
+            return SignalType.LONG
+        if hits['sell']:
+            return SignalType.SHORT
+        if hits['close']:
+            return SignalType.CLOSE
         
         # 补充：仅当“止盈/目标/TPx”同时出现明确价格格式（含冒号/空格后的数值）时，视为分批平仓
         # 避免 "TP1/TP2 已触发/达成" 这类无价格统计类提示被当成信号
-        tp_price_patterns = [
-            r'(?:第[一二三四五六七八九十1-9]\s*止盈|tp\s*\d*|目标)\s*[:：\s]+(\d+\.?\d*)',
-            r'(?:止盈|目标)\s*[:：\s]+(\d+\.?\d*)'
-        ]
-        for pat in tp_price_patterns:
-            if re.search(pat, message, re.IGNORECASE):
+        for pattern in _TP_PRICE_PATTERNS:
+            if pattern.search(message):
                 return SignalType.CLOSE
         # 若仅出现 “已触发/达成/到位” 且不含明确价格，忽略
-        trigger_only_keywords = ['已触发', '已觸發', '达成', '達成', '到位']
-        if any(k in message for k in trigger_only_keywords):
+        if hits['trigger']:
             return SignalType.UNKNOWN
         
         return SignalType.UNKNOWN
@@ -152,29 +469,17 @@ class SignalParser:
         🔧 BUG 16 修复：优先匹配 # 和 $ 开头的符号，避免误匹配 URL
         """
         # 🔧 优先匹配带 # 或 $ 前缀的符号（最常见的信号格式）
-        priority_patterns = [
-            r'#([A-Z0-9]{1,10})\b',  # 支持以数字开头，如 #0G
-            r'\$([A-Z0-9]{1,10})\b',  # 支持以数字开头，如 $0G
-        ]
-        
-        for pattern in priority_patterns:
-            match = re.search(pattern, message.upper())
+        message_upper = message.upper()
+        for pattern in _SYMBOL_PRIORITY_PATTERNS:
+            match = pattern.search(message_upper)
             if match:
                 # 只匹配到币种，默认配对 USDT
                 return f"{match.group(1)}/USDT"
         
-        # 🔧 其他格式（需要排除 URL）
-        other_patterns = [
-            r'([A-Z0-9]{2,10})/([A-Z]{3,5})',  # BTC/USDT 或 0G/USDT
-            r'([A-Z0-9]{2,10})(USDT|BUSD|USDC|DAI)\b',  # BTCUSDT 或 0GUSDT
-            r'\b([A-Z0-9]{2,10})\s*USDT',  # BTC USDT 或 0G USDT
-        ]
-        
-        # 🔧 排除 URL 区域（http:// 或 https:// 开头到下一个空格）
-        clean_message = re.sub(r'https?://[^\s]+', '', message, flags=re.IGNORECASE)
-        
-        for pattern in other_patterns:
-            match = re.search(pattern, clean_message.upper())
+        # 🔧 其他格式（需要排除 URL：http:// 或 https:// 开头到下一个空格）
+        clean_upper = _URL_PATTERN.sub('', message).upper()
+        for pattern in _SYMBOL_OTHER_PATTERNS:
+            match = pattern.search(clean_upper)
             if match:
                 if len(match.groups()) == 2:
                     # 匹配到完整交易对
@@ -189,8 +494,11 @@ class SignalParser:
     def _extract_price(message: str, keywords: list) -> Optional[float]:
         """提取价格"""
         for keyword in keywords:
-            pattern = rf'{keyword}[:\s]*(\d+\.?\d*)'
-            match = re.search(pattern, message, re.IGNORECASE)
+            pattern = _PRICE_PATTERN_CACHE.get(keyword)
+            if pattern is None:
+                pattern = re.compile(rf'{keyword}[:\s]*(\d+\.?\d*)', re.IGNORECASE)
+                _PRICE_PATTERN_CACHE[keyword] = pattern
+            match = pattern.search(message)
             if match:
                 try:
                     return float(match.group(1))
@@ -201,50 +509,14 @@ class SignalParser:
     @staticmethod
     def _extract_take_profit(message: str) -> list:
         """提取止盈目标（可能有多个）- 增强版支持中文格式"""
-        tp_list = []
-        patterns = [
-            # 英文格式
-            r'tp\s*\d*[:\s：]*(\d+\.?\d*)',
-            r'take\s*profit\s*\d*[:\s：]*(\d+\.?\d*)',
-            r'target\s*\d*[:\s：]*(\d+\.?\d*)',
-            # 中文格式（简体）
-            r'止盈\s*\d*[:\s：]*(\d+\.?\d*)',
-            r'目标\s*\d*[:\s：]*(\d+\.?\d*)',
-            # 特殊中文格式："第一止盈"、"第二止盈"等
-            r'第[一二三四五六七八九十1-9]\s*止盈[:\s：]*(\d+\.?\d*)',
-            r'第[一二三四五六七八九十1-9]\s*目标[:\s：]*(\d+\.?\d*)',
-            # Emoji 格式
-            r'🎯\s*\d*[:\s：]*(\d+\.?\d*)',
-            # 新增中文习惯用法："到0.0703 减仓/保本一次"、"到 0.0703" 等
-            r'到[:\s]*?(\d+\.?\d*)',
-            r'到价[:\s：]*?(\d+\.?\d*)',
-            r'(?:减仓|減倉|保本)[:\s]*?(\d+\.?\d*)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, message, re.IGNORECASE)
-            for match in matches:
-                try:
-                    price = float(match.group(1))
-                    if price > 0 and price not in tp_list:
-                        tp_list.append(price)
-                except (ValueError, IndexError):
-                    continue
-        
-        # 按价格排序
-        return sorted(tp_list)
+        # 全部格式在字段扫描中一次完成（格式表见 _TAKE_PROFIT_PATTERNS），按价格排序
+        return _scan_fields(message)['take_profit']
     
     @staticmethod
     def _extract_leverage(message: str) -> Optional[int]:
         """提取杠杆倍数"""
-        patterns = [
-            r'leverage[:\s]*(\d+)[x]?',
-            r'(\d+)[x]\s*leverage',
-            r'杠杆[:\s]*(\d+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
+        for pattern in _LEVERAGE_REGEXES:
+            match = pattern.search(message)
             if match:
                 try:
                     return int(match.group(1))
@@ -252,3 +524,18 @@ class SignalParser:
                     continue
         return None
 
+def _scale_price(price: Optional[float], scale: float) -> Optional[float]:
+    """按合约乘数换算价格（消除浮点误差）"""
+    return None if price is None else float(f"{price * scale:.12g}")
+
+
+def _parse_chunk(messages: List[str]) -> List[Optional[tuple]]:
+    """进程池工作函数：顺序解析一块消息，返回 (类型, 币种, 入场, 止损, 止盈, 杠杆) 或 None"""
+    return [
+        (s.signal_type.value, s.symbol, s.entry_price, s.stop_loss, tuple(s.take_profit), s.leverage) if s else None
+        for s in SignalParser.parse_many(messages)
+    ]
+
+
+# 模块加载时编译关键词匹配器
+SignalParser.compile_keywords()
@@ -0,0 +1,178 @@
+"""
+按群组的信号模板
+不同信号源的格式差异很大（"#0G 市价多"、"第一止盈："、"🎯" 等），
+为已知群组配置专用模板（signal_templates.json），加载时编译为该群专用的匹配器：
+来自已知群组的消息只走模板的少量格式，未命中时再回退到通用解析器
+"""
+
+import itertools
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+from keyword_matcher import KeywordMatcher
+from signal_parser import SignalParser, SignalType, MessageAnalysis
+
+logger = logging.getLogger(__name__)
+
+# 模板版本号（每次编译递增，用于区分解析缓存中新旧模板的结果）
+_template_versions = itertools.count(1)
+
+
+class SignalTemplate:
+    """
+    单个群组的编译后模板
+
+    配置字段（除 long/short 外均可省略）:
+        name: 模板名称（日志用）
+        long / short / close: 方向关键词列表（不区分大小写）
+        ignore: 命中即忽略的关键词（战绩/广告等）
+        symbol: 币种正则，需包含命名分组 base（可选 quote，缺省 USDT）；省略时使用通用币种提取
+        entry / stop_loss / leverage: 取第一个匹配的正则，需包含命名分组 value
+        take_profit: 止盈正则列表（全部匹配取并集），需包含命名分组 value
+        fallback: 模板未识别时是否回退通用解析器（默认 true）
+    """
+
+    def __init__(self, chat_id: str, config: Dict[str, Any]):
+        self.chat_id = str(chat_id)
+        self.version = next(_template_versions)
+        self.name = config.get('name') or self.chat_id
+        self.fallback = bool(config.get('fallback', True))
+        self.keywords = KeywordMatcher({
+            'ignore': [kw.lower() for kw in config.get('ignore', [])],
+            'long': [kw.lower() for kw in config.get('long', [])],
+            'short': [kw.lower() for kw in config.get('short', [])],
+            'close': [kw.lower() for kw in config.get('close', [])],
+        })
+        self.symbol = self._compile(config.get('symbol'), 'base')
+        self.entry = self._compile(config.get('entry'), 'value')
+        self.stop_loss = self._compile(config.get('stop_loss'), 'value')
+        self.leverage = self._compile(config.get('leverage'), 'value')
+        take_profit = config.get('take_profit') or []
+        if isinstance(take_profit, str):
+            take_profit = [take_profit]
+        self.take_profit = [self._compile(p, 'value') for p in take_profit]
+
+    def _compile(self, pattern: Optional[str], group: str):
+        if not pattern:
+            return None
+        regex = re.compile(pattern, re.IGNORECASE)
+        if group not in regex.groupindex:
+            raise ValueError(f"模板 {self.name} 的正则缺少命名分组 {group}: {pattern}")
+        return regex
+
+    def analyze(self, message: str) -> Optional[MessageAnalysis]:
+        """
+        按模板解析消息
+
+        Returns:
+            MessageAnalysis；消息不符合该模板（无方向关键词且无止盈价）时返回 None
+        """
+        hits = self.keywords.scan(message.lower())
+        if hits['ignore']:
+            return MessageAnalysis(signal_type=SignalType.UNKNOWN)
+
+        take_profit: List[float] = []
+        for regex in self.take_profit:
+            for match in regex.finditer(message):
+                price = self._to_number(match.group('value'), float)
+                if price and price > 0 and price not in take_profit:
+                    take_profit.append(price)
+
+        if hits['long']:
+            signal_type = SignalType.LONG
+        elif hits['short']:
+            signal_type = SignalType.SHORT
+        elif hits['close'] or take_profit:
+            signal_type = SignalType.CLOSE
+        else:
+            return None
+
+        return MessageAnalysis(
+            signal_type=signal_type,
+            symbol=self._extract_symbol(message),
+            entry_price=self._search(self.entry, message, float),
+            stop_loss=self._search(self.stop_loss, message, float),
+            take_profit=tuple(sorted(take_profit)),
+            leverage=self._search(self.leverage, message, int),
+            is_tp_hint=bool(take_profit),
+        )
+
+    def _extract_symbol(self, message: str) -> Optional[str]:
+        if self.symbol is None:
+            return SignalParser._extract_symbol(message)
+        match = self.symbol.search(message)
+        if not match:
+            return SignalParser._extract_symbol(message)
+        quote = match.groupdict().get('quote') or 'USDT'
+        return f"{match.group('base').upper()}/{quote.upper()}"
+
+    def _search(self, regex, message: str, cast):
+        if regex is None:
+            return None
+        match = regex.search(message)
+        return self._to_number(match.group('value'), cast) if match else None
+
+    @staticmethod
+    def _to_number(raw: Optional[str], cast):
+        try:
+            return cast(raw) if raw else None
+        except ValueError:
+            return None
+
+
+class SignalTemplateRegistry:
+    """群组模板注册表：chat_id -> SignalTemplate（从 JSON 配置加载）"""
+
+    def __init__(self, config_file: str = 'signal_templates.json'):
+        self.config_file = Path(config_file)
+        self._templates: Dict[str, SignalTemplate] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> int:
+        """加载并编译模板，返回成功加载的数量（配置文件不存在时为空）"""
+        templates: Dict[str, SignalTemplate] = {}
+        if self.config_file.exists():
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for chat_id, config in (data.get('profiles') or {}).items():
+                    if not config.get('enabled', True):
+                        continue
+                    try:
+                        templates[str(chat_id)] = SignalTemplate(chat_id, config)
+                    except (ValueError, re.error) as e:
+                        logger.warning(f"⚠ 群组模板 {chat_id} 编译失败，已跳过: {e}")
+            except Exception as e:
+                logger.warning(f"加载群组模板失败: {e}")
+        with self._lock:
+            self._templates = templates
+        if templates:
+            logger.info(f"✓ 已加载群组模板 {len(templates)} 个: " + ", ".join(t.name for t in templates.values()))
+        return len(templates)
+
+    def get(self, chat_id) -> Optional[SignalTemplate]:
+        """获取群组模板（未配置返回 None）"""
+        if chat_id is None or not self._templates:
+            return None
+        return self._templates.get(str(chat_id))
+
+    def add(self, chat_id, config: Dict[str, Any]) -> SignalTemplate:
+        """运行时注册/替换一个群组模板"""
+        template = SignalTemplate(chat_id, config)
+        with self._lock:
+            self._templates = {**self._templates, str(chat_id): template}
+        return template
+
+    def remove(self, chat_id):
+        """移除群组模板（之后该群走通用解析）"""
+        with self._lock:
+            self._templates = {k: v for k, v in self._templates.items() if k != str(chat_id)}
+
+
+# 全局模板注册表
+signal_templates = SignalTemplateRegistry()
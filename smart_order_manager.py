@@ -22,6 +22,10 @@ class TPSLConfig:
     breakeven_enabled: bool = True
     breakeven_trigger_percent: float = 1.0
     stop_trailing_after_breakeven: bool = False
+    trailing_min_step_percent: float = 0.1    # 交易所止损改单的最小步长（百分比）
+    trailing_min_step_ticks: int = 0          # 交易所止损改单的最小步长（价格最小变动单位个数，0 为不限制）
+    trailing_min_amend_interval: float = 10.0  # 同一持仓两次改单的最小间隔（秒）
+    trailing_native: bool = True              # 交易所支持时改用原生追踪止损单（程序追踪作为后备）
     
     def __post_init__(self):
         if self.additional_tps is None:
@@ -53,7 +57,11 @@ class SmartOrderManager:
                     trailing_stop_percent=data.get('trailing_stop', {}).get('percent', 2.0),
                     breakeven_enabled=data.get('breakeven', {}).get('enabled', True),
                     breakeven_trigger_percent=data.get('breakeven', {}).get('trigger_percent', 1.0),
-                    stop_trailing_after_breakeven=data.get('stop_trailing_after_breakeven', False)
+                    stop_trailing_after_breakeven=data.get('stop_trailing_after_breakeven', False),
+                    trailing_min_step_percent=data.get('trailing_stop', {}).get('min_step_percent', 0.1),
+                    trailing_min_step_ticks=data.get('trailing_stop', {}).get('min_step_ticks', 0),
+                    trailing_min_amend_interval=data.get('trailing_stop', {}).get('min_amend_interval_sec', 10.0),
+                    trailing_native=data.get('trailing_stop', {}).get('native', True)
                 )
             except Exception as e:
                 logger.warning(f"加载配置失败，使用默认配置: {e}")
@@ -89,7 +97,11 @@ class SmartOrderManager:
             'trailing_stop_percent': self.config.trailing_stop_percent,
             'move_to_breakeven': self.config.breakeven_enabled,
             'breakeven_trigger_percent': self.config.breakeven_trigger_percent,
-            'stop_trailing_after_breakeven': getattr(self.config, 'stop_trailing_after_breakeven', False)
+            'stop_trailing_after_breakeven': getattr(self.config, 'stop_trailing_after_breakeven', False),
+            'trailing_min_step_percent': self.config.trailing_min_step_percent,
+            'trailing_min_step_ticks': self.config.trailing_min_step_ticks,
+            'trailing_min_amend_interval': self.config.trailing_min_amend_interval,
+            'trailing_native': self.config.trailing_native,
         }
         
         # 1. 处理止损
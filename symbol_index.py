@@ -0,0 +1,158 @@
+"""
+可交易币种索引
+由各账户已加载的 markets 构建（base -> 各账户的合约符号），供解析阶段校验币种是否可交易、
+解析别名（1000PEPE / PEPE、0G 等数字开头的币种），以及快速换算各账户的合约符号
+"""
+
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+# 小币种常见的合约乘数前缀（如 1000PEPE、1000000MOG）
+_MULTIPLIER_PREFIX = re.compile(r'^(1000000|10000|1000)(?=[A-Z])')
+_MULTIPLIERS = {'1000000': 1000000.0, '10000': 10000.0, '1000': 1000.0}
+
+
+def _market_priority(market: Dict[str, Any]) -> int:
+    """合约符号优先级：USDT 本位永续 > 其他永续/交割 > USDT 现货 > 其他"""
+    quote = str(market.get('quote') or '').upper()
+    if market.get('type') == 'swap' and quote == 'USDT':
+        return 3
+    if market.get('contract') or market.get('type') in ('swap', 'future'):
+        return 2
+    if quote == 'USDT':
+        return 1
+    return 0
+
+
+class TradableSymbolIndex:
+    """可交易币种索引：account -> {base: 合约符号}，以及 base -> 可交易账户"""
+
+    def __init__(self):
+        self._contracts: Dict[str, Dict[str, str]] = {}  # account -> {BASE: symbol}
+        self._accounts_by_base: Dict[str, List[str]] = {}  # BASE -> [account]
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """是否已有账户的 markets 可用（为空时不做校验）"""
+        return bool(self._contracts)
+
+    def update_account(self, account_name: str, markets: Optional[Dict[str, Dict[str, Any]]]) -> int:
+        """用账户已加载的 markets 更新索引，返回该账户可交易的币种数"""
+        best: Dict[str, Tuple[int, str]] = {}
+        for symbol, market in (markets or {}).items():
+            try:
+                if market.get('active') is False:
+                    continue
+                base = str(market.get('base') or symbol.split('/')[0]).upper()
+                priority = _market_priority(market)
+                if base not in best or priority > best[base][0]:
+                    best[base] = (priority, symbol)
+            except Exception:
+                continue
+        with self._lock:
+            self._contracts[account_name] = {base: symbol for base, (_, symbol) in best.items()}
+            self._rebuild_bases()
+        logger.info(f"✓ {account_name} 可交易币种索引: {len(best)} 个")
+        return len(best)
+
+    def remove_account(self, account_name: str):
+        """移除账户"""
+        with self._lock:
+            if self._contracts.pop(account_name, None) is not None:
+                self._rebuild_bases()
+
+    def _rebuild_bases(self):
+        """重建 base -> 账户 映射（调用方持有锁）"""
+        accounts_by_base: Dict[str, List[str]] = {}
+        for account_name, contracts in self._contracts.items():
+            for base in contracts:
+                accounts_by_base.setdefault(base, []).append(account_name)
+        self._accounts_by_base = accounts_by_base
+
+    @staticmethod
+    def _split(symbol: str) -> Tuple[str, str]:
+        base, _, quote = symbol.split(':')[0].partition('/')
+        return base.upper(), (quote or 'USDT').upper()
+
+    def resolve(self, symbol: Optional[str]) -> Optional[Tuple[str, float]]:
+        """
+        校验并解析信号中的币种
+
+        Returns:
+            (规范币种 BASE/QUOTE, 价格换算系数)；任何账户都不可交易时返回 None。
+            例如信号为 PEPE 而交易所只有 1000PEPE，返回 ('1000PEPE/USDT', 1000.0)，
+            信号中的价格需乘以该系数。索引为空（尚未加载 markets）时原样返回、系数为 1
+        """
+        if not symbol:
+            return None
+        base, quote = self._split(symbol)
+        if not self.ready:
+            return symbol, 1.0
+        return self._resolve_in(self._accounts_by_base, base, quote)
+
+    def resolve_for(self, account_name: str, symbol: Optional[str]) -> Optional[Tuple[str, float]]:
+        """
+        按单个账户的可交易列表解析币种（各账户上架的可能是不同别名，如一个只有 PEPE、
+        另一个只有 1000PEPE）。返回该账户上的 (币种, 相对输入币种的价格换算系数)，
+        该账户不可交易时返回 None；该账户未建索引时原样返回
+        """
+        if not symbol:
+            return None
+        contracts = self._contracts.get(account_name)
+        if contracts is None:
+            return symbol, 1.0
+        base, quote = self._split(symbol)
+        return self._resolve_in(contracts, base, quote)
+
+    @staticmethod
+    def _resolve_in(bases, base: str, quote: str) -> Optional[Tuple[str, float]]:
+        """在给定的 base 集合中解析：原样 → 去掉乘数前缀 → 补上乘数前缀"""
+        if base in bases:
+            return f"{base}/{quote}", 1.0
+        # 去掉乘数前缀：1000PEPE -> PEPE（价格需除以乘数）
+        match = _MULTIPLIER_PREFIX.match(base)
+        if match:
+            plain = base[match.end():]
+            if plain in bases:
+                return f"{plain}/{quote}", 1.0 / _MULTIPLIERS[match.group(1)]
+        # 补上乘数前缀：PEPE -> 1000PEPE / 1000000PEPE
+        for prefix, multiplier in _MULTIPLIERS.items():
+            alias = prefix + base
+            if alias in bases:
+                return f"{alias}/{quote}", multiplier
+        return None
+
+    def accounts_for(self, symbol: str) -> List[str]:
+        """可交易该币种的账户列表（索引为空时返回空列表）"""
+        base, _ = self._split(symbol)
+        return list(self._accounts_by_base.get(base, []))
+
+    def is_listed(self, account_name: str, symbol: str) -> bool:
+        """账户是否可交易该币种（该账户未建索引时视为可交易）"""
+        contracts = self._contracts.get(account_name)
+        if contracts is None:
+            return True
+        return self._split(symbol)[0] in contracts
+
+    def contract_symbol(self, account_name: str, symbol: str) -> Optional[str]:
+        """账户上该币种的首选合约符号（未收录返回 None）"""
+        contracts = self._contracts.get(account_name)
+        if not contracts:
+            return None
+        return contracts.get(self._split(symbol)[0])
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计"""
+        return {
+            'accounts': {name: len(c) for name, c in self._contracts.items()},
+            'bases': len(self._accounts_by_base),
+        }
+
+
+# 全局可交易币种索引
+tradable_symbols = TradableSymbolIndex()
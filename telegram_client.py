@@ -1,20 +1,46 @@
 from telethon import TelegramClient, events
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from config import Config
 from signal_parser import SignalParser, SignalType, TradingSignal
 from exchange_client import ExchangeClient
 from multi_exchange_client import multi_exchange_client
 import logging
+import math
 import asyncio
-import re
+from typing import Optional, Tuple
+from collections import OrderedDict
 import order_manager
 from database import trading_db
 from risk_manager import init_risk_manager, risk_manager
 from trade_executor import TradeExecutor
+from message_cache import MessageCache
+from parse_cache import parse_cache
+from context_store import ChatContextStore
+from market_data_bus import get_market_data_bus
+from account_state import start_account_state_refresh
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _guess_price_scale(symbol: str, price: float, entry_price) -> float:
+    """
+    持仓合约带乘数前缀（如 1000PEPE）而群内报价可能是原币种价格时，按与开仓价的接近程度
+    判断止盈价是否需要乘以该乘数
+    """
+    try:
+        entry_price = float(entry_price or 0.0)
+        base = symbol.split('/')[0].upper()
+        for prefix, multiplier in (('1000000', 1e6), ('10000', 1e4), ('1000', 1e3)):
+            if base.startswith(prefix) and base[len(prefix):len(prefix) + 1].isalpha():
+                if entry_price > 0 and price > 0 and \
+                        abs(math.log(price * multiplier / entry_price)) < abs(math.log(price / entry_price)):
+                    return multiplier
+                break
+    except Exception:
+        pass
+    return 1.0
+
 class TelegramSignalBot:
     """Telegram 信号监听机器人"""
     
@@ -22,17 +48,23 @@ class TelegramSignalBot:
         self.client = None
         # 使用多交易所客户端
         self.multi_exchange = multi_exchange_client
+        # 行情/账户状态总线：价格、持仓查询与监控任务与 GUI 共享
+        self.market_data = get_market_data_bus(self.multi_exchange)
         self.executor = TradeExecutor(self.multi_exchange)
+        # 机器人事件循环（总线线程上的平仓检测把记账投递回这里，风控状态只在事件循环上修改）
+        self.loop = None
         # 单交易所客户端（仅在需要时初始化）
         self.exchange = None
         self.signal_parser = SignalParser()
-        # 记录每个群最近一次开仓（用于无币种的止盈消息推断）
-        self.recent_entries = {}  # chat_id -> { 'symbol': str, 'time': datetime }
         self.tp_infer_window = timedelta(minutes=20)
-        # 记录每个群最近一次“止盈价格提示”（用于后续无价格的触发消息回填）
-        self.last_tp_hint = {}  # chat_id -> { 'price': float, 'time': datetime }
+        # 群组上下文：每个群近期开仓（按币种保留多个）与最近一次“止盈价格提示”，
+        # 用于无币种止盈消息推断及无价格触发消息回填；过期自动淘汰并落库，重启可恢复
+        self.chat_context = ChatContextStore(ttl=self.tp_infer_window, max_entries_per_chat=10, db=trading_db)
         # 去重：记录已处理的消息ID（仅保留近期窗口，避免内存膨胀）
         self.processed_ids = {}  # chat_id -> set(ids)
+        self.message_outcomes = {}  # chat_id -> OrderedDict(msg_id -> (交易字段, 是否已执行))
+        # 近期消息文本/币种缓存（回复消息推断币种时优先本地查找）
+        self.message_cache = MessageCache(max_per_chat=500)
         # 是否在内部启用 PositionManager 监控（服务器/无界面模式）
         self.enable_internal_monitor = enable_internal_monitor
         
@@ -95,7 +127,7 @@ class TelegramSignalBot:
             # 监听消息编辑，防止“先发后补价格/修改价格”的情况漏接
             @self.client.on(events.MessageEdited(chats=group_entities))
             async def message_edited_handler(event):
-                await self.handle_message(event)
+                await self.handle_message(event, edited=True)
 
             logger.info("✓ 正在监听群组: " + "; ".join(resolved_labels))
         except Exception as e:
@@ -105,6 +137,12 @@ class TelegramSignalBot:
         
         logger.info(f"✓ 交易状态: {'已启用' if Config.TRADING_ENABLED else '已禁用（仅监听模式）'}")
         
+        # 恢复重启前窗口内的群组上下文
+        try:
+            self.chat_context.load()
+        except Exception:
+            pass
+        
         # 保持运行（断线后持续重试连接，不退出进程）
         # 启动后回补近30分钟内遗漏消息（后台任务）
         try:
@@ -113,23 +151,34 @@ class TelegramSignalBot:
             pass
         try:
             init_risk_manager(self.multi_exchange)
+            # 风控检查读本地账户快照，余额由总线上的周期任务刷新
+            start_account_state_refresh(self.market_data)
         except Exception:
             pass
-        # 服务器/无界面模式下，在此初始化 PositionManager 并启动监控任务
+        # 从本地状态恢复持仓（每个账户一次批量核对），并重启 TP1 监控
+        try:
+            if order_manager.position_manager is None:
+                order_manager.position_manager = order_manager.PositionManager(
+                    self.multi_exchange, adaptive_cadence=True, market_data=self.market_data,
+                    vectorized=Config.VECTORIZED_MONITOR)
+            restored = await asyncio.to_thread(order_manager.position_manager.restore_state)
+            self.executor.resume_tp1_watchers(restored)
+        except Exception as e:
+            logger.warning(f"恢复持仓状态失败: {e}")
+        # 服务器/无界面模式下启动持仓监控任务
         try:
             if self.enable_internal_monitor:
-                if order_manager.position_manager is None:
-                    order_manager.position_manager = order_manager.PositionManager(self.multi_exchange)
-                    logger.info("✓ 服务器模式: PositionManager 已初始化")
+                logger.info("✓ 服务器模式: PositionManager 已初始化")
                 try:
-                    asyncio.create_task(self._trailing_monitor_loop())
+                    order_manager.start_position_monitor(self.market_data)
                     logger.info("✓ 服务器模式: 持仓监控任务已启动")
                 except Exception as me:
                     logger.error(f"服务器模式: 启动持仓监控任务失败: {me}")
         except Exception:
             pass
         try:
-            asyncio.create_task(self._position_fill_monitor_loop())
+            self.loop = asyncio.get_running_loop()
+            self.market_data.register_job('fill_monitor', self._check_closed_positions, 1.0)
         except Exception:
             pass
         while True:
@@ -142,66 +191,96 @@ class TelegramSignalBot:
                 await asyncio.sleep(10)
                 continue
     
-    async def handle_message(self, event):
-        """处理接收到的消息"""
+    async def handle_message(self, event, edited: bool = False):
+        """
+        处理接收到的消息
+        
+        Args:
+            event: Telethon 事件
+            edited: 是否为消息编辑事件（仅当交易字段变化且此前未执行过时才重新处理）
+        """
         message = getattr(event, 'message', None)
         message_text = getattr(message, 'text', None)
         chat_id = getattr(event, 'chat_id', None)
         msg_id = getattr(message, 'id', None)
         
         # 基于消息ID去重：同一条消息只处理一次，防止重复开仓
+        seen_before = False
         if chat_id is not None and msg_id is not None:
             pid = self.processed_ids.setdefault(chat_id, set())
             if msg_id in pid:
-                logger.info(f"⏭ 已处理过的消息 {msg_id}，跳过执行")
-                return
-            # 第一次遇到该消息ID时立即写入，避免并发触发导致重复执行
-            pid.add(msg_id)
+                if not edited:
+                    logger.info(f"⏭ 已处理过的消息 {msg_id}，跳过执行")
+                    return
+                seen_before = True
+            else:
+                # 第一次遇到该消息ID时立即写入，避免并发触发导致重复执行
+                pid.add(msg_id)
         
         if not message_text:
             return
         
+        # 按内容缓存的解析结果（已配置模板的群优先按模板解析）：一次扫描得到信号类型与全部字段，
+        # 止盈提示预判与信号解析共用
+        # 止盈提示：止盈/目标/TP，以及“减仓/減倉/保本/到 价格”类文案
+        analysis = parse_cache.analyze(message_text, chat_id=chat_id)
+        
+        # 写入近期消息缓存，供后续回复消息本地解析币种
+        self.message_cache.put(chat_id, msg_id, message_text, symbol=analysis.symbol)
+        message_time = self._message_time(message)
+        
+        # 编辑过的消息：交易字段未变化则跳过；已执行过的信号只记录变化，不重复下单
+        if seen_before:
+            outcome = self._get_outcome(chat_id, msg_id)
+            if outcome is not None:
+                prev_key, executed = outcome
+                if prev_key == analysis.trading_key:
+                    logger.info(f"⏭ 消息 {msg_id} 已编辑，但交易字段未变化，跳过")
+                    return
+                if executed:
+                    logger.warning(f"⚠ 已执行的消息 {msg_id} 被编辑且交易字段已变化，不重复下单: "
+                                   f"{prev_key} -> {analysis.trading_key}")
+                    self._remember_outcome(chat_id, msg_id, analysis.trading_key, executed=True)
+                    return
+            logger.info(f"✏️ 消息 {msg_id} 编辑后交易字段有变化，重新处理")
+        self._remember_outcome(chat_id, msg_id, analysis.trading_key, executed=False)
+        
         logger.info(f"\n收到消息:\n{message_text}\n")
         
-        # 预判是否为止盈提示及价格提取（无论是否解析出正式信号，都可用于缓存/回填）
-        text_lower = (message_text or '').lower()
-        # 扩展止盈提示：支持“减仓/減倉/保本/到 价格”类文案
-        is_tp_hint = (
-            ('止盈' in message_text) or ('目标' in message_text) or ('tp' in text_lower)
-            or ('减仓' in message_text) or ('減倉' in message_text) or ('保本' in message_text)
-            or (re.search(r'到\s*\d+\.?\d*', message_text) is not None)
-        )
-        tp_prices = SignalParser._extract_take_profit(message_text) if is_tp_hint else []
+        is_tp_hint = analysis.is_tp_hint
+        tp_prices = analysis.take_profit if is_tp_hint else []
 
         # 解析信号
-        signal = self.signal_parser.parse(message_text)
+        signal = self.signal_parser.parse(message_text, analysis=analysis)
         
         if signal:
+            signal.message_time = message_time
             logger.info(f"✓ 识别到交易信号: {signal}")
             # 记录最近开仓（仅 LONG/SHORT）
             if signal.signal_type in [SignalType.LONG, SignalType.BUY, SignalType.SHORT, SignalType.SELL] and chat_id is not None:
                 try:
-                    self.recent_entries[chat_id] = {
-                        'symbol': signal.symbol,
-                        'time': datetime.utcnow()
-                    }
+                    ref_prices = [signal.entry_price, signal.stop_loss] + list(signal.take_profit or [])
+                    self.chat_context.record_entry(chat_id, signal.symbol, ref_prices, msg_id=msg_id, at=message_time,
+                                                   scale=signal.price_scale)
                 except Exception:
                     pass
 
             # 若本条消息自身属于“止盈提示”，则缓存价格（用于后续无价格触发消息的回填）
             if is_tp_hint and tp_prices and chat_id is not None:
                 try:
-                    self.last_tp_hint[chat_id] = {'price': tp_prices[0], 'time': datetime.utcnow()}
+                    self.chat_context.record_tp_hint(chat_id, tp_prices[0], at=message_time)
                 except Exception:
                     pass
 
             # CLOSE 且无价格，但包含“第一/第二”关键词时，尝试使用最近缓存价格进行回填
             if signal.signal_type == SignalType.CLOSE and (not signal.take_profit) and chat_id is not None:
-                if (('第一' in message_text) or ('第二' in message_text)) and (chat_id in self.last_tp_hint):
-                    hint = self.last_tp_hint.get(chat_id)
-                    if hint and (datetime.utcnow() - hint['time'] <= self.tp_infer_window):
-                        signal.take_profit = [hint['price']]
-                        logger.info(f"✓ 使用缓存止盈价回填分批平仓: {signal.symbol} @ {hint['price']}")
+                if ('第一' in message_text) or ('第二' in message_text):
+                    hint = self.chat_context.last_tp_hint(chat_id)
+                    if hint:
+                        # 缓存的是群内原始价格，按信号的币种别名换算
+                        signal.take_profit = [hint['price'] * signal.price_scale]
+                        logger.info(f"✓ 使用缓存止盈价回填分批平仓: {signal.symbol} @ {signal.take_profit[0]}")
+            self._remember_outcome(chat_id, msg_id, analysis.trading_key, executed=True)
             await self.execute_signal(signal)
         else:
             # 邻近消息推断：无币种的止盈/目标消息，尝试套用窗口内的最近开仓
@@ -209,7 +288,7 @@ class TelegramSignalBot:
                 if is_tp_hint and tp_prices and chat_id is not None:
                     # 先缓存价格
                     try:
-                        self.last_tp_hint[chat_id] = {'price': tp_prices[0], 'time': datetime.utcnow()}
+                        self.chat_context.record_tp_hint(chat_id, tp_prices[0], at=message_time)
                     except Exception:
                         pass
                     # 仅当消息包含“第一/第1”或“保本/减仓/減倉”时，即时触发TP1；否则只缓存
@@ -218,26 +297,24 @@ class TelegramSignalBot:
                         logger.info("✓ 识别到止盈提示，但非‘第一止盈’，已缓存价格，等待自动策略/后续触发")
                         return
                     inferred_symbol = None
-                    # -1) 尝试直接从当前消息中解析币种（例如包含 #0G 等）
-                    try:
-                        cur_sym = SignalParser._extract_symbol(message_text)
-                        if cur_sym:
-                            inferred_symbol = cur_sym
-                    except Exception:
-                        pass
+                    inferred_scale = None  # 推断自近期开仓/持仓时已是规范币种，记录价格换算系数
+                    # -1) 直接使用当前消息中解析出的币种（例如包含 #0G 等）
+                    if analysis.symbol:
+                        inferred_symbol = analysis.symbol
+                    # 先占位为已执行再 await：推断期间到达的编辑事件不会重复触发止盈
+                    self._remember_outcome(chat_id, msg_id, analysis.trading_key, executed=True)
                     # 0) 若为回复消息，优先从被回复内容中解析币种
                     try:
-                        reply = await event.get_reply_message() if hasattr(event, 'get_reply_message') else None
-                        if reply and getattr(reply, 'text', None):
-                            sym = SignalParser._extract_symbol(reply.text)
-                            if sym:
-                                inferred_symbol = sym
+                        sym = await self._resolve_reply_symbol(event, chat_id)
+                        if sym:
+                            inferred_symbol = sym
                     except Exception:
                         pass
-                    # 1) 优先用20分钟内的最近开仓
-                    last = self.recent_entries.get(chat_id)
-                    if last and (datetime.utcnow() - last['time'] <= self.tp_infer_window):
-                        inferred_symbol = inferred_symbol or last['symbol']
+                    # 1) 优先用20分钟内的近期开仓（多个币种时按止盈价与参考价的接近程度选择）
+                    if not inferred_symbol:
+                        entry = self.chat_context.infer_entry(chat_id, tp_prices[0])
+                        if entry:
+                            inferred_symbol, inferred_scale = entry['symbol'], entry.get('scale', 1.0)
                     # 2) 无近期开仓，则若当前仅有一个持仓，则使用该持仓
                     if not inferred_symbol and len(self.multi_exchange.clients) > 0:
                         # 仅在单账户场景下做此推断，避免多账户错配
@@ -246,6 +323,9 @@ class TelegramSignalBot:
                             opens = self.multi_exchange.list_open_positions(account_name)
                             if len(opens) == 1 and opens[0].get('symbol'):
                                 inferred_symbol = opens[0]['symbol']
+                                inferred_scale = _guess_price_scale(inferred_symbol, tp_prices[0],
+                                                                    opens[0].get('entry_price'))
+                    inferred_signal = None
                     if inferred_symbol:
                         inferred_signal = TradingSignal(
                             signal_type=SignalType.CLOSE,
@@ -256,9 +336,18 @@ class TelegramSignalBot:
                             leverage=None,
                             raw_message=message_text
                         )
-                        logger.info(f"✓ 即时第一止盈：推断 {inferred_symbol}，按50%限价挂单 @ {tp_prices[0]}")
+                        if inferred_scale is None:
+                            # 消息/被回复消息中的原始币种：与普通信号一样解析别名并换算价格
+                            inferred_signal = SignalParser._check_tradable(inferred_signal)
+                        else:
+                            inferred_signal.apply_alias(inferred_symbol, inferred_scale)
+                    if inferred_signal:
+                        inferred_symbol = inferred_signal.symbol
+                        logger.info(f"✓ 即时第一止盈：推断 {inferred_symbol}，按50%限价挂单 @ {inferred_signal.take_profit[0]}")
                         await self.execute_signal(inferred_signal)
                     else:
+                        # 未执行：撤销占位，后续编辑补全币种时仍可重新处理
+                        self._remember_outcome(chat_id, msg_id, analysis.trading_key, executed=False, replace=True)
                         logger.debug("止盈提示但缺少可推断的标的，忽略")
                 else:
                     logger.debug("未识别到有效的交易信号")
@@ -276,9 +365,60 @@ class TelegramSignalBot:
         except Exception:
             pass
     
+    def _get_outcome(self, chat_id, msg_id) -> Optional[Tuple[tuple, bool]]:
+        """已处理消息的 (交易字段, 是否已执行)"""
+        return self.message_outcomes.get(chat_id, {}).get(msg_id)
+
+    def _remember_outcome(self, chat_id, msg_id, trading_key: tuple, executed: bool, replace: bool = False):
+        """
+        记录消息的处理结果，供编辑事件判断是否需要重新处理（每群保留最近 500 条）；
+        已执行标记默认只增不减，replace=True 时直接覆盖（撤销执行前的占位）
+        """
+        if chat_id is None or msg_id is None:
+            return
+        outcomes = self.message_outcomes.setdefault(chat_id, OrderedDict())
+        previous = None if replace else outcomes.get(msg_id)
+        outcomes[msg_id] = (trading_key, executed or bool(previous and previous[1]))
+        outcomes.move_to_end(msg_id)
+        while len(outcomes) > 500:
+            outcomes.popitem(last=False)
+
+    @staticmethod
+    def _message_time(message) -> datetime:
+        """消息发送时间（UTC，无时区），缺失时使用当前时间"""
+        date = getattr(message, 'date', None)
+        if isinstance(date, datetime):
+            if date.tzinfo is not None:
+                date = date.astimezone(timezone.utc).replace(tzinfo=None)
+            return min(date, datetime.utcnow())
+        return datetime.utcnow()
+
+    async def _resolve_reply_symbol(self, event, chat_id) -> Optional[str]:
+        """解析被回复消息中的币种：优先查本地缓存，未命中时才请求 Telegram API"""
+        message = getattr(event, 'message', None)
+        reply_id = getattr(message, 'reply_to_msg_id', None)
+        if reply_id is not None:
+            found, sym = self.message_cache.get_symbol(chat_id, reply_id)
+            if found:
+                return sym
+        if not hasattr(event, 'get_reply_message'):
+            return None
+        reply = await event.get_reply_message()
+        reply_text = getattr(reply, 'text', None) if reply else None
+        if not reply_text:
+            return None
+        sym = parse_cache.analyze(reply_text, chat_id=chat_id).symbol
+        self.message_cache.put(chat_id, getattr(reply, 'id', reply_id), reply_text, symbol=sym)
+        return sym
+
     async def execute_signal(self, signal):
         """执行交易信号"""
         if not Config.TRADING_ENABLED:
+            # 实盘交易关闭时，模拟盘账户照常执行
+            if any(self.multi_exchange.is_paper(name) for name in self.multi_exchange.clients):
+                logger.info("📝 交易已禁用，仅在模拟盘账户执行信号")
+                await self.executor.execute(signal, paper_only=True)
+                return
             logger.info("⚠ 交易已禁用，仅记录信号")
             return
         
@@ -298,65 +438,61 @@ class TelegramSignalBot:
         await self.executor.execute_single(signal, self.exchange)
     
 
-    async def _trailing_monitor_loop(self):
-        while True:
-            try:
-                if order_manager.position_manager:
-                    order_manager.position_manager.monitor_positions()
-            except Exception:
-                pass
-            await asyncio.sleep(3)
-
-    async def _position_fill_monitor_loop(self):
-        while True:
-            try:
-                pm = order_manager.position_manager
-                if pm is None:
-                    await asyncio.sleep(5)
-                    continue
-                for account_name, symbol, info in list(pm.iter_active_positions()):
+    def _check_closed_positions(self):
+        """平仓检测（行情总线周期任务）：交易所已无仓位的持仓结算记账并移除"""
+        try:
+            pm = order_manager.position_manager
+            if pm is None:
+                return
+            # 只核对到期的持仓：贴近触发价的勤查，远离的退避
+            for account_name, symbol, info in pm.fill_checks_due():
+                try:
+                    # 单账户后备模式同样注册在执行引擎中（账户名 'single'）
+                    pos = self.market_data.get_position(account_name, symbol)
+                    cur_price = self.market_data.get_price(account_name, symbol)
+                    contracts = float(pos.get('contracts')) if pos else 0.0
+                    if contracts > 0:
+                        continue
+                    trade_id = info.get('trade_id')
+                    entry_price = float(info.get('entry_price') or 0.0)
+                    position_size = float(info.get('position_size') or 0.0)
+                    side = str(info.get('side') or '')
+                    lev = int(info.get('leverage') or 1)
+                    exit_price = cur_price or entry_price
+                    pnl = 0.0
+                    if entry_price and position_size and exit_price:
+                        if side == 'buy':
+                            pnl = (exit_price - entry_price) * position_size * lev
+                        elif side == 'sell':
+                            pnl = (entry_price - exit_price) * position_size * lev
+                    # 先移除持仓（下个周期不会重复结算），记账投递到事件循环
                     try:
-                        if account_name == 'single' and self.exchange and getattr(self.exchange, 'initialized', False):
-                            pos = self.exchange.get_position(symbol)
-                            cur_price = self.exchange.get_current_price(symbol)
-                        else:
-                            pos = self.multi_exchange.get_position(account_name, symbol)
-                            cur_price = self.multi_exchange.get_current_price(account_name, symbol)
-                        contracts = float(pos.get('contracts')) if pos else 0.0
-                        if contracts > 0:
-                            continue
-                        trade_id = info.get('trade_id') if isinstance(info, dict) else None
-                        entry_price = float(info.get('entry_price') or 0.0)
-                        position_size = float(info.get('position_size') or 0.0)
-                        side = str(info.get('side') or '')
-                        lev = int(info.get('leverage') or 1)
-                        exit_price = cur_price or entry_price
-                        if trade_id and exit_price:
-                            try:
-                                trading_db.close_trade(int(trade_id), float(exit_price))
-                            except Exception:
-                                pass
-                        try:
-                            pnl = 0.0
-                            if entry_price and position_size and exit_price:
-                                if side == 'buy':
-                                    pnl = (exit_price - entry_price) * position_size * lev
-                                elif side == 'sell':
-                                    pnl = (entry_price - exit_price) * position_size * lev
-                            if risk_manager:
-                                risk_manager.record_trade(account_name, pnl, closed=True)
-                        except Exception:
-                            pass
-                        try:
-                            pm.remove_position(account_name, symbol)
-                        except Exception:
-                            pass
+                        pm.remove_position(account_name, symbol)
                     except Exception:
-                        continue
+                        pass
+                    settle = self._settle_closed(account_name, trade_id, exit_price, pnl)
+                    if self.loop is not None and self.loop.is_running():
+                        asyncio.run_coroutine_threadsafe(settle, self.loop)
+                    else:
+                        asyncio.run(settle)
+                except Exception:
+                    continue
+        except Exception:
+            pass
+
+    async def _settle_closed(self, account_name, trade_id, exit_price, pnl):
+        """平仓记账（事件循环上执行）：数据库写入在线程池，风控计数在事件循环上更新"""
+        if trade_id and exit_price:
+            try:
+                await asyncio.to_thread(trading_db.close_trade, int(trade_id), float(exit_price))
             except Exception:
                 pass
-            await asyncio.sleep(5)
-
+        try:
+            if risk_manager:
+                risk_manager.record_trade(account_name, pnl, closed=True,
+                                          is_paper=self.multi_exchange.is_paper(account_name))
+        except Exception:
+            pass
 
     async def _backfill_recent_messages(self, group_entities, minutes: int = 30, limit: int = 80):
         try:
@@ -367,6 +503,8 @@ class TelegramSignalBot:
                         if not getattr(msg, 'text', None):
                             continue
                         chat_id = getattr(msg, 'chat_id', None)
+                        # 回补的历史消息同样写入缓存，后续回复可直接本地命中
+                        self.message_cache.put(chat_id, getattr(msg, 'id', None), msg.text)
                         if chat_id is not None:
                             pid = self.processed_ids.setdefault(chat_id, set())
                             if getattr(msg, 'id', None) in pid:
@@ -384,11 +522,19 @@ class TelegramSignalBot:
                         await self.handle_message(_Event(msg))
                 except Exception:
                     continue
+            stats = parse_cache.stats()
+            logger.info(f"✓ 消息回补完成（解析缓存 {stats['size']} 条，命中率 {stats['hit_rate']:.1f}%）")
         except Exception:
             pass
 
     def stop(self):
         """停止机器人"""
+        try:
+            # 节流中尚未落库的止损移动在退出前写入
+            if order_manager.position_manager is not None:
+                order_manager.position_manager.flush_state()
+        except Exception as e:
+            logger.warning(f"持仓状态落库失败: {e}")
         if self.client:
             self.client.disconnect()
         logger.info("机器人已停止")
@@ -0,0 +1,86 @@
+"""
+测试账户状态快照
+验证风控构造与开仓检查不请求交易所余额、余额经行情总线刷新（平仓后优先刷新），
+以及当日盈亏与持仓数从快照读取
+"""
+
+import sys
+import io
+import time
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from account_state import AccountStateStore
+from market_data_bus import MarketDataBus
+from risk_manager import RiskManager, RiskLimits
+from conftest import FakeExchange
+
+
+def _setup():
+    balances = {'acc1': 1000.0, 'acc2': 500.0}
+    exchange = FakeExchange(balances, balances=balances)
+    bus = MarketDataBus(exchange)
+    store = AccountStateStore()
+    store.attach(bus)
+    rm = RiskManager(exchange, account_state=store)
+    return exchange, bus, store, rm
+
+
+def test_checks_without_rest():
+    """构造与开仓检查都只读快照；余额由刷新任务批量拉取"""
+    print("=" * 60)
+    print("测试开仓检查只读本地快照")
+    print("=" * 60)
+
+    exchange, bus, store, rm = _setup()
+    assert exchange.balance_calls == 0
+    assert store.refresh_balances(bus) == 2 and exchange.balance_calls == 2
+    # 未到刷新间隔的账户不再请求
+    assert store.refresh_balances(bus) == 0
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        ok, reason = rm.can_open_trade('acc1', 100.0)
+        assert ok, reason
+    elapsed = (time.perf_counter() - start) / 1000
+    print(f"单次检查: {elapsed * 1e6:.1f} µs, 余额请求: {exchange.balance_calls}")
+    assert exchange.balance_calls == 2
+    assert rm.get_risk_status('acc1')['initial_balance'] == 1000.0
+
+    # 平仓后余额标记为待刷新，下个周期只刷新该账户
+    rm.record_trade('acc1', 0.0, closed=False)
+    exchange.balances['acc1'] = 950.0
+    rm.record_trade('acc1', -50.0, closed=True)
+    assert store.refresh_balances(bus) == 1 and store.get_balance('acc1') == 950.0
+    print("✅ 通过")
+
+
+def test_limits_from_snapshot():
+    """余额不足、当日亏损与持仓数限制都按快照判断"""
+    print("=" * 60)
+    print("测试按快照执行风控限制")
+    print("=" * 60)
+
+    exchange, bus, store, rm = _setup()
+    rm.set_risk_limits(RiskLimits(max_daily_loss_pct=5.0, max_open_positions=2, min_account_balance=600.0))
+    store.refresh_balances(bus)
+    ok, reason = rm.can_open_trade('acc2', 10.0)
+    assert not ok and '余额不足' in reason
+
+    for _ in range(2):
+        rm.record_trade('acc1', 0.0, closed=False)
+    ok, reason = rm.can_open_trade('acc1', 10.0)
+    assert not ok and '最大持仓数' in reason
+    assert rm.get_risk_status('acc1')['open_positions_count'] == 2
+
+    rm.record_trade('acc1', -60.0, closed=True)
+    ok, reason = rm.can_open_trade('acc1', 10.0)
+    print(f"原因: {reason}")
+    assert not ok and store.daily_pnl('acc1') == -60.0
+    assert exchange.balance_calls == 2
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_checks_without_rest()
+    test_limits_from_snapshot()
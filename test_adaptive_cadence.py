@@ -0,0 +1,89 @@
+"""
+测试自适应监控节奏
+验证贴近触发价的持仓检查间隔短、远离的退避，波动放大时间隔缩短，以及平仓核对的节奏
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import order_manager
+from conftest import FakeExchange, make_manager
+
+
+def _manager():
+    exchange = FakeExchange(prices={'BTC/USDT': 100.0, 'ETH/USDT': 100.0})
+    # BTC 距止损 0.2%，ETH 距止损 30%
+    pm = make_manager(exchange, {
+        ('acc1', 'BTC/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0, 'stop_loss': 99.8},
+        ('acc1', 'ETH/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0, 'stop_loss': 70.0},
+    }, adaptive_cadence=True)
+    return pm, exchange
+
+
+def test_interval_by_distance():
+    """近触发价的持仓间隔远小于远离的持仓，未到期的持仓不取价"""
+    print("=" * 60)
+    print("测试按触发距离安排检查间隔")
+    print("=" * 60)
+
+    pm, exchange = _manager()
+    pm.monitor_positions(now=1000.0)
+    near = pm._check_interval[('acc1', 'BTC/USDT')]
+    far = pm._check_interval[('acc1', 'ETH/USDT')]
+    print(f"近: {near:.2f}s 远: {far:.2f}s")
+    assert near < far == order_manager.MAX_CHECK_INTERVAL
+    assert exchange.fetches == 2
+
+    # 近持仓到期前两者都不取价；到期后只取近持仓
+    pm.monitor_positions(now=1000.0 + near / 2)
+    assert exchange.fetches == 2 and pm.checks_skipped == 2
+    pm.monitor_positions(now=1000.0 + near)
+    assert exchange.fetches == 3
+    assert abs(pm.next_monitor_delay(now=1000.0 + near) - min(near, order_manager.MONITOR_TICK)) < 1e-9
+    print("✅ 通过")
+
+
+def test_volatility_shrinks_interval():
+    """价格快速变动后，同样距离下的检查间隔缩短到亚秒级"""
+    print("=" * 60)
+    print("测试波动放大时缩短检查间隔")
+    print("=" * 60)
+
+    pm, exchange = _manager()
+    now = 1000.0
+    pm.monitor_positions(now=now)
+    quiet = pm._check_interval[('acc1', 'BTC/USDT')]
+    for price in (100.3, 99.95, 100.4, 100.0):
+        now = pm._next_check[('acc1', 'BTC/USDT')]
+        exchange.prices['BTC/USDT'] = price
+        pm.monitor_positions(now=now)
+    busy = pm._check_interval[('acc1', 'BTC/USDT')]
+    print(f"平静: {quiet:.2f}s 波动: {busy:.2f}s")
+    assert busy < quiet and busy < 1.0
+    print("✅ 通过")
+
+
+def test_fill_checks_due():
+    """平仓核对按持仓检查间隔的两倍退避，止损变化后立即重新检查"""
+    pm, exchange = _manager()
+    pm.monitor_positions(now=1000.0)
+    assert len(pm.fill_checks_due(now=1000.0)) == 2
+    assert pm.fill_checks_due(now=1001.0) == []
+    # 近持仓 2 倍检查间隔后到期，远持仓封顶 FILL_CHECK_MAX_INTERVAL
+    near = pm._check_interval[('acc1', 'BTC/USDT')]
+    due = [s for _, s, _ in pm.fill_checks_due(now=1000.0 + 2 * near)]
+    assert due == ['BTC/USDT']
+
+    pm.update_position('acc1', 'ETH/USDT', stop_loss=99.0)
+    assert ('acc1', 'ETH/USDT') not in pm._next_check
+    pm.remove_position('acc1', 'ETH/USDT')
+    assert ('acc1', 'ETH/USDT') not in pm._next_fill_check
+    print("✅ 平仓核对节奏通过")
+
+
+if __name__ == "__main__":
+    test_interval_by_distance()
+    test_volatility_shrinks_interval()
+    test_fill_checks_due()
@@ -0,0 +1,108 @@
+"""
+测试群组上下文存储
+验证 TTL 过期过滤（插入顺序与消息时间不一致时）、多币种推断、止盈提示按时间更新，
+以及 chat_context 表的落库、恢复与回溯消息去重
+"""
+
+import sys
+import io
+from datetime import datetime, timedelta
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from context_store import ChatContextStore
+from conftest import temp_db
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def test_ttl_filter():
+    """较新的记录先写入、过期的记录后写入时，过期记录仍被过滤，不参与推断"""
+    print("=" * 60)
+    print("测试群组上下文 TTL 过滤")
+    print("=" * 60)
+
+    store = ChatContextStore(ttl=timedelta(minutes=20))
+    store.record_entry(1, 'BTC/USDT', [60000.0], at=NOW - timedelta(minutes=5))
+    store.record_entry(1, 'ETH/USDT', [3000.0], at=NOW - timedelta(minutes=30))
+    entries = store.recent_entries(1, now=NOW)
+    assert [e['symbol'] for e in entries] == ['BTC/USDT']
+    assert store.get_entry(1, 'ETH/USDT', now=NOW) is None
+    assert store.infer_symbol(1, 3100.0, now=NOW) == 'BTC/USDT'
+    assert store.infer_symbol(1, now=NOW + timedelta(minutes=16)) is None
+    print("✅ 通过")
+
+
+def test_infer_and_order():
+    """多个近期开仓按消息时间排序，按止盈价接近程度推断币种"""
+    print("=" * 60)
+    print("测试群组上下文多币种推断")
+    print("=" * 60)
+
+    store = ChatContextStore()
+    store.record_entry(1, 'SOL/USDT', [150.0, 140.0], at=NOW - timedelta(minutes=1))
+    store.record_entry(1, 'BTC/USDT', [60000.0, 58000.0], at=NOW - timedelta(minutes=3))
+    assert [e['symbol'] for e in store.recent_entries(1, now=NOW)] == ['SOL/USDT', 'BTC/USDT']
+    assert store.infer_symbol(1, 61000.0, now=NOW) == 'BTC/USDT'
+    assert store.infer_symbol(1, 155.0, now=NOW) == 'SOL/USDT'
+    # 价格与所有参考价都相差过大时退回最新的一个
+    assert store.infer_symbol(1, 0.5, now=NOW) == 'SOL/USDT'
+    # 同一币种更早的消息不覆盖较新的记录
+    store.record_entry(1, 'SOL/USDT', [10.0], at=NOW - timedelta(minutes=10))
+    assert store.get_entry(1, 'SOL/USDT', now=NOW)['ref_prices'] == [150.0, 140.0]
+    print("✅ 通过")
+
+
+def test_tp_hint_order():
+    """较早的止盈提示不覆盖较新的提示，过期后不再返回"""
+    print("=" * 60)
+    print("测试止盈提示按时间更新")
+    print("=" * 60)
+
+    store = ChatContextStore(ttl=timedelta(minutes=20))
+    store.record_tp_hint(1, 105.0, at=NOW - timedelta(minutes=2))
+    store.record_tp_hint(1, 101.0, at=NOW - timedelta(minutes=8))
+    assert store.last_tp_hint(1, now=NOW)['price'] == 105.0
+    store.record_tp_hint(1, 110.0, at=NOW - timedelta(minutes=1))
+    assert store.last_tp_hint(1, now=NOW)['price'] == 110.0
+    assert store.last_tp_hint(1, now=NOW + timedelta(minutes=30)) is None
+    print("✅ 通过")
+
+
+def test_persist_and_load():
+    """落库后重启恢复（含换算系数）；恢复后回溯同一批消息不重复写入 chat_context"""
+    print("=" * 60)
+    print("测试群组上下文落库与恢复")
+    print("=" * 60)
+
+    db = temp_db('context.db')
+    store = ChatContextStore(db=db)
+    at = datetime.utcnow() - timedelta(minutes=2)
+    store.record_entry(-1001, '1000PEPE/USDT', [0.0091, 0.0085], msg_id=7, at=at, scale=1000.0)
+    store.record_tp_hint(-1001, 0.0000095, at=at + timedelta(seconds=30))
+    rows = db.load_chat_context(at - timedelta(minutes=1))
+    assert [r['kind'] for r in rows] == ['entry', 'tp_hint']
+    assert rows[0]['chat_id'] == '-1001' and rows[0]['ref_prices'] == [0.0091, 0.0085]
+
+    restored = ChatContextStore(db=db)
+    assert restored.load() == 2
+    entry = restored.get_entry(-1001, '1000PEPE/USDT')
+    assert entry['scale'] == 1000.0 and entry['msg_id'] == 7
+    assert restored.last_tp_hint(-1001)['price'] == 0.0000095
+
+    # 回溯历史消息：同一条消息再次记录不落库
+    restored.record_entry(-1001, '1000PEPE/USDT', [0.0091, 0.0085], msg_id=7, at=at, scale=1000.0)
+    restored.record_tp_hint(-1001, 0.0000095, at=at + timedelta(seconds=30))
+    assert len(db.load_chat_context(at - timedelta(minutes=1))) == 2
+
+    # 过期记录随清理从表中删除
+    assert db.prune_chat_context(datetime.utcnow()) == 2
+    assert db.load_chat_context(at - timedelta(minutes=1)) == []
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_ttl_filter()
+    test_infer_and_order()
+    test_tp_hint_order()
+    test_persist_and_load()
@@ -0,0 +1,102 @@
+"""
+测试跨账户敞口索引
+验证按 (交易对, 方向) 的合计名义价值随登记/更新/平仓增量维护，
+以及组合层面限制在信号分发前一次检查并返回剩余额度与剩余账户名额
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from account_state import AccountStateStore
+from exposure_index import ExposureIndex
+from risk_manager import RiskManager, RiskLimits
+from conftest import FakeExchange, make_manager
+
+
+def test_incremental_aggregate():
+    """同一信号在 15 个账户开仓后合计正确；部分平仓与平仓后增量回退"""
+    print("=" * 60)
+    print("测试敞口索引增量维护")
+    print("=" * 60)
+
+    accounts = [f'acc{i}' for i in range(15)]
+    exposure = ExposureIndex()
+    positions = {(account_name, 'BTC/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 2.0,
+                                              'stop_loss': 95.0} for account_name in accounts}
+    positions[('acc0', 'ETH/USDT')] = {'side': 'sell', 'entry_price': 50.0, 'position_size': 1.0}
+    pm = make_manager(FakeExchange(accounts), positions, exposure=exposure)
+    assert exposure.notional('BTC/USDT', 'buy') == 3000.0 and exposure.account_count('BTC/USDT', 'long') == 15
+    assert exposure.notional('BTC/USDT', 'sell') == 0.0 and exposure.total() == 3050.0
+
+    # 重复登记同一持仓不重复计入；部分平仓按新数量更新
+    pm._save_position_info('acc1', 'BTC/USDT', pm.get_position_info('acc1', 'BTC/USDT'))
+    pm.update_position('acc1', 'BTC/USDT', position_size=1.0)
+    assert exposure.notional('BTC/USDT', 'long') == 2900.0
+
+    pm.remove_position('acc2', 'BTC/USDT')
+    pm.remove_position('acc0', 'ETH/USDT')
+    print(f"敞口: {exposure.snapshot()} 合计: {exposure.total()}")
+    assert exposure.notional('BTC/USDT', 'long') == 2700.0 and exposure.total() == 2700.0
+    assert 'ETH/USDT' not in exposure.snapshot() and len(exposure) == 14
+    print("✅ 通过")
+
+
+def test_signal_level_limits():
+    """达到合计上限或账户数上限时整个信号被拒绝，否则返回剩余额度"""
+    print("=" * 60)
+    print("测试组合层面限制")
+    print("=" * 60)
+
+    exposure = ExposureIndex()
+    rm = RiskManager(FakeExchange(['acc1']), account_state=AccountStateStore(), exposure=exposure)
+    assert rm.check_signal_exposure('BTC/USDT', 'buy') == (True, "允许开仓", None)
+
+    rm.set_risk_limits(RiskLimits(max_symbol_notional=5000.0, max_total_notional=8000.0, max_symbol_accounts=3))
+    for i in range(2):
+        exposure.set(f'acc{i}', 'BTC/USDT', 'buy', 2000.0)
+    exposure.set('acc0', 'ETH/USDT', 'sell', 3500.0)
+    ok, reason, headroom = rm.check_signal_exposure('BTC/USDT', 'buy')
+    assert ok and headroom == 500.0  # 合计上限 8000 - 7500 比单币种 5000 - 4000 更紧
+    ok, _, headroom = rm.check_signal_exposure('BTC/USDT', 'sell')
+    assert ok and headroom == 500.0
+
+    exposure.set('acc2', 'BTC/USDT', 'buy', 100.0)
+    ok, reason, _ = rm.check_signal_exposure('BTC/USDT', 'buy')
+    print(f"原因: {reason}")
+    assert not ok and '账户数' in reason
+    exposure.remove('acc2', 'BTC/USDT')
+    exposure.set('acc0', 'ETH/USDT', 'sell', 4000.0)
+    ok, reason, _ = rm.check_signal_exposure('BTC/USDT', 'buy')
+    assert not ok and '组合敞口' in reason
+    print(f"概览: {rm.get_exposure_status()}")
+    print("✅ 通过")
+
+
+def test_account_slots():
+    """剩余账户名额按已持仓账户数计算；已有同方向持仓的账户加仓不占新名额"""
+    print("=" * 60)
+    print("测试同方向持仓账户名额")
+    print("=" * 60)
+
+    exposure = ExposureIndex()
+    rm = RiskManager(FakeExchange(['acc1']), account_state=AccountStateStore(), exposure=exposure)
+    assert rm.signal_account_slots('BTC/USDT', 'buy') is None
+
+    rm.set_risk_limits(RiskLimits(max_symbol_accounts=3))
+    exposure.set('acc0', 'BTC/USDT', 'buy', 100.0)
+    exposure.set('acc1', 'BTC/USDT', 'sell', 100.0)
+    assert rm.signal_account_slots('BTC/USDT', 'buy') == 2
+    assert rm.holds_side('acc0', 'BTC/USDT', 'buy') and not rm.holds_side('acc1', 'BTC/USDT', 'buy')
+    assert not rm.holds_side('acc9', 'BTC/USDT', 'buy')
+    for i in range(2, 5):
+        exposure.set(f'acc{i}', 'BTC/USDT', 'long', 100.0)
+    assert rm.signal_account_slots('BTC/USDT', 'buy') == 0
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_incremental_aggregate()
+    test_signal_level_limits()
+    test_account_slots()
@@ -0,0 +1,86 @@
+"""
+测试热路径日志
+验证按键限频（附带省略条数）、采样、仅状态变化时输出，以及级别未启用时不格式化消息
+"""
+
+import sys
+import io
+import logging
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from hot_log import HotPathLogger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _logger(name, level=logging.INFO):
+    logger = logging.getLogger(name)
+    logger.handlers[:] = []
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_rate_limit_and_sample():
+    """限频：间隔内只输出一次，下次输出附带省略条数；采样：每 N 次输出一次"""
+    print("=" * 60)
+    print("测试热路径日志限频与采样")
+    print("=" * 60)
+
+    logger, handler = _logger('test_hot_log.rate')
+    hot = HotPathLogger(logger, interval=60.0)
+    for i in range(5):
+        hot.log(logging.INFO, ('price_fail', 'acc1'), "获取价格失败 %d", i)
+    hot.log(logging.INFO, ('price_fail', 'acc2'), "获取价格失败 %s", 'acc2')
+    assert handler.messages == ["获取价格失败 0", "获取价格失败 acc2"]
+    hot._last_emit[('price_fail', 'acc1')] -= 61
+    hot.log(logging.INFO, ('price_fail', 'acc1'), "获取价格失败 %d", 9)
+    assert handler.messages[-1] == "获取价格失败 9 (期间省略 4 条)"
+
+    handler.messages.clear()
+    for i in range(10):
+        hot.sample(logging.INFO, 'tick', "tick %d", i, every=4)
+    assert handler.messages == ["tick 0", "tick 4 (每 4 次采样)", "tick 8 (每 4 次采样)"]
+    print(f"统计: {hot.get_stats()}")
+    print("✅ 通过")
+
+
+def test_on_change_and_lazy():
+    """状态不变不输出；级别未启用时参数不会被格式化"""
+    print("=" * 60)
+    print("测试仅状态变化输出与延迟格式化")
+    print("=" * 60)
+
+    logger, handler = _logger('test_hot_log.change')
+    hot = HotPathLogger(logger)
+    for sl in (95.0, 95.0, 96.0, 96.0):
+        hot.on_change(logging.INFO, ('sl', 'acc1'), sl, "止损 %.1f", sl)
+    assert handler.messages == ["止损 95.0", "止损 96.0"]
+    hot.forget(('sl', 'acc1'))
+    assert hot.on_change(logging.INFO, ('sl', 'acc1'), 96.0, "止损 %.1f", 96.0)
+
+    class Boom:
+        def __str__(self):
+            raise AssertionError("不应格式化")
+
+    quiet, quiet_handler = _logger('test_hot_log.quiet', level=logging.WARNING)
+    quiet_hot = HotPathLogger(quiet)
+    assert not quiet_hot.log(logging.INFO, 'k', "%s", Boom())
+    assert not quiet_hot.sample(logging.INFO, 'k', "%s", Boom())
+    assert quiet_handler.messages == []
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_rate_limit_and_sample()
+    test_on_change_and_lazy()
@@ -0,0 +1,115 @@
+"""
+测试行情/账户状态总线
+验证缓存有效期内的读取复用、并发同键请求合并、订阅推送，以及周期任务只登记一次
+"""
+
+import sys
+import io
+import threading
+import time
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import order_manager
+from market_data_bus import MarketDataBus, TOPIC_PRICE, TOPIC_ORDER
+from position_state import PositionStateStore
+
+
+class SlowExchange:
+    """每次请求耗时 50ms，记录请求次数"""
+
+    def __init__(self):
+        self.clients = {'acc1': object()}
+        self.price_calls = 0
+        self.order_calls = 0
+
+    def get_current_price(self, account_name, symbol):
+        self.price_calls += 1
+        time.sleep(0.05)
+        return 100.0
+
+    def get_position(self, account_name, symbol):
+        return {'contracts': 1.0}
+
+    def fetch_order_status(self, account_name, symbol, order_id):
+        self.order_calls += 1
+        return {'status': 'closed', 'filled': 1.0, 'remaining': 0.0}
+
+
+def test_read_through_and_coalesce():
+    """多个线程同时读取同一价格只请求一次，有效期内再次读取命中缓存"""
+    print("=" * 60)
+    print("测试行情总线请求合并")
+    print("=" * 60)
+
+    exchange = SlowExchange()
+    bus = MarketDataBus(exchange, price_ttl=5.0)
+    updates = []
+    unsubscribe = bus.subscribe(TOPIC_PRICE, lambda key, value: updates.append((key, value)))
+
+    threads = [threading.Thread(target=bus.get_price, args=('acc1', 'BTC/USDT')) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert exchange.price_calls == 1
+    assert bus.get_price('acc1', 'BTC/USDT') == 100.0 and exchange.price_calls == 1
+    assert updates == [(('acc1', 'BTC/USDT'), 100.0)]
+
+    # max_age=0 强制刷新；取消订阅后不再推送
+    unsubscribe()
+    bus.get_price('acc1', 'BTC/USDT', max_age=0)
+    assert exchange.price_calls == 2 and len(updates) == 1
+    print(f"统计: {bus.get_stats()}")
+    print("✅ 通过")
+
+
+def test_final_order_status_cached():
+    """订单最终状态只查询一次"""
+    exchange = SlowExchange()
+    bus = MarketDataBus(exchange, order_ttl=0)
+    seen = []
+    bus.subscribe(TOPIC_ORDER, lambda key, value: seen.append(key))
+    for _ in range(3):
+        assert bus.get_order_status('acc1', 'BTC/USDT', 'TP1')['status'] == 'closed'
+    assert exchange.order_calls == 1 and seen == [('acc1', 'TP1')]
+    # 订单结束后请求锁即释放；超过保留期后缓存项与其余键的锁由轮询线程清理
+    assert (TOPIC_ORDER, ('acc1', 'TP1')) not in bus._fetch_locks
+    bus.get_price('acc1', 'BTC/USDT')
+    assert bus.prune() == 0
+    assert bus.prune(now=time.monotonic() + 120) == 2
+    assert bus._cache == {} and bus._fetch_locks == {}
+    print("✅ 订单最终状态缓存通过")
+
+
+def test_job_registered_once():
+    """GUI 与机器人都登记持仓监控时只执行一个任务，价格经总线读取"""
+    print("=" * 60)
+    print("测试持仓监控任务只登记一次")
+    print("=" * 60)
+
+    exchange = SlowExchange()
+    bus = MarketDataBus(exchange)
+    bus.start = lambda: None  # 只手动执行到期任务
+    pm = order_manager.PositionManager(exchange, state_store=PositionStateStore(), market_data=bus)
+    pm._save_position_info('acc1', 'BTC/USDT', {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0,
+                                                'stop_loss': 95.0})
+    saved = order_manager.position_manager
+    order_manager.position_manager = pm
+    try:
+        assert order_manager.start_position_monitor(bus) is True
+        assert order_manager.start_position_monitor(bus) is False
+        bus.run_due_jobs()
+        assert exchange.price_calls == 1
+        # 其他组件在有效期内读取同一价格不再请求交易所
+        assert bus.get_price('acc1', 'BTC/USDT') == 100.0 and exchange.price_calls == 1
+    finally:
+        order_manager.position_manager = saved
+    assert bus.get_stats()['jobs'] == ['position_monitor']
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_read_through_and_coalesce()
+    test_final_order_status_cached()
+    test_job_registered_once()
@@ -0,0 +1,76 @@
+"""
+测试近期消息缓存
+验证按群组的 LRU 淘汰、币种延迟解析（只解析一次）与文本变化后的重新解析
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import message_cache as message_cache_module
+from message_cache import MessageCache
+
+
+def test_lru_eviction():
+    """每个群只保留最近 max_per_chat 条，查询会刷新最近使用顺序"""
+    print("=" * 60)
+    print("测试消息缓存 LRU 淘汰")
+    print("=" * 60)
+
+    cache = MessageCache(max_per_chat=3)
+    for msg_id in range(1, 4):
+        cache.put(1, msg_id, f"消息 {msg_id}", symbol=None)
+    cache.put(2, 1, "另一个群", symbol=None)
+    assert cache.get_symbol(1, 1) == (True, None)  # 刷新 1，最久未用的变为 2
+    cache.put(1, 4, "消息 4", symbol=None)
+    assert cache.get_text(1, 2) is None
+    assert [cache.get_text(1, i) for i in (1, 3, 4)] == ["消息 1", "消息 3", "消息 4"]
+    assert cache.get_text(2, 1) == "另一个群"
+    # 空文本与缺少 ID 的消息不缓存
+    cache.put(1, 5, "")
+    cache.put(None, 6, "x")
+    assert cache.get_text(1, 5) is None and cache.stats()['messages'] == 4
+    assert cache.get_symbol(1, 99) == (False, None)
+    print(f"统计: {cache.stats()}")
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    print("✅ 通过")
+
+
+def test_lazy_parse():
+    """未提供币种时首次查询才按所在群解析，之后复用；文本被编辑后重新解析"""
+    print("=" * 60)
+    print("测试币种延迟解析")
+    print("=" * 60)
+
+    calls = []
+    real = message_cache_module.parse_cache
+
+    class CountingParser:
+        def analyze(self, text, **kwargs):
+            calls.append((text, kwargs.get('chat_id')))
+            return real.analyze(text, **kwargs)
+
+    message_cache_module.parse_cache = CountingParser()
+    try:
+        cache = MessageCache()
+        cache.put(1, 10, "#BTC 多 60000 止损 58000")
+        assert calls == []
+        assert cache.get_symbol(1, 10) == (True, 'BTC/USDT')
+        assert cache.get_symbol(1, 10) == (True, 'BTC/USDT')
+        # 按消息所在群解析（已配置模板的群走模板）
+        assert calls == [("#BTC 多 60000 止损 58000", 1)]
+        # 相同文本再次写入保留已解析结果
+        cache.put(1, 10, "#BTC 多 60000 止损 58000")
+        assert cache.get_symbol(1, 10) == (True, 'BTC/USDT') and len(calls) == 1
+        # 编辑后文本变化，重新解析
+        cache.put(1, 10, "#ETH 空 3000 止损 3100")
+        assert cache.get_symbol(1, 10) == (True, 'ETH/USDT') and len(calls) == 2
+    finally:
+        message_cache_module.parse_cache = real
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_lazy_parse()
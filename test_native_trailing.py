@@ -0,0 +1,96 @@
+"""
+测试交易所原生追踪止损接管
+验证追踪止损交给交易所后程序不再追踪/改单，不支持时继续程序追踪，保本后停止追踪会撤销原生追踪单
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from conftest import FakeExchange, make_manager
+from trigger_index import KIND_TRAILING
+
+
+def _exchange(native=True):
+    return FakeExchange(price=100.0, native=native)
+
+
+def _manager(exchange, **overrides):
+    info = {'side': 'buy', 'entry_price': 100.0, 'position_size': 2.0, 'stop_loss': 95.0,
+            'trailing_stop_pct': 3.0, 'highest_price': 100.0, 'sl_order_id': 'SL0',
+            'trailing_native': True, 'trailing_min_amend_sec': 0}
+    info.update(overrides)
+    return make_manager(exchange, {('acc1', 'BTC/USDT'): info})
+
+
+def test_handover():
+    """交给交易所后：不再登记追踪阈值，价格创新高也不改单"""
+    print("=" * 60)
+    print("测试追踪止损交给交易所")
+    print("=" * 60)
+
+    exchange = _exchange()
+    pm = _manager(exchange)
+    assert pm.hand_over_trailing('acc1', 'BTC/USDT')
+    assert exchange.trailing == [('sell', 2.0, 3.0)]
+    info = pm.get_position_info('acc1', 'BTC/USDT')
+    assert info['native_trailing_order_id'] == 'TR1'
+    assert KIND_TRAILING not in [k for _, _, k in pm.trigger_index.levels_of('acc1', 'BTC/USDT')]
+
+    exchange.price = 120.0
+    pm.monitor_positions()
+    assert exchange.amends == [] and info['stop_loss'] == 95.0
+    # 重复调用不会重复下单
+    assert pm.hand_over_trailing('acc1', 'BTC/USDT') and len(exchange.trailing) == 1
+    assert pm.get_amend_stats()['native_handover'] == 1
+    print("✅ 通过")
+
+
+def test_fallback_to_program():
+    """交易所不支持原生追踪时继续程序追踪"""
+    print("=" * 60)
+    print("测试不支持原生追踪时的程序追踪")
+    print("=" * 60)
+
+    exchange = _exchange(native=False)
+    pm = _manager(exchange)
+    assert not pm.hand_over_trailing('acc1', 'BTC/USDT')
+    exchange.price = 110.0
+    pm.monitor_positions()
+    assert exchange.amends == [('SL0', 106.7)]
+    print("✅ 通过")
+
+
+def test_breakeven_cancels_native():
+    """保本后停止追踪：撤销原生追踪单，止损移到成本价附近"""
+    exchange = _exchange()
+    pm = _manager(exchange, move_sl_to_breakeven=True, breakeven_trigger_pct=1.0,
+                  stop_trailing_after_breakeven=True)
+    pm.hand_over_trailing('acc1', 'BTC/USDT')
+    exchange.price = 101.5
+    pm.monitor_positions()
+    info = pm.get_position_info('acc1', 'BTC/USDT')
+    assert exchange.cancels == ['TR1'] and info.native_trailing_order_id is None
+    assert info['sl_moved_to_breakeven'] and exchange.amends == [('SL0', 100.1)]
+    print("✅ 保本撤销原生追踪单通过")
+
+
+def test_remove_cancels_orders():
+    """移除持仓（检测到已平仓、程序化止损平仓）时撤销原生追踪单与止损单"""
+    exchange = _exchange()
+    pm = _manager(exchange)
+    pm.hand_over_trailing('acc1', 'BTC/USDT')
+    pm.remove_position('acc1', 'BTC/USDT')
+    assert exchange.cancels == ['TR1', 'SL0']
+    assert pm.get_position_info('acc1', 'BTC/USDT') is None
+    pm.remove_position('acc1', 'BTC/USDT')
+    assert exchange.cancels == ['TR1', 'SL0']
+    print("✅ 移除持仓撤销挂单通过")
+
+
+if __name__ == "__main__":
+    test_handover()
+    test_fallback_to_program()
+    test_breakeven_cancels_native()
+    test_remove_cancels_orders()
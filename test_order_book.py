@@ -0,0 +1,76 @@
+"""
+测试订单簿记录
+验证批量快照在有效期内复用、消失订单的最终状态缓存，以及失败退避
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from order_book import OrderBookOfRecord
+
+
+class FakeClient:
+    """只实现 fetch_open_orders 的假客户端"""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.options = {}
+        self.calls = 0
+        self.fail = False
+
+    def fetch_open_orders(self, symbol=None, params=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("network")
+        return [dict(o) for o in self.orders if symbol is None or o['symbol'] == symbol]
+
+
+def test_batched_lookup():
+    """多次查询在有效期内只批量拉取一次"""
+    print("=" * 60)
+    print("测试订单簿批量快照")
+    print("=" * 60)
+
+    client = FakeClient([
+        {'id': 'A', 'symbol': 'BTC/USDT:USDT', 'filled': 0, 'remaining': 1, 'reduceOnly': True},
+        {'id': 'B', 'symbol': 'ETH/USDT:USDT', 'filled': 0.5, 'remaining': 0.5, 'reduceOnly': False},
+    ])
+    book = OrderBookOfRecord(lambda: {'acc1': client}, refresh_interval=60)
+
+    assert book.lookup('acc1', 'A')['status'] == 'open'
+    assert book.lookup('acc1', 'B')['filled'] == 0.5
+    assert [o['id'] for o in book.open_orders('acc1', 'BTC/USDT:USDT')] == ['A']
+    assert client.calls == 1
+    assert client.options['warnOnFetchOpenOrdersWithoutSymbol'] is False
+
+    # 不在快照中的订单交给调用方直接查询，最终状态缓存后不再请求
+    assert book.lookup('acc1', 'C') is None
+    book.record_final('acc1', 'C', {'status': 'closed', 'filled': 1.0, 'remaining': 0.0})
+    assert book.lookup('acc1', 'C')['status'] == 'closed'
+
+    # 强制刷新：A 已被撤销
+    book.remove('acc1', ['A'])
+    assert book.lookup('acc1', 'A')['status'] == 'canceled'
+    print(f"统计: {book.stats()}")
+    print("✅ 通过")
+
+
+def test_failure_backoff():
+    """刷新失败后退避，期间不重复请求"""
+    client = FakeClient([])
+    client.fail = True
+    book = OrderBookOfRecord(lambda: {'acc1': client}, refresh_interval=0)
+    assert book.open_orders('acc1') is None
+    attempts = client.calls
+    assert book.lookup('acc1', 'X') is None
+    assert book.open_orders('acc1') is None
+    assert client.calls == attempts
+    assert book.open_orders('missing') is None
+    print("✅ 失败退避通过")
+
+
+if __name__ == "__main__":
+    test_batched_lookup()
+    test_failure_backoff()
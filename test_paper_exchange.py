@@ -0,0 +1,128 @@
+"""
+测试模拟盘交易所客户端
+验证市价成交、止损/止盈触发、只减仓与余额盈亏计算
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from paper_exchange import PaperExchange
+from conftest import temp_db
+
+
+class FakePublicClient:
+    """只提供行情与市场信息的假客户端"""
+
+    def __init__(self, price):
+        self.price = price
+        self.markets = {'BTC/USDT:USDT': {'contractSize': 1.0}}
+        self.has = {'cancelOrders': True}
+
+    def fetch_ticker(self, symbol):
+        return {'symbol': symbol, 'last': self.price}
+
+    def market(self, symbol):
+        return self.markets[symbol]
+
+
+def _paper(price=100.0):
+    return PaperExchange(FakePublicClient(price), account_name='paper', balance=1000.0,
+                         fee_rate=0.0, slippage_pct=0.0)
+
+
+def test_market_and_stop_loss():
+    """市价开仓后止损触发平仓，亏损计入余额"""
+    print("=" * 60)
+    print("测试模拟盘市价单与止损")
+    print("=" * 60)
+
+    ex = _paper()
+    order = ex.create_order('BTC/USDT:USDT', 'market', 'buy', 2.0)
+    assert order['status'] == 'closed' and order['average'] == 100.0
+    sl = ex.create_order('BTC/USDT:USDT', 'market', 'sell', 2.0,
+                         params={'stopLossPrice': 95.0, 'reduceOnly': True})
+    assert sl['status'] == 'open'
+    assert [o['id'] for o in ex.fetch_open_orders('BTC/USDT:USDT')] == [sl['id']]
+
+    # 价格未到止损价不触发
+    ex._public.price = 97.0
+    ex.fetch_ticker('BTC/USDT:USDT')
+    assert ex.fetch_order(sl['id'])['status'] == 'open'
+    pos = ex.fetch_positions(['BTC/USDT:USDT'])[0]
+    assert pos['side'] == 'long' and pos['unrealizedPnl'] == -6.0
+
+    ex._public.price = 94.0
+    ex.fetch_ticker('BTC/USDT:USDT')
+    assert ex.fetch_order(sl['id'])['status'] == 'closed'
+    assert ex.fetch_positions() == []
+    assert ex.summary()['realized_pnl'] == -12.0
+    assert ex.fetch_balance()['USDT']['total'] == 988.0
+    print(f"概况: {ex.summary()}")
+    print("✅ 通过")
+
+
+def test_take_profit_and_reduce_only():
+    """空单止盈部分平仓；只减仓单不会反向开仓"""
+    print("=" * 60)
+    print("测试模拟盘止盈与只减仓")
+    print("=" * 60)
+
+    ex = _paper()
+    ex.set_leverage(10, 'BTC/USDT:USDT')
+    ex.create_order('BTC/USDT:USDT', 'market', 'sell', 3.0)
+    tp = ex.create_order('BTC/USDT:USDT', 'market', 'buy', 1.0,
+                         params={'takeProfitPrice': 90.0, 'reduceOnly': True})
+    limit = ex.create_limit_order('BTC/USDT:USDT', 'buy', 5.0, 80.0, params={'reduceOnly': True})
+
+    ex.on_price('BTC/USDT:USDT', 90.0)
+    assert ex.fetch_order(tp['id'])['status'] == 'closed'
+    assert ex.fetch_positions()[0]['contracts'] == 2.0
+    assert ex.fetch_balance()['USDT']['used'] == 2.0 * 90.0 / 10
+
+    # 只减仓限价单数量超过持仓时按持仓数量成交
+    ex.on_price('BTC/USDT:USDT', 80.0)
+    filled = ex.fetch_order(limit['id'])
+    assert filled['status'] == 'closed' and filled['filled'] == 2.0
+    assert ex.fetch_positions() == []
+    assert ex.realized_pnl == 10.0 + 40.0
+
+    # 无持仓时只减仓单直接撤销
+    stray = ex.create_order('BTC/USDT:USDT', 'market', 'sell', 1.0, params={'reduceOnly': True})
+    assert stray['status'] == 'canceled'
+    assert ex.has['cancelOrders'] is True
+    print("✅ 通过")
+
+
+def test_state_survives_restart():
+    """余额、持仓、挂单与订单号落库，重启后恢复并继续撮合"""
+    print("=" * 60)
+    print("测试模拟盘状态重启恢复")
+    print("=" * 60)
+
+    db = temp_db('paper.db')
+    ex = PaperExchange(FakePublicClient(100.0), account_name='paper', balance=1000.0,
+                       fee_rate=0.0, slippage_pct=0.0, db=db)
+    ex.create_order('BTC/USDT:USDT', 'market', 'buy', 2.0)
+    sl = ex.create_order('BTC/USDT:USDT', 'market', 'sell', 2.0,
+                         params={'stopLossPrice': 95.0, 'reduceOnly': True})
+
+    restored = PaperExchange(FakePublicClient(100.0), account_name='paper', balance=1000.0,
+                             fee_rate=0.0, slippage_pct=0.0, db=db)
+    assert restored.fetch_positions()[0]['contracts'] == 2.0
+    assert [o['id'] for o in restored.fetch_open_orders()] == [sl['id']]
+    assert restored.create_limit_order('BTC/USDT:USDT', 'buy', 1.0, 50.0)['id'] != sl['id']
+    restored.on_price('BTC/USDT:USDT', 94.0)
+    assert restored.fetch_order(sl['id'])['status'] == 'closed' and restored.fetch_positions() == []
+    assert restored.balance == 988.0
+    # 另一账户的状态互不影响
+    other = PaperExchange(FakePublicClient(100.0), account_name='paper2', balance=500.0, db=db)
+    assert other.balance == 500.0 and other.fetch_positions() == []
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_market_and_stop_loss()
+    test_take_profit_and_reduce_only()
+    test_state_survives_restart()
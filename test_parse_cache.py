@@ -0,0 +1,70 @@
+"""
+测试消息解析缓存
+验证按规范化内容命中、结果不可变，以及编辑前后交易字段的比较
+"""
+
+import sys
+import io
+import dataclasses
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from parse_cache import ParseCache, normalize_message
+
+
+def test_cache_hit():
+    """相同内容（仅空白/换行符不同）命中缓存"""
+    print("=" * 60)
+    print("测试解析缓存命中")
+    print("=" * 60)
+
+    cache = ParseCache(max_size=10)
+    first = cache.analyze("#BTC 做多\r\n止损: 41000  \n止盈: 43000")
+    second = cache.analyze("  #BTC 做多\n止损: 41000\n止盈: 43000\n")
+    print(f"结果: {first}")
+    print(f"统计: {cache.stats()}")
+    assert first is second
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert normalize_message(" a \r\nb  \n") == "a\nb"
+
+    # 结果不可变
+    try:
+        first.stop_loss = 1.0
+        raise AssertionError("解析结果应不可变")
+    except dataclasses.FrozenInstanceError:
+        pass
+    print("✅ 通过")
+
+
+def test_cache_bounded():
+    """超过容量后淘汰最久未使用的条目"""
+    cache = ParseCache(max_size=3)
+    for i in range(5):
+        cache.analyze(f"#BTC 做多 止损: {41000 + i}")
+    assert cache.stats()['size'] == 3
+    cache.analyze("#BTC 做多 止损: 41000")
+    assert cache.stats()['misses'] == 6
+    print("✅ 容量限制通过")
+
+
+def test_trading_key():
+    """编辑只改文案时交易字段不变，改价格时变化"""
+    print("=" * 60)
+    print("测试编辑前后交易字段比较")
+    print("=" * 60)
+
+    cache = ParseCache()
+    original = cache.analyze("#SOL 做空 入场 100 止损: 102 止盈: 95")
+    cosmetic = cache.analyze("🔥 #SOL 做空 入场 100 止损: 102 止盈: 95 （稳）")
+    changed = cache.analyze("#SOL 做空 入场 100 止损: 103 止盈: 95")
+    print(f"原始: {original.trading_key}")
+    print(f"修改: {changed.trading_key}")
+    assert original.trading_key == cosmetic.trading_key
+    assert original.trading_key != changed.trading_key
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_cache_hit()
+    test_cache_bounded()
+    test_trading_key()
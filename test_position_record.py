@@ -0,0 +1,59 @@
+"""
+测试持仓记录
+验证数值字段统一转为 float、按方向预先计算的触发价，以及与字典用法兼容的映射接口
+"""
+
+import sys
+import io
+import json
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from position_record import PositionRecord, PositionSide
+
+
+def test_fields_and_derived():
+    """字符串/整数数值转为 float，保本触发价与追踪系数随字段更新"""
+    print("=" * 60)
+    print("测试持仓记录字段与派生触发价")
+    print("=" * 60)
+
+    long = PositionRecord('buy', entry_price='100', stop_loss=95, breakeven_trigger_pct=2, trailing_stop_pct='5')
+    assert long.side is PositionSide.LONG and long.is_long
+    assert isinstance(long.entry_price, float) and long.stop_loss == 95.0
+    assert abs(long.breakeven_price - 102.0) < 1e-9 and abs(long.trailing_factor - 0.95) < 1e-12
+    assert long.extreme_price() == 100.0
+
+    short = PositionRecord('sell', entry_price=50.0)
+    assert not short.is_long and abs(short.breakeven_price - 49.5) < 1e-9 and short.trailing_factor is None
+    short['trailing_stop_pct'] = 4.0
+    assert abs(short.trailing_factor - 1.04) < 1e-12
+    assert not hasattr(long, '__dict__')
+    print("✅ 通过")
+
+
+def test_mapping_compat():
+    """None 字段视为不存在；未定义的键存入 extra；可按字典序列化与还原"""
+    print("=" * 60)
+    print("测试持仓记录映射接口")
+    print("=" * 60)
+
+    record = PositionRecord.from_dict({'side': 'sell', 'entry_price': 10.0, 'stop_loss': None,
+                                       'tp1_order_id': 'T1', 'note': 'x'})
+    assert record.get('stop_loss', 'missing') == 'missing' and 'stop_loss' not in record
+    assert record['side'] == 'sell' and record['tp1_order_id'] == 'T1' and record['note'] == 'x'
+    record.update(stop_loss=11, sl_moved_to_breakeven=True)
+    assert record.stop_loss == 11.0 and record['sl_moved_to_breakeven'] is True
+    assert record.setdefault('state', 'entry') == 'entry'
+
+    restored = PositionRecord.from_dict(json.loads(json.dumps(dict(record))))
+    assert restored == record
+    del record['note']
+    assert 'note' not in record.extra
+    print(f"记录: {record!r}")
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_fields_and_derived()
+    test_mapping_compat()
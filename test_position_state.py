@@ -0,0 +1,81 @@
+"""
+测试持仓生命周期状态机
+验证状态只向前推进、落库，以及重启后按批量持仓核对恢复
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from position_state import PositionState, PositionStateStore
+from conftest import FakeExchange, make_manager, temp_db
+
+
+def _store():
+    return PositionStateStore(db=temp_db('state.db'))
+
+
+def test_transitions():
+    """状态只能向前推进，平仓可从任意状态进入"""
+    print("=" * 60)
+    print("测试持仓状态推进")
+    print("=" * 60)
+
+    store = _store()
+    info = {'side': 'buy', 'entry_price': 100.0, 'stop_loss': 96.0}
+    store.save('acc1', 'BTC/USDT', info)
+    assert info['state'] == PositionState.ENTRY.value
+    assert store.transition('acc1', 'BTC/USDT', info, PositionState.PROTECTED, tp1_order_id='T1')
+    assert store.transition('acc1', 'BTC/USDT', info, PositionState.BREAKEVEN, stop_loss=100.0)
+    # 迟到的 TP1 成交不会把状态退回，但字段更新仍然保存
+    assert not store.transition('acc1', 'BTC/USDT', info, PositionState.TP1_FILLED, note='late')
+    assert info['state'] == PositionState.BREAKEVEN.value and info['note'] == 'late'
+
+    loaded = store.load_open()
+    print(f"落库: {loaded}")
+    assert len(loaded) == 1 and loaded[0][2]['stop_loss'] == 100.0 and loaded[0][2]['tp1_order_id'] == 'T1'
+
+    store.mark_closed('acc1', 'BTC/USDT', info)
+    assert store.load_open() == []
+    print("✅ 通过")
+
+
+def test_restore():
+    """重启恢复：仍有仓位的恢复，已无仓位的标记平仓，查询失败时保留本地状态"""
+    print("=" * 60)
+    print("测试重启恢复持仓状态")
+    print("=" * 60)
+
+    store = _store()
+    pm = make_manager(FakeExchange(positions=[]), {
+        ('acc1', 'BTC/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 2.0, 'stop_loss': 96.0},
+        ('acc1', 'ETH/USDT'): {'side': 'sell', 'entry_price': 50.0, 'position_size': 1.0},
+    }, state_store=store)
+    store.transition('acc1', 'BTC/USDT', pm.get_position_info('acc1', 'BTC/USDT'), PositionState.PROTECTED,
+                     tp1_order_id='T1')
+    pm._save_position_info('acc2', 'SOL/USDT', {'side': 'buy', 'entry_price': 10.0})
+
+    # 查询失败：按本地状态恢复
+    exchange = FakeExchange(positions=None)
+    restored = make_manager(exchange, state_store=store).restore_state()
+    assert sorted(s for _, s, _ in restored) == ['BTC/USDT', 'ETH/USDT']
+
+    # 模拟重启：每个账户只做一次批量查询，BTC 仍有仓位（数量以交易所为准），ETH 已平
+    exchange = FakeExchange(positions=[{'symbol': 'BTC/USDT:USDT', 'contracts': 1.0, 'side': 'long'}])
+    fresh = make_manager(exchange, state_store=store)
+    restored = fresh.restore_state()
+    print(f"恢复: {restored}")
+    assert exchange.position_calls == 1
+    assert [(a, s) for a, s, _ in restored] == [('acc1', 'BTC/USDT')]
+    info = fresh.get_position_info('acc1', 'BTC/USDT')
+    assert info['state'] == PositionState.PROTECTED.value and info['position_size'] == 1.0
+    assert info['tp1_order_id'] == 'T1'
+    # 未连接的账户保留状态等待下次核对
+    assert sorted(s for _, s, _ in store.load_open()) == ['BTC/USDT', 'SOL/USDT']
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_transitions()
+    test_restore()
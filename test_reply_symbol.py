@@ -0,0 +1,82 @@
+"""
+测试回复消息的币种解析
+验证被回复消息命中本地缓存时不请求 Telegram API，未命中时回退到 get_reply_message()
+并把结果写回缓存
+"""
+
+import sys
+import io
+import asyncio
+from types import SimpleNamespace
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from message_cache import MessageCache
+import telegram_client
+from telegram_client import TelegramSignalBot
+
+
+class FakeEvent:
+    def __init__(self, reply_id, reply_text=None):
+        self.message = SimpleNamespace(id=100, reply_to_msg_id=reply_id)
+        self.reply_text = reply_text
+        self.api_calls = 0
+
+    async def get_reply_message(self):
+        self.api_calls += 1
+        if self.reply_text is None:
+            return None
+        return SimpleNamespace(id=self.message.reply_to_msg_id, text=self.reply_text)
+
+
+def _resolve(bot, event, chat_id=1):
+    return asyncio.run(TelegramSignalBot._resolve_reply_symbol(bot, event, chat_id))
+
+
+def test_cache_hit():
+    """被回复消息已在缓存中：直接返回币种，不调用 get_reply_message()"""
+    print("=" * 60)
+    print("测试回复消息命中缓存")
+    print("=" * 60)
+
+    bot = SimpleNamespace(message_cache=MessageCache())
+    bot.message_cache.put(1, 7, "#BTC 多 60000 止损 58000")
+    event = FakeEvent(7, "不应读取")
+    assert _resolve(bot, event) == 'BTC/USDT'
+    assert event.api_calls == 0
+    print("✅ 通过")
+
+
+def test_fallback_to_api():
+    """缓存未命中时回退到 get_reply_message()，结果写回缓存供下次使用"""
+    print("=" * 60)
+    print("测试回复消息回退到 Telegram API")
+    print("=" * 60)
+
+    bot = SimpleNamespace(message_cache=MessageCache())
+    event = FakeEvent(8, "#ETH 空 3000 止损 3100")
+    chats = []
+    real = telegram_client.parse_cache.analyze
+    # 只在实例上替换，结束后删除即恢复类方法
+    telegram_client.parse_cache.analyze = lambda text, chat_id=None: chats.append(chat_id) or real(text, chat_id=chat_id)
+    try:
+        assert _resolve(bot, event) == 'ETH/USDT'
+    finally:
+        del telegram_client.parse_cache.analyze
+    # 被回复消息按所在群解析（已配置模板的群走模板）
+    assert chats == [1]
+    assert event.api_calls == 1
+    assert bot.message_cache.get_symbol(1, 8) == (True, 'ETH/USDT')
+
+    again = FakeEvent(8, "不应读取")
+    assert _resolve(bot, again) == 'ETH/USDT' and again.api_calls == 0
+
+    # 被回复消息不存在或无文本
+    missing = FakeEvent(9)
+    assert _resolve(bot, missing) is None and missing.api_calls == 1
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_cache_hit()
+    test_fallback_to_api()
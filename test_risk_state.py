@@ -0,0 +1,93 @@
+"""
+测试风控状态持久化
+验证连亏计数、冷却期、当日盈亏与持仓数在重启后从检查点恢复（不请求交易所、不回放交易），
+以及每日统计按平仓增量累加
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from account_state import AccountStateStore
+from risk_manager import RiskManager
+from conftest import FakeExchange, temp_db
+
+
+def test_restore_after_restart():
+    """重启后连亏、冷却、当日盈亏、持仓数与初始余额都与重启前一致"""
+    print("=" * 60)
+    print("测试风控状态重启恢复")
+    print("=" * 60)
+
+    db = temp_db('risk.db')
+    rm = RiskManager(FakeExchange(), account_state=AccountStateStore(), db=db)
+    assert rm.can_open_trade('acc1', 10.0)[0]
+    for _ in range(4):
+        rm.record_trade('acc1', 0.0, closed=False)
+    for pnl in (-5.0, -5.0, -5.0):
+        rm.record_trade('acc1', pnl, closed=True)
+    before = rm.get_risk_status('acc1')
+    assert not before['trading_enabled'] and before['consecutive_losses'] == 3
+
+    exchange = FakeExchange()
+    restored = RiskManager(exchange, account_state=AccountStateStore(), db=db)
+    after = restored.get_risk_status('acc1')
+    print(f"恢复后: 连亏 {after['consecutive_losses']} 日PnL {after['daily_pnl']} 持仓 {after['open_positions_count']}")
+    for key in ('trading_enabled', 'cooldown_until', 'initial_balance', 'daily_pnl', 'total_pnl',
+                'consecutive_losses', 'total_trades', 'open_positions_count'):
+        assert after[key] == before[key], key
+    assert exchange.balance_calls == 0
+    ok, reason = restored.can_open_trade('acc1', 10.0)
+    assert not ok and '冷却期' in reason
+    print("✅ 通过")
+
+
+def test_daily_stats_upsert():
+    """同一天多次平仓累加到同一行，胜率与最大盈亏正确"""
+    print("=" * 60)
+    print("测试每日统计增量累加")
+    print("=" * 60)
+
+    db = temp_db('risk.db')
+    for exit_price in (110.0, 95.0, 120.0):
+        trade_id = db.record_trade('acc1', 'BTC/USDT', 'buy', 100.0, 1.0)
+        db.close_trade(trade_id, exit_price, fees=1.0)
+    stats = db.get_daily_stats('acc1')
+    assert len(stats) == 1
+    row = stats[0]
+    print(f"每日统计: {row}")
+    assert row['total_trades'] == 3 and row['winning_trades'] == 2 and row['losing_trades'] == 1
+    assert abs(row['total_pnl'] - 22.0) < 1e-9 and abs(row['total_fees'] - 3.0) < 1e-9
+    assert abs(row['win_rate'] - 200.0 / 3) < 1e-9
+    assert row['largest_win'] == 19.0 and row['largest_loss'] == -6.0
+    print("✅ 通过")
+
+
+def test_paper_excluded():
+    """模拟盘平仓不计入每日统计与风控计数"""
+    print("=" * 60)
+    print("测试模拟盘交易不计入实盘统计")
+    print("=" * 60)
+
+    db = temp_db('risk.db')
+    trade_id = db.record_trade('acc1', 'BTC/USDT', 'buy', 100.0, 1.0, is_paper=True)
+    db.close_trade(trade_id, 90.0)
+    assert db.get_daily_stats('acc1') == []
+    assert db.get_trades('acc1')[0]['pnl'] == -10.0
+
+    rm = RiskManager(FakeExchange(), account_state=AccountStateStore(), db=db)
+    for _ in range(3):
+        rm.record_trade('acc1', 0.0, closed=False, is_paper=True)
+        rm.record_trade('acc1', -5.0, closed=True, is_paper=True)
+    status = rm.get_risk_status('acc1')
+    assert status['trading_enabled'] and status['consecutive_losses'] == 0
+    assert status['total_trades'] == 0 and status['open_positions_count'] == 0
+    assert db.load_risk_states() == {}
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_restore_after_restart()
+    test_daily_stats_upsert()
+    test_paper_excluded()
@@ -0,0 +1,122 @@
+"""
+测试单遍关键词匹配与字段提取
+验证 analyze() 的结果与 parse() 一致，以及止盈提示预判
+"""
+
+import sys
+import io
+import json
+import os
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from keyword_matcher import KeywordMatcher
+from signal_parser import SignalParser, SignalType
+
+
+def test_keyword_overlap():
+    """重叠/包含的关键词都应命中"""
+    print("=" * 60)
+    print("测试关键词重叠匹配")
+    print("=" * 60)
+
+    matcher = KeywordMatcher({
+        'exclude': ['点击', '点击进入', '免费'],
+        'buy': ['多单'],
+        'close': ['平多'],
+    })
+    hits = matcher.scan('点击进入 平多单')
+    print(f"命中: {hits}")
+    assert hits['exclude'] == {'点击', '点击进入'}
+    assert hits['buy'] == {'多单'}
+    assert hits['close'] == {'平多'}
+
+    # 与逐组 in 判断的优先级保持一致
+    assert SignalParser._detect_signal_type('点击进入群组了解更多') == SignalType.UNKNOWN
+    assert SignalParser._detect_signal_type('平多单') == SignalType.LONG
+    assert SignalParser._detect_signal_type('tp1 已触发') == SignalType.UNKNOWN
+    print("✅ 通过")
+
+
+def test_analyze_fields():
+    """一次扫描提取全部字段"""
+    print("=" * 60)
+    print("测试字段提取")
+    print("=" * 60)
+
+    message = "#ORDI 轻仓多 入场 35.2 止损 33 目标：38 杠杆 20"
+    analysis = SignalParser.analyze(message)
+    print(f"结果: {analysis}")
+    assert analysis.signal_type == SignalType.LONG
+    assert analysis.symbol == 'ORDI/USDT'
+    assert analysis.entry_price == 35.2
+    assert analysis.stop_loss == 33.0
+    assert analysis.take_profit == (38.0,)
+    assert analysis.leverage == 20
+
+    analysis = SignalParser.analyze("10x leverage long on #ARB target1 1.35 target2 1.42")
+    assert analysis.leverage == 10
+    assert analysis.take_profit == (1.35, 1.42)
+
+    # 传入 analysis 与直接 parse 结果一致，且互不共享止盈列表
+    for text in [message, "SHORT SOL/USDT\nEntry: 100.5\nStop Loss: 102\nTake Profit: 95, 90, 85", "gm gm"]:
+        analysis = SignalParser.analyze(text)
+        shared = SignalParser.parse(text, analysis=analysis)
+        direct = SignalParser.parse(text)
+        assert repr(shared) == repr(direct)
+        if shared:
+            shared.take_profit.append(1.0)
+            assert 1.0 not in analysis.take_profit
+    print("✅ 通过")
+
+
+def test_tp_hint():
+    """止盈提示预判"""
+    print("=" * 60)
+    print("测试止盈提示预判")
+    print("=" * 60)
+
+    cases = [
+        ("第一止盈：0.0703", True, [0.0703]),
+        ("到0.0703 减仓一次", True, [0.0703]),
+        ("到 0.52", True, [0.52]),
+        ("到:0.52", False, [0.52]),
+        ("TP1 已触发 请平仓", True, [1.0]),
+        ("gm gm", False, []),
+    ]
+    for text, expected_hint, expected_tps in cases:
+        analysis = SignalParser.analyze(text)
+        print(f"{text!r} -> hint={analysis.is_tp_hint}, tp={analysis.take_profit}")
+        assert analysis.is_tp_hint == expected_hint
+        assert list(analysis.take_profit) == expected_tps
+    print("✅ 通过")
+
+
+def test_parse_many():
+    """批量解析：顺序与逐条 parse 一致，重复文本返回独立对象"""
+    print("=" * 60)
+    print("测试批量解析")
+    print("=" * 60)
+
+    corpus_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signal_corpus.json')
+    with open(corpus_path, 'r', encoding='utf-8') as f:
+        texts = [item['text'] for item in json.load(f)]
+    messages = texts + texts[:5] + [None, '']
+
+    expected = [repr(SignalParser.parse(m or '')) for m in messages]
+    assert [repr(s) for s in SignalParser.parse_many(messages)] == expected
+    # 进程池路径（小块强制分发）
+    assert [repr(s) for s in SignalParser.parse_many(messages, workers=2, chunk_size=10)] == expected
+
+    results = SignalParser.parse_many(texts[:1] * 2)
+    assert results[0] is not results[1]
+    results[0].take_profit.append(1.0)
+    assert 1.0 not in results[1].take_profit
+    print(f"✅ 通过（{len(messages)} 条）")
+
+
+if __name__ == "__main__":
+    test_keyword_overlap()
+    test_analyze_fields()
+    test_tp_hint()
+    test_parse_many()
@@ -0,0 +1,71 @@
+"""
+测试过期信号保护
+验证延迟预算、不利滑点判断，以及跳过 / 改限价 / 缩仓三种处理
+"""
+
+import sys
+import io
+from datetime import datetime, timedelta
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from signal_guard import evaluate_signal, ACTION_PROCEED, ACTION_SKIP, ACTION_LIMIT, ACTION_SHRINK
+
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def test_within_budget():
+    """预算内或价格有利时照常执行；未配置预算时不限制"""
+    print("=" * 60)
+    print("测试预算内信号")
+    print("=" * 60)
+
+    d = evaluate_signal('buy', 100.0, 100.5, NOW - timedelta(seconds=5), max_age_sec=30,
+                        max_slippage_pct=1.0, now=NOW)
+    assert d.action == ACTION_PROCEED and d.age_sec == 5.0 and abs(d.slippage_pct - 0.5) < 1e-9
+
+    # 空单价格上涨是有利偏离（能以更高价开空）
+    d = evaluate_signal('sell', 100.0, 110.0, NOW, max_slippage_pct=1.0, now=NOW)
+    assert d.action == ACTION_PROCEED and d.slippage_pct < 0
+
+    d = evaluate_signal('buy', 100.0, 150.0, NOW - timedelta(hours=1), now=NOW)
+    assert d.action == ACTION_PROCEED
+
+    # 没有缓存价格时只检查延迟
+    d = evaluate_signal('buy', 100.0, None, NOW - timedelta(seconds=5), max_age_sec=30,
+                        max_slippage_pct=1.0, now=NOW)
+    assert d.action == ACTION_PROCEED and d.slippage_pct is None
+    print("✅ 通过")
+
+
+def test_stale_actions():
+    """超出预算：按配置跳过、改为入场价限价单或缩仓"""
+    print("=" * 60)
+    print("测试过期信号处理")
+    print("=" * 60)
+
+    old = NOW - timedelta(seconds=60)
+    d = evaluate_signal('buy', 100.0, 100.0, old, max_age_sec=30, now=NOW)
+    print(f"跳过: {d}")
+    assert d.action == ACTION_SKIP and '60.0s' in d.reason
+
+    d = evaluate_signal('sell', 100.0, 97.0, NOW, max_slippage_pct=1.0, action=ACTION_LIMIT, now=NOW)
+    assert d.action == ACTION_LIMIT and d.limit_price == 100.0
+
+    # 无入场价无法改限价，退化为跳过
+    d = evaluate_signal('buy', None, 100.0, old, max_age_sec=30, action=ACTION_LIMIT, now=NOW)
+    assert d.action == ACTION_SKIP
+
+    d = evaluate_signal('buy', 100.0, 102.0, NOW, max_slippage_pct=1.0, action=ACTION_SHRINK, now=NOW)
+    assert d.action == ACTION_SHRINK and abs(d.size_factor - 0.5) < 1e-9
+
+    # 偏离过大，缩仓比例过小时直接跳过
+    d = evaluate_signal('buy', 100.0, 110.0, NOW, max_slippage_pct=1.0, action=ACTION_SHRINK, now=NOW)
+    assert d.action == ACTION_SKIP
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_within_budget()
+    test_stale_actions()
@@ -0,0 +1,86 @@
+"""
+测试按群组的信号模板
+验证模板解析、回退通用解析器，以及解析缓存按群组区分模板结果
+"""
+
+import sys
+import io
+import json
+import os
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from signal_parser import SignalParser, SignalType
+from signal_templates import SignalTemplateRegistry, signal_templates
+from parse_cache import ParseCache
+
+CHAT_ID = -1001234567890
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signal_templates.example.json')
+
+
+def _example_profile():
+    with open(EXAMPLE_CONFIG, 'r', encoding='utf-8') as f:
+        return json.load(f)['profiles'][str(CHAT_ID)]
+
+
+def test_template_parse():
+    """示例模板解析该群的常见格式"""
+    print("=" * 60)
+    print("测试群组模板解析")
+    print("=" * 60)
+
+    registry = SignalTemplateRegistry(EXAMPLE_CONFIG)
+    template = registry.get(CHAT_ID)
+    assert template is not None
+    assert registry.get(-1) is None
+
+    result = template.analyze("#MDT 市價空\n第一止盈：0.01972")
+    print(f"#MDT -> {result}")
+    assert result.signal_type == SignalType.SHORT
+    assert result.symbol == 'MDT/USDT'
+    assert result.take_profit == (0.01972,)
+
+    result = template.analyze("🎯 0.455 🎯 0.47")
+    print(f"🎯 -> {result}")
+    assert result.signal_type == SignalType.CLOSE and result.is_tp_hint
+    assert result.take_profit == (0.455, 0.47)
+
+    assert template.analyze("本周战绩 #BTC 市价多").signal_type == SignalType.UNKNOWN
+    # 不符合模板的消息交给通用解析器
+    assert template.analyze("SHORT SOL/USDT\nEntry: 100.5") is None
+    print("✅ 通过")
+
+
+def test_parser_with_chat_id():
+    """SignalParser 按 chat_id 优先走模板，未命中回退通用解析"""
+    print("=" * 60)
+    print("测试模板与通用解析器回退")
+    print("=" * 60)
+
+    signal_templates.add(CHAT_ID, _example_profile())
+    try:
+        signal = SignalParser.parse("#0G 市价多 20x\n第一止盈：1.85", chat_id=CHAT_ID)
+        print(f"模板: {signal}")
+        assert signal.signal_type == SignalType.LONG and signal.leverage == 20
+
+        text = "SHORT SOL/USDT\nEntry: 100.5\nStop Loss: 102"
+        assert repr(SignalParser.parse(text, chat_id=CHAT_ID)) == repr(SignalParser.parse(text))
+
+        # 未配置模板的群组与通用解析一致
+        assert repr(SignalParser.parse("#0G 市价多 20x", chat_id=-1)) == repr(SignalParser.parse("#0G 市价多 20x"))
+
+        # 解析缓存按群组区分模板结果
+        cache = ParseCache()
+        generic = cache.analyze("🎯 0.455 🎯 0.47")
+        templated = cache.analyze("🎯 0.455 🎯 0.47", chat_id=CHAT_ID)
+        assert generic.signal_type == SignalType.UNKNOWN
+        assert templated.signal_type == SignalType.CLOSE
+        assert cache.analyze("🎯 0.455 🎯 0.47", chat_id=-1) is generic
+    finally:
+        signal_templates.remove(CHAT_ID)
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_template_parse()
+    test_parser_with_chat_id()
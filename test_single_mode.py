@@ -0,0 +1,110 @@
+"""
+测试单交易所后备模式
+验证 execute_single 通过执行引擎走与多交易所相同的流程（入场、止损、止盈），且只操作单账户
+"""
+
+import sys
+import io
+import asyncio
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from signal_parser import TradingSignal, SignalType
+from position_state import PositionStateStore
+from conftest import temp_db
+import trade_executor
+
+
+class FakeEngine:
+    """记录调用的多交易所执行引擎"""
+
+    def __init__(self):
+        cfg = type("Cfg", (), {"default_leverage": 10})
+        self.clients = {'single': object(), 'other': object()}
+        self.accounts = {'single': cfg(), 'other': cfg()}
+        self.calls = []
+
+    def get_current_price(self, account_name, symbol):
+        return 100.0
+
+    def calculate_position_size(self, account_name, symbol, price):
+        return 2.0
+
+    def set_leverage(self, account_name, symbol, leverage=None):
+        self.calls.append(('leverage', account_name, leverage))
+        return True
+
+    def place_market_order(self, account_name, symbol, side, amount, current_price=None, leverage=None):
+        self.calls.append(('entry', account_name, side, amount, leverage))
+        return {'status': 'success', 'order_id': 'E1', 'price': 100.0, 'amount': amount}
+
+    def place_stop_loss_order(self, account_name, symbol, side, amount, stop_price):
+        self.calls.append(('sl', account_name, side, stop_price))
+        return {'status': 'placed', 'id': 'S1'}
+
+    def place_take_profit_order(self, account_name, symbol, side, amount, tp_price):
+        self.calls.append(('tp', account_name, side, tp_price))
+        return {'status': 'placed', 'id': f'T{tp_price}'}
+
+    def fetch_order_status(self, account_name, symbol, order_id):
+        return {'status': 'canceled'}
+
+
+class FakeAdapter:
+    ACCOUNT_NAME = 'single'
+
+    def __init__(self, engine):
+        self.engine = engine
+
+
+def test_execute_single_uses_engine():
+    """单账户信号只在 'single' 账户执行，并挂出止损与止盈"""
+    print("=" * 60)
+    print("测试单交易所模式走统一执行引擎")
+    print("=" * 60)
+
+    engine = FakeEngine()
+    saved = (trade_executor.risk_manager, trade_executor.order_manager.position_manager, trade_executor.trading_db)
+    trade_executor.risk_manager = None
+    # 后台记账写入临时数据库，不改动仓库中的 trading_history.db
+    trade_executor.trading_db = db = temp_db('single.db')
+    pm = trade_executor.order_manager.PositionManager(engine, state_store=PositionStateStore())
+    trade_executor.order_manager.position_manager = pm
+    try:
+        executor = trade_executor.TradeExecutor(engine)
+        signal = TradingSignal(SignalType.LONG, 'BTC/USDT', None, None, [110.0, 120.0], 5, 'test')
+
+        async def run():
+            await executor.execute_single(signal, FakeAdapter(engine))
+            await asyncio.gather(*list(executor._background_tasks), return_exceptions=True)
+
+        asyncio.run(run())
+        print(f"调用: {engine.calls}")
+        assert {c[1] for c in engine.calls} == {'single'}
+        kinds = [c[0] for c in engine.calls]
+        assert kinds[:2] == ['leverage', 'entry'] and 'sl' in kinds and kinds.count('tp') >= 2
+        # 按信号杠杆（5x）开仓，而不是账户默认杠杆（10x）
+        assert engine.calls[0][2] == 5 and engine.calls[1][4] == 5
+        assert pm.get_position_info('single', 'BTC/USDT').leverage == 5
+        assert executor.get_protection_stats()['count'] == 1
+        assert [t['account_name'] for t in db.get_trades()] == ['single']
+    finally:
+        (trade_executor.risk_manager, trade_executor.order_manager.position_manager,
+         trade_executor.trading_db) = saved
+    print("✅ 通过")
+
+
+def test_unregistered_account():
+    """单账户未注册到引擎时不执行"""
+    engine = FakeEngine()
+    del engine.clients['single']
+    executor = trade_executor.TradeExecutor(engine)
+    signal = TradingSignal(SignalType.LONG, 'BTC/USDT', None, None, [], 5, 'test')
+    asyncio.run(executor.execute_single(signal, FakeAdapter(engine)))
+    assert engine.calls == []
+    print("✅ 未注册账户不执行通过")
+
+
+if __name__ == "__main__":
+    test_execute_single_uses_engine()
+    test_unregistered_account()
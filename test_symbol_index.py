@@ -0,0 +1,133 @@
+"""
+测试可交易币种索引
+验证别名解析（1000PEPE / 数字开头币种）、不可交易币种在解析阶段被拒绝，以及合约符号选择
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from symbol_index import TradableSymbolIndex
+from signal_parser import SignalParser, SignalType, TradingSignal
+from context_store import ChatContextStore
+
+
+def _market(base, quote='USDT', type_='swap', active=True):
+    symbol = f"{base}/{quote}:{quote}" if type_ == 'swap' else f"{base}/{quote}"
+    return symbol, {'symbol': symbol, 'base': base, 'quote': quote, 'type': type_,
+                    'contract': type_ == 'swap', 'active': active}
+
+
+def _markets(*items):
+    return dict(items)
+
+
+def _build_index():
+    index = TradableSymbolIndex()
+    index.update_account('binance', _markets(
+        _market('BTC'), _market('BTC', type_='spot'), _market('1000PEPE'), _market('0G'),
+        _market('DEAD', active=False),
+    ))
+    index.update_account('bitget', _markets(
+        _market('BTC', type_='spot'), _market('BTC'), _market('SOL'),
+    ))
+    return index
+
+
+def test_resolve():
+    """别名解析与不可交易币种"""
+    print("=" * 60)
+    print("测试可交易币种索引")
+    print("=" * 60)
+
+    index = _build_index()
+    print(f"统计: {index.stats()}")
+    assert index.resolve('BTC/USDT') == ('BTC/USDT', 1.0)
+    assert index.resolve('0G/USDT') == ('0G/USDT', 1.0)
+    assert index.resolve('PEPE/USDT') == ('1000PEPE/USDT', 1000.0)
+    assert index.resolve('XYZ/USDT') is None
+    assert index.resolve('DEAD/USDT') is None
+
+    assert sorted(index.accounts_for('BTC/USDT')) == ['binance', 'bitget']
+    assert index.is_listed('bitget', 'SOL/USDT') and not index.is_listed('binance', 'SOL/USDT')
+    assert index.is_listed('unknown', 'SOL/USDT')  # 未建索引的账户不过滤
+    # 同时有现货和合约时选 USDT 本位永续
+    assert index.contract_symbol('bitget', 'BTC/USDT') == 'BTC/USDT:USDT'
+
+    # 去掉乘数前缀：信号写 1000SOL，交易所只有 SOL
+    assert index.resolve('1000SOL/USDT') == ('SOL/USDT', 0.001)
+
+    # 未加载 markets 时不做校验
+    assert TradableSymbolIndex().resolve('XYZ/USDT') == ('XYZ/USDT', 1.0)
+    print("✅ 通过")
+
+
+def test_parser_validation():
+    """解析阶段拒绝不可交易币种、按别名换算价格"""
+    print("=" * 60)
+    print("测试解析阶段币种校验")
+    print("=" * 60)
+
+    original = SignalParser.symbol_index
+    SignalParser.symbol_index = _build_index()
+    try:
+        assert SignalParser.parse("#XYZ 市价多 止损: 1.2") is None
+
+        signal = SignalParser.parse("#PEPE 做多 入场 0.0000091 止损: 0.0000085 止盈: 0.0000100")
+        print(f"别名: {signal}")
+        assert signal.symbol == '1000PEPE/USDT'
+        assert signal.entry_price == 0.0091 and signal.stop_loss == 0.0085
+        assert signal.take_profit == [0.01]
+
+        assert SignalParser.parse("#0G 市价空").symbol == '0G/USDT'
+
+        # 批量解析同样校验
+        results = SignalParser.parse_many(["#XYZ 做多", "#BTC 做多", "#XYZ 做多"])
+        assert results[0] is None and results[2] is None and results[1].symbol == 'BTC/USDT'
+    finally:
+        SignalParser.symbol_index = original
+    print("✅ 通过")
+
+
+def test_resolve_per_account():
+    """一个账户上架 PEPE、另一个只有 1000PEPE 时，各自解析到本账户的合约并换算价格"""
+    print("=" * 60)
+    print("测试按账户解析别名")
+    print("=" * 60)
+
+    index = _build_index()
+    index.update_account('okx', _markets(_market('PEPE')))
+    # 全局解析优先原币种，但 binance 仍能解析到别名
+    assert index.resolve('PEPE/USDT') == ('PEPE/USDT', 1.0)
+    assert index.resolve_for('okx', 'PEPE/USDT') == ('PEPE/USDT', 1.0)
+    assert index.resolve_for('binance', 'PEPE/USDT') == ('1000PEPE/USDT', 1000.0)
+    assert index.resolve_for('bitget', 'PEPE/USDT') is None
+    assert index.resolve_for('unknown', 'PEPE/USDT') == ('PEPE/USDT', 1.0)
+
+    signal = TradingSignal(SignalType.CLOSE, 'PEPE/USDT', take_profit=[0.00001])
+    signal.apply_alias('1000PEPE/USDT', 1000.0)
+    assert signal.take_profit == [0.01] and signal.price_scale == 1000.0
+    print("✅ 通过")
+
+
+def test_context_scale():
+    """近期开仓按换算后的价格记录时，群内原始止盈价按系数换算后仍能匹配到该币种"""
+    print("=" * 60)
+    print("测试群组上下文按别名换算匹配")
+    print("=" * 60)
+
+    store = ChatContextStore()
+    store.record_entry(1, '1000PEPE/USDT', [0.0091, 0.0085], scale=1000.0)
+    store.record_entry(1, 'BTC/USDT', [60000.0, 58000.0])
+    entry = store.infer_entry(1, 0.0000100)
+    assert entry['symbol'] == '1000PEPE/USDT' and entry['scale'] == 1000.0
+    assert store.infer_symbol(1, 61000.0) == 'BTC/USDT'
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_resolve()
+    test_parser_validation()
+    test_resolve_per_account()
+    test_context_scale()
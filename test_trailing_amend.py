@@ -0,0 +1,177 @@
+"""
+测试追踪止损改单合并
+验证最小步长/最小间隔内的止损改动只更新内存、被合并的改动随后补发，以及改单计数
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from position_state import PositionStateStore
+from conftest import FakeExchange, make_manager
+
+
+def _manager(**overrides):
+    exchange = FakeExchange(price=100.0)
+    info = {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0, 'stop_loss': 95.0,
+            'trailing_stop_pct': 5.0, 'highest_price': 100.0, 'sl_order_id': 'SL0',
+            'trailing_min_step_pct': 1.0, 'trailing_min_amend_sec': 0}
+    info.update(overrides)
+    return make_manager(exchange, {('acc1', 'BTC/USDT'): info}), exchange
+
+
+def test_step_hysteresis():
+    """小于最小步长的上移只更新内存中的止损，累计超过步长后才改单"""
+    print("=" * 60)
+    print("测试追踪止损最小步长")
+    print("=" * 60)
+
+    pm, exchange = _manager()
+    for price in (100.2, 100.4, 100.6, 100.8):
+        exchange.price = price
+        pm.monitor_positions()
+    info = pm.get_position_info('acc1', 'BTC/USDT')
+    # 止损已跟随到 100.8 * 0.95，但相对 95 的改动不足 1%，未改单
+    assert abs(info['stop_loss'] - 95.76) < 1e-9
+    assert exchange.amends == []
+    assert pm.get_amend_stats()['coalesced'] == 4
+
+    exchange.price = 101.5
+    pm.monitor_positions()
+    assert exchange.amends == [('SL0', 96.425)]
+    assert info['sl_order_id'] == 'SL1' and info['sl_amended_price'] == info['stop_loss']
+    print(f"改单统计: {pm.get_amend_stats()}")
+    print("✅ 通过")
+
+
+def test_interval_and_flush():
+    """最小间隔内的改动先合并，间隔过后下个监控周期补发最新止损"""
+    print("=" * 60)
+    print("测试追踪止损最小改单间隔")
+    print("=" * 60)
+
+    pm, exchange = _manager(trailing_min_step_pct=0, trailing_min_amend_sec=60)
+    exchange.price = 110.0
+    pm.monitor_positions()
+    assert len(exchange.amends) == 1
+
+    exchange.price = 120.0
+    pm.monitor_positions()
+    assert len(exchange.amends) == 1 and pm.get_amend_stats()['coalesced'] == 1
+
+    # 模拟间隔已过：价格回落不会再触发追踪，但待发改动会被补发
+    info = pm.get_position_info('acc1', 'BTC/USDT')
+    info['sl_amended_at'] -= 120
+    exchange.price = 115.0
+    pm.monitor_positions()
+    assert exchange.amends[-1] == ('SL1', 114.0)
+    assert pm.get_amend_stats()['flushed'] == 1
+    print("✅ 通过")
+
+
+def test_tick_step():
+    """按最小变动单位个数限制步长"""
+    pm, exchange = _manager(trailing_min_step_pct=0, trailing_min_step_ticks=2)
+    exchange.price = 100.9  # 止损 95.855，改动不足 2 个 0.5
+    pm.monitor_positions()
+    assert exchange.amends == []
+    exchange.price = 101.2  # 止损 96.14，改动 1.14 >= 1.0
+    pm.monitor_positions()
+    assert len(exchange.amends) == 1
+    print("✅ 最小变动单位步长通过")
+
+
+class RecordingDB:
+    """记录持仓状态落库"""
+
+    def __init__(self):
+        self.saved = []
+
+    def save_position_state(self, account_name, symbol, state, payload):
+        self.saved.append(payload)
+
+
+def test_coalesced_persisted():
+    """合并（未改单）的止损移动按间隔节流落库，停止时补写最新止损"""
+    import json
+    db = RecordingDB()
+    exchange = FakeExchange(price=100.0)
+    pm = make_manager(exchange, {('acc1', 'BTC/USDT'): {
+        'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0, 'stop_loss': 95.0,
+        'trailing_stop_pct': 5.0, 'highest_price': 100.0, 'sl_order_id': 'SL0',
+        'trailing_min_step_pct': 1.0}}, state_store=PositionStateStore(db))
+    exchange.price = 100.4
+    pm.monitor_positions()
+    assert exchange.amends == [] and pm.get_amend_stats()['coalesced'] == 1
+    assert abs(json.loads(db.saved[-1])['stop_loss'] - 95.38) < 1e-9
+
+    # 节流间隔内的后续移动只更新内存，不逐个周期写库；停止时统一落库
+    saves = len(db.saved)
+    for price in (100.5, 100.6, 100.7):
+        exchange.price = price
+        pm.monitor_positions()
+    assert exchange.amends == [] and len(db.saved) == saves
+    assert pm.flush_state() == 1 and len(db.saved) == saves + 1
+    assert abs(json.loads(db.saved[-1])['stop_loss'] - 95.665) < 1e-9
+    assert pm.flush_state() == 0
+    print("✅ 合并止损落库通过")
+
+
+class LockProbeExchange(FakeExchange):
+    """在改单/平仓时从另一线程尝试获取持仓锁"""
+
+    def __init__(self, price):
+        super().__init__(price=price)
+        self.pm = None
+        self.lock_free = []
+
+    def _probe(self):
+        import threading
+        def _try():
+            acquired = self.pm._lock.acquire(timeout=1)
+            if acquired:
+                self.pm._lock.release()
+            self.lock_free.append(acquired)
+
+        worker = threading.Thread(target=_try)
+        worker.start()
+        worker.join()
+
+    def amend_stop_loss_order(self, *args, **kwargs):
+        self._probe()
+        return super().amend_stop_loss_order(*args, **kwargs)
+
+    def close_position(self, account_name, symbol):
+        self._probe()
+        return super().close_position(account_name, symbol)
+
+
+def test_exchange_calls_outside_lock():
+    """监控线程改单与程序化止损平仓时不持有持仓锁"""
+    print("=" * 60)
+    print("测试交易所请求在锁外执行")
+    print("=" * 60)
+
+    exchange = LockProbeExchange(100.0)
+    pm = make_manager(exchange, {('acc1', 'BTC/USDT'): {
+        'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0, 'stop_loss': 95.0,
+        'trailing_stop_pct': 5.0, 'highest_price': 100.0, 'sl_order_id': 'SL0'}})
+    exchange.pm = pm
+    exchange.price = 110.0
+    pm.monitor_positions()
+    info = pm.get_position_info('acc1', 'BTC/USDT')
+    assert exchange.amends == [('SL0', 104.5)] and info['sl_order_id'] == 'SL1'
+    exchange.price = 104.0
+    pm.monitor_positions()
+    assert pm.get_position_info('acc1', 'BTC/USDT') is None
+    assert exchange.lock_free == [True, True]
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_step_hysteresis()
+    test_interval_and_flush()
+    test_tick_step()
+    test_coalesced_persisted()
+    test_exchange_calls_outside_lock()
@@ -0,0 +1,123 @@
+"""
+测试持仓触发价索引
+验证二分查找只返回越过阈值的条目，以及持仓监控只处理被触发的持仓
+"""
+
+import sys
+import io
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from trigger_index import TriggerIndex, ABOVE, BELOW, KIND_STOP_LOSS, KIND_BREAKEVEN, KIND_TRAILING
+from conftest import FakeExchange, make_manager
+
+
+def test_index_queries():
+    """阈值边界、按账户过滤、更新与移除"""
+    print("=" * 60)
+    print("测试触发价索引查询")
+    print("=" * 60)
+
+    index = TriggerIndex()
+    index.update('acc1', 'BTC/USDT', [(BELOW, 95.0, KIND_STOP_LOSS), (ABOVE, 101.0, KIND_BREAKEVEN)])
+    index.update('acc2', 'BTC/USDT', [(BELOW, 90.0, KIND_STOP_LOSS)])
+    assert len(index) == 3
+
+    assert index.crossed('BTC/USDT', 100.0) == []
+    assert index.crossed('BTC/USDT', 101.0) == [('acc1', KIND_BREAKEVEN)]
+    assert index.crossed('BTC/USDT', 95.0) == [('acc1', KIND_STOP_LOSS)]
+    assert sorted(index.crossed('BTC/USDT', 89.0)) == [('acc1', KIND_STOP_LOSS), ('acc2', KIND_STOP_LOSS)]
+    assert index.crossed('BTC/USDT', 89.0, account_name='acc2') == [('acc2', KIND_STOP_LOSS)]
+    assert index.crossed('ETH/USDT', 1.0) == []
+
+    # 更新会替换旧阈值
+    index.update('acc1', 'BTC/USDT', [(BELOW, 99.0, KIND_STOP_LOSS)])
+    assert index.levels_of('acc1', 'BTC/USDT') == [(BELOW, 99.0, KIND_STOP_LOSS)]
+    assert index.crossed('BTC/USDT', 101.0) == []
+    index.remove('acc1', 'BTC/USDT')
+    index.remove('acc2', 'BTC/USDT')
+    assert len(index) == 0
+    print("✅ 通过")
+
+
+def test_monitor_touches_only_crossed():
+    """价格远离阈值时不做任何处理；越过止损只平对应持仓；保本后索引随之更新"""
+    print("=" * 60)
+    print("测试持仓监控只处理被触发的持仓")
+    print("=" * 60)
+
+    exchange = FakeExchange(prices={'BTC/USDT': 100.0, 'ETH/USDT': 50.0})
+    pm = make_manager(exchange, {
+        ('acc1', 'BTC/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0, 'stop_loss': 96.0,
+                               'move_sl_to_breakeven': True, 'breakeven_trigger_pct': 1.0},
+        ('acc1', 'ETH/USDT'): {'side': 'sell', 'entry_price': 50.0, 'position_size': 1.0, 'stop_loss': 52.0},
+    })
+
+    pm.monitor_positions()
+    assert pm.evaluations == 0 and exchange.closed == []
+
+    # BTC 涨到保本触发价：止损移到成本价附近，保本阈值从索引中移除
+    exchange.prices['BTC/USDT'] = 101.5
+    pm.monitor_positions()
+    info = pm.get_position_info('acc1', 'BTC/USDT')
+    assert info['sl_moved_to_breakeven'] and abs(info['stop_loss'] - 100.1) < 1e-9
+    assert [k for _, _, k in pm.trigger_index.levels_of('acc1', 'BTC/USDT')] == [KIND_STOP_LOSS]
+
+    # ETH 空单涨破止损：只平 ETH
+    exchange.prices['ETH/USDT'] = 52.5
+    pm.monitor_positions()
+    assert exchange.closed == [('acc1', 'ETH/USDT')]
+    assert pm.get_position_info('acc1', 'ETH/USDT') is None
+    assert pm.trigger_index.levels_of('acc1', 'ETH/USDT') == []
+    print(f"触发处理次数: {pm.evaluations}")
+    print("✅ 通过")
+
+
+def test_trailing_level_follows_extreme():
+    """追踪止损阈值为已记录的最高价，新高后上移"""
+    pm = make_manager(FakeExchange(prices={'SOL/USDT': 10.0}), {
+        ('acc1', 'SOL/USDT'): {'side': 'buy', 'entry_price': 10.0, 'position_size': 1.0, 'stop_loss': 9.0,
+                               'trailing_stop_pct': 5.0, 'highest_price': 10.0},
+    })
+    pm.exchange.prices['SOL/USDT'] = 11.0
+    pm.monitor_positions()
+    info = pm.get_position_info('acc1', 'SOL/USDT')
+    assert info['highest_price'] == 11.0 and abs(info['stop_loss'] - 10.45) < 1e-9
+    assert (ABOVE, 11.0, KIND_TRAILING) in pm.trigger_index.levels_of('acc1', 'SOL/USDT')
+    print("✅ 追踪止损阈值通过")
+
+
+def test_monitor_one_price_per_symbol():
+    """同一交易对的多个账户持仓只取一次价格、只查询一次索引，越过阈值的账户分别处理"""
+    print("=" * 60)
+    print("测试按交易对分组监控")
+    print("=" * 60)
+
+    # 同一交易所同一网络的账户共用价格
+    account = type('Account', (), {'exchange_type': 'binance', 'testnet': False})
+    exchange = FakeExchange({name: account() for name in ('acc1', 'acc2', 'acc3')}, prices={'BTC/USDT': 100.0})
+    pm = make_manager(exchange, {
+        (account_name, 'BTC/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0,
+                                     'stop_loss': stop_loss}
+        for account_name, stop_loss in (('acc1', 96.0), ('acc2', 94.0), ('acc3', 97.0))
+    })
+    queries = []
+    crossed = pm.trigger_index.crossed
+    pm.trigger_index.crossed = lambda *args: queries.append(args) or crossed(*args)
+
+    exchange.prices['BTC/USDT'] = 95.5
+    exchange.fetches = 0
+    pm.monitor_positions()
+    assert exchange.fetches == 1 and queries[0] == ('BTC/USDT', 95.5)
+    # 只有越过止损的账户进入处理（各自再按账户确认一次止损）
+    assert len(queries) == 1 + 2
+    assert sorted(exchange.closed) == [('acc1', 'BTC/USDT'), ('acc3', 'BTC/USDT')]
+    assert pm.get_position_info('acc2', 'BTC/USDT') is not None
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_index_queries()
+    test_monitor_touches_only_crossed()
+    test_trailing_level_follows_extreme()
+    test_monitor_one_price_per_symbol()
@@ -0,0 +1,101 @@
+"""
+测试向量化触发价评估
+验证与触发价索引逐条查询的结果一致（NumPy 与逐行比较两种实现），
+以及持仓管理器开启向量化后同一交易所同一交易对只取一次价格
+"""
+
+import sys
+import io
+import random
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from position_record import PositionRecord
+from order_manager import PositionManager
+from conftest import FakeExchange, make_manager
+from trigger_index import TriggerIndex
+from vector_evaluator import VectorEvaluator, HAS_NUMPY
+
+
+class FakeAccount:
+    def __init__(self, exchange_type):
+        self.exchange_type = exchange_type
+        self.testnet = False
+
+
+def _random_book(rng, count):
+    positions = {}
+    for i in range(count):
+        side = rng.choice(('buy', 'sell'))
+        entry = rng.uniform(90, 110)
+        info = {'side': side, 'entry_price': entry, 'position_size': 1.0,
+                'stop_loss': entry * (0.95 if side == 'buy' else 1.05)}
+        if rng.random() < 0.5:
+            info.update(move_sl_to_breakeven=True, breakeven_trigger_pct=1.0)
+        if rng.random() < 0.5:
+            info.update(trailing_stop_pct=2.0, highest_price=entry, lowest_price=entry)
+        positions[f'acc{i}'] = PositionRecord.from_dict(info)
+    return positions
+
+
+def test_matches_trigger_index():
+    """随机持仓与价格下，两种实现的命中结果都与触发价索引一致"""
+    print("=" * 60)
+    print("测试向量化评估与触发价索引一致")
+    print("=" * 60)
+
+    rng = random.Random(7)
+    positions = _random_book(rng, 200)
+    index = TriggerIndex()
+    evaluators = [VectorEvaluator(use_numpy=False)] + ([VectorEvaluator(use_numpy=True)] if HAS_NUMPY else [])
+    for account_name, record in positions.items():
+        levels = PositionManager._trigger_levels(record)
+        index.update(account_name, 'BTC/USDT', levels)
+        for evaluator in evaluators:
+            evaluator.update(account_name, 'BTC/USDT', record.is_long, levels)
+
+    for price in (80.0, 95.0, 100.0, 104.5, 120.0):
+        expected = {}
+        for account_name, kind in index.crossed('BTC/USDT', price):
+            expected.setdefault(account_name, set()).add(kind)
+        for evaluator in evaluators:
+            assert dict(evaluator.evaluate('BTC/USDT', price)) == expected
+
+    for evaluator in evaluators:
+        evaluator.remove('acc0', 'BTC/USDT')
+        assert len(evaluator) == 199
+        assert all(account_name != 'acc0' for account_name, _ in evaluator.evaluate('BTC/USDT', 1e9))
+        assert evaluator.evaluate('ETH/USDT', 100.0) == []
+    print(f"NumPy: {'已安装' if HAS_NUMPY else '未安装（逐行比较）'}")
+    print("✅ 通过")
+
+
+def test_one_price_per_group():
+    """同一交易所的账户共用一次取价，只有越过触发价的持仓被处理"""
+    print("=" * 60)
+    print("测试向量化监控按价格来源分组取价")
+    print("=" * 60)
+
+    accounts = {f'bn{i}': FakeAccount('binance') for i in range(30)}
+    accounts['bg0'] = FakeAccount('bitget')
+    exchange = FakeExchange(accounts, prices={'BTC/USDT': 100.0})
+    # bn0 的止损价高于现价，应被程序化止损平仓
+    pm = make_manager(exchange, {
+        (account_name, 'BTC/USDT'): {'side': 'buy', 'entry_price': 100.0, 'position_size': 1.0,
+                                     'stop_loss': 101.0 if account_name == 'bn0' else 90.0}
+        for account_name in accounts
+    }, vectorized=True)
+    exchange.fetches = 0
+
+    pm.monitor_positions()
+    print(f"取价次数: {exchange.fetches}, 处理次数: {pm.evaluations}")
+    assert exchange.fetches == 2
+    assert pm.evaluations == 1 and exchange.closed == [('bn0', 'BTC/USDT')]
+    assert pm.get_position_info('bn0', 'BTC/USDT') is None
+    assert len(pm.vector_evaluator) == 30
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_matches_trigger_index()
+    test_one_price_per_group()
@@ -1,15 +1,22 @@
 import asyncio
+import copy
 import logging
+import time
+from collections import Counter, deque
 from datetime import datetime
 from typing import Optional
-from config import Config
 from retry_utils import log_struct
 
 from signal_parser import SignalType
+from symbol_index import tradable_symbols
 from smart_order_manager import smart_order_manager
 from database import trading_db
 import order_manager
+import market_data_bus
+from position_state import PositionState
+from position_record import PositionRecord
 from risk_manager import risk_manager
+from signal_guard import evaluate_signal, ACTION_PROCEED, ACTION_SKIP, ACTION_LIMIT, ACTION_SHRINK
 
 logger = logging.getLogger(__name__)
 
@@ -17,299 +24,98 @@ logger = logging.getLogger(__name__)
 class TradeExecutor:
     def __init__(self, multi_exchange):
         self.multi_exchange = multi_exchange
+        self._background_tasks = set()  # 后台记账任务（保留引用防止被回收）
+        self.unprotected_ms = deque(maxlen=500)  # 每笔入场的无保护时长（毫秒）
+        self.guard_stats = Counter()  # 过期信号保护的处理次数（按动作）
+        # ccxt 同步客户端不是线程安全的：同一账户的保护单请求按账户锁串行
 
-    async def execute(self, signal):
+    async def execute(self, signal, paper_only=False):
+        """执行信号（paper_only=True 时只在模拟盘账户执行）"""
         if len(self.multi_exchange.clients) > 0:
-            await self._execute_multi_exchange(signal)
+            await self._execute_multi_exchange(signal, paper_only=paper_only)
         else:
-            logger.info("单交易所执行器抽象将在下一步对接，当前仅走多交易所路径")
+            logger.warning("⚠ 没有已连接的交易所账户，信号未执行")
 
     async def execute_single(self, signal, exchange_client):
-        """单交易所执行路径。account_name 固定为 'single'。"""
-        try:
-            try:
-                log_struct(logger, logging.INFO, 'exec_start', mode='single', symbol=getattr(signal, 'symbol', None), signal_type=str(getattr(signal, 'signal_type', None)), leverage=getattr(signal, 'leverage', None))
-            except Exception:
-                pass
-            order_plan = smart_order_manager.create_order_plan(signal)
-            logger.info(f"\n{smart_order_manager.format_plan_summary(order_plan)}\n")
-
-            # 获取入场价
-            entry_price = signal.entry_price
-            if not entry_price:
-                entry_price = exchange_client.get_current_price(signal.symbol)
-                if not entry_price:
-                    logger.error("无法获取当前价格")
-                    return
-
-            # CLOSE 处理
-            if signal.signal_type == SignalType.CLOSE:
-                tp_price = None
-                if signal.take_profit:
-                    tp_price = signal.take_profit[0]
-                if tp_price:
-                    pos = exchange_client.get_position(signal.symbol)
-                    if not pos:
-                        logger.info("  ⚠ 无持仓可平")
-                        return
-                    msg = (signal.raw_message or "")
-                    if ("第一" in msg) or ("第1" in msg):
-                        portion = 0.5
-                    elif "第二" in msg:
-                        portion = 0.3
-                    else:
-                        logger.info("  ⏭ 已有自动分批策略，忽略非‘第一/第二’的止盈提示")
-                        return
-                    amount_to_close = float(pos['contracts']) * portion
-                    side = 'buy' if pos['side'] == 'short' else 'sell'
-                    tp_order = exchange_client.place_take_profit_order(
-                        signal.symbol, side, amount_to_close, tp_price
-                    )
-                    if tp_order:
-                        logger.info(f"  ✓ 已挂出分批止盈: {tp_price}，数量: {amount_to_close:.6f}")
-                        try:
-                            trading_db.record_order(None, 'single', signal.symbol, 'take_profit', side,
-                                                    price=tp_price, amount=amount_to_close,
-                                                    status=(tp_order.get('status') if isinstance(tp_order, dict) else 'placed'),
-                                                    order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None))
-                        except Exception:
-                            pass
-                    else:
-                        logger.warning("  ⚠ 分批止盈下单失败，已忽略（不全平）")
-                    return
-                else:
-                    pre = None
-                    try:
-                        pre = exchange_client.get_position(signal.symbol)
-                    except Exception:
-                        pre = None
-                    closed = exchange_client.close_position(signal.symbol)
-                    logger.info("  ✓ 已平仓" if closed else "  ⚠ 无持仓可平")
-                    if closed and pre and risk_manager:
-                        try:
-                            entry_p = float(pre.get('entry_price') or 0.0)
-                            side_p = str(pre.get('side') or '')
-                            cur_p = exchange_client.get_current_price(signal.symbol) or entry_p
-                            lev = int(signal.leverage or 1)
-                            contracts = float(pre.get('contracts') or 0.0)
-                            pnl = 0.0
-                            if entry_p and contracts:
-                                if side_p == 'long':
-                                    pnl = (cur_p - entry_p) * contracts * lev
-                                elif side_p == 'short':
-                                    pnl = (entry_p - cur_p) * contracts * lev
-                            risk_manager.record_trade('single', pnl, closed=True)
-                        except Exception:
-                            pass
-                    if closed:
-                        try:
-                            ti = None
-                            if order_manager.position_manager:
-                                info = order_manager.position_manager.get_position_info('single', signal.symbol)
-                                if info:
-                                    ti = info.get('trade_id')
-                            if ti:
-                                ep = exchange_client.get_current_price(signal.symbol)
-                                if ep:
-                                    trading_db.close_trade(ti, float(ep))
-                        except Exception:
-                            pass
-                    return
-
-            # 计算仓位
-            position_size = exchange_client.calculate_position_size(
-                signal.symbol,
-                entry_price,
-                Config.RISK_PERCENTAGE,
-            )
-            if position_size <= 0:
-                logger.error("仓位大小计算错误")
-                return
-            tv = 0.0
-            try:
-                tv = float(position_size) * float(entry_price)
-            except Exception:
-                tv = 0.0
-            rm = None
-            try:
-                rm = risk_manager
-            except Exception:
-                rm = None
-            if rm:
-                try:
-                    ok, reason = rm.can_open_trade('single', tv)
-                except Exception:
-                    ok, reason = True, ""
-                if not ok:
-                    logger.warning(f"  ⚠ 受风控限制，拒绝开仓: {reason}")
-                    try:
-                        log_struct(logger, logging.WARNING, 'risk_blocked', account='single', symbol=signal.symbol, reason=reason, tv=tv)
-                    except Exception:
-                        pass
-                    try:
-                        trading_db.record_risk_event('single', 'BLOCKED_OPEN', reason, severity='WARN')
-                    except Exception:
-                        pass
-                    return
-
-            # 下单
-            side = 'buy' if signal.signal_type in [SignalType.LONG, SignalType.BUY] else 'sell'
-            order_result = None
-            if signal.entry_price:
-                order_result = exchange_client.place_limit_order(signal.symbol, side, position_size, signal.entry_price)
-            else:
-                order_result = exchange_client.place_market_order(signal.symbol, side, position_size)
-            if not order_result:
-                logger.error("  ✗ 单交易所: 订单执行失败")
-                return
-            logger.info("  ✓ 入场订单已执行")
-            try:
-                log_struct(logger, logging.INFO, 'entry_order_placed', account='single', symbol=signal.symbol, side=side, amount=position_size, price=(order_result.get('price') or entry_price), order_id=(order_result.get('id') if isinstance(order_result, dict) else None))
-            except Exception:
-                pass
-            try:
-                trading_db.record_order(None, 'single', signal.symbol, 'entry', side,
-                                        price=(order_result.get('price') or entry_price), amount=(order_result.get('amount') or position_size),
-                                        status=(order_result.get('status') or 'placed'), order_id=(order_result.get('id') if isinstance(order_result, dict) else None))
-            except Exception:
-                pass
-
-            # 记录 trade
-            sl_price = entry_price * (0.96 if side == 'buy' else 1.04)
-            trade_id = None
-            try:
-                lev = int(signal.leverage or 1)
-                base_price2 = order_result.get('price') or entry_price
-                trade_id = trading_db.record_trade(
-                    'single', signal.symbol, side,
-                    base_price2, position_size, lev,
-                    stop_loss=sl_price,
-                    take_profit=(order_plan['take_profits'] or []),
-                    trailing_stop_pct=order_plan.get('trailing_stop_percent'),
-                    notes='single'
-                )
-                try:
-                    log_struct(logger, logging.INFO, 'trade_recorded', account='single', trade_id=trade_id, symbol=signal.symbol, entry_price=base_price2, size=position_size, leverage=lev)
-                except Exception:
-                    pass
-            except Exception:
-                trade_id = None
-            try:
-                if risk_manager:
-                    risk_manager.record_trade('single', 0.0, closed=False)
-            except Exception:
-                pass
-
-            # 设置止损
-            try:
-                sl_side = 'sell' if side == 'buy' else 'buy'
-                sl_order = exchange_client.place_stop_loss_order(
-                    signal.symbol, sl_side, position_size, sl_price
-                )
-                if sl_order:
-                    logger.info(f"  ✓ 已设置初始止损(-4%): {sl_price}")
-                    try:
-                        log_struct(logger, logging.INFO, 'sl_placed', account='single', symbol=signal.symbol, side=sl_side, amount=position_size, stop_price=sl_price)
-                    except Exception:
-                        pass
-                    try:
-                        trading_db.record_order(None, 'single', signal.symbol, 'stop_loss', sl_side,
-                                                price=sl_price, amount=position_size,
-                                                status=(sl_order.get('status') if isinstance(sl_order, dict) else 'placed'),
-                                                order_id=(sl_order.get('id') if isinstance(sl_order, dict) else None))
-                    except Exception:
-                        pass
-                else:
-                    logger.warning("  ⚠ 初始止损设置失败")
-            except Exception as e:
-                logger.warning(f"  ⚠ 初始止损设置失败: {e}")
+        """
+        单交易所（后备模式）执行：ExchangeClient 已把单账户注册到执行引擎，
+        这里只在该账户上走与多交易所完全相同的执行流程
+        """
+        engine = getattr(exchange_client, 'engine', None)
+        account_name = getattr(exchange_client, 'ACCOUNT_NAME', 'single')
+        if engine is None or account_name not in getattr(engine, 'clients', {}):
+            logger.error("单交易所执行失败: 账户未在执行引擎中注册")
+            return
+        # 单账户模式与旧版一致：按信号中的杠杆开仓（多账户按各账户配置的默认杠杆）
+        executor = self if engine is self.multi_exchange else TradeExecutor(engine)
+        await executor._execute_multi_exchange(signal, accounts=[account_name], use_signal_leverage=True)
 
-            # 登记持仓信息（供后台监控自动落库PnL）
-            try:
-                self._register_position_for_trailing('single', signal.symbol, side, entry_price, position_size, order_plan, sl_price, trade_id)
-                try:
-                    log_struct(logger, logging.INFO, 'position_registered', account='single', symbol=signal.symbol, entry_price=entry_price, size=position_size, trade_id=trade_id)
-                except Exception:
-                    pass
-            except Exception:
-                pass
+    def _is_paper(self, account_name):
+        """账户是否为模拟盘"""
+        try:
+            return bool(self.multi_exchange.is_paper(account_name))
+        except Exception:
+            return False
 
-            # 止盈
-            base_price = order_result.get('price') or entry_price
-            if order_plan['take_profits']:
-                tp_side = 'sell' if side == 'buy' else 'buy'
-                for i, (tp_price, tp_portion) in enumerate(zip(order_plan['take_profits'], order_plan['tp_portions']), 1):
-                    try:
-                        tp_size = position_size * (tp_portion / 100.0)
-                        tp_order = exchange_client.place_take_profit_order(
-                            signal.symbol, tp_side, tp_size, tp_price
-                        )
-                        if tp_order:
-                            logger.info(f"  ✓ TP{i} 已设置: {tp_price} ({tp_portion}% 仓位, 数量: {tp_size:.4f})")
-                            try:
-                                log_struct(logger, logging.INFO, 'tp_placed', account='single', symbol=signal.symbol, idx=i, portion=tp_portion, amount=tp_size, price=tp_price)
-                            except Exception:
-                                pass
-                            try:
-                                trading_db.record_order(None, 'single', signal.symbol, 'take_profit', tp_side,
-                                                        price=tp_price, amount=tp_size,
-                                                        status=(tp_order.get('status') if isinstance(tp_order, dict) else 'placed'),
-                                                        order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None))
-                            except Exception:
-                                pass
-                        else:
-                            logger.warning(f"  ⚠ TP{i} 设置失败")
-                    except Exception as e:
-                        logger.warning(f"  ⚠ TP{i} 设置失败: {e}")
-            else:
-                try:
-                    cfg = getattr(smart_order_manager, 'config', None)
-                    add_tps = (cfg.additional_tps if cfg else None) or [
-                        {'profit_percent': 10.0, 'portion_percent': 50.0},
-                        {'profit_percent': 20.0, 'portion_percent': 30.0},
-                        {'profit_percent': 50.0, 'portion_percent': 20.0},
-                    ]
-                    tp_side = 'sell' if side == 'buy' else 'buy'
-                    for i, tp in enumerate(add_tps, 1):
-                        profit_pct = float(tp.get('profit_percent', 0.0)) / 100.0
-                        portion_pct = float(tp.get('portion_percent', 0.0))
-                        tp_amount = position_size * (portion_pct / 100.0)
-                        if tp_amount <= 0 or not base_price:
-                            continue
-                        tp_price = base_price * (1 + profit_pct) if side == 'buy' else base_price * (1 - profit_pct)
-                        tp_order = exchange_client.place_take_profit_order(
-                            signal.symbol, tp_side, tp_amount, tp_price
-                        )
-                        if tp_order:
-                            logger.info(f"  ✓ 回退TP{i} 已设置: {tp_price} ({portion_pct}% 仓位, 数量: {tp_amount:.4f})")
-                            try:
-                                log_struct(logger, logging.INFO, 'tp_fallback_placed', account='single', symbol=signal.symbol, idx=i, portion=portion_pct, amount=tp_amount, price=tp_price)
-                            except Exception:
-                                pass
-                            try:
-                                trading_db.record_order(None, 'single', signal.symbol, 'take_profit', tp_side,
-                                                        price=tp_price, amount=tp_amount,
-                                                        status=(tp_order.get('status') if isinstance(tp_order, dict) else 'placed'),
-                                                        order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None))
-                            except Exception:
-                                pass
-                        else:
-                            logger.warning(f"  ⚠ 回退TP{i} 设置失败")
-                except Exception as e:
-                    logger.warning(f"  ⚠ 回退分批止盈挂单失败: {e}")
-        except Exception as e:
-            logger.error(f"单交易所执行失败: {e}")
+    def _entry_leverage(self, account_name, order_plan):
+        """持仓杠杆：订单计划指定了本次入场杠杆时使用它，否则为账户默认杠杆"""
+        lev = order_plan.get('entry_leverage') if order_plan else None
+        if not lev:
+            lev = getattr(self.multi_exchange.accounts.get(account_name), 'default_leverage', None)
+        return lev or 1
 
-    async def _execute_multi_exchange(self, signal):
+    async def _execute_multi_exchange(self, signal, paper_only=False, accounts=None, use_signal_leverage=False):
         try:
             log_struct(logger, logging.INFO, 'exec_start', mode='multi', symbol=getattr(signal, 'symbol', None), signal_type=str(getattr(signal, 'signal_type', None)), leverage=getattr(signal, 'leverage', None))
         except Exception:
             pass
+        # 只在上架了该币种的账户执行；全部不可交易时不做任何账户请求
+        # 各账户上架的可能是不同别名（PEPE / 1000PEPE），按账户解析
+        account_names = [name for name in (accounts or self.multi_exchange.clients.keys())
+                         if name in self.multi_exchange.clients
+                         and tradable_symbols.resolve_for(name, signal.symbol) is not None]
+        if paper_only:
+            account_names = [name for name in account_names if self._is_paper(name)]
+        if not account_names:
+            logger.warning(f"⚠ {signal.symbol} 在所有已连接交易所均不可交易，跳过")
+            return
+        skipped = len(accounts or self.multi_exchange.clients) - len(account_names)
+        if skipped:
+            logger.info(f"⏭ {skipped} 个账户未上架 {signal.symbol}，已跳过")
+        base_signal = signal
         order_plan = smart_order_manager.create_order_plan(signal)
         logger.info(f"\n{smart_order_manager.format_plan_summary(order_plan)}\n")
-        for account_name in self.multi_exchange.clients.keys():
+        plans = {(signal.symbol, 1.0): order_plan}
+        # 组合层面风控：每个信号只查一次跨账户敞口，分发时按剩余额度逐个账户扣减
+        headroom = None
+        slots = None
+        signal_side = None
+        if risk_manager and signal.signal_type in [SignalType.LONG, SignalType.BUY, SignalType.SHORT, SignalType.SELL]:
+            signal_side = 'buy' if signal.signal_type in [SignalType.LONG, SignalType.BUY] else 'sell'
+            try:
+                ok, reason, headroom = risk_manager.check_signal_exposure(signal.symbol, signal_side)
+                slots = risk_manager.signal_account_slots(signal.symbol, signal_side)
+            except Exception:
+                ok, reason, headroom, slots = True, "", None, None
+            if not ok:
+                logger.warning(f"⚠ 受组合风控限制，信号未分发: {reason}")
+                try:
+                    log_struct(logger, logging.WARNING, 'risk_blocked_signal', symbol=signal.symbol, side=signal_side, reason=reason)
+                except Exception:
+                    pass
+                return
+        for account_name in account_names:
             try:
                 logger.info(f"📍 正在 {account_name} 执行...")
+                # 该账户只上架别名合约时，换成别名币种并换算价格（订单计划按换算后的信号生成）
+                signal, scale = self._account_signal(base_signal, account_name)
+                order_plan = plans.get((signal.symbol, scale))
+                if order_plan is None:
+                    order_plan = plans[(signal.symbol, scale)] = smart_order_manager.create_order_plan(signal)
+                leverage = None
+                if use_signal_leverage and order_plan.get('leverage'):
+                    leverage = int(order_plan['leverage'])
+                    order_plan = dict(order_plan, entry_leverage=leverage)
                 entry_price = signal.entry_price
                 if not entry_price:
                     entry_price = self.multi_exchange.get_current_price(account_name, signal.symbol)
@@ -354,7 +160,8 @@ class TradeExecutor:
                                 trading_db.record_order(None, account_name, signal.symbol, 'take_profit', side,
                                                         price=tp_price, amount=amount_to_close,
                                                         status=(tp_order.get('status') if isinstance(tp_order, dict) else 'placed'),
-                                                        order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None))
+                                                        order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None),
+                                                        is_paper=self._is_paper(account_name))
                             except Exception:
                                 pass
                             if ("第一" in msg) or ("第1" in msg):
@@ -391,7 +198,7 @@ class TradeExecutor:
                                 entry_p = float(pre.get('entry_price') or 0.0)
                                 side_p = str(pre.get('side') or '')
                                 cur_p = self.multi_exchange.get_current_price(account_name, signal.symbol) or entry_p
-                                lev = getattr(self.multi_exchange.accounts.get(account_name, None), 'default_leverage', 1) or 1
+                                lev = self._entry_leverage(account_name, order_plan)
                                 contracts = float(pre.get('contracts') or 0.0)
                                 pnl = 0.0
                                 if entry_p and contracts:
@@ -399,7 +206,8 @@ class TradeExecutor:
                                         pnl = (cur_p - entry_p) * contracts * lev
                                     elif side_p == 'short':
                                         pnl = (entry_p - cur_p) * contracts * lev
-                                risk_manager.record_trade(account_name, pnl, closed=True)
+                                risk_manager.record_trade(account_name, pnl, closed=True,
+                                                          is_paper=self._is_paper(account_name))
                                 try:
                                     log_struct(logger, logging.INFO, 'trade_closed_signal', account=account_name, symbol=signal.symbol, pnl=pnl)
                                 except Exception:
@@ -449,6 +257,13 @@ class TradeExecutor:
                         except Exception:
                             pass
                         continue
+                if headroom is not None and tv > headroom:
+                    logger.warning(f"  ⚠ 组合敞口剩余额度不足 ({headroom:.2f} USDT)，跳过该账户")
+                    continue
+                new_slot = slots is not None and not risk_manager.holds_side(account_name, signal.symbol, signal_side)
+                if new_slot and slots <= 0:
+                    logger.warning(f"  ⚠ {signal.symbol} 同方向持仓账户数已达上限，跳过该账户")
+                    continue
                 logger.info(f"  仓位大小: {position_size}")
                 if signal.signal_type in [SignalType.LONG, SignalType.BUY]:
                     side = 'buy'
@@ -456,176 +271,34 @@ class TradeExecutor:
                     side = 'sell'
                 else:
                     continue
+                # 过期信号保护：只用已缓存（或本来就要取）的价格，不额外请求
+                decision, live_price = self._guard_signal(account_name, signal, side)
+                if decision.action == ACTION_SKIP:
+                    continue
+                if decision.action == ACTION_SHRINK:
+                    position_size *= decision.size_factor
                 sl_price = entry_price * (0.96 if side == 'buy' else 1.04)
+                if leverage:
+                    self.multi_exchange.set_leverage(account_name, signal.symbol, leverage)
+                if decision.action == ACTION_LIMIT:
+                    self._place_limit_entry(account_name, signal.symbol, side, position_size,
+                                            decision.limit_price, sl_price, order_plan)
+                    if headroom is not None:
+                        headroom -= tv
+                    if new_slot:
+                        slots -= 1
+                    continue
                 order_result = self.multi_exchange.place_market_order(
-                    account_name, signal.symbol, side, position_size
+                    account_name, signal.symbol, side, position_size, current_price=live_price,
+                    leverage=leverage
                 )
                 if order_result and order_result.get('status') == 'success':
-                    logger.info("  ✓ 入场订单已执行")
-                    logger.info(f"  订单ID: {order_result.get('order_id')}")
-                    try:
-                        log_struct(logger, logging.INFO, 'entry_order_placed', account=account_name, symbol=signal.symbol, side=side, amount=position_size, price=(order_result.get('price') or entry_price), order_id=(order_result.get('order_id') if isinstance(order_result, dict) else None))
-                    except Exception:
-                        pass
-                    try:
-                        trading_db.record_order(None, account_name, signal.symbol, 'entry', side,
-                                                price=(order_result.get('price')), amount=(order_result.get('amount')),
-                                                status=order_result.get('status'), order_id=order_result.get('order_id'))
-                    except Exception:
-                        pass
-                    trade_id = None
-                    try:
-                        acct = self.multi_exchange.accounts.get(account_name)
-                        lev = getattr(acct, 'default_leverage', None) or 1
-                        base_price2 = order_result.get('price') or entry_price
-                        trade_id = trading_db.record_trade(
-                            account_name, signal.symbol, side,
-                            base_price2, position_size, lev,
-                            stop_loss=sl_price,
-                            take_profit=(order_plan['take_profits'] or []),
-                            trailing_stop_pct=order_plan.get('trailing_stop_percent'),
-                            notes='multi'
-                        )
-                        try:
-                            log_struct(logger, logging.INFO, 'trade_recorded', account=account_name, trade_id=trade_id, symbol=signal.symbol, entry_price=base_price2, size=position_size, leverage=lev)
-                        except Exception:
-                            pass
-                    except Exception:
-                        trade_id = None
-                    try:
-                        if risk_manager:
-                            risk_manager.record_trade(account_name, 0.0, closed=False)
-                    except Exception:
-                        pass
-                    try:
-                        sl_side = 'sell' if side == 'buy' else 'buy'
-                        sl_order = self.multi_exchange.place_stop_loss_order(
-                            account_name, signal.symbol, sl_side, position_size, sl_price
-                        )
-                        if sl_order:
-                            if isinstance(sl_order, dict) and sl_order.get('program_sl'):
-                                logger.info(f"  ✓ 程序化止损已启用 (止损价: {sl_price})")
-                                logger.info("  📊 程序将监控价格并在达到止损价时自动平仓")
-                                try:
-                                    log_struct(logger, logging.INFO, 'sl_program_mode', account=account_name, symbol=signal.symbol, side=sl_side, amount=position_size, stop_price=sl_price)
-                                except Exception:
-                                    pass
-                            elif isinstance(sl_order, dict) and sl_order.get('status') == 'manual_required':
-                                logger.info(f"  ✓ Bitget TPSL不可用，已启用手动止损模式 (止损价: {sl_price})")
-                                logger.info("  📝 请通过发送 '止损：价格' 信号来手动设置止损")
-                                try:
-                                    log_struct(logger, logging.INFO, 'sl_manual_mode', account=account_name, symbol=signal.symbol, side=sl_side, amount=position_size, stop_price=sl_price)
-                                except Exception:
-                                    pass
-                            else:
-                                logger.info(f"  ✓ 已设置初始止损(-4%): {sl_price}")
-                                try:
-                                    log_struct(logger, logging.INFO, 'sl_placed', account=account_name, symbol=signal.symbol, side=sl_side, amount=position_size, stop_price=sl_price)
-                                except Exception:
-                                    pass
-                            try:
-                                trading_db.record_order(None, account_name, signal.symbol, 'stop_loss', sl_side,
-                                                        price=sl_price, amount=position_size,
-                                                        status=(sl_order.get('status') if isinstance(sl_order, dict) else 'placed'),
-                                                        order_id=(sl_order.get('id') if isinstance(sl_order, dict) else None))
-                            except Exception:
-                                pass
-                        else:
-                            logger.warning("  ⚠ 初始止损设置失败")
-                    except Exception as e:
-                        logger.warning(f"  ⚠ 初始止损设置失败: {e}")
-                    base_price = order_result.get('price') or entry_price
-                    try:
-                        self._register_position_for_trailing(account_name, signal.symbol, side, base_price, position_size, order_plan, sl_price, trade_id)
-                        try:
-                            log_struct(logger, logging.INFO, 'position_registered', account=account_name, symbol=signal.symbol, entry_price=base_price, size=position_size, trade_id=trade_id)
-                        except Exception:
-                            pass
-                    except Exception:
-                        pass
-                    if order_plan['take_profits']:
-                        tp_side = 'sell' if side == 'buy' else 'buy'
-                        first_tp_order_id = None
-                        for i, (tp_price, tp_portion) in enumerate(zip(order_plan['take_profits'], order_plan['tp_portions']), 1):
-                            try:
-                                tp_size = position_size * (tp_portion / 100.0)
-                                tp_order = self.multi_exchange.place_take_profit_order(
-                                    account_name, signal.symbol, tp_side,
-                                    tp_size, tp_price
-                                )
-                                if tp_order:
-                                    logger.info(f"  ✓ TP{i} 已设置: {tp_price} ({tp_portion}% 仓位, 数量: {tp_size:.4f})")
-                                    try:
-                                        log_struct(logger, logging.INFO, 'tp_placed', account=account_name, symbol=signal.symbol, idx=i, portion=tp_portion, amount=tp_size, price=tp_price)
-                                    except Exception:
-                                        pass
-                                    if i == 1:
-                                        first_tp_order_id = tp_order.get('order_id') if isinstance(tp_order, dict) else None
-                                        try:
-                                            log_struct(logger, logging.INFO, 'tp1_order_id', account=account_name, symbol=signal.symbol, order_id=first_tp_order_id)
-                                        except Exception:
-                                            pass
-                                else:
-                                    logger.warning(f"  ⚠ TP{i} 设置失败")
-                            except Exception as e:
-                                logger.warning(f"  ⚠ TP{i} 设置失败: {e}")
-                        if first_tp_order_id:
-                            pos_side = 'long' if side == 'buy' else 'short'
-                            try:
-                                asyncio.create_task(
-                                    self._monitor_tp1_and_move_sl(account_name, signal.symbol, pos_side, first_tp_order_id)
-                                )
-                            except Exception:
-                                pass
-                    else:
-                        try:
-                            cfg = getattr(smart_order_manager, 'config', None)
-                            add_tps = (cfg.additional_tps if cfg else None) or [
-                                {'profit_percent': 10.0, 'portion_percent': 50.0},
-                                {'profit_percent': 20.0, 'portion_percent': 30.0},
-                                {'profit_percent': 50.0, 'portion_percent': 20.0},
-                            ]
-                            tp_side = 'sell' if side == 'buy' else 'buy'
-                            first_tp_order_id = None
-                            placed_total = 0.0
-                            for i, tp in enumerate(add_tps, 1):
-                                profit_pct = float(tp.get('profit_percent', 0.0)) / 100.0
-                                portion_pct = float(tp.get('portion_percent', 0.0))
-                                tp_amount = position_size * (portion_pct / 100.0)
-                                if tp_amount <= 0 or not base_price:
-                                    continue
-                                tp_price = base_price * (1 + profit_pct) if side == 'buy' else base_price * (1 - profit_pct)
-                                tp_order = self.multi_exchange.place_take_profit_order(
-                                    account_name, signal.symbol, tp_side, tp_amount, tp_price
-                                )
-                                if tp_order:
-                                    placed_total += tp_amount
-                                    logger.info(f"  ✓ 回退TP{i} 已设置: {tp_price} ({portion_pct}% 仓位, 数量: {tp_amount:.4f})")
-                                    try:
-                                        log_struct(logger, logging.INFO, 'tp_fallback_placed', account=account_name, symbol=signal.symbol, idx=i, portion=portion_pct, amount=tp_amount, price=tp_price)
-                                    except Exception:
-                                        pass
-                                    if i == 1:
-                                        first_tp_order_id = tp_order.get('order_id') if isinstance(tp_order, dict) else None
-                                    try:
-                                        trading_db.record_order(None, account_name, signal.symbol, 'take_profit', tp_side,
-                                                                price=tp_price, amount=tp_amount,
-                                                                status=(tp_order.get('status') if isinstance(tp_order, dict) else 'placed'),
-                                                                order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None))
-                                    except Exception:
-                                        pass
-                                else:
-                                    logger.warning(f"  ⚠ 回退TP{i} 设置失败")
-                            if first_tp_order_id:
-                                pos_side = 'long' if side == 'buy' else 'short'
-                                try:
-                                    asyncio.create_task(
-                                        self._monitor_tp1_and_move_sl(account_name, signal.symbol, pos_side, first_tp_order_id)
-                                    )
-                                except Exception:
-                                    pass
-                        except Exception as e:
-                            logger.warning(f"  ⚠ 回退分批止盈挂单失败: {e}")
+                    if headroom is not None:
+                        headroom -= tv
+                    if new_slot:
+                        slots -= 1
+                    await self._protect_entry(account_name, signal.symbol, side, position_size, entry_price,
+                                              sl_price, order_plan, order_result)
                 else:
                     logger.error(f"  ✗ {account_name}: 订单执行失败")
                     continue
@@ -634,34 +307,425 @@ class TradeExecutor:
                 continue
         logger.info("✅ 多交易所信号执行完成")
 
+    @staticmethod
+    def _account_signal(signal, account_name):
+        """按账户的可交易列表解析别名，返回 (该账户使用的信号, 相对原信号的价格换算系数)"""
+        resolved = tradable_symbols.resolve_for(account_name, signal.symbol)
+        if resolved is None or (resolved[0] == signal.symbol and resolved[1] == 1.0):
+            return signal, 1.0
+        symbol, scale = resolved
+        logger.info(f"  {account_name} 币种别名: {signal.symbol} -> {symbol}"
+                    + (f"（价格 ×{scale:g}）" if scale != 1.0 else ""))
+        return copy.copy(signal).apply_alias(symbol, scale), scale
+
+    async def _protect_entry(self, account_name, symbol, side, position_size, entry_price, sl_price,
+                             order_plan, order_result):
+        """入场成交后：登记持仓、挂出止损/止盈、启动 TP1 监控并在后台记账"""
+        entry_ack = time.monotonic()
+        logger.info("  ✓ 入场订单已执行")
+        logger.info(f"  订单ID: {order_result.get('order_id')}")
+        base_price = order_result.get('price') or entry_price
+        # 先登记持仓（内存操作，程序化止损/移动止损立即生效），trade_id 由后台记账补上
+        try:
+            self._register_position_for_trailing(account_name, symbol, side, base_price, position_size, order_plan, sl_price, None)
+        except Exception:
+            pass
+        # 保护阶段：止损先提交，各止盈腿紧随其后并发提交
+        tp_legs = self._build_tp_legs(order_plan, side, base_price, position_size)
+        protection = await self._place_protection(
+            account_name, symbol, side, position_size, sl_price, tp_legs, entry_ack
+        )
+        # 交易所侧止损单号（程序化止损为 None），追踪止损改单时使用
+        sl_order = protection['sl_order']
+        sl_order_id = None
+        if isinstance(sl_order, dict) and sl_order.get('status') == 'success' and not sl_order.get('program_sl'):
+            sl_order_id = sl_order.get('order_id')
+        first_tp_order_id = None
+        for i, tp_price, tp_amount, tp_portion, fallback, tp_order in protection['tp_orders']:
+            if tp_order and i == 1:
+                first_tp_order_id = tp_order.get('order_id') if isinstance(tp_order, dict) else None
+        self._transition_position(
+            account_name, symbol,
+            PositionState.PROTECTED if protection['sl_order'] else None,
+            time_unprotected_ms=protection['unprotected_ms'], tp1_order_id=first_tp_order_id,
+            sl_order_id=sl_order_id, sl_amended_price=sl_price
+        )
+        # 追踪止损尽量交给交易所原生追踪单（不支持时继续由程序追踪）
+        pm = order_manager.position_manager
+        if pm is not None and order_plan.get('trailing_stop') and order_plan.get('trailing_native'):
+            self._spawn_background(pm.hand_over_trailing, account_name, symbol)
+        if first_tp_order_id:
+            pos_side = 'long' if side == 'buy' else 'short'
+            try:
+                asyncio.create_task(
+                    self._monitor_tp1_and_move_sl(account_name, symbol, pos_side, first_tp_order_id)
+                )
+            except Exception:
+                pass
+        # 记账阶段（数据库/风控/结构化日志）放到后台，不阻塞下一个账户
+        task = asyncio.create_task(self._entry_bookkeeping(
+            account_name, symbol, side, position_size, base_price, sl_price,
+            order_plan, order_result, protection
+        ))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _guard_signal(self, account_name, signal, side):
+        """
+        按账户的延迟预算与滑点上限检查信号，返回 (判断结果, 实时价格)
+
+        价格优先取缓存；缓存缺失且需要检查滑点时取一次价格，并交给市价下单复用（下单本来也要取价格）
+        """
+        acct = self.multi_exchange.accounts.get(account_name)
+        max_age = float(getattr(acct, 'max_signal_age_sec', 0) or 0)
+        max_slip = float(getattr(acct, 'max_slippage_pct', 0) or 0)
+        action = getattr(acct, 'stale_action', ACTION_SKIP) or ACTION_SKIP
+        live_price = None
+        try:
+            live_price = self.multi_exchange.get_cached_price(account_name, signal.symbol)
+            if live_price is None and max_slip and signal.entry_price:
+                live_price = self.multi_exchange.get_current_price(account_name, signal.symbol)
+        except Exception:
+            live_price = None
+        decision = evaluate_signal(side, signal.entry_price, live_price, getattr(signal, 'message_time', None),
+                                   max_age_sec=max_age, max_slippage_pct=max_slip, action=action)
+        self.guard_stats[decision.action] += 1
+        if decision.action != ACTION_PROCEED:
+            labels = {ACTION_SKIP: '跳过', ACTION_LIMIT: f'改为限价单 @ {decision.limit_price}',
+                      ACTION_SHRINK: f'仓位缩小至 {decision.size_factor:.0%}'}
+            logger.warning(f"  ⏱ {account_name} {signal.symbol}: {decision.reason}，{labels[decision.action]}")
+        try:
+            log_struct(logger, logging.INFO, 'signal_guard', account=account_name, symbol=signal.symbol,
+                       action=decision.action, age_sec=decision.age_sec, slippage_pct=decision.slippage_pct,
+                       size_factor=decision.size_factor, live_price=live_price, entry_price=signal.entry_price)
+        except Exception:
+            pass
+        return decision, live_price
+
+    def _place_limit_entry(self, account_name, symbol, side, position_size, limit_price, sl_price, order_plan):
+        """过期信号改为入场价限价单，成交后再挂保护单（后台等待，不阻塞其他账户）"""
+        order = self.multi_exchange.place_limit_order(account_name, symbol, side, limit_price, position_size)
+        order_id = order.get('id') if isinstance(order, dict) else None
+        if not order_id:
+            logger.error(f"  ✗ {account_name}: 限价入场单下单失败")
+            return None
+        logger.info(f"  ✓ 限价入场单已挂出: {side} {position_size} @ {limit_price}，订单ID: {order_id}")
+        acct = self.multi_exchange.accounts.get(account_name)
+        timeout = float(getattr(acct, 'limit_entry_timeout_sec', 60) or 60)
+        task = asyncio.create_task(self._await_limit_entry(
+            account_name, symbol, side, position_size, limit_price, sl_price, order_plan, order_id, timeout
+        ))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _await_limit_entry(self, account_name, symbol, side, position_size, limit_price, sl_price,
+                                 order_plan, order_id, timeout, poll_interval=2.0):
+        """等待限价入场单成交；超时撤单，已成交部分照常挂保护单"""
+        try:
+            deadline = asyncio.get_event_loop().time() + timeout
+            status = None
+            # 查单/撤单都是同步 REST 调用，放到线程池执行，避免阻塞事件循环
+            while asyncio.get_event_loop().time() < deadline:
+                status = await asyncio.to_thread(self._order_status, account_name, symbol, order_id)
+                if status and status.get('status') in ('closed', 'canceled'):
+                    break
+                await asyncio.sleep(poll_interval)
+            if not status or status.get('status') not in ('closed', 'canceled'):
+                await asyncio.to_thread(self.multi_exchange.cancel_order, account_name, symbol, order_id)
+                status = await asyncio.to_thread(self._order_status, account_name, symbol, order_id) or status
+            filled = float((status or {}).get('filled') or 0.0)
+            if (status or {}).get('status') == 'closed' and not filled:
+                filled = position_size
+            if filled <= 0:
+                logger.info(f"  ⏭ {account_name} {symbol} 限价入场单未成交，已撤销")
+                return
+            order_result = {'status': 'success', 'order_id': order_id, 'price': limit_price, 'amount': filled}
+            await self._protect_entry(account_name, symbol, side, filled, limit_price, sl_price, order_plan, order_result)
+        except Exception as e:
+            logger.error(f"✗ {account_name} 限价入场单跟踪失败: {e}")
+
+    def _build_tp_legs(self, order_plan, side, base_price, position_size):
+        """
+        止盈腿列表：[(序号, 价格, 数量, 仓位%, 是否回退TP)]
+        信号未给止盈时按配置的 additional_tps 以入场价生成回退止盈
+        """
+        legs = []
+        if order_plan.get('take_profits'):
+            for i, (tp_price, tp_portion) in enumerate(zip(order_plan['take_profits'], order_plan['tp_portions']), 1):
+                legs.append((i, tp_price, position_size * (tp_portion / 100.0), tp_portion, False))
+            return legs
+        cfg = getattr(smart_order_manager, 'config', None)
+        add_tps = (cfg.additional_tps if cfg else None) or [
+            {'profit_percent': 10.0, 'portion_percent': 50.0},
+            {'profit_percent': 20.0, 'portion_percent': 30.0},
+            {'profit_percent': 50.0, 'portion_percent': 20.0},
+        ]
+        for i, tp in enumerate(add_tps, 1):
+            try:
+                profit_pct = float(tp.get('profit_percent', 0.0)) / 100.0
+                portion_pct = float(tp.get('portion_percent', 0.0))
+            except Exception:
+                continue
+            tp_amount = position_size * (portion_pct / 100.0)
+            if tp_amount <= 0 or not base_price:
+                continue
+            tp_price = base_price * (1 + profit_pct) if side == 'buy' else base_price * (1 - profit_pct)
+            legs.append((i, tp_price, tp_amount, portion_pct, True))
+        return legs
+
+    async def _place_protection(self, account_name, symbol, side, position_size, sl_price, tp_legs, entry_ack):
+        """
+        入场成交后的保护阶段：止损请求最先提交，确认后各止盈腿并发提交（每条腿一个线程池请求），
+        无保护时长只包含一次止损往返，止盈挂单总耗时约为最慢的一条腿
+
+        Returns:
+            {'sl_order', 'tp_orders': [(序号, 价格, 数量, 仓位%, 是否回退TP, 订单)], 'unprotected_ms'}
+            unprotected_ms 为入场确认到止损确认的耗时（止损失败为 None）
+        """
+        close_side = 'sell' if side == 'buy' else 'buy'
+
+        def _call(func, *args):
+            try:
+                return func(*args)
+            except Exception as e:
+                return e
+
+        sl_order = await asyncio.to_thread(_call, self.multi_exchange.place_stop_loss_order,
+                                           account_name, symbol, close_side, position_size, sl_price)
+        sl_acked_at = time.monotonic()
+        tp_results = await asyncio.gather(*[
+            asyncio.to_thread(_call, self.multi_exchange.place_take_profit_order,
+                              account_name, symbol, close_side, tp_amount, tp_price)
+            for _, tp_price, tp_amount, _, _ in tp_legs
+        ])
+
+        unprotected_ms = None
+        if isinstance(sl_order, Exception):
+            logger.warning(f"  ⚠ 初始止损设置失败: {sl_order}")
+            sl_order = None
+        elif not sl_order:
+            logger.warning("  ⚠ 初始止损设置失败")
+        else:
+            unprotected_ms = (sl_acked_at - entry_ack) * 1000.0
+            if isinstance(sl_order, dict) and sl_order.get('program_sl'):
+                logger.info(f"  ✓ 程序化止损已启用 (止损价: {sl_price})")
+                logger.info("  📊 程序将监控价格并在达到止损价时自动平仓")
+            elif isinstance(sl_order, dict) and sl_order.get('status') == 'manual_required':
+                logger.info(f"  ✓ Bitget TPSL不可用，已启用手动止损模式 (止损价: {sl_price})")
+                logger.info("  📝 请通过发送 '止损：价格' 信号来手动设置止损")
+            else:
+                logger.info(f"  ✓ 已设置初始止损(-4%): {sl_price}")
+            logger.info(f"  ⏱ 无保护时长: {unprotected_ms:.0f} ms")
+            self.unprotected_ms.append(unprotected_ms)
+
+        tp_orders = []
+        for (i, tp_price, tp_amount, tp_portion, fallback), tp_order in zip(tp_legs, tp_results):
+            label = '回退TP' if fallback else 'TP'
+            if isinstance(tp_order, Exception):
+                logger.warning(f"  ⚠ {label}{i} 设置失败: {tp_order}")
+                tp_order = None
+            elif tp_order:
+                logger.info(f"  ✓ {label}{i} 已设置: {tp_price} ({tp_portion}% 仓位, 数量: {tp_amount:.4f})")
+            else:
+                logger.warning(f"  ⚠ {label}{i} 设置失败")
+            tp_orders.append((i, tp_price, tp_amount, tp_portion, fallback, tp_order))
+        return {'sl_order': sl_order, 'tp_orders': tp_orders, 'unprotected_ms': unprotected_ms}
+
+    def _spawn_background(self, func, *args):
+        """在线程池中后台执行同步任务（保留引用直到完成，异常只记录不抛出）"""
+        async def _run():
+            try:
+                await asyncio.to_thread(func, *args)
+            except Exception as e:
+                logger.warning(f"后台任务 {getattr(func, '__name__', func)} 失败: {e}")
+        task = asyncio.create_task(_run())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _entry_bookkeeping(self, account_name, symbol, side, position_size, base_price, sl_price,
+                                 order_plan, order_result, protection):
+        """入场后的记账：数据库写入在线程池执行，持仓 trade_id 与风控计数回到事件循环更新"""
+        try:
+            trade_id = await asyncio.to_thread(
+                self._record_entry_bookkeeping, account_name, symbol, side, position_size,
+                base_price, sl_price, order_plan, order_result, protection
+            )
+        except Exception as e:
+            logger.warning(f"后台记账失败 {account_name} {symbol}: {e}")
+            trade_id = None
+        # 补上持仓登记时缺少的 trade_id
+        if trade_id:
+            self._transition_position(account_name, symbol, None, trade_id=trade_id)
+        try:
+            if risk_manager:
+                risk_manager.record_trade(account_name, 0.0, closed=False, is_paper=self._is_paper(account_name))
+        except Exception:
+            pass
+
+    def _record_entry_bookkeeping(self, account_name, symbol, side, position_size, base_price, sl_price,
+                                  order_plan, order_result, protection):
+        """
+        入场后的数据库记账与结构化日志（线程池执行，不修改持仓与风控状态）
+
+        Returns:
+            trade_id（记录失败为 None）
+        """
+        is_paper = self._is_paper(account_name)
+        try:
+            log_struct(logger, logging.INFO, 'entry_order_placed', account=account_name, symbol=symbol, side=side, amount=position_size, price=base_price, order_id=order_result.get('order_id'))
+        except Exception:
+            pass
+        try:
+            trading_db.record_order(None, account_name, symbol, 'entry', side,
+                                    price=(order_result.get('price')), amount=(order_result.get('amount')),
+                                    status=order_result.get('status'), order_id=order_result.get('order_id'), is_paper=is_paper)
+        except Exception:
+            pass
+        trade_id = None
+        try:
+            lev = self._entry_leverage(account_name, order_plan)
+            trade_id = trading_db.record_trade(
+                account_name, symbol, side,
+                base_price, position_size, lev,
+                stop_loss=sl_price,
+                take_profit=(order_plan['take_profits'] or []),
+                trailing_stop_pct=order_plan.get('trailing_stop_percent'),
+                notes='paper' if is_paper else 'multi',
+                is_paper=is_paper
+            )
+            try:
+                log_struct(logger, logging.INFO, 'trade_recorded', account=account_name, trade_id=trade_id, symbol=symbol, entry_price=base_price, size=position_size, leverage=lev)
+            except Exception:
+                pass
+        except Exception:
+            trade_id = None
+        try:
+            log_struct(logger, logging.INFO, 'position_registered', account=account_name, symbol=symbol, entry_price=base_price, size=position_size, trade_id=trade_id)
+        except Exception:
+            pass
+
+        close_side = 'sell' if side == 'buy' else 'buy'
+        sl_order = protection.get('sl_order')
+        if sl_order:
+            mode = 'sl_placed'
+            if isinstance(sl_order, dict) and sl_order.get('program_sl'):
+                mode = 'sl_program_mode'
+            elif isinstance(sl_order, dict) and sl_order.get('status') == 'manual_required':
+                mode = 'sl_manual_mode'
+            try:
+                log_struct(logger, logging.INFO, mode, account=account_name, symbol=symbol, side=close_side, amount=position_size, stop_price=sl_price)
+            except Exception:
+                pass
+            try:
+                trading_db.record_order(trade_id, account_name, symbol, 'stop_loss', close_side,
+                                        price=sl_price, amount=position_size,
+                                        status=(sl_order.get('status') if isinstance(sl_order, dict) else 'placed'),
+                                        order_id=(sl_order.get('id') if isinstance(sl_order, dict) else None),
+                                        is_paper=is_paper)
+            except Exception:
+                pass
+        try:
+            log_struct(logger, logging.INFO, 'position_protected', account=account_name, symbol=symbol,
+                       protected=bool(sl_order), unprotected_ms=protection.get('unprotected_ms'))
+        except Exception:
+            pass
+
+        for i, tp_price, tp_amount, tp_portion, fallback, tp_order in protection.get('tp_orders', []):
+            if not tp_order:
+                continue
+            try:
+                log_struct(logger, logging.INFO, 'tp_fallback_placed' if fallback else 'tp_placed', account=account_name, symbol=symbol, idx=i, portion=tp_portion, amount=tp_amount, price=tp_price)
+                if i == 1 and not fallback:
+                    log_struct(logger, logging.INFO, 'tp1_order_id', account=account_name, symbol=symbol, order_id=(tp_order.get('order_id') if isinstance(tp_order, dict) else None))
+            except Exception:
+                pass
+            try:
+                trading_db.record_order(trade_id, account_name, symbol, 'take_profit', close_side,
+                                        price=tp_price, amount=tp_amount,
+                                        status=(tp_order.get('status') if isinstance(tp_order, dict) else 'placed'),
+                                        order_id=(tp_order.get('id') if isinstance(tp_order, dict) else None),
+                                        is_paper=is_paper)
+            except Exception:
+                pass
+        return trade_id
+
+    def _transition_position(self, account_name, symbol, state, **updates):
+        """推进持仓生命周期状态并落库（state 为 None 时只更新字段；持仓未登记时忽略）"""
+        try:
+            pm = order_manager.position_manager
+            if pm is not None:
+                pm.update_position(account_name, symbol, state, **updates)
+        except Exception as e:
+            logger.debug(f"更新持仓状态失败 {account_name} {symbol}: {e}")
+
+    def resume_tp1_watchers(self, restored):
+        """重启后为尚未成交 TP1 的已恢复持仓重新启动 TP1 监控（成交后移动保本止损）"""
+        count = 0
+        for account_name, symbol, info in restored or []:
+            try:
+                order_id = info.get('tp1_order_id')
+                if not order_id or info.get('state') not in (PositionState.ENTRY.value, PositionState.PROTECTED.value):
+                    continue
+                pos_side = 'long' if info.get('side') == 'buy' else 'short'
+                asyncio.create_task(self._monitor_tp1_and_move_sl(account_name, symbol, pos_side, order_id))
+                count += 1
+            except Exception:
+                continue
+        if count:
+            logger.info(f"✓ 已恢复 {count} 个 TP1 监控任务")
+        return count
+
+    def get_protection_stats(self):
+        """入场确认到止损确认的无保护时长统计（最近若干笔，毫秒）"""
+        samples = list(self.unprotected_ms)
+        if not samples:
+            return {'count': 0, 'avg_ms': 0.0, 'max_ms': 0.0}
+        return {'count': len(samples), 'avg_ms': sum(samples) / len(samples), 'max_ms': max(samples)}
+
+    def get_guard_stats(self):
+        """过期信号保护的处理次数（proceed / skip / limit / shrink）"""
+        return dict(self.guard_stats)
+
+    def _order_status(self, account_name, symbol, order_id):
+        """订单状态：行情总线已就绪时经总线读取（状态更新同时推送给订阅者）"""
+        bus = market_data_bus.market_data_bus
+        if bus is not None and bus.exchange is self.multi_exchange:
+            return bus.get_order_status(account_name, symbol, order_id)
+        return self.multi_exchange.fetch_order_status(account_name, symbol, order_id)
+
     def _register_position_for_trailing(self, account_name, symbol, side, entry_price, position_size, order_plan, stop_loss_price, trade_id=None):
         try:
             if order_manager.position_manager is None:
                 return
             lev = None
             try:
-                acct = self.multi_exchange.accounts.get(account_name)
-                lev = getattr(acct, 'default_leverage', None) or None
+                lev = self._entry_leverage(account_name, order_plan)
             except Exception:
                 lev = None
-            info = {
-                'entry_price': entry_price,
-                'position_size': position_size,
-                'side': side,
-                'stop_loss': stop_loss_price,
-                'take_profits': order_plan.get('take_profits'),
-                'tp_portions': order_plan.get('tp_portions'),
-                'trailing_stop_pct': (order_plan.get('trailing_stop_percent') if order_plan.get('trailing_stop') else None),
-                'move_sl_to_breakeven': order_plan.get('move_to_breakeven'),
-                'stop_trailing_after_breakeven': order_plan.get('stop_trailing_after_breakeven'),
-                'breakeven_trigger_pct': order_plan.get('breakeven_trigger_percent'),
-                'highest_price': entry_price if side == 'buy' else None,
-                'lowest_price': entry_price if side == 'sell' else None,
-                'sl_moved_to_breakeven': False,
-                'entry_time': datetime.now(),
-                'trade_id': trade_id,
-                'leverage': lev,
-            }
+            info = PositionRecord(
+                side,
+                entry_price=entry_price,
+                position_size=position_size,
+                stop_loss=stop_loss_price,
+                take_profits=order_plan.get('take_profits'),
+                tp_portions=order_plan.get('tp_portions'),
+                trailing_stop_pct=(order_plan.get('trailing_stop_percent') if order_plan.get('trailing_stop') else None),
+                move_sl_to_breakeven=order_plan.get('move_to_breakeven'),
+                stop_trailing_after_breakeven=order_plan.get('stop_trailing_after_breakeven'),
+                breakeven_trigger_pct=order_plan.get('breakeven_trigger_percent'),
+                trailing_min_step_pct=order_plan.get('trailing_min_step_percent'),
+                trailing_min_step_ticks=order_plan.get('trailing_min_step_ticks'),
+                trailing_min_amend_sec=order_plan.get('trailing_min_amend_interval'),
+                trailing_native=order_plan.get('trailing_native', False),
+                highest_price=entry_price if side == 'buy' else None,
+                lowest_price=entry_price if side == 'sell' else None,
+                sl_moved_to_breakeven=False,
+                entry_time=datetime.now(),
+                trade_id=trade_id,
+                leverage=lev,
+            )
             order_manager.position_manager._save_position_info(account_name, symbol, info)
         except Exception:
             pass
@@ -670,38 +734,41 @@ class TradeExecutor:
         try:
             deadline = asyncio.get_event_loop().time() + 2 * 60 * 60
             status = None
+            # 查单/查仓/下单都是同步 REST 调用，放到线程池执行，避免阻塞事件循环
             while asyncio.get_event_loop().time() < deadline:
-                status = self.multi_exchange.fetch_order_status(account_name, symbol, tp_order_id)
+                status = await asyncio.to_thread(self._order_status, account_name, symbol, tp_order_id)
                 if status and status.get('status') in ('closed', 'canceled'):
                     break
                 await asyncio.sleep(3)
             if not status or status.get('status') != 'closed':
                 logger.info("  ⚠ TP1 未在监控窗口内成交/已取消，跳过保本止损移动")
                 return
-            pos = self.multi_exchange.get_position(account_name, symbol)
+            pos = await asyncio.to_thread(self.multi_exchange.get_position, account_name, symbol)
             if not pos:
+                self._transition_position(account_name, symbol, PositionState.TP1_FILLED)
                 logger.info("  ⚠ TP1 成交后无剩余持仓")
                 return
             entry_price = pos.get('entry_price')
             remaining = float(pos.get('contracts') or 0)
+            # 部分止盈后按剩余数量刷新持仓（同步更新跨账户敞口）
+            updates = {'position_size': remaining} if remaining > 0 else {}
+            self._transition_position(account_name, symbol, PositionState.TP1_FILLED, **updates)
             if not entry_price or remaining <= 0:
                 logger.info("  ⚠ 无法获取保本价或无剩余仓位")
                 return
             # 正确的平仓方向：多仓→卖(sell)止损；空仓→买(buy)止损
             sl_side = 'sell' if pos_side == 'long' else 'buy'
-            sl_order = self.multi_exchange.place_stop_loss_order(
-                account_name, symbol, sl_side, remaining, entry_price
+            sl_order = await asyncio.to_thread(
+                self.multi_exchange.place_stop_loss_order, account_name, symbol, sl_side, remaining, entry_price
             )
             if sl_order:
                 if isinstance(sl_order, dict) and sl_order.get('program_sl'):
                     try:
                         pm = getattr(order_manager, 'position_manager', None)
-                        if pm is not None:
-                            pos_info = pm.get_position_info(account_name, symbol)
-                            if pos_info is not None:
-                                pos_info['stop_loss'] = float(entry_price)
-                                pos_info['sl_moved_to_breakeven'] = True
-                                logger.info(f"  ✓ 程序化保本止损价已同步到监控: {symbol} @ {entry_price}")
+                        if pm is not None and pm.update_position(account_name, symbol, PositionState.BREAKEVEN,
+                                                                 stop_loss=float(entry_price),
+                                                                 sl_moved_to_breakeven=True):
+                            logger.info(f"  ✓ 程序化保本止损价已同步到监控: {symbol} @ {entry_price}")
                     except Exception:
                         pass
                     logger.info(f"  ✓ 程序化保本止损已设置 (保本价: {entry_price})")
@@ -710,6 +777,7 @@ class TradeExecutor:
                     logger.info(f"  ✓ Bitget TPSL不可用，保本止损需要手动设置 (保本价: {entry_price})")
                     logger.info("  📝 请通过发送 '止损：价格' 信号来手动设置保本止损")
                 else:
+                    self._transition_position(account_name, symbol, PositionState.BREAKEVEN)
                     logger.info(f"  ✓ 已将止损移动到保本位: {entry_price}")
             else:
                 logger.warning("  ⚠ 保本止损下单失败")
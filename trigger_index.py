@@ -0,0 +1,106 @@
+"""
+持仓触发价索引
+按交易对维护两张有序表：价格涨到阈值以上触发（above）与跌到阈值以下触发（below），
+条目为 (阈值, 账户, 触发类型)。每次价格更新用二分查找取出已越过阈值的条目，
+只处理这些持仓，单次查询为 O(log n + k)，与持仓总数无关
+"""
+
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ABOVE = 'above'  # 价格 >= 阈值时触发
+BELOW = 'below'  # 价格 <= 阈值时触发
+
+# 触发类型
+KIND_STOP_LOSS = 'sl'            # 程序化止损
+KIND_BREAKEVEN = 'breakeven'     # 保本触发价
+KIND_TRAILING = 'trail'          # 追踪止损的极值价（越过即需要重算止损）
+
+Entry = Tuple[float, str, str]  # (阈值, 账户, 触发类型)
+
+
+class TriggerIndex:
+    """按交易对、方向排序的触发价索引"""
+
+    def __init__(self):
+        self._above: Dict[str, List[Entry]] = {}
+        self._below: Dict[str, List[Entry]] = {}
+        # (account_name, symbol) -> [(方向, 条目)]，用于更新/移除时定位旧条目
+        self._owned: Dict[Tuple[str, str], List[Tuple[str, Entry]]] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, direction: str, symbol: str, create: bool = False) -> Optional[List[Entry]]:
+        tables = self._above if direction == ABOVE else self._below
+        table = tables.get(symbol)
+        if table is None and create:
+            table = tables[symbol] = []
+        return table
+
+    def _discard(self, account_name: str, symbol: str):
+        for direction, entry in self._owned.pop((account_name, symbol), []):
+            table = self._table(direction, symbol)
+            if not table:
+                continue
+            i = bisect.bisect_left(table, entry)
+            if i < len(table) and table[i] == entry:
+                del table[i]
+            if not table:
+                (self._above if direction == ABOVE else self._below).pop(symbol, None)
+
+    def update(self, account_name: str, symbol: str, levels: Iterable[Tuple[str, float, str]]):
+        """
+        替换某个持仓的全部触发价
+
+        Args:
+            levels: [(方向 ABOVE/BELOW, 阈值, 触发类型)]
+        """
+        with self._lock:
+            self._discard(account_name, symbol)
+            owned = []
+            for direction, level, kind in levels:
+                if level is None:
+                    continue
+                entry = (float(level), account_name, kind)
+                bisect.insort(self._table(direction, symbol, create=True), entry)
+                owned.append((direction, entry))
+            if owned:
+                self._owned[(account_name, symbol)] = owned
+
+    def remove(self, account_name: str, symbol: str):
+        """移除某个持仓的全部触发价"""
+        with self._lock:
+            self._discard(account_name, symbol)
+
+    def crossed(self, symbol: str, price: float, account_name: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        当前价格已越过阈值的条目：[(account_name, 触发类型)]
+
+        Args:
+            account_name: 只返回该账户的条目（各交易所价格不同，按账户分别查询）
+        """
+        hits: List[Tuple[str, str]] = []
+        with self._lock:
+            above = self._above.get(symbol)
+            if above:
+                # 阈值 <= price 的前缀（单元素元组比同阈值的任何条目都小）
+                for level, acct, kind in above[:bisect.bisect_left(above, (math.nextafter(price, math.inf),))]:
+                    if account_name is None or acct == account_name:
+                        hits.append((acct, kind))
+            below = self._below.get(symbol)
+            if below:
+                # 阈值 >= price 的后缀
+                for level, acct, kind in below[bisect.bisect_left(below, (price,)):]:
+                    if account_name is None or acct == account_name:
+                        hits.append((acct, kind))
+        return hits
+
+    def levels_of(self, account_name: str, symbol: str) -> List[Tuple[str, float, str]]:
+        """某个持仓当前登记的触发价"""
+        with self._lock:
+            return [(d, e[0], e[2]) for d, e in self._owned.get((account_name, symbol), [])]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(t) for t in self._above.values()) + sum(len(t) for t in self._below.values())
@@ -0,0 +1,187 @@
+"""
+向量化触发价评估
+多个子账户跟同一信号时，同一交易对会在几十个账户中持有。这里按交易对把持仓的
+方向、止损价、保本触发价、追踪止损极值价存成列，一个价格到来时一次性比较整列，
+只返回需要处理的行。安装了 NumPy 时用数组运算，否则退回逐行比较（结果一致）
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖
+    np = None
+
+from trigger_index import KIND_STOP_LOSS, KIND_BREAKEVEN, KIND_TRAILING
+
+HAS_NUMPY = np is not None
+
+NAN = float('nan')
+
+
+class _SymbolBook:
+    """单个交易对的持仓列（行与账户一一对应）"""
+
+    __slots__ = ('accounts', 'rows', 'is_long', 'stop', 'breakeven', 'trail', 'arrays')
+
+    def __init__(self):
+        self.accounts: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.is_long: List[bool] = []
+        self.stop: List[float] = []       # 止损价（NaN 为无）
+        self.breakeven: List[float] = []  # 保本触发价（NaN 为未启用/已保本）
+        self.trail: List[float] = []      # 追踪止损极值价（NaN 为未启用）
+        self.arrays = None                # 对应的 NumPy 数组（增删行后置空，评估时重建）
+
+    def set_row(self, account_name: str, is_long: bool, stop: float, breakeven: float, trail: float):
+        row = self.rows.get(account_name)
+        if row is None:
+            self.rows[account_name] = len(self.accounts)
+            self.accounts.append(account_name)
+            self.is_long.append(is_long)
+            self.stop.append(stop)
+            self.breakeven.append(breakeven)
+            self.trail.append(trail)
+            self.arrays = None
+            return
+        self.is_long[row] = is_long
+        self.stop[row] = stop
+        self.breakeven[row] = breakeven
+        self.trail[row] = trail
+        if self.arrays is not None:
+            long_col, stop_col, be_col, trail_col = self.arrays
+            long_col[row], stop_col[row], be_col[row], trail_col[row] = is_long, stop, breakeven, trail
+
+    def remove_row(self, account_name: str) -> bool:
+        row = self.rows.pop(account_name, None)
+        if row is None:
+            return False
+        # 末行移到被删除的位置，保持列紧凑
+        last = len(self.accounts) - 1
+        if row != last:
+            for column in (self.accounts, self.is_long, self.stop, self.breakeven, self.trail):
+                column[row] = column[last]
+            self.rows[self.accounts[row]] = row
+        for column in (self.accounts, self.is_long, self.stop, self.breakeven, self.trail):
+            column.pop()
+        self.arrays = None
+        return True
+
+    def columns(self):
+        if self.arrays is None:
+            self.arrays = (np.array(self.is_long, dtype=bool), np.array(self.stop, dtype=float),
+                           np.array(self.breakeven, dtype=float), np.array(self.trail, dtype=float))
+        return self.arrays
+
+
+class VectorEvaluator:
+    """按交易对分组的列式触发价评估"""
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        """
+        Args:
+            use_numpy: 是否使用 NumPy（默认已安装即使用）
+        """
+        self.use_numpy = HAS_NUMPY if use_numpy is None else (use_numpy and HAS_NUMPY)
+        self._books: Dict[str, _SymbolBook] = {}
+        self._lock = threading.Lock()
+
+    def update(self, account_name: str, symbol: str, is_long: bool, levels: Iterable[Tuple[str, float, str]]):
+        """
+        登记/更新某个持仓的触发价
+
+        Args:
+            levels: PositionManager._trigger_levels 的输出 [(方向, 阈值, 触发类型)]
+        """
+        by_kind = {kind: level for _, level, kind in levels}
+        if not by_kind:
+            # 没有任何触发价的持仓不占行
+            self.remove(account_name, symbol)
+            return
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = _SymbolBook()
+            book.set_row(account_name, bool(is_long),
+                         float(by_kind.get(KIND_STOP_LOSS, NAN)),
+                         float(by_kind.get(KIND_BREAKEVEN, NAN)),
+                         float(by_kind.get(KIND_TRAILING, NAN)))
+
+    def remove(self, account_name: str, symbol: str):
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is not None and book.remove_row(account_name) and not book.accounts:
+                del self._books[symbol]
+
+    def evaluate(self, symbol: str, price: float,
+                 accounts: Optional[Set[str]] = None) -> List[Tuple[str, Set[str]]]:
+        """
+        用一个价格评估该交易对的全部持仓，只返回需要处理的 [(account_name, {触发类型})]
+
+        Args:
+            accounts: 只评估这些账户（价格来源不同的账户分组评估）
+        """
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                return []
+            if self.use_numpy:
+                return self._evaluate_numpy(book, price, accounts)
+            return self._evaluate_python(book, price, accounts)
+
+    @staticmethod
+    def _evaluate_numpy(book: _SymbolBook, price: float, accounts: Optional[Set[str]]):
+        is_long, stop, breakeven, trail = book.columns()
+        # NaN 参与比较恒为 False，未启用的触发自然不命中
+        with np.errstate(invalid='ignore'):
+            sl_hit = np.where(is_long, price <= stop, price >= stop)
+            be_hit = np.where(is_long, price >= breakeven, price <= breakeven)
+            trail_hit = np.where(is_long, price >= trail, price <= trail)
+        hits = []
+        for row in np.flatnonzero(sl_hit | be_hit | trail_hit):
+            account_name = book.accounts[row]
+            if accounts is not None and account_name not in accounts:
+                continue
+            kinds = set()
+            if sl_hit[row]:
+                kinds.add(KIND_STOP_LOSS)
+            if be_hit[row]:
+                kinds.add(KIND_BREAKEVEN)
+            if trail_hit[row]:
+                kinds.add(KIND_TRAILING)
+            hits.append((account_name, kinds))
+        return hits
+
+    @staticmethod
+    def _evaluate_python(book: _SymbolBook, price: float, accounts: Optional[Set[str]]):
+        hits = []
+        for row, account_name in enumerate(book.accounts):
+            if accounts is not None and account_name not in accounts:
+                continue
+            is_long = book.is_long[row]
+            kinds = set()
+            stop, breakeven, trail = book.stop[row], book.breakeven[row], book.trail[row]
+            if not math.isnan(stop) and (price <= stop if is_long else price >= stop):
+                kinds.add(KIND_STOP_LOSS)
+            if not math.isnan(breakeven) and (price >= breakeven if is_long else price <= breakeven):
+                kinds.add(KIND_BREAKEVEN)
+            if not math.isnan(trail) and (price >= trail if is_long else price <= trail):
+                kinds.add(KIND_TRAILING)
+            if kinds:
+                hits.append((account_name, kinds))
+        return hits
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._books)
+
+    def accounts_by_symbol(self) -> Dict[str, List[str]]:
+        """{symbol: [有触发价的账户]} 快照"""
+        with self._lock:
+            return {symbol: list(book.accounts) for symbol, book in self._books.items()}
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(book.accounts) for book in self._books.values())